@@ -0,0 +1,886 @@
+"""asyncio-based server engine.
+
+Serves the same routes as FileShareHandler and DirectoryShareHandler from a
+single event loop instead of one OS thread per connection, using
+loop.sendfile for file bodies. Blocking work runs in worker threads: API
+and page rendering in the loop's default executor, archive streaming (which
+holds its thread for the whole download) in a separate, bounded executor.
+"""
+
+import asyncio
+import http.client
+import io
+import os
+import threading
+import time
+import json
+from concurrent.futures import ThreadPoolExecutor
+from email.utils import formatdate
+from http import HTTPStatus
+from typing import List, Optional, Tuple
+from urllib.parse import urlparse
+
+try:
+    from .security import validate_request_path, validate_directory_path
+    from .directory_handler import (
+        generate_directory_listing_html, stream_directory_as_zip, stream_directory_as_tar,
+        build_stored_zip_layout, stream_files_as_zip
+    )
+    from .http_utils import (
+        RangeNotSatisfiable, RangeResponsePlan, FileResponsePlan, format_http_date, if_none_match_matches,
+        chunk_frame, LAST_CHUNK, make_etag, body_etag, chunks_etag, is_not_modified
+    )
+    from .zipstream import ZIP_COMPRESSION_STORE
+    from .tarstream import zstd_available
+    from .listing_cache import ListingCache
+    from .jsonstream import iter_json_chunks, should_stream_json, is_reencodable
+    from .content_encoding import StaticPayload, negotiate_body, choose_encoding, iter_compressed
+    from .transfer import SENDFILE_SLICE
+    from .server import (
+        FileShareServer,
+        DirectoryShareServer,
+        DownloadProgressTracker,
+        build_api_response,
+        api_file_stat,
+        api_validators,
+        api_head_status,
+        archive_download_format,
+        is_restful_archive_path,
+        TAR_CONTENT_TYPES,
+        POSTED_BODY_LIMITS,
+        SIGNATURE_PATH,
+        BLOCKS_PATH,
+        MAX_BLOCKS_BODY,
+        build_signature_response,
+        parse_blocks_request,
+        RequestBodyError,
+        RETRY_AFTER_SECONDS,
+        json_error_payload,
+        prepare_posted_zip,
+        posted_body_length,
+        zip_compression_for_request
+    )
+except ImportError:
+    from security import validate_request_path, validate_directory_path
+    from directory_handler import (
+        generate_directory_listing_html, stream_directory_as_zip, stream_directory_as_tar,
+        build_stored_zip_layout, stream_files_as_zip
+    )
+    from http_utils import (
+        RangeNotSatisfiable, RangeResponsePlan, FileResponsePlan, format_http_date, if_none_match_matches,
+        chunk_frame, LAST_CHUNK, make_etag, body_etag, chunks_etag, is_not_modified
+    )
+    from zipstream import ZIP_COMPRESSION_STORE
+    from tarstream import zstd_available
+    from listing_cache import ListingCache
+    from jsonstream import iter_json_chunks, should_stream_json, is_reencodable
+    from content_encoding import StaticPayload, negotiate_body, choose_encoding, iter_compressed
+    from transfer import SENDFILE_SLICE
+    from server import (
+        FileShareServer,
+        DirectoryShareServer,
+        DownloadProgressTracker,
+        build_api_response,
+        api_file_stat,
+        api_validators,
+        api_head_status,
+        archive_download_format,
+        is_restful_archive_path,
+        TAR_CONTENT_TYPES,
+        POSTED_BODY_LIMITS,
+        SIGNATURE_PATH,
+        BLOCKS_PATH,
+        MAX_BLOCKS_BODY,
+        build_signature_response,
+        parse_blocks_request,
+        RequestBodyError,
+        RETRY_AFTER_SECONDS,
+        json_error_payload,
+        prepare_posted_zip,
+        posted_body_length,
+        zip_compression_for_request
+    )
+
+# Constants
+MAX_REQUEST_HEAD = 64 * 1024  # Largest accepted request line + headers
+REQUEST_TIMEOUT = 30  # Seconds to wait for a complete request head
+LISTEN_BACKLOG = 1024
+MAX_ARCHIVE_STREAMS = 64  # Zip/tar downloads streamed at once (one thread each); more get 503
+
+
+class AsyncRequest:
+    """Parsed HTTP request head.
+
+    Exposes the same ``headers`` / ``client_address`` attributes as a
+    BaseHTTPRequestHandler so DirectoryShareServer.track_session accepts it.
+    """
+
+    def __init__(self, method: str, path: str, version: str, headers, client_address: Tuple[str, int]):
+        self.method = method
+        self.path = path
+        self.version = version
+        self.headers = headers
+        self.client_address = client_address
+        self.session_id: Optional[str] = None
+        # Request bodies are left on the connection for the route to read
+        self.reader: Optional[asyncio.StreamReader] = None
+
+
+async def read_request(reader: asyncio.StreamReader, client_address) -> Optional[AsyncRequest]:
+    """
+    Read and parse one request head.
+
+    Args:
+        reader: Connection stream reader
+        client_address: (ip, port) of the peer
+
+    Returns:
+        AsyncRequest, or None if the peer closed, timed out or sent garbage
+    """
+    try:
+        head = await asyncio.wait_for(reader.readuntil(b'\r\n\r\n'), REQUEST_TIMEOUT)
+    except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, asyncio.TimeoutError, ConnectionError):
+        return None
+
+    request_line, _, header_block = head.partition(b'\r\n')
+    try:
+        method, path, version = request_line.decode('iso-8859-1').split(' ', 2)
+    except ValueError:
+        return None
+
+    headers = http.client.parse_headers(io.BytesIO(header_block))
+    request = AsyncRequest(method, path, version.strip(), headers, client_address)
+    request.reader = reader
+    return request
+
+
+def format_response_head(status: int, headers: List[Tuple[str, str]]) -> bytes:
+    """
+    Serialise a status line and headers.
+
+    Connections are closed after each response, so ``Connection: close``
+    is always added.
+    """
+    lines = [f"HTTP/1.1 {status} {HTTPStatus(status).phrase}"]
+    lines.append(f"Date: {formatdate(usegmt=True)}")
+    lines.extend(f"{name}: {value}" for name, value in headers)
+    lines.append("Connection: close")
+    return ('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1', 'strict')
+
+
+class _StreamBridge:
+    """File-like object letting blocking code in a worker thread write to an asyncio stream."""
+
+    def __init__(self, writer: asyncio.StreamWriter, loop: asyncio.AbstractEventLoop):
+        self._writer = writer
+        self._loop = loop
+
+    async def _write(self, data: bytes):
+        self._writer.write(data)
+        await self._writer.drain()
+
+    def write(self, data) -> int:
+        if not data:
+            return 0
+        # Block the worker thread until the event loop has drained the data (back-pressure)
+        asyncio.run_coroutine_threadsafe(self._write(bytes(data)), self._loop).result()
+        return len(data)
+
+    def flush(self):
+        pass
+
+
+class AsyncEngineMixin:
+    """Runs an asyncio server in a background thread with the threaded servers' lifecycle."""
+
+    allowed_methods = ('GET', 'HEAD')
+
+    def start(self):
+        """Start the event loop in a background thread."""
+        self._loop = asyncio.new_event_loop()
+        self._started = threading.Event()
+        self._startup_error: Optional[BaseException] = None
+
+        self.server_thread = threading.Thread(target=self._run_loop)
+        self.server_thread.daemon = True
+        self.server_thread.start()
+        self._started.wait()
+        if self._startup_error:
+            raise self._startup_error
+
+        # Schedule auto-shutdown
+        self.shutdown_timer = threading.Timer(self.timeout_minutes * 60, self._shutdown_server)
+        self.shutdown_timer.start()
+
+    def _run_loop(self):
+        """Event loop thread body."""
+        loop = self._loop
+        asyncio.set_event_loop(loop)
+        try:
+            self._async_server = loop.run_until_complete(asyncio.start_server(
+                self._handle_connection,
+                host='0.0.0.0',
+                port=self.port,
+                reuse_address=True,
+                backlog=LISTEN_BACKLOG,
+                limit=MAX_REQUEST_HEAD
+            ))
+        except BaseException as e:
+            self._startup_error = e
+            self._started.set()
+            loop.close()
+            return
+
+        self._started.set()
+        try:
+            loop.run_forever()
+        finally:
+            self._async_server.close()
+            # Cancel in-flight connections first: wait_closed() waits for them on newer Pythons
+            pending = asyncio.all_tasks(loop)
+            for task in pending:
+                task.cancel()
+            loop.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
+            loop.run_until_complete(self._async_server.wait_closed())
+            loop.close()
+
+    def _shutdown_server(self):
+        """Internal shutdown logic."""
+        if self.shutdown_timer:
+            self.shutdown_timer.cancel()
+
+        loop = getattr(self, '_loop', None)
+        if loop and not loop.is_closed():
+            loop.call_soon_threadsafe(loop.stop)
+            if self.server_thread and self.server_thread is not threading.current_thread():
+                self.server_thread.join()
+
+        self.segments.close_all()
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Serve one request on a new connection, then close it."""
+        client_address = writer.get_extra_info('peername') or ('unknown', 0)
+        try:
+            request = await read_request(reader, client_address)
+            if request is None:
+                return
+            if request.method not in self.allowed_methods:
+                await self._send_error(request, writer, 501, "Unsupported method")
+                return
+            await self._route(request, writer)
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except (ConnectionError, OSError, asyncio.CancelledError):
+                pass
+
+    async def _route(self, request: AsyncRequest, writer: asyncio.StreamWriter):
+        """Dispatch a request; implemented by the concrete servers."""
+        raise NotImplementedError
+
+    def _extra_headers(self, request: AsyncRequest) -> List[Tuple[str, str]]:
+        """Headers added to every response (e.g. session cookie)."""
+        return []
+
+    async def _send_bytes(
+        self,
+        request: AsyncRequest,
+        writer: asyncio.StreamWriter,
+        status: int,
+        content_type: str,
+        body: bytes,
+        validators: Optional[List[Tuple[str, str]]] = None
+    ):
+        """Send a complete in-memory response, gzip/brotli-compressed when the client accepts it."""
+        body, encoding, vary = negotiate_body(body, content_type, request.headers.get('Accept-Encoding'))
+        headers = [('Content-Type', content_type)] + list(validators or ())
+        if vary:
+            headers.append(('Vary', 'Accept-Encoding'))
+        if encoding:
+            headers.append(('Content-Encoding', encoding))
+        headers.append(('Content-Length', str(len(body))))
+        headers.extend(self._extra_headers(request))
+        writer.write(format_response_head(status, headers))
+        if request.method != 'HEAD':
+            writer.write(body)
+        await writer.drain()
+
+    async def _send_not_modified(self, request: AsyncRequest, writer: asyncio.StreamWriter,
+                                 validators: List[Tuple[str, str]]):
+        """Send 304 Not Modified with the resource's current validators."""
+        writer.write(format_response_head(304, validators + self._extra_headers(request)))
+        await writer.drain()
+
+    async def _send_static_payload(self, request: AsyncRequest, writer: asyncio.StreamWriter,
+                                   payload: StaticPayload):
+        """Send a prepared payload, or 304 if the client's cached copy (If-None-Match) is current."""
+        body, headers = payload.select(request.headers.get('Accept-Encoding'))
+        headers.extend(self._extra_headers(request))
+        if if_none_match_matches(request.headers.get('If-None-Match'), payload.etags):
+            writer.write(format_response_head(304, headers))
+        else:
+            headers.append(('Content-Length', str(len(body))))
+            writer.write(format_response_head(200, headers))
+            if request.method != 'HEAD':
+                writer.write(body)
+        await writer.drain()
+
+    async def _send_error(self, request: AsyncRequest, writer: asyncio.StreamWriter, status: int, message: str):
+        """Send a plain-text error response."""
+        body = f"{status} {message}\n".encode('utf-8')
+        writer.write(format_response_head(status, [
+            ('Content-Type', 'text/plain; charset=utf-8'),
+            ('Content-Length', str(len(body)))
+        ]))
+        if request.method != 'HEAD':
+            writer.write(body)
+        await writer.drain()
+
+    async def _send_json(self, request: AsyncRequest, writer: asyncio.StreamWriter, status: int, data: dict,
+                         validators: Optional[List[Tuple[str, str]]] = None):
+        """Send a JSON response or 304 Not Modified (large listings are streamed as they are encoded)."""
+        if should_stream_json(data):
+            await self._send_json_stream(request, writer, status, data, validators)
+            return
+        body = json.dumps(data).encode('utf-8')
+        if status == 200:
+            if validators is None:
+                validators = [('ETag', body_etag(body))]
+            if is_not_modified(request.headers, [value for name, value in validators if name == 'ETag']):
+                await self._send_not_modified(request, writer, validators)
+                return
+        await self._send_bytes(request, writer, status, 'application/json', body, validators)
+
+    async def _send_json_head(self, request: AsyncRequest, writer: asyncio.StreamWriter, status: int,
+                              validators: Optional[List[Tuple[str, str]]] = None):
+        """Answer HEAD on a JSON endpoint with status only (see FileTransferMixin._send_json_head)."""
+        headers = [('Content-Type', 'application/json')] + list(validators or ()) + [('Vary', 'Accept-Encoding')]
+        writer.write(format_response_head(status, headers + self._extra_headers(request)))
+        await writer.drain()
+
+    async def _send_json_stream(self, request: AsyncRequest, writer: asyncio.StreamWriter, status: int, data: dict,
+                                validators: Optional[List[Tuple[str, str]]] = None):
+        """Send JSON in JSON_CHUNK_SIZE pieces, chunked for HTTP/1.1 clients and close-delimited otherwise."""
+        if status == 200 and validators is None and is_reencodable(data):
+            # Hashed chunk by chunk: the same ETag as the body encoded in one piece
+            validators = [('ETag', chunks_etag(iter_json_chunks(data)))]
+            if is_not_modified(request.headers, [validators[0][1]]):
+                await self._send_not_modified(request, writer, validators)
+                return
+        chunked = request.version == 'HTTP/1.1'
+        encoding = choose_encoding(request.headers.get('Accept-Encoding'))
+        headers = [('Content-Type', 'application/json')] + list(validators or ()) + [('Vary', 'Accept-Encoding')]
+        if encoding:
+            headers.append(('Content-Encoding', encoding))
+        if chunked:
+            headers.append(('Transfer-Encoding', 'chunked'))
+        headers.extend(self._extra_headers(request))
+        writer.write(format_response_head(status, headers))
+        if request.method == 'HEAD':
+            await writer.drain()
+            return
+
+        chunks = iter_json_chunks(data)
+        if encoding:
+            chunks = iter_compressed(chunks, encoding)
+        for chunk in chunks:
+            writer.write(chunk_frame(chunk) if chunked else chunk)
+            # Waiting for the socket also lets other connections run between chunks
+            await writer.drain()
+        if chunked:
+            writer.write(LAST_CHUNK)
+        await writer.drain()
+
+    async def _send_file(self, request: AsyncRequest, writer: asyncio.StreamWriter, file_path: str, filename: str,
+                         plan=None):
+        """Send a file with Range support (or a precomputed plan, e.g. BlockResponsePlan) using loop.sendfile."""
+        try:
+            from .logger import (
+                format_download_start,
+                format_download_progress,
+                format_download_complete,
+                format_download_interrupted,
+                format_download_error,
+                get_timestamp
+            )
+            from .directory_handler import format_file_size
+        except ImportError:
+            from logger import (
+                format_download_start,
+                format_download_progress,
+                format_download_complete,
+                format_download_interrupted,
+                format_download_error,
+                get_timestamp
+            )
+            from directory_handler import format_file_size
+
+        client_ip = request.client_address[0]
+        if plan is None:
+            try:
+                stat_result = os.stat(file_path)
+            except OSError:
+                await self._send_error(request, writer, 404, "File not found")
+                return
+
+            etag = make_etag(stat_result)
+            if is_not_modified(request.headers, [etag], stat_result.st_mtime):
+                await self._send_not_modified(request, writer, [
+                    ('ETag', etag), ('Last-Modified', format_http_date(stat_result.st_mtime))
+                ])
+                return
+
+            try:
+                plan = FileResponsePlan(request.headers, stat_result, filename)
+            except RangeNotSatisfiable:
+                headers = [('Content-Range', f'bytes */{stat_result.st_size}'), ('Content-Length', '0')]
+                writer.write(format_response_head(416, headers + self._extra_headers(request)))
+                await writer.drain()
+                return
+
+        writer.write(format_response_head(plan.status, plan.headers + self._extra_headers(request)))
+        if request.method == 'HEAD':
+            # Size and validators come from the stat: the file is never opened
+            await writer.drain()
+            return
+
+        tracker = DownloadProgressTracker(client_ip, plan.display_name, plan.transfer_size)
+        print(format_download_start(get_timestamp(), client_ip, plan.display_name, format_file_size(plan.transfer_size)))
+
+        loop = asyncio.get_running_loop()
+        try:
+            with open(file_path, 'rb') as f:
+                for prefix, offset, length in plan.segments():
+                    if prefix:
+                        writer.write(prefix)
+                    await writer.drain()
+
+                    sent_total = 0
+                    while sent_total < length:
+                        block = min(SENDFILE_SLICE, length - sent_total)
+                        sent = await loop.sendfile(writer.transport, f, offset + sent_total, block)
+                        if not sent:
+                            break
+                        sent_total += sent
+                        if tracker.update(sent):
+                            print(format_download_progress(
+                                get_timestamp(),
+                                client_ip,
+                                tracker.bytes_transferred,
+                                tracker.file_size,
+                                tracker.get_progress_percentage()
+                            ))
+                await writer.drain()
+
+            tracker.complete()
+            duration = time.time() - tracker.start_time
+            print(format_download_complete(get_timestamp(), client_ip, plan.display_name, plan.transfer_size, duration))
+        except (BrokenPipeError, ConnectionResetError):
+            print(format_download_interrupted(
+                get_timestamp(),
+                client_ip,
+                plan.display_name,
+                tracker.bytes_transferred,
+                plan.transfer_size
+            ))
+        except OSError as e:
+            print(format_download_error(get_timestamp(), client_ip, plan.display_name, str(e)))
+
+
+class AsyncFileShareServer(AsyncEngineMixin, FileShareServer):
+    """Single-file sharing served by the asyncio engine."""
+
+    allowed_methods = ('GET', 'HEAD', 'POST')
+
+    async def _route(self, request: AsyncRequest, writer: asyncio.StreamWriter):
+        endpoint = urlparse(request.path).path
+        if request.method == 'POST':
+            if endpoint == BLOCKS_PATH:
+                await self._send_blocks(request, writer)
+            else:
+                await self._send_json(request, writer, 404, json_error_payload(404, "API Endpoint Not Found"))
+            return
+
+        if endpoint == SIGNATURE_PATH:
+            if request.method == 'HEAD':
+                # Don't read and block-hash the file for headers only
+                await self._send_json_head(request, writer, 200 if os.path.isfile(self.file_path) else 404)
+                return
+            loop = asyncio.get_running_loop()
+            status, data = await loop.run_in_executor(
+                None, build_signature_response, self.file_path, self.allowed_filename, self.signatures
+            )
+            await self._send_json(request, writer, status, data)
+            return
+
+        is_valid, _ = validate_request_path(request.path, self.allowed_filename)
+        if not is_valid:
+            await self._send_error(request, writer, 403, "Access denied")
+            return
+
+        if not os.path.exists(self.file_path):
+            await self._send_error(request, writer, 404, "File not found")
+            return
+
+        await self._send_file(request, writer, self.file_path, self.allowed_filename)
+
+    async def _send_blocks(self, request: AsyncRequest, writer: asyncio.StreamWriter):
+        """Send the blocks listed in a POST /api/blocks body, back to back."""
+        try:
+            length = posted_body_length(request.headers, MAX_BLOCKS_BODY)
+            body = await asyncio.wait_for(request.reader.readexactly(length), REQUEST_TIMEOUT)
+            plan = parse_blocks_request(self.file_path, self.allowed_filename, body)
+        except RequestBodyError as e:
+            await self._send_json(request, writer, e.status, json_error_payload(e.status, str(e)))
+            return
+        except (asyncio.IncompleteReadError, asyncio.TimeoutError):
+            return
+
+        await self._send_file(request, writer, self.file_path, self.allowed_filename, plan)
+
+
+class AsyncDirectoryShareServer(AsyncEngineMixin, DirectoryShareServer):
+    """Directory sharing (SPA, API, files, zip) served by the asyncio engine."""
+
+    allowed_methods = ('GET', 'HEAD', 'POST')
+    max_archive_streams = MAX_ARCHIVE_STREAMS
+
+    def start(self):
+        self._open_entry_cache()
+        self.listing_cache = ListingCache()
+        # Archive downloads block a thread until the client has drained them: keep them
+        # off the default executor so slow downloads can't starve the API and the page
+        self._archive_executor = ThreadPoolExecutor(self.max_archive_streams, thread_name_prefix='archive')
+        self._archive_streams = 0
+        super().start()
+
+    def _shutdown_server(self):
+        super()._shutdown_server()
+        self._archive_executor.shutdown(wait=False)
+        self._close_entry_cache()
+        self._close_listing_cache()
+
+    async def _reserve_archive_stream(self, request: AsyncRequest, writer: asyncio.StreamWriter) -> bool:
+        """
+        Take one of the archive streaming threads, or answer 503 if all are busy.
+
+        Call before the response head is sent; pair with _release_archive_stream().
+
+        Returns:
+            True if the archive can be streamed
+        """
+        if self._archive_streams >= self.max_archive_streams:
+            body = b"Server busy, retry later\n"
+            writer.write(format_response_head(503, [
+                ('Retry-After', str(RETRY_AFTER_SECONDS)),
+                ('Content-Type', 'text/plain; charset=utf-8'),
+                ('Content-Length', str(len(body)))
+            ]))
+            writer.write(body)
+            await writer.drain()
+            return False
+        self._archive_streams += 1
+        return True
+
+    def _release_archive_stream(self):
+        """Give back a thread taken with _reserve_archive_stream()."""
+        self._archive_streams -= 1
+
+    def _log_archive_error(self, request: AsyncRequest, archive_filename: str, error: OSError):
+        """Log an archive that failed mid-stream (a file vanished, shrank or became unreadable)."""
+        try:
+            from .logger import format_download_error, get_timestamp
+        except ImportError:
+            from logger import format_download_error, get_timestamp
+        print(format_download_error(get_timestamp(), request.client_address[0], archive_filename, str(error)))
+
+    def _extra_headers(self, request: AsyncRequest) -> List[Tuple[str, str]]:
+        if request.session_id:
+            return [('Set-Cookie', f'quick_share_session={request.session_id}; Path=/; HttpOnly')]
+        return []
+
+    async def _route(self, request: AsyncRequest, writer: asyncio.StreamWriter):
+        allowed, session_id = self.track_session(request)
+        if not allowed:
+            await self._send_error(request, writer, 403, "Session limit reached")
+            return
+        request.session_id = session_id
+
+        loop = asyncio.get_running_loop()
+
+        if request.method == 'POST':
+            endpoint = urlparse(request.path).path
+            if endpoint in POSTED_BODY_LIMITS:
+                await self._send_posted_zip(request, writer, endpoint)
+            else:
+                await self._send_json(request, writer, 404, json_error_payload(404, "API Endpoint Not Found"))
+            return
+
+        if request.path.startswith('/api/'):
+            validators = None
+            stat_result = api_file_stat(self.directory_path, request.path)
+            if stat_result is not None:
+                validators = api_validators(stat_result)
+                if is_not_modified(request.headers, [validators[0][1]], stat_result.st_mtime):
+                    await self._send_not_modified(request, writer, validators)
+                    return
+            if request.method == 'HEAD':
+                status = api_head_status(self.directory_path, request.path, self.encoding_cache)
+                await self._send_json_head(request, writer, status, validators)
+                return
+
+            # Directory scans and file reads may block, keep them off the loop
+            status, data = await loop.run_in_executor(
+                None, build_api_response, self.directory_path, request.path, self.hash_cache,
+                self.listing_cache, self.line_index_cache, self.encoding_cache
+            )
+            await self._send_json(request, writer, status, data, validators)
+            return
+
+        archive_format = archive_download_format(request.path)
+        if archive_format:
+            # RESTful archive URLs always archive the shared root
+            if is_restful_archive_path(request.path):
+                is_valid, real_path = validate_directory_path('/', self.directory_path)
+            else:
+                is_valid, real_path = validate_directory_path(request.path, self.directory_path)
+
+            if not is_valid:
+                await self._send_error(request, writer, 403, "Access denied")
+                return
+
+            if archive_format == 'zip':
+                await self._send_zip(request, writer, real_path)
+            else:
+                await self._send_tar(request, writer, real_path, archive_format)
+            return
+
+        is_valid, real_path = validate_directory_path(request.path, self.directory_path)
+        if not is_valid:
+            await self._send_error(request, writer, 403, "Access denied")
+            return
+
+        if os.path.isfile(real_path):
+            await self._send_file(request, writer, real_path, os.path.basename(real_path))
+            return
+
+        use_legacy = self.legacy_mode or '?legacy=1' in request.path
+        if use_legacy:
+            html = await loop.run_in_executor(
+                None, generate_directory_listing_html, self.directory_path, real_path
+            )
+            await self._send_bytes(request, writer, 200, 'text/html; charset=utf-8', html.encode('utf-8'))
+        else:
+            await self._send_static_payload(request, writer, self.spa_page)
+
+    async def _send_zip(self, request: AsyncRequest, writer: asyncio.StreamWriter, target_dir: str):
+        """Stream a zip archive produced in a worker thread."""
+        zip_filename = f"{os.path.basename(self.directory_path)}.zip"
+        compression = zip_compression_for_request(request.path, self.zip_compression)
+        if compression == ZIP_COMPRESSION_STORE:
+            await self._send_stored_zip(request, writer, target_dir, zip_filename)
+            return
+
+        headers = [
+            ('Content-Type', 'application/zip'),
+            ('Content-Disposition', f'attachment; filename="{zip_filename}"'),
+        ]
+        if request.method == 'HEAD':
+            writer.write(format_response_head(200, headers + self._extra_headers(request)))
+            await writer.drain()
+            return
+        if not await self._reserve_archive_stream(request, writer):
+            return
+
+        try:
+            writer.write(format_response_head(200, headers + self._extra_headers(request)))
+            await writer.drain()
+
+            loop = asyncio.get_running_loop()
+            bridge = _StreamBridge(writer, loop)
+            await loop.run_in_executor(
+                self._archive_executor, stream_directory_as_zip, bridge, self.directory_path, target_dir, True,
+                compression, self.entry_cache
+            )
+        except (BrokenPipeError, ConnectionResetError):
+            # Client disconnected - this is normal, ignore it
+            pass
+        except OSError as e:
+            self._log_archive_error(request, zip_filename, e)
+        finally:
+            self._release_archive_stream()
+
+    async def _send_posted_zip(self, request: AsyncRequest, writer: asyncio.StreamWriter, endpoint: str):
+        """Stream the zip requested by a POST /api/zip (selection) or /api/delta (client manifest) body."""
+        loop = asyncio.get_running_loop()
+        try:
+            length = posted_body_length(request.headers, POSTED_BODY_LIMITS[endpoint])
+            body = await asyncio.wait_for(request.reader.readexactly(length), REQUEST_TIMEOUT)
+            files, zip_filename, compression = await loop.run_in_executor(
+                None, prepare_posted_zip, self.directory_path, endpoint,
+                request.headers.get('Content-Type', ''), body, self.hash_cache
+            )
+        except RequestBodyError as e:
+            await self._send_json(request, writer, e.status, json_error_payload(e.status, str(e)))
+            return
+        except (asyncio.IncompleteReadError, asyncio.TimeoutError):
+            return
+
+        compression = compression or zip_compression_for_request(request.path, self.zip_compression)
+        headers = [
+            ('Content-Type', 'application/zip'),
+            ('Content-Disposition', f'attachment; filename="{zip_filename}"'),
+        ]
+        if not await self._reserve_archive_stream(request, writer):
+            return
+
+        try:
+            writer.write(format_response_head(200, headers + self._extra_headers(request)))
+            await writer.drain()
+
+            bridge = _StreamBridge(writer, loop)
+            await loop.run_in_executor(
+                self._archive_executor, stream_files_as_zip, bridge, files, zip_filename, True,
+                compression, self.entry_cache
+            )
+        except (BrokenPipeError, ConnectionResetError):
+            # Client disconnected - this is normal, ignore it
+            pass
+        except OSError as e:
+            self._log_archive_error(request, zip_filename, e)
+        finally:
+            self._release_archive_stream()
+
+    async def _send_tar(self, request: AsyncRequest, writer: asyncio.StreamWriter,
+                        target_dir: str, archive_format: str):
+        """Stream a tar archive produced in a worker thread."""
+        if archive_format == 'tar.zst' and not zstd_available():
+            await self._send_error(request, writer, 501, "tar.zst downloads need the zstandard module on the server")
+            return
+
+        archive_filename = f"{os.path.basename(self.directory_path)}.{archive_format}"
+        headers = [
+            ('Content-Type', TAR_CONTENT_TYPES[archive_format]),
+            ('Content-Disposition', f'attachment; filename="{archive_filename}"'),
+        ]
+        if request.method == 'HEAD':
+            writer.write(format_response_head(200, headers + self._extra_headers(request)))
+            await writer.drain()
+            return
+        if not await self._reserve_archive_stream(request, writer):
+            return
+
+        try:
+            writer.write(format_response_head(200, headers + self._extra_headers(request)))
+            await writer.drain()
+
+            loop = asyncio.get_running_loop()
+            bridge = _StreamBridge(writer, loop)
+            await loop.run_in_executor(
+                self._archive_executor, stream_directory_as_tar, bridge, self.directory_path, target_dir,
+                archive_format, True
+            )
+        except (BrokenPipeError, ConnectionResetError):
+            # Client disconnected - this is normal, ignore it
+            pass
+        except OSError as e:
+            self._log_archive_error(request, archive_filename, e)
+        finally:
+            self._release_archive_stream()
+
+    async def _send_stored_zip(self, request: AsyncRequest, writer: asyncio.StreamWriter,
+                               target_dir: str, zip_filename: str):
+        """Send a store-only zip with Content-Length and Range support."""
+        loop = asyncio.get_running_loop()
+        layout = await loop.run_in_executor(
+            None, build_stored_zip_layout, self.directory_path, target_dir, self.entry_cache
+        )
+        try:
+            plan = RangeResponsePlan(
+                request.headers, layout.size, layout.etag, format_http_date(layout.mtime),
+                zip_filename, 'application/zip',
+                # The newest mtime survives deletes and renames: only the ETag pins the layout
+                date_validates_range=False
+            )
+        except RangeNotSatisfiable:
+            headers = [('Content-Range', f'bytes */{layout.size}'), ('Content-Length', '0')]
+            writer.write(format_response_head(416, headers + self._extra_headers(request)))
+            await writer.drain()
+            return
+
+        if request.method == 'HEAD':
+            writer.write(format_response_head(plan.status, plan.headers + self._extra_headers(request)))
+            await writer.drain()
+            return
+        if not await self._reserve_archive_stream(request, writer):
+            return
+        try:
+            await self._stream_stored_zip(request, writer, layout, plan)
+        finally:
+            self._release_archive_stream()
+
+    async def _stream_stored_zip(self, request: AsyncRequest, writer: asyncio.StreamWriter, layout, plan):
+        """Send the head and (ranged) body of a stored zip on the archive executor."""
+        try:
+            from .logger import (
+                format_download_start,
+                format_download_progress,
+                format_download_complete,
+                format_download_interrupted,
+                format_download_error,
+                get_timestamp
+            )
+            from .directory_handler import format_file_size
+        except ImportError:
+            from logger import (
+                format_download_start,
+                format_download_progress,
+                format_download_complete,
+                format_download_interrupted,
+                format_download_error,
+                get_timestamp
+            )
+            from directory_handler import format_file_size
+
+        client_ip = request.client_address[0]
+        loop = asyncio.get_running_loop()
+        writer.write(format_response_head(plan.status, plan.headers + self._extra_headers(request)))
+        await writer.drain()
+
+        tracker = DownloadProgressTracker(client_ip, plan.display_name, plan.transfer_size)
+        print(format_download_start(get_timestamp(), client_ip, plan.display_name, format_file_size(plan.transfer_size)))
+
+        def on_progress(sent: int):
+            if tracker.update(sent):
+                print(format_download_progress(
+                    get_timestamp(),
+                    client_ip,
+                    tracker.bytes_transferred,
+                    tracker.file_size,
+                    tracker.get_progress_percentage()
+                ))
+
+        def write_body(bridge: _StreamBridge):
+            for prefix, offset, length in plan.segments():
+                bridge.write(prefix)
+                layout.write_range(bridge, offset, length, on_progress)
+
+        try:
+            await loop.run_in_executor(self._archive_executor, write_body, _StreamBridge(writer, loop))
+            await writer.drain()
+            tracker.complete()
+            duration = time.time() - tracker.start_time
+            print(format_download_complete(get_timestamp(), client_ip, plan.display_name, plan.transfer_size, duration))
+        except (BrokenPipeError, ConnectionResetError):
+            print(format_download_interrupted(
+                get_timestamp(),
+                client_ip,
+                plan.display_name,
+                tracker.bytes_transferred,
+                plan.transfer_size
+            ))
+        except OSError as e:
+            print(format_download_error(get_timestamp(), client_ip, plan.display_name, str(e)))
@@ -0,0 +1,364 @@
+"""Block signatures and rolling-checksum matching for delta transfers of large single files."""
+
+import hashlib
+import math
+import os
+import threading
+import zlib
+from typing import Dict, List, Optional, Tuple
+
+try:
+    from .http_utils import make_etag
+except ImportError:
+    from http_utils import make_etag
+
+# Constants
+MIN_BLOCK_SIZE = 4 * 1024
+MAX_BLOCK_SIZE = 1024 * 1024
+BLOCK_SIZE_ALIGN = 1024
+STRONG_ALGORITHM = 'blake2b'
+STRONG_DIGEST_SIZE = 16
+FILE_ALGORITHM = 'sha256'
+READ_SIZE = 16 * 1024 * 1024  # Bytes read from disk at a time while hashing or matching
+MAX_BLOCK_RUNS = 1024 * 1024  # Largest accepted number of runs in one blocks request
+LOOKAHEAD_BLOCKS = 8  # Aligned blocks tried after a mismatch before rolling
+ROLLING_SEARCH_SIZE = 4 * 1024 * 1024  # Bytes rolled (in Python) per changed region looking for moved content
+RESYNC_INTERVAL_BLOCKS = 1024  # Blocks stepped without a match between one-block rolling searches
+
+_ADLER_MOD = 65521
+
+
+def choose_block_size(file_size: int) -> int:
+    """
+    Pick the signature block size for a file (rsync's square-root rule).
+
+    Args:
+        file_size: File size in bytes
+
+    Returns:
+        Block size, a multiple of BLOCK_SIZE_ALIGN between MIN_BLOCK_SIZE and MAX_BLOCK_SIZE
+    """
+    block_size = int(math.sqrt(file_size)) // BLOCK_SIZE_ALIGN * BLOCK_SIZE_ALIGN
+    return max(MIN_BLOCK_SIZE, min(MAX_BLOCK_SIZE, block_size))
+
+
+def strong_digest(data) -> str:
+    """Strong checksum of one block."""
+    return hashlib.new(STRONG_ALGORITHM, data, digest_size=STRONG_DIGEST_SIZE).hexdigest()
+
+
+def compute_signature(file_path: str, block_size: Optional[int] = None) -> dict:
+    """
+    Checksum every block of a file.
+
+    Args:
+        file_path: File to describe
+        block_size: Block size (default: choose_block_size)
+
+    Returns:
+        Signature dict: size, mtime, etag, block_size, FILE_ALGORITHM of the
+        whole file, and per-block 'weak' (adler32) and 'strong' checksums
+
+    Raises:
+        OSError: If the file can't be read
+    """
+    with open(file_path, 'rb') as f:
+        stat_result = os.fstat(f.fileno())
+        block_size = block_size or choose_block_size(stat_result.st_size)
+        read_size = max(block_size, READ_SIZE // block_size * block_size)
+
+        file_hash = hashlib.new(FILE_ALGORITHM)
+        weak = []
+        strong = []
+        while True:
+            data = f.read(read_size)
+            if not data:
+                break
+            file_hash.update(data)
+            view = memoryview(data)
+            for start in range(0, len(view), block_size):
+                block = view[start:start + block_size]
+                weak.append(zlib.adler32(block))
+                strong.append(strong_digest(block))
+
+    return {
+        'size': stat_result.st_size,
+        'mtime': stat_result.st_mtime,
+        'etag': make_etag(stat_result),
+        'block_size': block_size,
+        FILE_ALGORITHM: file_hash.hexdigest(),
+        'weak': weak,
+        'strong': strong,
+    }
+
+
+class SignatureCache:
+    """
+    Signatures of shared files, computed once per file version.
+
+    Concurrent requests for the same version wait for one computation
+    instead of each reading the file.
+    """
+
+    def __init__(self):
+        self._signatures: Dict[str, Tuple[str, dict]] = {}
+        self._lock = threading.Lock()
+        self._file_locks: Dict[str, threading.Lock] = {}
+
+    def get(self, file_path: str) -> dict:
+        """
+        Signature of the current version of a file.
+
+        Args:
+            file_path: File to describe
+
+        Returns:
+            Signature dict (see compute_signature)
+
+        Raises:
+            OSError: If the file can't be read
+        """
+        with self._lock:
+            file_lock = self._file_locks.setdefault(file_path, threading.Lock())
+
+        with file_lock:
+            etag = make_etag(os.stat(file_path))
+            cached = self._signatures.get(file_path)
+            if cached and cached[0] == etag:
+                return cached[1]
+
+            signature = compute_signature(file_path)
+            self._signatures[file_path] = (signature['etag'], signature)
+            return signature
+
+
+def parse_block_runs(runs, block_size: int, file_size: int) -> List[Tuple[int, int]]:
+    """
+    Validate requested block runs and turn them into byte ranges.
+
+    Args:
+        runs: List of [first_block, block_count] pairs, ascending and not overlapping
+        block_size: Block size of the signature the client used
+        file_size: Current file size
+
+    Returns:
+        List of (offset, length) byte ranges
+
+    Raises:
+        ValueError: If the runs are malformed or out of range
+    """
+    if not isinstance(runs, list) or len(runs) > MAX_BLOCK_RUNS:
+        raise ValueError("Expected a list of [first, count] block runs")
+
+    block_count = (file_size + block_size - 1) // block_size
+    ranges = []
+    next_block = 0
+    for run in runs:
+        if (not isinstance(run, list) or len(run) != 2
+                or not all(isinstance(value, int) and not isinstance(value, bool) for value in run)):
+            raise ValueError("Expected a list of [first, count] block runs")
+        first, count = run
+        if first < next_block or count <= 0 or first + count > block_count:
+            raise ValueError("Block runs must be ascending, non-overlapping and inside the file")
+        offset = first * block_size
+        ranges.append((offset, min(count * block_size, file_size - offset)))
+        next_block = first + count
+    return ranges
+
+
+class BlockResponsePlan:
+    """Status, headers and body layout of a blocks response (requested block runs, back to back)."""
+
+    def __init__(self, ranges: List[Tuple[int, int]], file_size: int, etag: str, filename: str):
+        """
+        Initialize plan.
+
+        Args:
+            ranges: (offset, length) byte ranges from parse_block_runs
+            file_size: Full size of the file
+            etag: ETag of the file version the ranges come from
+            filename: Name used in logs
+        """
+        self.ranges = ranges
+        self.status = 200
+        self.file_size = file_size
+        self.transfer_size = self.body_length = sum(length for _, length in ranges)
+        self.display_name = f"{filename} [{len(ranges)} changed block runs]"
+        self.headers = [
+            ('Content-Type', 'application/octet-stream'),
+            ('Content-Length', str(self.body_length)),
+            ('ETag', etag),
+        ]
+
+    def segments(self):
+        """Yield the body layout as (prefix_bytes, offset, length) tuples."""
+        for offset, length in self.ranges:
+            yield b'', offset, length
+
+
+class _Window:
+    """Sliding read buffer over a file."""
+
+    def __init__(self, f, size: int):
+        self.f = f
+        self.size = size
+        self.start = 0
+        self.data = b''
+
+    def view(self, offset: int, length: int) -> memoryview:
+        """Bytes [offset, offset + length) of the file (shorter at EOF); offsets never move backwards."""
+        end = min(offset + length, self.size)
+        if offset < self.start or end > self.start + len(self.data):
+            keep = self.data[offset - self.start:] if self.start <= offset < self.start + len(self.data) else b''
+            self.f.seek(offset + len(keep))
+            self.data = keep + self.f.read(max(READ_SIZE, end - offset) - len(keep))
+            self.start = offset
+        return memoryview(self.data)[offset - self.start:end - self.start]
+
+
+def match_blocks(file_path: str, signature: dict) -> List[Optional[int]]:
+    """
+    Find the blocks of a signature that a local file already contains.
+
+    Windows are checksummed at C speed and the scan jumps a whole block
+    after every match. After a mismatch the next few block-aligned windows
+    are tried first (content rewritten in place, the common case for disk
+    images); failing that, the weak checksum is rolled byte by byte for up
+    to ROLLING_SEARCH_SIZE bytes to find content that moved (insertions and
+    deletions). If that finds nothing too, the scan steps a block at a time,
+    rolling over a single block every RESYNC_INTERVAL_BLOCKS, until a match
+    re-arms the full search. The pure Python rolling loop so covers a small
+    fraction of the file instead of all of it, as rsync's C loop would.
+
+    Args:
+        file_path: Local (old) version of the file
+        signature: Signature of the wanted version (see compute_signature)
+
+    Returns:
+        For each signature block, an offset in the local file holding the
+        same content, or None if the block must be downloaded
+    """
+    block_size = signature['block_size']
+    weak_sums = signature['weak']
+    strong_sums = signature['strong']
+    sources: List[Optional[int]] = [None] * len(weak_sums)
+    if not weak_sums:
+        return sources
+
+    last_length = signature['size'] - (len(weak_sums) - 1) * block_size
+    full_blocks = len(weak_sums) if last_length == block_size else len(weak_sums) - 1
+    weak_index: Dict[int, List[int]] = {}
+    for index in range(full_blocks):
+        weak_index.setdefault(weak_sums[index], []).append(index)
+
+    def claim(weak: int, data, at: int) -> bool:
+        # Every still-missing block with this content can come from here
+        candidates = weak_index.get(weak)
+        if not candidates:
+            return False
+        digest = strong_digest(data)
+        found = False
+        for index in candidates:
+            if strong_sums[index] == digest:
+                found = True
+                if sources[index] is None:
+                    sources[index] = at
+        return found
+
+    def roll(base: int, weak: int, length: int) -> Optional[int]:
+        # Slide the window one byte at a time from base; return where a block matched
+        limit = min(base + length, size - block_size)
+        buf = window.view(base, limit - base + block_size)
+        a = weak & 0xffff
+        b = weak >> 16
+        at = base
+        while at < limit:
+            out_byte = buf[at - base]
+            in_byte = buf[at - base + block_size]
+            a = (a - out_byte + in_byte) % _ADLER_MOD
+            b = (b - block_size * out_byte + a - 1) % _ADLER_MOD
+            at += 1
+            weak = (b << 16) | a
+            if weak in weak_index and claim(weak, buf[at - base:at - base + block_size], at):
+                return at
+        return None
+
+    with open(file_path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        window = _Window(f, size)
+        offset = 0
+        rolling = True
+        stepped = 0
+        while weak_index and offset + block_size <= size:
+            data = window.view(offset, block_size)
+            weak = zlib.adler32(data)
+            if claim(weak, data, offset):
+                offset += block_size
+                rolling = True
+                continue
+
+            if rolling:
+                # Content rewritten in place: the block grid resumes shortly
+                resumed = None
+                for step in range(1, LOOKAHEAD_BLOCKS + 1):
+                    at = offset + step * block_size
+                    if at + block_size > size:
+                        break
+                    ahead = window.view(at, block_size)
+                    if claim(zlib.adler32(ahead), ahead, at):
+                        resumed = at + block_size
+                        break
+                if resumed is not None:
+                    offset = resumed
+                    continue
+                # Content moved (insertion or deletion): look for where it went
+                rolling = False
+                found = roll(offset, weak, ROLLING_SEARCH_SIZE)
+            elif stepped >= RESYNC_INTERVAL_BLOCKS:
+                # Past a large deletion any window is within a block of a match
+                found = roll(offset, weak, block_size)
+            else:
+                stepped += 1
+                offset += block_size
+                continue
+
+            stepped = 0
+            if found is not None:
+                offset = found + block_size
+                rolling = True
+            else:
+                offset += block_size
+
+        if full_blocks < len(weak_sums):
+            # Short last block: try the same position and the local file's tail
+            index = len(weak_sums) - 1
+            for at in (index * block_size, size - last_length):
+                if 0 <= at and at + last_length <= size:
+                    f.seek(at)
+                    data = f.read(last_length)
+                    if zlib.adler32(data) == weak_sums[index] and strong_digest(data) == strong_sums[index]:
+                        sources[index] = at
+                        break
+
+    return sources
+
+
+def missing_runs(sources: List[Optional[int]]) -> List[List[int]]:
+    """
+    Group the blocks that must be downloaded into runs.
+
+    Args:
+        sources: Result of match_blocks
+
+    Returns:
+        List of [first_block, block_count] pairs
+    """
+    runs = []
+    for index, source in enumerate(sources):
+        if source is not None:
+            continue
+        if runs and runs[-1][0] + runs[-1][1] == index:
+            runs[-1][1] += 1
+        else:
+            runs.append([index, 1])
+    return runs
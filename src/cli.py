@@ -1,6 +1,8 @@
 import argparse
 import sys
 from . import __version__
+from .workers import reuse_port_supported
+from .utils import parse_size
 
 
 def is_update_command(args=None):
@@ -60,6 +62,66 @@ def parse_update_arguments(args=None):
     return parser.parse_args(args)
 
 
+def is_pull_command(args=None):
+    """
+    Check if the command is a pull command.
+
+    Args:
+        args: List of arguments. If None, uses sys.argv[1:].
+
+    Returns:
+        True if the first argument is 'pull', False otherwise.
+    """
+    if args is None:
+        args = sys.argv[1:]
+
+    if not args:
+        return False
+
+    return args[0] == 'pull'
+
+
+def parse_pull_arguments(args=None):
+    """
+    Parse pull subcommand arguments.
+
+    Args:
+        args: List of arguments. If None, uses sys.argv[1:].
+
+    Returns:
+        argparse.Namespace with pull command options.
+    """
+    if args is None:
+        args = sys.argv[1:]
+
+    # Skip 'pull' if present
+    if args and args[0] == 'pull':
+        args = args[1:]
+
+    parser = argparse.ArgumentParser(
+        prog='quick-share pull',
+        description='Download only new or changed files (or blocks of a shared file)'
+    )
+
+    parser.add_argument(
+        'url',
+        help='URL of the shared directory or file (e.g. http://192.168.1.10:8000/docs/)'
+    )
+
+    parser.add_argument(
+        'dest',
+        help='Local directory to bring up to date'
+    )
+
+    parser.add_argument(
+        '--delete',
+        action='store_true',
+        help='Also delete local files that are no longer shared'
+    )
+
+    return parser.parse_args(args)
+
+
 def parse_arguments(args=None):
     """
     Parse command line arguments.
@@ -108,6 +170,47 @@ def parse_arguments(args=None):
         help="Use legacy server-side rendered directory listing"
     )
 
+    parser.add_argument(
+        "--engine",
+        choices=["threaded", "pool", "async"],
+        default="threaded",
+        help="Server engine: thread per connection, bounded thread pool, or asyncio event loop (default: threaded)"
+    )
+
+    parser.add_argument(
+        "--threads",
+        type=int,
+        default=16,
+        help="Worker threads for --engine pool (default: 16)"
+    )
+
+    parser.add_argument(
+        "--queue",
+        type=int,
+        default=64,
+        help="Connections waiting for a worker before 503 with --engine pool (default: 64)"
+    )
+
+    parser.add_argument(
+        "--zip-compression",
+        choices=["auto", "deflate", "store"],
+        default="auto",
+        help="Zip downloads: store already-compressed files (auto), deflate everything, or store only (default: auto)"
+    )
+
+    parser.add_argument(
+        "--zip-cache",
+        default="1G",
+        help="Disk space for deflated files reused by repeated zip downloads, e.g. 512M, 2G; 0 disables (default: 1G)"
+    )
+
+    parser.add_argument(
+        "-w", "--workers",
+        type=int,
+        default=1,
+        help="Processes sharing the port via SO_REUSEPORT, to use several CPU cores (default: 1)"
+    )
+
     return parser.parse_args(args)
 
 def validate_arguments(args):
@@ -129,6 +232,28 @@ def validate_arguments(args):
     if args.max_downloads <= 0:
         raise ValueError("max_downloads must be a positive integer")
 
+    # Validate worker pool sizing
+    if getattr(args, 'threads', 1) <= 0:
+        raise ValueError("threads must be a positive integer")
+    if getattr(args, 'queue', 1) <= 0:
+        raise ValueError("queue must be a positive integer")
+
+    # Validate multi-process serving
+    workers = getattr(args, 'workers', 1)
+    if workers <= 0:
+        raise ValueError("workers must be a positive integer")
+    if workers > 1:
+        if getattr(args, 'engine', 'threaded') == 'async':
+            raise ValueError("--workers is not supported with --engine async")
+        if not reuse_port_supported():
+            raise ValueError("--workers requires SO_REUSEPORT and fork(), which this platform lacks")
+
+    # Validate zip entry cache size
+    try:
+        parse_size(getattr(args, 'zip_cache', '0'))
+    except ValueError as e:
+        raise ValueError(f"Invalid --zip-cache size: {e}")
+
     # Validate timeout
     if args.timeout:
         # Check format <number><unit>
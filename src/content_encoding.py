@@ -0,0 +1,227 @@
+"""Accept-Encoding negotiation and gzip/brotli compression of text responses."""
+
+import gzip
+import hashlib
+import zlib
+from typing import Dict, Iterable, List, Optional, Tuple
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Constants
+COMPRESS_MIN_SIZE = 1024  # Smaller bodies fit in a packet or two: not worth compressing
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 4  # Per-request quality: faster than gzip -6 and still smaller
+STATIC_GZIP_LEVEL = 9  # Static payloads are compressed once, so use the best settings
+STATIC_BROTLI_QUALITY = 11
+COMPRESSIBLE_TYPES = ('text/', 'application/json', 'application/javascript', 'image/svg+xml')
+
+
+def brotli_available() -> bool:
+    """Check whether responses can be brotli-compressed (needs the brotli module)."""
+    return brotli is not None
+
+
+def is_compressible(content_type: str) -> bool:
+    """Whether a Content-Type is text worth compressing."""
+    return content_type.startswith(COMPRESSIBLE_TYPES)
+
+
+def parse_accept_encoding(header: Optional[str]) -> Dict[str, float]:
+    """
+    Parse an Accept-Encoding header.
+
+    Args:
+        header: Raw header value (e.g., "gzip, deflate, br;q=0.9")
+
+    Returns:
+        Mapping of lower-cased coding to its q-value (malformed q-values count as 0)
+    """
+    codings = {}
+    if not header:
+        return codings
+    for part in header.split(','):
+        coding, _, params = part.strip().partition(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        for param in params.split(';'):
+            name, _, value = param.strip().partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        codings[coding] = quality
+    return codings
+
+
+def choose_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """
+    Pick the content coding for a response.
+
+    Brotli is preferred over gzip at equal q-values when the module is
+    installed; a wildcard accepts either unless it is listed with q=0.
+
+    Args:
+        accept_encoding: Raw Accept-Encoding header of the request
+
+    Returns:
+        'br', 'gzip', or None to send the body as is
+    """
+    codings = parse_accept_encoding(accept_encoding)
+    if not codings:
+        return None
+
+    wildcard = codings.get('*', 0.0)
+    candidates = ['br', 'gzip'] if brotli_available() else ['gzip']
+    best = None
+    best_quality = 0.0
+    for coding in candidates:
+        quality = codings.get(coding, wildcard)
+        if quality > best_quality:
+            best, best_quality = coding, quality
+    return best
+
+
+def compress(body: bytes, encoding: str, static: bool = False) -> bytes:
+    """
+    Compress a whole body.
+
+    Args:
+        body: Uncompressed bytes
+        encoding: 'gzip' or 'br'
+        static: Use the slow, best settings (for payloads compressed once)
+
+    Returns:
+        Compressed bytes
+    """
+    if encoding == 'br':
+        return brotli.compress(body, quality=STATIC_BROTLI_QUALITY if static else BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=STATIC_GZIP_LEVEL if static else GZIP_LEVEL, mtime=0)
+
+
+def iter_compressed(chunks: Iterable[bytes], encoding: str) -> Iterable[bytes]:
+    """
+    Compress a streamed body chunk by chunk.
+
+    Each input chunk is flushed so the client can start decoding (and
+    rendering) before the body is complete.
+
+    Args:
+        chunks: Uncompressed chunks
+        encoding: 'gzip' or 'br'
+
+    Yields:
+        Non-empty compressed chunks
+    """
+    if encoding == 'br':
+        compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+        for chunk in chunks:
+            data = compressor.process(chunk) + compressor.flush()
+            if data:
+                yield data
+        data = compressor.finish()
+    else:
+        # wbits=31: zlib stream with a gzip header and trailer
+        compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+        for chunk in chunks:
+            data = compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+            if data:
+                yield data
+        data = compressor.flush()
+    if data:
+        yield data
+
+
+def negotiate_body(body: bytes, content_type: str, accept_encoding: Optional[str]):
+    """
+    Compress a response body if the client accepts it and it is worth it.
+
+    Args:
+        body: Uncompressed response body
+        content_type: Content-Type of the response
+        accept_encoding: Raw Accept-Encoding header of the request
+
+    Returns:
+        Tuple of (body, encoding, vary): encoding is the Content-Encoding to
+        send (None if uncompressed), vary whether the response depends on
+        Accept-Encoding
+    """
+    if not is_compressible(content_type) or len(body) < COMPRESS_MIN_SIZE:
+        return body, None, False
+
+    encoding = choose_encoding(accept_encoding)
+    if encoding is None:
+        return body, None, True
+    return compress(body, encoding), encoding, True
+
+
+class StaticPayload:
+    """
+    A response body that doesn't change while the server runs (e.g. the SPA page).
+
+    The raw bytes and every supported compressed form are prepared once,
+    at the best compression settings, and each representation gets a
+    strong ETag derived from the content.
+    """
+
+    def __init__(self, body: bytes, content_type: str, cache_control: str = 'no-cache'):
+        """
+        Initialize payload.
+
+        Args:
+            body: Uncompressed body
+            content_type: Content-Type header value
+            cache_control: Cache-Control header value (default: cache, but revalidate)
+        """
+        self.body = body
+        self.content_type = content_type
+        self.cache_control = cache_control
+        self._digest = hashlib.sha256(body).hexdigest()[:32]
+        self.etag = f'"{self._digest}"'
+
+        self.compressible = is_compressible(content_type) and len(body) >= COMPRESS_MIN_SIZE
+        self._encoded: Dict[str, bytes] = {}
+        if self.compressible:
+            for encoding in ('br', 'gzip') if brotli_available() else ('gzip',):
+                self._encoded[encoding] = compress(body, encoding, static=True)
+        self.etags = [self.etag] + [self._variant_etag(encoding) for encoding in self._encoded]
+
+    def _variant_etag(self, encoding: str) -> str:
+        """ETag of a compressed representation."""
+        return f'"{self._digest}-{encoding}"'
+
+    def select(self, accept_encoding: Optional[str]) -> Tuple[bytes, List[Tuple[str, str]]]:
+        """
+        Representation to send for a request.
+
+        Args:
+            accept_encoding: Raw Accept-Encoding header of the request
+
+        Returns:
+            Tuple of (body, headers): headers are Content-Type, ETag,
+            Cache-Control and, where they apply, Vary and Content-Encoding
+            (Content-Length is left to the caller)
+        """
+        encoding = choose_encoding(accept_encoding) if self.compressible else None
+        if encoding not in self._encoded:
+            encoding = None
+
+        if encoding:
+            body, etag = self._encoded[encoding], self._variant_etag(encoding)
+        else:
+            body, etag = self.body, self.etag
+        headers = [
+            ('Content-Type', self.content_type),
+            ('ETag', etag),
+            ('Cache-Control', self.cache_control),
+        ]
+        if self.compressible:
+            headers.append(('Vary', 'Accept-Encoding'))
+        if encoding:
+            headers.append(('Content-Encoding', encoding))
+        return body, headers
@@ -1,16 +1,31 @@
 """Directory sharing core handling logic."""
 
 import os
+import base64
 import html
-import zipfile
+import json
+import queue
+import threading
+import time
+from stat import S_ISDIR, S_ISREG
 from pathlib import Path
-from typing import Dict
+from typing import Dict, Iterable, List, Optional, Tuple
 from datetime import datetime
 
 try:
     from .templates import generate_spa_html
+    from .zipstream import write_zip, StoredZipLayout, ZIP_COMPRESSION_AUTO
+    from .tarstream import write_tar
 except ImportError:
     from templates import generate_spa_html
+    from zipstream import write_zip, StoredZipLayout, ZIP_COMPRESSION_AUTO
+    from tarstream import write_tar
+
+# Constants
+WALK_QUEUE_SIZE = 64  # Batches the background walker may run ahead of the archive writer
+WALK_BATCH_SIZE = 256  # Largest batch of files handed over at once
+WALK_PUT_TIMEOUT = 0.1  # Seconds between checks that the archive writer is still there
+ARCHIVE_PROGRESS_STEP = 10 * 1024 * 1024  # Log archive progress every 10MB
 
 
 def get_directory_info(directory_path: str) -> Dict:
@@ -88,7 +103,7 @@ def get_directory_structure(base_dir: str, current_dir: str) -> Dict:
         pass
 
     # Sort: directories first, then by name
-    items.sort(key=lambda x: (x['type'] != 'directory', x['name'].lower()))
+    items.sort(key=tree_sort_key)
 
     return {
         'path': relative_path,
@@ -96,6 +111,97 @@ def get_directory_structure(base_dir: str, current_dir: str) -> Dict:
     }
 
 
+def tree_sort_key(item: Dict) -> Tuple[bool, str, str]:
+    """
+    Sort key of a listing item: directories first, then by name.
+
+    Names that differ only in case are ordered by their exact spelling, so
+    the order is total and pages cut at any item are stable.
+    """
+    return (item['type'] != 'directory', item['name'].lower(), item['name'])
+
+
+def encode_tree_cursor(item: Dict) -> str:
+    """
+    Build the opaque cursor that resumes a listing after an item.
+
+    Args:
+        item: Last item of a page
+
+    Returns:
+        URL-safe cursor string
+    """
+    is_file, _, name = tree_sort_key(item)
+    raw = json.dumps([int(is_file), name], ensure_ascii=False).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_tree_cursor(cursor: str) -> Tuple[bool, str, str]:
+    """
+    Turn a cursor back into the sort key it points after.
+
+    Args:
+        cursor: Value from encode_tree_cursor
+
+    Returns:
+        Sort key (see tree_sort_key)
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        is_file, name = json.loads(raw.decode('utf-8'))
+    except (ValueError, TypeError):
+        raise ValueError("Invalid cursor")
+    if is_file not in (0, 1) or not isinstance(name, str):
+        raise ValueError("Invalid cursor")
+    return (bool(is_file), name.lower(), name)
+
+
+def paginate_directory_structure(structure: Dict, limit: int, cursor: Optional[str] = None) -> Dict:
+    """
+    Cut one page out of a sorted listing.
+
+    The page starts after the cursor's sort key rather than at an index, so
+    entries created or deleted between requests never shift later pages
+    (no duplicates, no skipped entries that existed throughout).
+
+    Args:
+        structure: Result of get_directory_structure
+        limit: Maximum number of items in the page
+        cursor: Cursor of the previous page (None for the first page)
+
+    Returns:
+        Dictionary with path, items (the page), total and next_cursor
+        (None on the last page)
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    items = structure['items']
+    start = 0
+    if cursor:
+        after = decode_tree_cursor(cursor)
+        # Binary search for the first item sorting after the cursor
+        high = len(items)
+        while start < high:
+            middle = (start + high) // 2
+            if tree_sort_key(items[middle]) <= after:
+                start = middle + 1
+            else:
+                high = middle
+
+    page = items[start:start + limit]
+    has_more = start + limit < len(items)
+    return {
+        'path': structure['path'],
+        'items': page,
+        'total': len(items),
+        'next_cursor': encode_tree_cursor(page[-1]) if has_more and page else None
+    }
+
+
 def format_file_size(size_bytes: int) -> str:
     """
     Format bytes to human-readable format.
@@ -246,11 +352,217 @@ def generate_error_html(error_message: str) -> str:
     """
 
 
+def _iter_archive_files(base_dir: str, target_dir: str):
+    """
+    Yield (file_path, arcname, stat_result) for every regular file under target_dir.
+
+    Directories are visited in os.walk order (top-down, symlinked
+    directories not followed) with one scandir per directory, and every
+    file is stat'ed exactly once.
+
+    Args:
+        base_dir: Shared root directory (arcnames are relative to it)
+        target_dir: Directory to walk
+    """
+    pending = [target_dir]
+    while pending:
+        directory = pending.pop()
+        arcdir = os.path.relpath(directory, base_dir)
+        subdirs = []
+        try:
+            with os.scandir(directory) as it:
+                for entry in it:
+                    try:
+                        if entry.is_dir():
+                            if not entry.is_symlink():
+                                subdirs.append(entry.path)
+                            continue
+                        stat_result = entry.stat()
+                    except OSError:
+                        # Skip broken links and files we can't stat
+                        continue
+                    if not S_ISREG(stat_result.st_mode):
+                        continue
+                    arcname = entry.name if arcdir == os.curdir else os.path.join(arcdir, entry.name)
+                    yield entry.path, arcname, stat_result
+        except OSError:
+            # Unreadable directory: archive what we could list
+            pass
+        pending.extend(reversed(subdirs))
+
+
+class _ArchiveWalk:
+    """
+    Walk a tree on a background thread, feeding the archive writer through a bounded queue.
+
+    The writer starts on the first file found instead of waiting for the
+    whole tree; files_found and bytes_found grow as the walk proceeds.
+    """
+
+    def __init__(self, files: Iterable[Tuple[str, str, os.stat_result]]):
+        """
+        Start walking.
+
+        Args:
+            files: Lazy iterable of (file_path, arcname, stat_result), e.g. _iter_archive_files()
+        """
+        self.files_found = 0
+        self.bytes_found = 0
+        self.done = False
+        self._error: Optional[BaseException] = None
+        self._queue = queue.Queue(maxsize=WALK_QUEUE_SIZE)
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, args=(files,), name='quick-share-walk'
+        )
+        self._thread.daemon = True
+        self._thread.start()
+
+    def _run(self, files: Iterable[Tuple[str, str, os.stat_result]]):
+        """Walker thread body: queue files in batches that grow up to WALK_BATCH_SIZE."""
+        batch = []
+        batch_limit = 1  # The first file goes out alone for a fast first byte
+        try:
+            for item in files:
+                self.files_found += 1
+                self.bytes_found += item[2].st_size
+                batch.append(item)
+                if len(batch) >= batch_limit:
+                    if not self._put(batch):
+                        return
+                    batch = []
+                    batch_limit = min(batch_limit * 2, WALK_BATCH_SIZE)
+            if batch and not self._put(batch):
+                return
+        except Exception as e:
+            self._error = e
+        finally:
+            self.done = True
+            self._put(None)
+
+    def _put(self, batch) -> bool:
+        """Queue a batch unless the consumer went away."""
+        while not self._stopped.is_set():
+            try:
+                self._queue.put(batch, timeout=WALK_PUT_TIMEOUT)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def __iter__(self):
+        while True:
+            batch = self._queue.get()
+            if batch is None:
+                break
+            yield from batch
+        if self._error:
+            raise self._error
+
+    def close(self):
+        """Stop the walker (e.g. after the client disconnected)."""
+        self._stopped.set()
+
+
+def iter_selected_files(base_dir: str, targets: List[str]):
+    """
+    Yield (file_path, arcname, stat_result) for a selection of files and directories.
+
+    Args:
+        base_dir: Shared root directory (arcnames are relative to it)
+        targets: Validated real paths; directories are archived recursively
+    """
+    for target in targets:
+        try:
+            stat_result = os.stat(target)
+        except OSError:
+            continue
+        if S_ISDIR(stat_result.st_mode):
+            yield from _iter_archive_files(base_dir, target)
+        elif S_ISREG(stat_result.st_mode):
+            yield target, os.path.relpath(target, base_dir), stat_result
+
+
+def build_stored_zip_layout(base_dir: str, target_dir: str, entry_cache=None) -> StoredZipLayout:
+    """
+    Lay out a store-only zip of a directory without reading any file data.
+
+    Args:
+        base_dir: Shared root directory
+        target_dir: Target directory to zip (may be subdirectory)
+        entry_cache: Optional EntryCache holding CRCs from earlier downloads
+
+    Returns:
+        StoredZipLayout with the archive's exact size and validators
+    """
+    return StoredZipLayout(_iter_archive_files(base_dir, target_dir), entry_cache)
+
+
+class _ArchiveProgress:
+    """Download logging shared by the zip and tar streamers."""
+
+    def __init__(self, archive_name: str, walk: _ArchiveWalk):
+        """
+        Log the start of an archive download.
+
+        Args:
+            archive_name: Download name used in logs
+            walk: Walk feeding the archive; its running totals stand in for the size
+        """
+        try:
+            from .logger import format_download_start, get_timestamp
+        except ImportError:
+            from logger import format_download_start, get_timestamp
+
+        self.client_ip = "unknown"  # Not available in this context
+        self.archive_name = archive_name
+        self.walk = walk
+        self.bytes_processed = 0
+
+        # The size is only known once the walk completes; don't wait for it
+        print(format_download_start(get_timestamp(), self.client_ip, archive_name, "size pending"))
+        self.start_time = time.time()
+
+    def add(self, file_size: int):
+        """Account for one archived file."""
+        try:
+            from .logger import format_download_progress, get_timestamp
+        except ImportError:
+            from logger import format_download_progress, get_timestamp
+
+        previous = self.bytes_processed
+        self.bytes_processed += file_size
+
+        # Log every 10MB of data processed, against the total found so far
+        if self.bytes_processed // ARCHIVE_PROGRESS_STEP > previous // ARCHIVE_PROGRESS_STEP:
+            total_size = max(self.walk.bytes_found, self.bytes_processed)
+            percentage = min((self.bytes_processed / total_size) * 100, 99)
+            print(format_download_progress(
+                get_timestamp(),
+                self.client_ip,
+                self.bytes_processed,
+                total_size,
+                percentage
+            ))
+
+    def complete(self):
+        """Log completion."""
+        try:
+            from .logger import format_download_complete, get_timestamp
+        except ImportError:
+            from logger import format_download_complete, get_timestamp
+
+        duration = time.time() - self.start_time
+        print(format_download_complete(get_timestamp(), self.client_ip, self.archive_name, self.bytes_processed, duration))
+
+
 def stream_directory_as_zip(
     output_stream,
     base_dir: str,
     target_dir: str,
-    progress_callback=None
+    progress_callback=None,
+    compression: str = ZIP_COMPRESSION_AUTO,
+    entry_cache=None
 ) -> None:
     """
     Stream directory as zip file with optional progress callback.
@@ -260,81 +572,114 @@ def stream_directory_as_zip(
         base_dir: Shared root directory
         target_dir: Target directory to zip (may be subdirectory)
         progress_callback: Optional callback function for progress tracking
+        compression: 'auto' (store already-compressed files), 'deflate' or 'store'
+        entry_cache: Optional EntryCache of entries deflated by earlier downloads
     """
-    try:
-        from .logger import (
-            format_download_start,
-            format_download_progress,
-            format_download_complete,
-            get_timestamp
-        )
-    except ImportError:
-        from logger import (
-            format_download_start,
-            format_download_progress,
-            format_download_complete,
-            get_timestamp
-        )
+    stream_selection_as_zip(
+        output_stream, base_dir, [target_dir], f"{os.path.basename(base_dir)}.zip",
+        progress_callback, compression, entry_cache
+    )
 
-    import time
 
-    if progress_callback:
-        # Calculate total directory size (not accurate for compressed zip, but good enough for progress)
-        total_size = 0
-        for root, dirs, files in os.walk(target_dir):
-            for file in files:
-                file_path = os.path.join(root, file)
-                try:
-                    total_size += os.path.getsize(file_path)
-                except OSError:
-                    pass
+def stream_selection_as_zip(
+    output_stream,
+    base_dir: str,
+    targets: List[str],
+    archive_name: str,
+    progress_callback=None,
+    compression: str = ZIP_COMPRESSION_AUTO,
+    entry_cache=None
+) -> None:
+    """
+    Stream selected files and directories as one zip file.
 
-        client_ip = "unknown"  # Not available in this context
-        dir_name = os.path.basename(base_dir)
-        timestamp = get_timestamp()
+    Args:
+        output_stream: Output stream (HTTP response wfile)
+        base_dir: Shared root directory (arcnames are relative to it)
+        targets: Validated real paths of the files and directories to include
+        archive_name: Download name used in progress logs
+        progress_callback: Optional callback function for progress tracking
+        compression: 'auto' (store already-compressed files), 'deflate' or 'store'
+        entry_cache: Optional EntryCache of entries deflated by earlier downloads
+    """
+    stream_files_as_zip(
+        output_stream, iter_selected_files(base_dir, targets), archive_name,
+        progress_callback, compression, entry_cache
+    )
 
-        print(format_download_start(timestamp, client_ip, f"{dir_name}.zip", format_file_size(total_size)))
 
-        start_time = time.time()
-        bytes_processed = 0
+def stream_files_as_zip(
+    output_stream,
+    files: Iterable[Tuple[str, str, os.stat_result]],
+    archive_name: str,
+    progress_callback=None,
+    compression: str = ZIP_COMPRESSION_AUTO,
+    entry_cache=None
+) -> None:
+    """
+    Stream files produced by a (lazy) iterable as one zip file.
 
-    # Use streaming zip writing
-    with zipfile.ZipFile(output_stream, 'w', zipfile.ZIP_DEFLATED) as zipf:
-        for root, dirs, files in os.walk(target_dir):
-            for file in files:
-                file_path = os.path.join(root, file)
+    The iterable is consumed on a background thread, so slow producers
+    (directory walks, change detection) overlap with compression.
 
-                # Calculate relative path within zip
-                arcname = os.path.relpath(file_path, base_dir)
+    Args:
+        output_stream: Output stream (HTTP response wfile)
+        files: Iterable of (file_path, arcname, stat_result)
+        archive_name: Download name used in progress logs
+        progress_callback: Optional callback function for progress tracking
+        compression: 'auto' (store already-compressed files), 'deflate' or 'store'
+        entry_cache: Optional EntryCache of entries deflated by earlier downloads
+    """
+    walk = _ArchiveWalk(files)
+    progress = None
+    if progress_callback:
+        progress = _ArchiveProgress(archive_name, walk)
 
-                try:
-                    zipf.write(file_path, arcname)
-
-                    if progress_callback:
-                        # Update progress (approximate)
-                        try:
-                            file_size = os.path.getsize(file_path)
-                            bytes_processed += file_size
-
-                            # Log every 10MB of data processed
-                            if bytes_processed % (10 * 1024 * 1024) < 1024 * 1024 and bytes_processed > 0:
-                                percentage = min((bytes_processed / total_size) * 100, 99)
-                                timestamp = get_timestamp()
-                                print(format_download_progress(
-                                    timestamp,
-                                    client_ip,
-                                    bytes_processed,
-                                    total_size,
-                                    percentage
-                                ))
-                        except OSError:
-                            pass
+    def on_entry(entry):
+        if progress:
+            progress.add(entry.file_size)
+
+    # Stream zip as the walk proceeds, deflating upcoming files on the compression pool while writing
+    try:
+        write_zip(output_stream, walk, on_entry=on_entry, compression=compression, entry_cache=entry_cache)
+    finally:
+        walk.close()
+
+    if progress:
+        progress.complete()
 
-                except (OSError, PermissionError):
-                    # Skip files we can't read
-                    continue
 
+def stream_directory_as_tar(
+    output_stream,
+    base_dir: str,
+    target_dir: str,
+    archive_format: str = 'tar',
+    progress_callback=None
+) -> None:
+    """
+    Stream directory as a tar archive with optional progress callback.
+
+    Args:
+        output_stream: Output stream (HTTP response wfile)
+        base_dir: Shared root directory
+        target_dir: Target directory to archive (may be subdirectory)
+        archive_format: 'tar', 'tar.gz' or 'tar.zst'
+        progress_callback: Optional callback function for progress tracking
+    """
+    walk = _ArchiveWalk(_iter_archive_files(base_dir, target_dir))
+    progress = None
     if progress_callback:
-        duration = time.time() - start_time
-        timestamp = get_timestamp()
-        print(format_download_complete(timestamp, client_ip, f"{os.path.basename(base_dir)}.zip", bytes_processed, duration))
+        progress = _ArchiveProgress(f"{os.path.basename(base_dir)}.{archive_format}", walk)
+
+    def on_entry(info):
+        if progress:
+            progress.add(info.size)
+
+    compression = archive_format.partition('.')[2] or None
+    try:
+        write_tar(output_stream, walk, compression=compression, on_entry=on_entry)
+    finally:
+        walk.close()
+
+    if progress:
+        progress.complete()
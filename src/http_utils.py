@@ -0,0 +1,438 @@
+"""HTTP helpers: byte ranges, validators and multipart framing."""
+
+import hashlib
+import os
+import uuid
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Iterable, List, Optional, Tuple
+
+# Constants
+MAX_RANGES = 64  # More ranges than this is treated as abuse and ignored
+CHUNKED_BUFFER_SIZE = 64 * 1024  # Small writes are gathered into chunks of about this size
+LAST_CHUNK = b'0\r\n\r\n'  # Terminates a Transfer-Encoding: chunked body
+
+
+class RangeNotSatisfiable(Exception):
+    """Raised when a Range header is valid but no range overlaps the file."""
+
+
+def parse_range_header(range_header: Optional[str], file_size: int) -> Optional[List[Tuple[int, int]]]:
+    """
+    Parse an HTTP Range header into byte ranges.
+
+    Overlapping and adjacent ranges are coalesced; the result is sorted.
+
+    Args:
+        range_header: Raw Range header value (e.g., "bytes=0-499,-500")
+        file_size: Size of the representation in bytes
+
+    Returns:
+        List of inclusive (start, end) tuples, or None if the header is
+        absent, malformed or should be ignored (full response)
+
+    Raises:
+        RangeNotSatisfiable: If no requested range overlaps the file
+    """
+    if not range_header:
+        return None
+
+    unit, sep, spec = range_header.strip().partition('=')
+    if not sep or unit.strip().lower() != 'bytes':
+        return None
+
+    parts = [part.strip() for part in spec.split(',') if part.strip()]
+    if not parts or len(parts) > MAX_RANGES:
+        return None
+
+    ranges = []
+    for part in parts:
+        first, dash, last = part.partition('-')
+        if not dash:
+            return None
+        first, last = first.strip(), last.strip()
+
+        try:
+            if not first:
+                # Suffix range: last N bytes
+                if not last.isdigit():
+                    return None
+                suffix = int(last)
+                if suffix == 0:
+                    continue
+                start = max(file_size - suffix, 0)
+                end = file_size - 1
+            else:
+                if not first.isdigit() or (last and not last.isdigit()):
+                    return None
+                start = int(first)
+                if last and int(last) < start:
+                    return None
+                end = min(int(last), file_size - 1) if last else file_size - 1
+        except ValueError:
+            return None
+
+        if start < file_size and start <= end:
+            ranges.append((start, end))
+
+    if not ranges:
+        raise RangeNotSatisfiable()
+
+    ranges.sort()
+    merged = [ranges[0]]
+    for start, end in ranges[1:]:
+        last_start, last_end = merged[-1]
+        if start <= last_end + 1:
+            merged[-1] = (last_start, max(last_end, end))
+        else:
+            merged.append((start, end))
+
+    return merged
+
+
+def format_content_range(start: int, end: int, total: int) -> str:
+    """Format a Content-Range header value for an inclusive byte range."""
+    return f"bytes {start}-{end}/{total}"
+
+
+def make_etag(stat_result: os.stat_result) -> str:
+    """
+    Build a strong ETag from file metadata.
+
+    Args:
+        stat_result: Result of os.stat() for the file
+
+    Returns:
+        Quoted ETag string
+    """
+    return f'"{stat_result.st_ino:x}-{stat_result.st_size:x}-{stat_result.st_mtime_ns:x}"'
+
+
+def format_http_date(timestamp: float) -> str:
+    """Format a POSIX timestamp as an HTTP-date (RFC 7231)."""
+    return formatdate(timestamp, usegmt=True)
+
+
+def if_range_matches(if_range: Optional[str], etag: str, last_modified: Optional[str]) -> bool:
+    """
+    Evaluate an If-Range precondition.
+
+    Args:
+        if_range: Raw If-Range header value (None if absent)
+        etag: Current strong ETag of the file
+        last_modified: Current Last-Modified HTTP-date of the file (None if a
+            date must not validate the range)
+
+    Returns:
+        True if the Range header should be honoured
+    """
+    if not if_range:
+        return True
+
+    if_range = if_range.strip()
+    if if_range.startswith('"') or if_range.startswith('W/'):
+        # Weak validators never match for If-Range
+        return if_range == etag
+
+    return last_modified is not None and if_range == last_modified
+
+
+def body_etag(body: bytes) -> str:
+    """
+    Build a weak ETag from a response body (for responses without a file behind them).
+
+    Weak, so it covers every content coding of the body.
+
+    Args:
+        body: Uncompressed response body
+
+    Returns:
+        Quoted weak ETag string
+    """
+    return chunks_etag((body,))
+
+
+def chunks_etag(chunks: Iterable[bytes]) -> str:
+    """
+    Build the body_etag of a body produced in chunks, without joining them.
+
+    Args:
+        chunks: Pieces of the uncompressed response body
+
+    Returns:
+        Quoted weak ETag string
+    """
+    digest = hashlib.sha256()
+    for chunk in chunks:
+        digest.update(chunk)
+    return f'W/"{digest.hexdigest()[:32]}"'
+
+
+def if_none_match_matches(if_none_match: Optional[str], etags: Iterable[str]) -> bool:
+    """
+    Evaluate an If-None-Match precondition (weak comparison).
+
+    Args:
+        if_none_match: Raw If-None-Match header value (None if absent)
+        etags: Current ETags of the resource (one per representation)
+
+    Returns:
+        True if the client's copy is current and 304 should be sent
+    """
+    if not if_none_match:
+        return False
+
+    if_none_match = if_none_match.strip()
+    if if_none_match == '*':
+        return True
+
+    def opaque(tag: str) -> str:
+        tag = tag.strip()
+        return tag[2:] if tag.startswith('W/') else tag
+
+    wanted = {opaque(tag) for tag in if_none_match.split(',')}
+    return any(opaque(etag) in wanted for etag in etags)
+
+
+def if_modified_since_matches(if_modified_since: Optional[str], mtime: float) -> bool:
+    """
+    Evaluate an If-Modified-Since precondition.
+
+    Args:
+        if_modified_since: Raw If-Modified-Since header value (None if absent)
+        mtime: Current modification time of the resource (POSIX timestamp)
+
+    Returns:
+        True if the resource is unchanged since that date and 304 should be
+        sent (malformed dates are ignored)
+    """
+    if not if_modified_since:
+        return False
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        return False
+    # HTTP-dates have one-second resolution
+    return int(mtime) <= since.timestamp()
+
+
+def is_not_modified(request_headers, etags: Iterable[str], mtime: Optional[float] = None) -> bool:
+    """
+    Decide whether a GET can be answered with 304 Not Modified.
+
+    If-None-Match takes precedence; If-Modified-Since is only consulted
+    without it, and only for resources with a modification time.
+
+    Args:
+        request_headers: Request headers (mapping with .get)
+        etags: Current ETags of the resource
+        mtime: Current modification time of the resource (None if unknown)
+
+    Returns:
+        True if the client's cached copy is current
+    """
+    if_none_match = request_headers.get('If-None-Match')
+    if if_none_match:
+        return if_none_match_matches(if_none_match, etags)
+    if mtime is None:
+        return False
+    return if_modified_since_matches(request_headers.get('If-Modified-Since'), mtime)
+
+
+class MultipartByteranges:
+    """Layout of a multipart/byteranges response body."""
+
+    def __init__(self, ranges: List[Tuple[int, int]], file_size: int, content_type: str):
+        """
+        Initialize multipart layout.
+
+        Args:
+            ranges: Inclusive (start, end) byte ranges
+            file_size: Full size of the file
+            content_type: Content-Type of each part
+        """
+        self.ranges = ranges
+        self.boundary = uuid.uuid4().hex
+        self.content_type = f'multipart/byteranges; boundary={self.boundary}'
+        self._part_headers = [
+            (
+                f'\r\n--{self.boundary}\r\n'
+                f'Content-Type: {content_type}\r\n'
+                f'Content-Range: {format_content_range(start, end, file_size)}\r\n'
+                f'\r\n'
+            ).encode('ascii')
+            for start, end in ranges
+        ]
+        self.trailer = f'\r\n--{self.boundary}--\r\n'.encode('ascii')
+
+    def parts(self):
+        """Yield (part_header_bytes, start, length) for each range."""
+        for header, (start, end) in zip(self._part_headers, self.ranges):
+            yield header, start, end - start + 1
+
+    @property
+    def content_length(self) -> int:
+        """Exact size of the multipart body."""
+        data = sum(end - start + 1 for start, end in self.ranges)
+        framing = sum(len(header) for header in self._part_headers) + len(self.trailer)
+        return data + framing
+
+
+class RangeResponsePlan:
+    """Status, headers and body layout of a (possibly partial) response for a sized representation."""
+
+    def __init__(self, request_headers, size: int, etag: str, last_modified: str, filename: str,
+                 content_type: str = 'application/octet-stream', date_validates_range: bool = True):
+        """
+        Decide how to answer a request.
+
+        Range is only honoured if the client's copy is still current
+        (If-Range). A single satisfiable range yields 206 with Content-Range,
+        several ranges yield a multipart/byteranges body; anything else
+        falls back to a full 200 response.
+
+        Args:
+            request_headers: Request headers (mapping with .get)
+            size: Size of the full representation in bytes
+            etag: Strong ETag of the representation
+            last_modified: Last-Modified HTTP-date of the representation
+            filename: Name used in Content-Disposition and logs
+            content_type: Content-Type of the representation
+            date_validates_range: Whether a date If-Range may select a range; False
+                for representations whose content can change without changing
+                Last-Modified (generated archives), which then need an ETag If-Range
+
+        Raises:
+            RangeNotSatisfiable: If the requested ranges don't overlap the representation
+        """
+        self.file_size = size
+        self.etag = etag
+        self.last_modified = last_modified
+
+        self.ranges = None
+        if if_range_matches(request_headers.get('If-Range'), self.etag,
+                            self.last_modified if date_validates_range else None):
+            self.ranges = parse_range_header(request_headers.get('Range'), self.file_size)
+
+        self.multipart = None
+        content_range = None
+        if self.ranges is None:
+            self.status = 200
+            self.transfer_size = self.body_length = self.file_size
+            self.display_name = filename
+        elif len(self.ranges) == 1:
+            self.status = 206
+            start, end = self.ranges[0]
+            self.transfer_size = self.body_length = end - start + 1
+            self.display_name = f"{filename} [bytes {start}-{end}]"
+            content_range = format_content_range(start, end, self.file_size)
+        else:
+            self.status = 206
+            self.multipart = MultipartByteranges(self.ranges, self.file_size, content_type)
+            self.transfer_size = sum(end - start + 1 for start, end in self.ranges)
+            self.body_length = self.multipart.content_length
+            self.display_name = f"{filename} [{len(self.ranges)} ranges]"
+
+        self.headers = [
+            ('Content-Type', self.multipart.content_type if self.multipart else content_type),
+            ('Content-Disposition', f'attachment; filename="{filename}"'),
+            ('Content-Length', str(self.body_length)),
+            ('Accept-Ranges', 'bytes'),
+            ('ETag', self.etag),
+            ('Last-Modified', self.last_modified),
+        ]
+        if content_range:
+            self.headers.append(('Content-Range', content_range))
+
+    def segments(self):
+        """
+        Yield the body layout as (prefix_bytes, offset, length) tuples.
+
+        The final tuple may carry only a trailer (length 0).
+        """
+        if self.multipart:
+            for part_header, start, length in self.multipart.parts():
+                yield part_header, start, length
+            yield self.multipart.trailer, 0, 0
+        elif self.ranges:
+            start, end = self.ranges[0]
+            yield b'', start, end - start + 1
+        else:
+            yield b'', 0, self.file_size
+
+
+class FileResponsePlan(RangeResponsePlan):
+    """Response plan for a file on disk, validated by its stat result."""
+
+    def __init__(self, request_headers, stat_result: os.stat_result, filename: str):
+        """
+        Decide how to answer a file request.
+
+        Args:
+            request_headers: Request headers (mapping with .get)
+            stat_result: Result of os.stat() for the file
+            filename: Name used in Content-Disposition and logs
+
+        Raises:
+            RangeNotSatisfiable: If the requested ranges don't overlap the file
+        """
+        super().__init__(
+            request_headers,
+            stat_result.st_size,
+            make_etag(stat_result),
+            format_http_date(stat_result.st_mtime),
+            filename
+        )
+
+
+def chunk_frame(data: bytes) -> bytes:
+    """Frame one chunk for Transfer-Encoding: chunked."""
+    return b'%x\r\n%s\r\n' % (len(data), data)
+
+
+class ChunkedWriter:
+    """
+    File-like wrapper writing a Transfer-Encoding: chunked body.
+
+    Small writes (e.g. zip entry headers) are gathered so each chunk
+    carries at least CHUNKED_BUFFER_SIZE bytes where possible. close()
+    ends the body; a body abandoned without close() stays unterminated,
+    so the client can tell it was cut short.
+    """
+
+    def __init__(self, output, buffer_size: int = CHUNKED_BUFFER_SIZE):
+        """
+        Initialize writer.
+
+        Args:
+            output: Underlying binary stream (the connection)
+            buffer_size: Bytes gathered before a chunk is written
+        """
+        self.output = output
+        self.buffer_size = buffer_size
+        self._pending: List[bytes] = []
+        self._pending_size = 0
+
+    def write(self, data) -> int:
+        """Queue data for the next chunk, writing it once enough is gathered."""
+        length = len(data)
+        if not length:
+            return 0
+        self._pending.append(bytes(data))
+        self._pending_size += length
+        if self._pending_size >= self.buffer_size:
+            self.flush()
+        return length
+
+    def flush(self):
+        """Write gathered data as one chunk."""
+        if self._pending:
+            self.output.write(chunk_frame(b''.join(self._pending)))
+            self._pending = []
+            self._pending_size = 0
+
+    def close(self):
+        """Write the remaining data and the terminating chunk."""
+        self.flush()
+        self.output.write(LAST_CHUNK)
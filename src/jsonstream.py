@@ -0,0 +1,117 @@
+"""Incremental JSON encoding for large API responses."""
+
+import json
+from collections.abc import Iterator
+from itertools import islice
+from typing import Iterable
+
+# Constants
+JSON_CHUNK_SIZE = 64 * 1024  # Characters of JSON text buffered per written chunk
+STREAM_MIN_ITEMS = 1000  # Listings at least this long are streamed instead of encoded in one piece
+ENCODE_BATCH_SIZE = 256  # Array elements encoded per call to the C encoder
+
+_encoder = json.JSONEncoder()
+
+
+def iter_json(value) -> Iterable[str]:
+    """
+    Encode a value as JSON piece by piece.
+
+    Dicts and arrays at the top of the document are opened up; array
+    elements are handed to the C encoder ENCODE_BATCH_SIZE at a time, so
+    no more than one batch is encoded in memory at once. Any iterator
+    (e.g. a generator of entries) is encoded as an array as it is
+    consumed. The output is identical to json.dumps(value) for plain
+    values.
+
+    Args:
+        value: Value to encode
+
+    Yields:
+        Pieces of the JSON text
+    """
+    if isinstance(value, dict):
+        yield '{'
+        first = True
+        for key, item in value.items():
+            if not first:
+                yield ', '
+            first = False
+            yield _encoder.encode(str(key))
+            yield ': '
+            yield from iter_json(item)
+        yield '}'
+    elif isinstance(value, (list, tuple, Iterator)):
+        yield '['
+        items = iter(value)
+        first = True
+        while True:
+            batch = list(islice(items, ENCODE_BATCH_SIZE))
+            if not batch:
+                break
+            if not first:
+                yield ', '
+            first = False
+            # One C encoder call per batch, without its surrounding brackets
+            yield _encoder.encode(batch)[1:-1]
+        yield ']'
+    else:
+        yield _encoder.encode(value)
+
+
+def iter_json_chunks(value, chunk_size: int = JSON_CHUNK_SIZE) -> Iterable[bytes]:
+    """
+    Encode a value as UTF-8 JSON in chunks of about chunk_size bytes.
+
+    Args:
+        value: Value to encode (see iter_json)
+        chunk_size: Characters buffered before a chunk is emitted
+
+    Yields:
+        Non-empty byte chunks
+    """
+    pieces = []
+    buffered = 0
+    for piece in iter_json(value):
+        pieces.append(piece)
+        buffered += len(piece)
+        if buffered >= chunk_size:
+            yield ''.join(pieces).encode('utf-8')
+            pieces = []
+            buffered = 0
+    if pieces:
+        yield ''.join(pieces).encode('utf-8')
+
+
+def is_reencodable(data) -> bool:
+    """
+    Whether a payload can be encoded more than once (e.g. to hash it before streaming it).
+
+    Args:
+        data: Response payload
+
+    Returns:
+        False if a top-level value is an iterator, which is consumed by encoding
+    """
+    return not (isinstance(data, dict) and any(isinstance(value, Iterator) for value in data.values()))
+
+
+def should_stream_json(data) -> bool:
+    """
+    Whether a response payload is a listing large enough to stream.
+
+    Args:
+        data: Response payload
+
+    Returns:
+        True if a top-level value is an iterator or a list of at least STREAM_MIN_ITEMS items
+    """
+    if not isinstance(data, dict):
+        return False
+    for value in data.values():
+        if isinstance(value, Iterator):
+            return True
+        if isinstance(value, (list, tuple)) and len(value) >= STREAM_MIN_ITEMS:
+            return True
+    return False
+
@@ -0,0 +1,304 @@
+"""In-memory cache of directory listings for /api/tree, invalidated by inotify on Linux."""
+
+import ctypes
+import os
+import select
+import struct
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Optional
+
+try:
+    from .directory_handler import get_directory_structure
+except ImportError:
+    from directory_handler import get_directory_structure
+
+# Constants
+DEFAULT_MAX_ENTRIES = 1000000  # Listed items kept in memory across all cached directories
+FALLBACK_MAX_AGE = 5.0  # Seconds before an unwatched listing is rescanned to pick up file size changes
+
+# inotify(7)
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_CLOEXEC = 0o2000000
+LISTING_EVENTS = (IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO |
+                  IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF)
+
+_EVENT_HEADER = struct.Struct('iIII')  # wd, mask, cookie, len
+_EVENT_BUFFER_SIZE = 64 * 1024
+
+
+class InotifyWatcher:
+    """
+    Minimal inotify binding (ctypes) that reports which watched directory changed.
+
+    A background thread reads events and calls on_change(path) for the
+    watched directory they belong to, or on_change(None) when the kernel
+    queue overflowed and anything may have changed.
+    """
+
+    def __init__(self, on_change: Callable[[Optional[str]], None]):
+        """
+        Initialize watcher.
+
+        Args:
+            on_change: Called from the reader thread with the changed directory
+
+        Raises:
+            OSError: If inotify is not available
+        """
+        # The C library is already loaded into the interpreter
+        self._libc = ctypes.CDLL(None, use_errno=True)
+        self._libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self._libc.inotify_rm_watch.argtypes = [ctypes.c_int, ctypes.c_int]
+
+        self.fd = self._libc.inotify_init1(IN_CLOEXEC)
+        if self.fd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno))
+
+        self._on_change = on_change
+        self._paths: Dict[int, str] = {}
+        self._lock = threading.Lock()
+        self._wake_r, self._wake_w = os.pipe()
+        # Started by the first add() so idle servers don't run a reader thread
+        self._thread: Optional[threading.Thread] = None
+
+    def add(self, path: str) -> Optional[int]:
+        """
+        Watch a directory.
+
+        Args:
+            path: Directory to watch
+
+        Returns:
+            Watch descriptor, or None if the watch couldn't be added (e.g. the
+            max_user_watches limit is reached)
+        """
+        with self._lock:
+            wd = self._libc.inotify_add_watch(self.fd, os.fsencode(path), LISTING_EVENTS | IN_ONLYDIR)
+            if wd < 0:
+                return None
+            self._paths[wd] = path
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='quick-share-inotify', daemon=True)
+                self._thread.start()
+            return wd
+
+    def remove(self, wd: int):
+        """Stop watching a directory."""
+        with self._lock:
+            if self._paths.pop(wd, None) is not None:
+                self._libc.inotify_rm_watch(self.fd, wd)
+
+    def _run(self):
+        """Reader thread body."""
+        while True:
+            try:
+                readable, _, _ = select.select([self.fd, self._wake_r], [], [])
+            except (OSError, ValueError):
+                return
+            if self._wake_r in readable:
+                return
+            try:
+                data = os.read(self.fd, _EVENT_BUFFER_SIZE)
+            except OSError:
+                return
+
+            changed = set()
+            overflow = False
+            offset = 0
+            while offset + _EVENT_HEADER.size <= len(data):
+                wd, mask, _, name_len = _EVENT_HEADER.unpack_from(data, offset)
+                offset += _EVENT_HEADER.size + name_len
+                if mask & IN_Q_OVERFLOW:
+                    overflow = True
+                    continue
+                with self._lock:
+                    path = self._paths.get(wd)
+                    if mask & IN_IGNORED:
+                        # Directory deleted or unmounted: the kernel dropped the watch
+                        self._paths.pop(wd, None)
+                if path is not None:
+                    changed.add(path)
+
+            if overflow:
+                self._on_change(None)
+            for path in changed:
+                self._on_change(path)
+
+    def close(self):
+        """Stop the reader thread and release the inotify instance."""
+        if self._thread is not None:
+            os.write(self._wake_w, b'x')
+            self._thread.join()
+        os.close(self.fd)
+        os.close(self._wake_r)
+        os.close(self._wake_w)
+
+
+def inotify_available() -> bool:
+    """Whether directory changes can be watched with inotify on this platform."""
+    return sys.platform.startswith('linux')
+
+
+class _Listing:
+    """A cached listing and how to tell whether it is still current."""
+
+    __slots__ = ('data', 'size', 'wd', 'validator', 'created')
+
+    def __init__(self, data: dict, wd: Optional[int], validator: Optional[tuple]):
+        self.data = data
+        self.size = max(len(data['items']), 1)
+        self.wd = wd
+        self.validator = validator
+        self.created = time.monotonic()
+
+
+class ListingCache:
+    """
+    LRU cache of get_directory_structure() results keyed by real path.
+
+    On Linux every cached directory is watched with inotify and its listing
+    is dropped as soon as an entry is created, deleted, renamed or modified,
+    so repeat listings never touch the disk. Elsewhere, or when the watch
+    limit is reached, a listing is reused while the directory's mtime is
+    unchanged and it is younger than FALLBACK_MAX_AGE (the directory mtime
+    does not change when a file inside is rewritten). The cache is bounded
+    by the total number of listed items.
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, use_inotify: Optional[bool] = None):
+        """
+        Initialize cache.
+
+        Args:
+            max_entries: Upper bound of the listed items kept across all directories
+            use_inotify: Watch directories with inotify (default: when available)
+        """
+        self.max_entries = max_entries
+        self._listings: 'OrderedDict[str, _Listing]' = OrderedDict()
+        self._pending: Dict[str, object] = {}
+        self._total = 0
+        self._lock = threading.Lock()
+
+        self._watcher: Optional[InotifyWatcher] = None
+        if use_inotify is None:
+            use_inotify = inotify_available()
+        if use_inotify:
+            try:
+                self._watcher = InotifyWatcher(self._invalidate)
+            except (OSError, AttributeError):
+                # No inotify (old kernel, non-glibc libc, seccomp): use the fallback
+                self._watcher = None
+
+    @property
+    def watching(self) -> bool:
+        """Whether listings are invalidated by inotify."""
+        return self._watcher is not None
+
+    def get(self, base_dir: str, real_path: str) -> dict:
+        """
+        Listing of a directory, from memory when it is known to be current.
+
+        Args:
+            base_dir: Shared root directory
+            real_path: Validated real path of the directory
+
+        Returns:
+            Result of get_directory_structure (shared: callers must not modify it)
+        """
+        with self._lock:
+            listing = self._listings.get(real_path)
+            if listing is not None:
+                if self._is_current(real_path, listing):
+                    self._listings.move_to_end(real_path)
+                    return listing.data
+                self._drop(real_path)
+
+            # Watch before scanning so no change slips in between
+            wd = self._watcher.add(real_path) if self._watcher else None
+            token = object()
+            self._pending[real_path] = token
+
+        validator = None if wd is not None else _directory_validator(real_path)
+        data = get_directory_structure(base_dir, real_path)
+
+        with self._lock:
+            if self._pending.get(real_path) is token:
+                # No change reported while scanning
+                del self._pending[real_path]
+                if real_path not in self._listings and len(data['items']) <= self.max_entries:
+                    self._store(real_path, _Listing(data, wd, validator))
+                    return data
+            if wd is not None and real_path not in self._listings and real_path not in self._pending:
+                self._watcher.remove(wd)
+        return data
+
+    def _is_current(self, real_path: str, listing: _Listing) -> bool:
+        """Validate an unwatched listing (watched ones are dropped on change)."""
+        if listing.wd is not None:
+            return True
+        if time.monotonic() - listing.created > FALLBACK_MAX_AGE:
+            return False
+        return _directory_validator(real_path) == listing.validator
+
+    def _store(self, real_path: str, listing: _Listing):
+        """Insert a listing and evict least recently used ones over the budget (lock held)."""
+        self._listings[real_path] = listing
+        self._total += listing.size
+        while self._total > self.max_entries and self._listings:
+            oldest = next(iter(self._listings))
+            self._drop(oldest)
+
+    def _drop(self, real_path: str):
+        """Forget a listing and its watch (lock held)."""
+        listing = self._listings.pop(real_path, None)
+        if listing is None:
+            return
+        self._total -= listing.size
+        if listing.wd is not None and self._watcher:
+            self._watcher.remove(listing.wd)
+
+    def _invalidate(self, real_path: Optional[str]):
+        """Drop the listing of a changed directory, or everything (None)."""
+        with self._lock:
+            if real_path is None:
+                for path in list(self._listings):
+                    self._drop(path)
+                self._pending.clear()
+                return
+            self._drop(real_path)
+            self._pending.pop(real_path, None)
+
+    def clear(self):
+        """Drop every listing."""
+        self._invalidate(None)
+
+    def close(self):
+        """Drop every listing and stop watching."""
+        self.clear()
+        if self._watcher:
+            self._watcher.close()
+            self._watcher = None
+
+
+def _directory_validator(real_path: str) -> Optional[tuple]:
+    """Identity and mtime of a directory (None if it can't be stat'ed)."""
+    try:
+        stat_result = os.stat(real_path)
+    except OSError:
+        return None
+    return (stat_result.st_ino, stat_result.st_mtime_ns)
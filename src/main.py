@@ -6,7 +6,7 @@ from typing import Tuple, Optional
 from .cli import parse_arguments, validate_arguments
 from .network import get_local_ip, get_all_lan_ips
 from .server import FileShareServer, DirectoryShareServer, find_available_port
-from .utils import format_file_size, parse_duration
+from .utils import format_file_size, parse_duration, parse_size
 from . import logger
 
 
@@ -162,6 +162,11 @@ def main() -> None:
         from .updater import run_update
         sys.exit(run_update())
 
+    from .cli import is_pull_command
+    if is_pull_command():
+        from .pull import run_pull
+        sys.exit(run_pull())
+
     try:
         # Parse and validate arguments
         args = parse_arguments()
@@ -215,15 +220,30 @@ def main() -> None:
         timeout_seconds = parse_duration(args.timeout)
         server_timeout_minutes = timeout_seconds / 60
 
+        # Select server implementation for the requested engine
+        if args.engine == "async":
+            from .async_server import AsyncFileShareServer, AsyncDirectoryShareServer
+            file_server_cls, directory_server_cls = AsyncFileShareServer, AsyncDirectoryShareServer
+        else:
+            file_server_cls, directory_server_cls = FileShareServer, DirectoryShareServer
+
+        # Bounded worker pool (--engine pool) and multi-process (--workers) options
+        server_options = {}
+        if args.engine == "pool":
+            server_options = {'pool_workers': args.threads, 'pool_queue': args.queue}
+        if args.workers > 1:
+            server_options['workers'] = args.workers
+
         # Dispatch to appropriate server based on path type
         if path_type == "file":
             # File sharing logic
             file_size_bytes = resolved_path.stat().st_size
 
-            server = FileShareServer(
+            server = file_server_cls(
                 file_path=str(resolved_path),
                 port=port,
-                timeout_minutes=server_timeout_minutes
+                timeout_minutes=server_timeout_minutes,
+                **server_options
             )
 
             # Print startup message for file
@@ -240,12 +260,15 @@ def main() -> None:
 
         elif path_type == "directory":
             # Directory sharing logic
-            server = DirectoryShareServer(
+            server = directory_server_cls(
                 directory_path=str(resolved_path),
                 port=port,
                 timeout_minutes=server_timeout_minutes,
                 max_sessions=args.max_downloads,  # Reuse max_downloads as max_sessions
-                legacy_mode=args.legacy
+                legacy_mode=args.legacy,
+                zip_compression=args.zip_compression,
+                zip_cache_size=parse_size(args.zip_cache),
+                **server_options
             )
 
             # Print startup message for directory
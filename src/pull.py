@@ -0,0 +1,506 @@
+"""Quick Share pull client - Incrementally sync a shared directory or file into a local folder."""
+
+import hashlib
+import http.cookiejar
+import json
+import os
+import tempfile
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+import zipfile
+from typing import Dict, List, Optional, Set, Tuple
+
+from .sync import HASH_ALGORITHM, file_digest
+from .blockdelta import FILE_ALGORITHM, match_blocks, missing_runs
+from .utils import format_file_size
+
+# Constants
+STATE_FILENAME = '.quick-share-sync.json'  # Hashes of local files, kept in the destination root
+TEMP_PREFIX = '.quick-share-'
+COPY_BLOCK_SIZE = 1024 * 1024
+PULL_TIMEOUT = 60  # Seconds to wait for the server between reads
+MANIFEST_PATH = '/api/manifest'
+DELTA_PATH = '/api/delta'
+SIGNATURE_PATH = '/api/signature'
+BLOCKS_PATH = '/api/blocks'
+
+
+class PullError(Exception):
+    """Error pulling a shared directory."""
+    pass
+
+
+class PullHTTPError(PullError):
+    """The server answered with an HTTP error."""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(f"Server returned {status}: {message}")
+        self.status = status
+
+
+def split_share_url(url: str) -> Tuple[str, str]:
+    """
+    Split a share URL into the server root and the shared directory path.
+
+    Args:
+        url: URL of a directory share, e.g. http://192.168.1.10:8000/docs/
+
+    Returns:
+        Tuple of (server root URL, directory path within the share)
+
+    Raises:
+        PullError: If the URL is not an http(s) URL
+    """
+    parsed = urllib.parse.urlparse(url)
+    if parsed.scheme not in ('http', 'https') or not parsed.netloc:
+        raise PullError(f"Not an http(s) URL: {url}")
+    path = urllib.parse.unquote(parsed.path) or '/'
+    return f"{parsed.scheme}://{parsed.netloc}", path
+
+
+def load_state(dest: str) -> Dict[str, dict]:
+    """Read the hashes recorded by the previous pull (empty if there is none)."""
+    try:
+        with open(os.path.join(dest, STATE_FILENAME), 'r', encoding='utf-8') as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return state if isinstance(state, dict) else {}
+
+
+def save_state(dest: str, state: Dict[str, dict]) -> None:
+    """Atomically record the hashes of the local files for the next pull."""
+    fd, temp_path = tempfile.mkstemp(dir=dest, prefix=TEMP_PREFIX, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(state, f)
+        os.replace(temp_path, os.path.join(dest, STATE_FILENAME))
+    except OSError:
+        try:
+            os.unlink(temp_path)
+        except OSError:
+            pass
+
+
+def _is_internal(rel_path: str) -> bool:
+    """Files the client keeps for itself and never syncs."""
+    name = rel_path.rsplit('/', 1)[-1]
+    return rel_path == STATE_FILENAME or (name.startswith(TEMP_PREFIX) and name.endswith('.tmp'))
+
+
+def scan_local(dest: str, state: Dict[str, dict]) -> Tuple[List[dict], Dict[str, dict]]:
+    """
+    Build the manifest of the local copy.
+
+    Files whose size and mtime match the recorded state are not hashed again.
+
+    Args:
+        dest: Local directory
+        state: Records of the previous pull, keyed by manifest path
+
+    Returns:
+        Tuple of (manifest entries, refreshed state)
+    """
+    manifest = []
+    new_state = {}
+    for root, _, filenames in os.walk(dest):
+        for filename in filenames:
+            file_path = os.path.join(root, filename)
+            rel_path = os.path.relpath(file_path, dest).replace(os.sep, '/')
+            if _is_internal(rel_path):
+                continue
+            try:
+                stat_result = os.stat(file_path)
+                record = state.get(rel_path)
+                if (record and record.get('size') == stat_result.st_size
+                        and record.get('mtime_ns') == stat_result.st_mtime_ns):
+                    digest = record[HASH_ALGORITHM]
+                else:
+                    digest = file_digest(file_path)
+            except (OSError, KeyError):
+                continue
+            new_state[rel_path] = {
+                'size': stat_result.st_size,
+                'mtime_ns': stat_result.st_mtime_ns,
+                HASH_ALGORITHM: digest,
+            }
+            manifest.append({
+                'path': rel_path,
+                'size': stat_result.st_size,
+                'mtime': stat_result.st_mtime,
+                HASH_ALGORITHM: digest,
+            })
+    return manifest, new_state
+
+
+def _local_target(dest: str, name: str) -> str:
+    """
+    Map a zip entry name to a path inside dest.
+
+    Raises:
+        PullError: If the name would escape dest or overwrite client state
+    """
+    parts = name.split('/')
+    if name.startswith('/') or any(part in ('', '.', '..') or '\\' in part or ':' in part for part in parts):
+        raise PullError(f"Refusing unsafe path from server: {name}")
+    if _is_internal(name):
+        raise PullError(f"Refusing to overwrite {name}")
+    return os.path.join(dest, *parts)
+
+
+def extract_delta(archive, dest: str, state: Dict[str, dict]) -> List[str]:
+    """
+    Write the files of a delta zip into dest.
+
+    Each file is written to a temporary file and renamed into place, so an
+    interrupted pull never leaves a half-written file behind.
+
+    Args:
+        archive: Seekable file object holding the zip
+        dest: Local directory
+        state: Records to update with the written files
+
+    Returns:
+        Manifest paths of the written files
+
+    Raises:
+        PullError: If the zip contains unsafe paths
+    """
+    written = []
+    with zipfile.ZipFile(archive) as zf:
+        for info in zf.infolist():
+            if info.is_dir():
+                continue
+            target = _local_target(dest, info.filename)
+            parent = os.path.dirname(target)
+            os.makedirs(parent, exist_ok=True)
+
+            digest = hashlib.new(HASH_ALGORITHM)
+            fd, temp_path = tempfile.mkstemp(dir=parent, prefix=TEMP_PREFIX, suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'wb') as out, zf.open(info) as src:
+                    while True:
+                        block = src.read(COPY_BLOCK_SIZE)
+                        if not block:
+                            break
+                        digest.update(block)
+                        out.write(block)
+                mtime = time.mktime(info.date_time + (0, 0, -1))
+                os.utime(temp_path, (mtime, mtime))
+                os.replace(temp_path, target)
+            except BaseException:
+                try:
+                    os.unlink(temp_path)
+                except OSError:
+                    pass
+                raise
+
+            stat_result = os.stat(target)
+            state[info.filename] = {
+                'size': stat_result.st_size,
+                'mtime_ns': stat_result.st_mtime_ns,
+                HASH_ALGORITHM: digest.hexdigest(),
+            }
+            written.append(info.filename)
+    return written
+
+
+def remove_extra_files(dest: str, server_paths: Set[str], state: Dict[str, dict]) -> List[str]:
+    """
+    Delete local files the server no longer has, and directories left empty.
+
+    Args:
+        dest: Local directory
+        server_paths: Manifest paths present on the server
+        state: Records to drop the deleted files from
+
+    Returns:
+        Manifest paths of the deleted files
+    """
+    removed = []
+    for root, _, filenames in os.walk(dest, topdown=False):
+        for filename in filenames:
+            file_path = os.path.join(root, filename)
+            rel_path = os.path.relpath(file_path, dest).replace(os.sep, '/')
+            if _is_internal(rel_path) or rel_path in server_paths:
+                continue
+            try:
+                os.unlink(file_path)
+            except OSError:
+                continue
+            state.pop(rel_path, None)
+            removed.append(rel_path)
+        if root != dest:
+            try:
+                os.rmdir(root)
+            except OSError:
+                # Not empty
+                pass
+    return removed
+
+
+class PullClient:
+    """Talks to a quick-share directory server, reusing one session for all requests."""
+
+    def __init__(self, url: str, timeout: float = PULL_TIMEOUT):
+        self.base_url, self.path = split_share_url(url)
+        self.timeout = timeout
+        # The session cookie makes the manifest and delta requests count as one download
+        self.opener = urllib.request.build_opener(
+            urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar())
+        )
+
+    def _open(self, endpoint: str, query: str = '', body: bytes = None):
+        url = self.base_url + endpoint + (f'?{query}' if query else '')
+        request = urllib.request.Request(url, data=body)
+        if body is not None:
+            request.add_header('Content-Type', 'application/json')
+        try:
+            return self.opener.open(request, timeout=self.timeout)
+        except urllib.error.HTTPError as e:
+            try:
+                message = json.loads(e.read().decode('utf-8'))['error']
+            except (ValueError, KeyError, TypeError):
+                message = e.reason
+            raise PullHTTPError(e.code, message)
+        except (urllib.error.URLError, OSError) as e:
+            raise PullError(f"Cannot reach {self.base_url}: {e}")
+
+    def fetch_manifest(self, with_hashes: bool = True) -> List[dict]:
+        """Fetch the server's manifest of the shared directory."""
+        query = urllib.parse.urlencode({'path': self.path, 'hash': '1' if with_hashes else '0'})
+        with self._open(MANIFEST_PATH, query) as response:
+            try:
+                return json.loads(response.read().decode('utf-8'))['files']
+            except (ValueError, KeyError) as e:
+                raise PullError(f"Invalid manifest from server: {e}")
+
+    def fetch_delta(self, local_manifest: List[dict]):
+        """
+        Download the zip of files that differ from the local manifest.
+
+        Returns:
+            Temporary file holding the zip, positioned at its start
+        """
+        body = json.dumps({'path': self.path, 'files': local_manifest}).encode('utf-8')
+        spool = tempfile.TemporaryFile()
+        try:
+            with self._open(DELTA_PATH, body=body) as response:
+                while True:
+                    block = response.read(COPY_BLOCK_SIZE)
+                    if not block:
+                        break
+                    spool.write(block)
+        except BaseException:
+            spool.close()
+            raise
+        spool.seek(0)
+        return spool
+
+    def fetch_signature(self) -> Optional[dict]:
+        """
+        Fetch the block signature of a single-file share.
+
+        Returns:
+            Signature dict, or None if the server shares a directory
+        """
+        try:
+            response = self._open(SIGNATURE_PATH)
+        except PullHTTPError as e:
+            if e.status == 404:
+                return None
+            raise
+        with response:
+            try:
+                signature = json.loads(response.read().decode('utf-8'))
+            except ValueError as e:
+                raise PullError(f"Invalid signature from server: {e}")
+        if not all(key in signature for key in ('filename', 'etag', 'block_size', 'size', 'weak', 'strong')):
+            raise PullError("Invalid signature from server")
+        return signature
+
+    def fetch_blocks(self, signature: dict, runs: List[List[int]]):
+        """
+        Request runs of blocks of the shared file.
+
+        Returns:
+            Open response streaming the blocks back to back
+        """
+        body = json.dumps({
+            'etag': signature['etag'],
+            'block_size': signature['block_size'],
+            'runs': runs,
+        }).encode('utf-8')
+        return self._open(BLOCKS_PATH, body=body)
+
+
+def _read_exactly(response, length: int) -> bytes:
+    """Read exactly length bytes of a blocks response."""
+    data = response.read(length)
+    while len(data) < length:
+        more = response.read(length - len(data))
+        if not more:
+            raise PullError("Connection closed before all changed blocks arrived")
+        data += more
+    return data
+
+
+def pull_file(client: PullClient, signature: dict, dest: str) -> bool:
+    """
+    Bring the local copy of a shared file up to date, downloading only changed blocks.
+
+    Blocks the local copy (dest/<filename>) already holds, wherever they
+    moved to, are copied from it; the rest are fetched from /api/blocks.
+    The result is checked against the server's whole-file hash before it
+    replaces the local copy.
+
+    Args:
+        client: Client of the file share
+        signature: Its signature (see PullClient.fetch_signature)
+        dest: Local directory (created if missing)
+
+    Returns:
+        True if the local copy was written, False if it was already current
+
+    Raises:
+        PullError: If the server misbehaves or the result doesn't verify
+    """
+    filename = signature['filename']
+    if not filename or '/' in filename or '\\' in filename or filename in ('.', '..') or _is_internal(filename):
+        raise PullError(f"Refusing unsafe file name from server: {filename}")
+    os.makedirs(dest, exist_ok=True)
+    target = os.path.join(dest, filename)
+
+    block_size = signature['block_size']
+    block_count = len(signature['weak'])
+    if os.path.isfile(target):
+        sources = match_blocks(target, signature)
+    else:
+        sources = [None] * block_count
+    runs = missing_runs(sources)
+
+    in_place = all(source == index * block_size for index, source in enumerate(sources))
+    if in_place and os.path.isfile(target) and os.path.getsize(target) == signature['size']:
+        # Every block matched where it already is
+        return False
+
+    changed = sum(count for _, count in runs)
+    changed_bytes = sum(min(count * block_size, signature['size'] - first * block_size) for first, count in runs)
+    print(f"{filename}: {changed}/{block_count} blocks changed, "
+          f"downloading {format_file_size(changed_bytes)} of {format_file_size(signature['size'])}")
+
+    digest = hashlib.new(FILE_ALGORITHM)
+    fd, temp_path = tempfile.mkstemp(dir=dest, prefix=TEMP_PREFIX, suffix='.tmp')
+    response = None
+    old = None
+    try:
+        with os.fdopen(fd, 'wb') as out:
+            if runs:
+                response = client.fetch_blocks(signature, runs)
+            if changed < block_count:
+                old = open(target, 'rb')
+            for index, source in enumerate(sources):
+                length = min(block_size, signature['size'] - index * block_size)
+                if source is None:
+                    data = _read_exactly(response, length)
+                else:
+                    old.seek(source)
+                    data = old.read(length)
+                digest.update(data)
+                out.write(data)
+
+        if digest.hexdigest() != signature.get(FILE_ALGORITHM):
+            raise PullError(f"{filename} does not match the server's checksum after reconstruction, pull again")
+        os.utime(temp_path, (signature['mtime'], signature['mtime']))
+        os.replace(temp_path, target)
+    except BaseException:
+        try:
+            os.unlink(temp_path)
+        except OSError:
+            pass
+        raise
+    finally:
+        if old is not None:
+            old.close()
+        if response is not None:
+            response.close()
+    return True
+
+
+def pull(url: str, dest: str, delete: bool = False) -> Tuple[List[str], List[str]]:
+    """
+    Bring dest up to date with a shared directory or file.
+
+    A shared file is kept as dest/<filename> and updated block by block.
+
+    Args:
+        url: URL of the shared directory or file
+        dest: Local directory (created if missing)
+        delete: Also delete local files that are not on the server (directory shares)
+
+    Returns:
+        Tuple of (written paths, deleted paths)
+
+    Raises:
+        PullError: If the server can't be reached or sends something unusable
+    """
+    client = PullClient(url)
+    signature = client.fetch_signature()
+    if signature is not None:
+        written = pull_file(client, signature, dest)
+        return ([signature['filename']] if written else []), []
+
+    os.makedirs(dest, exist_ok=True)
+
+    state = load_state(dest)
+    local_manifest, state = scan_local(dest, state)
+
+    with client.fetch_delta(local_manifest) as archive:
+        try:
+            written = extract_delta(archive, dest, state)
+        except zipfile.BadZipFile as e:
+            raise PullError(f"Invalid zip from server: {e}")
+
+    removed = []
+    if delete:
+        server_paths = {item['path'] for item in client.fetch_manifest(with_hashes=False)}
+        removed = remove_extra_files(dest, server_paths, state)
+
+    save_state(dest, state)
+    return written, removed
+
+
+def run_pull(args: list = None) -> int:
+    """
+    Entry point for pull command.
+
+    Args:
+        args: Command line arguments (default: sys.argv[1:])
+
+    Returns:
+        Exit code (0 for success, 1 for error)
+    """
+    from .cli import parse_pull_arguments
+
+    try:
+        parsed = parse_pull_arguments(args)
+    except SystemExit:
+        return 1
+
+    try:
+        written, removed = pull(parsed.url, parsed.dest, delete=parsed.delete)
+    except (PullError, OSError) as e:
+        print(f"❌ {e}")
+        return 1
+
+    for rel_path in written:
+        print(f"  + {rel_path}")
+    for rel_path in removed:
+        print(f"  - {rel_path}")
+    if written or removed:
+        print(f"✅ {len(written)} file(s) updated, {len(removed)} removed in {parsed.dest}")
+    else:
+        print(f"✅ {parsed.dest} is already up to date")
+    return 0
@@ -1,28 +1,107 @@
 import socket
 import os
+import queue
+import select
+import stat
 import threading
 import time
 import json
 from http.server import HTTPServer, BaseHTTPRequestHandler
 from socketserver import ThreadingMixIn
-from typing import Optional, Tuple
+from typing import Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlparse, parse_qs
 
 try:
     from .security import validate_request_path, validate_directory_path
-    from .directory_handler import generate_directory_listing_html, stream_directory_as_zip, get_directory_structure, generate_spa_html
+    from .directory_handler import (
+        generate_directory_listing_html, stream_directory_as_zip, stream_directory_as_tar, build_stored_zip_layout,
+        stream_files_as_zip, iter_selected_files, get_directory_structure, generate_spa_html,
+        paginate_directory_structure
+    )
+    from .transfer import send_file
+    from .http_utils import (
+        RangeNotSatisfiable, RangeResponsePlan, FileResponsePlan, format_http_date, make_etag, if_none_match_matches,
+        ChunkedWriter, body_etag, chunks_etag, is_not_modified
+    )
+    from .workers import WorkerCoordinator, WorkerProcesses
+    from .zipstream import ZIP_COMPRESSION_AUTO, ZIP_COMPRESSION_STORE, ZIP_COMPRESSION_MODES
+    from .tarstream import TAR_FORMATS, zstd_available
+    from .zipcache import EntryCache, DEFAULT_CACHE_SIZE
+    from .listing_cache import ListingCache
+    from .jsonstream import iter_json_chunks, should_stream_json, is_reencodable
+    from .content_encoding import StaticPayload, negotiate_body, choose_encoding, iter_compressed
+    from .sync import HashCache, HASH_ALGORITHM, build_manifest, iter_changed_files
+    from .textpreview import (
+        LineIndexCache, EncodingCache, NotTextError, file_encoding, read_file, read_byte_window, read_tail,
+        read_lines, MAX_PREVIEW_SIZE, DEFAULT_WINDOW_SIZE, DEFAULT_LINE_COUNT
+    )
+    from .blockdelta import (
+        SignatureCache, BlockResponsePlan, parse_block_runs, MIN_BLOCK_SIZE, MAX_BLOCK_SIZE
+    )
 except ImportError:
     from security import validate_request_path, validate_directory_path
-    from directory_handler import generate_directory_listing_html, stream_directory_as_zip, get_directory_structure, generate_spa_html
+    from directory_handler import (
+        generate_directory_listing_html, stream_directory_as_zip, stream_directory_as_tar, build_stored_zip_layout,
+        stream_files_as_zip, iter_selected_files, get_directory_structure, generate_spa_html,
+        paginate_directory_structure
+    )
+    from transfer import send_file
+    from http_utils import (
+        RangeNotSatisfiable, RangeResponsePlan, FileResponsePlan, format_http_date, make_etag, if_none_match_matches,
+        ChunkedWriter, body_etag, chunks_etag, is_not_modified
+    )
+    from workers import WorkerCoordinator, WorkerProcesses
+    from zipstream import ZIP_COMPRESSION_AUTO, ZIP_COMPRESSION_STORE, ZIP_COMPRESSION_MODES
+    from tarstream import TAR_FORMATS, zstd_available
+    from zipcache import EntryCache, DEFAULT_CACHE_SIZE
+    from listing_cache import ListingCache
+    from jsonstream import iter_json_chunks, should_stream_json, is_reencodable
+    from content_encoding import StaticPayload, negotiate_body, choose_encoding, iter_compressed
+    from sync import HashCache, HASH_ALGORITHM, build_manifest, iter_changed_files
+    from textpreview import (
+        LineIndexCache, EncodingCache, NotTextError, file_encoding, read_file, read_byte_window, read_tail,
+        read_lines, MAX_PREVIEW_SIZE, DEFAULT_WINDOW_SIZE, DEFAULT_LINE_COUNT
+    )
+    from blockdelta import (
+        SignatureCache, BlockResponsePlan, parse_block_runs, MIN_BLOCK_SIZE, MAX_BLOCK_SIZE
+    )
 
 # Constants
 CHUNK_SIZE = 8192  # 8KB chunks for file streaming
+PROGRESS_LOG_INTERVAL = CHUNK_SIZE * 10  # Log progress every ~80KB transferred
+DEFAULT_POOL_WORKERS = 16
+DEFAULT_POOL_QUEUE = 64
+RETRY_AFTER_SECONDS = 5  # Retry-After hint sent with 503 when the pool is saturated
+KEEPALIVE_TIMEOUT = 15  # Seconds an idle persistent connection waits for its next request
+KEEPALIVE_MAX_REQUESTS = 100  # Requests served on one connection before it is closed
+KEEPALIVE_POLL_INTERVAL = 0.5  # Seconds between checks for shutdown or queued connections while idle
+ARCHIVE_FORMATS = ('zip',) + TAR_FORMATS
+TAR_CONTENT_TYPES = {
+    'tar': 'application/x-tar',
+    'tar.gz': 'application/gzip',
+    'tar.zst': 'application/zstd',
+}
+ZIP_SELECTION_PATH = '/api/zip'
+MANIFEST_PATH = '/api/manifest'
+DELTA_PATH = '/api/delta'
+MAX_ZIP_SELECTION_BODY = 1024 * 1024  # Largest accepted POST /api/zip body
+MAX_DELTA_BODY = 128 * 1024 * 1024  # Largest accepted POST /api/delta body (client manifest)
+SIGNATURE_PATH = '/api/signature'
+BLOCKS_PATH = '/api/blocks'
+MAX_BLOCKS_BODY = 64 * 1024 * 1024  # Largest accepted POST /api/blocks body (block runs)
+MAX_TREE_PAGE_SIZE = 10000  # Largest accepted /api/tree limit (and the page size when only a cursor is given)
+CONTENT_WINDOW_PARAMS = ('offset', 'length', 'tail', 'line', 'count')  # /api/content previews a window if given
+POSTED_BODY_LIMITS = {
+    ZIP_SELECTION_PATH: MAX_ZIP_SELECTION_BODY,
+    DELTA_PATH: MAX_DELTA_BODY,
+}
 
 
 class DownloadProgressTracker:
-    """Track download progress for a single client connection.
+    """Track download progress for a single logical download.
 
-    This class is thread-safe as each connection gets its own instance.
-    No shared state means no locks needed.
+    Usually each connection gets its own instance, but the connections of a
+    segmented download share one, so updates are serialised with a lock.
     """
 
     def __init__(self, client_ip: str, filename: str, file_size: int):
@@ -40,20 +119,31 @@ class DownloadProgressTracker:
         self.bytes_transferred = 0
         self.start_time = time.time()
         self.is_complete = False
+        self._next_log_at = PROGRESS_LOG_INTERVAL
+        self._lock = threading.Lock()
 
     def update(self, chunk_size: int) -> bool:
         """
         Update progress after each chunk.
 
+        Chunks may be anything from an 8KB read to a multi-megabyte sendfile
+        slice, so logging is driven by crossing interval boundaries rather
+        than by chunk counts.
+
         Args:
             chunk_size: Size of transferred chunk
 
         Returns:
-            True if should log progress (every N chunks to avoid spam)
+            True if should log progress (every ~80KB to avoid spam)
         """
-        self.bytes_transferred += chunk_size
-        # Log every 10 chunks (~80KB) to avoid excessive output
-        return self.bytes_transferred % (CHUNK_SIZE * 10) == 0 or self.bytes_transferred == self.file_size
+        with self._lock:
+            self.bytes_transferred += chunk_size
+            if self.bytes_transferred >= self._next_log_at:
+                # Skip over every boundary this chunk crossed
+                intervals = self.bytes_transferred // PROGRESS_LOG_INTERVAL
+                self._next_log_at = (intervals + 1) * PROGRESS_LOG_INTERVAL
+                return True
+            return self.bytes_transferred == self.file_size
 
     def complete(self):
         """Mark download as complete."""
@@ -66,9 +156,312 @@ class DownloadProgressTracker:
         return (self.bytes_transferred / self.file_size) * 100
 
 
+class SegmentedDownload:
+    """State shared by the concurrent range connections of one logical download."""
+
+    def __init__(self, key: tuple, file_path: str, filename: str, client_ip: str):
+        """
+        Open the file once and capture its metadata.
+
+        Args:
+            key: Registry key identifying the client and file
+            file_path: Absolute path of the file
+            filename: Display name for logs
+            client_ip: Client IP address
+
+        Raises:
+            OSError: If the file cannot be opened
+        """
+        self.key = key
+        self.file = open(file_path, 'rb')
+        try:
+            self.stat_result = os.fstat(self.file.fileno())
+        except OSError:
+            self.file.close()
+            raise
+        self.lock = threading.Lock()  # Guards seek+read on the shared file (fallback path)
+        self.tracker = DownloadProgressTracker(client_ip, filename, self.stat_result.st_size)
+        self.active_connections = 0
+        self.is_started = False
+        self.linger_timer: Optional[threading.Timer] = None
+
+    def mark_started(self) -> bool:
+        """Record that a body is being sent; returns True only the first time."""
+        with self.lock:
+            if self.is_started:
+                return False
+            self.is_started = True
+            return True
+
+    def close(self):
+        """Close the shared file descriptor."""
+        self.file.close()
+
+
+class SegmentedDownloadRegistry:
+    """
+    Group concurrent range requests for the same file from the same client.
+
+    Clients such as aria2c open many connections, each fetching one range.
+    Connections are keyed by client identity and file path so they share one
+    open descriptor, one stat result and one progress tracker, and the
+    download is logged once. When the last connection finishes, the entry
+    lingers briefly so follow-up segments still join it.
+    """
+
+    def __init__(self, linger_seconds: float = 5.0):
+        """
+        Initialize registry.
+
+        Args:
+            linger_seconds: How long an idle, incomplete download waits for new segments
+        """
+        self.linger_seconds = linger_seconds
+        self._downloads = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, client_key: tuple, file_path: str, filename: str, client_ip: str) -> SegmentedDownload:
+        """
+        Join (or start) the segmented download of file_path for this client.
+
+        Args:
+            client_key: Hashable client identity (IP plus session or user agent)
+            file_path: Absolute path of the file
+            filename: Display name for logs
+            client_ip: Client IP address
+
+        Returns:
+            Shared SegmentedDownload; must be passed to release() when done
+        """
+        key = (client_key, file_path)
+        with self._lock:
+            download = self._downloads.get(key)
+            if download is None:
+                download = SegmentedDownload(key, file_path, filename, client_ip)
+                self._downloads[key] = download
+            elif download.linger_timer:
+                download.linger_timer.cancel()
+                download.linger_timer = None
+            download.active_connections += 1
+            return download
+
+    def release(self, download: SegmentedDownload):
+        """Leave a segmented download; finishes it once no connection is left."""
+        with self._lock:
+            download.active_connections -= 1
+            if download.active_connections > 0:
+                return
+
+            if download.tracker.bytes_transferred >= download.tracker.file_size or not download.is_started:
+                self._finish(download)
+            else:
+                # Incomplete: give the client a moment to open the next segment
+                timer = threading.Timer(self.linger_seconds, self._expire, args=(download,))
+                timer.daemon = True
+                download.linger_timer = timer
+                timer.start()
+
+    def close_all(self):
+        """Finish every tracked download (server shutdown)."""
+        with self._lock:
+            for download in list(self._downloads.values()):
+                if download.linger_timer:
+                    download.linger_timer.cancel()
+                self._finish(download)
+
+    def _expire(self, download: SegmentedDownload):
+        """Linger timer callback: finish the download if nobody rejoined."""
+        with self._lock:
+            if download.active_connections == 0 and self._downloads.get(download.key) is download:
+                self._finish(download)
+
+    def _finish(self, download: SegmentedDownload):
+        """Log the outcome and close the shared file. Caller holds the lock."""
+        try:
+            from .logger import format_download_complete, format_download_interrupted, get_timestamp
+        except ImportError:
+            from logger import format_download_complete, format_download_interrupted, get_timestamp
+
+        if self._downloads.get(download.key) is download:
+            del self._downloads[download.key]
+        download.close()
+
+        if not download.is_started:
+            return
+
+        tracker = download.tracker
+        timestamp = get_timestamp()
+        if tracker.bytes_transferred >= tracker.file_size:
+            tracker.complete()
+            duration = time.time() - tracker.start_time
+            print(format_download_complete(timestamp, tracker.client_ip, tracker.filename, tracker.file_size, duration))
+        else:
+            print(format_download_interrupted(
+                timestamp,
+                tracker.client_ip,
+                tracker.filename,
+                tracker.bytes_transferred,
+                tracker.file_size
+            ))
+
+
 class ThreadingHTTPServer(ThreadingMixIn, HTTPServer):
     """Handle requests in a separate thread."""
-    pass
+
+    closing = False  # Set on close so idle keep-alive connections let go
+
+    def server_close(self):
+        """Release idle keep-alive connections, then wait for in-flight requests."""
+        self.closing = True
+        super().server_close()
+
+
+class PooledHTTPServer(HTTPServer):
+    """
+    Handle requests on a fixed pool of worker threads.
+
+    Accepted connections wait in a bounded queue; when it is full the
+    connection is answered immediately with 503 and Retry-After instead of
+    spawning another thread, keeping memory and disk concurrency bounded.
+    """
+
+    closing = False  # Set on close so idle keep-alive connections let go
+
+    def __init__(self, server_address, handler_class, workers: int = DEFAULT_POOL_WORKERS,
+                 queue_size: int = DEFAULT_POOL_QUEUE, bind_and_activate: bool = True):
+        """
+        Initialize pooled server.
+
+        Args:
+            server_address: (host, port) to bind
+            handler_class: Request handler class
+            workers: Number of worker threads
+            queue_size: Maximum number of accepted connections waiting for a worker
+            bind_and_activate: Bind and listen immediately (as HTTPServer)
+        """
+        super().__init__(server_address, handler_class, bind_and_activate)
+        # queue.Queue treats 0 as unbounded, so at least one slot is always kept
+        self.pending = queue.Queue(maxsize=max(1, queue_size))
+        self.workers = []
+        for index in range(workers):
+            worker = threading.Thread(target=self._worker_loop, name=f"quick-share-worker-{index}")
+            worker.daemon = True
+            worker.start()
+            self.workers.append(worker)
+
+    def process_request(self, request, client_address):
+        """Queue the connection for a worker, or reject it if the queue is full."""
+        try:
+            self.pending.put_nowait((request, client_address))
+        except queue.Full:
+            self.reject_request(request)
+            self.shutdown_request(request)
+
+    def reject_request(self, request):
+        """Answer a connection with 503 Service Unavailable without reading it."""
+        body = b"Server busy, retry later\n"
+        response = (
+            "HTTP/1.1 503 Service Unavailable\r\n"
+            f"Retry-After: {RETRY_AFTER_SECONDS}\r\n"
+            "Content-Type: text/plain; charset=utf-8\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            "Connection: close\r\n"
+            "\r\n"
+        ).encode('ascii') + body
+        try:
+            # Never let a slow client stall the accept loop
+            request.settimeout(1)
+            request.sendall(response)
+        except OSError:
+            pass
+
+    def _worker_loop(self):
+        """Worker thread body: serve queued connections until a None sentinel arrives."""
+        while True:
+            item = self.pending.get()
+            if item is None:
+                break
+            request, client_address = item
+            try:
+                self.finish_request(request, client_address)
+            except Exception:
+                self.handle_error(request, client_address)
+            finally:
+                self.shutdown_request(request)
+
+    def server_close(self):
+        """Stop workers after they finish their current connection, then close the socket."""
+        self.closing = True
+        super().server_close()
+        # Drop connections nobody has started serving yet
+        while True:
+            try:
+                item = self.pending.get_nowait()
+            except queue.Empty:
+                break
+            if item is not None:
+                self.shutdown_request(item[0])
+        for _ in self.workers:
+            self.pending.put(None)
+
+
+def create_http_server(port: int, handler_class, pool_workers: Optional[int] = None,
+                       pool_queue: int = DEFAULT_POOL_QUEUE, reuse_port: bool = False) -> HTTPServer:
+    """
+    Create the HTTP server for a share.
+
+    Args:
+        port: Port to bind
+        handler_class: Request handler class
+        pool_workers: Worker thread count; None for one thread per connection
+        pool_queue: Accept queue size for the pooled server
+        reuse_port: Set SO_REUSEPORT so several processes can listen on the port
+
+    Returns:
+        Bound HTTPServer instance
+    """
+    if pool_workers:
+        httpd = PooledHTTPServer(('', port), handler_class, workers=pool_workers, queue_size=pool_queue,
+                                 bind_and_activate=False)
+    else:
+        httpd = ThreadingHTTPServer(('', port), handler_class, bind_and_activate=False)
+
+    try:
+        if reuse_port:
+            httpd.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        httpd.server_bind()
+        httpd.server_activate()
+    except Exception:
+        httpd.server_close()
+        raise
+    return httpd
+
+def start_listeners(workers: int, create_httpd) -> Tuple[HTTPServer, Optional[WorkerProcesses]]:
+    """
+    Bind the listener for this process, forking extra workers first if requested.
+
+    Workers are forked while the caller is still single-threaded; each binds
+    its own SO_REUSEPORT listener and the kernel balances connections.
+
+    Args:
+        workers: Total number of serving processes (including this one)
+        create_httpd: Callable returning a bound server for the share
+
+    Returns:
+        Tuple of (httpd for this process, worker processes or None)
+    """
+    worker_processes = None
+    if workers > 1:
+        worker_processes = WorkerProcesses(workers - 1, create_httpd)
+        worker_processes.start()
+
+    try:
+        return create_httpd(), worker_processes
+    except Exception:
+        if worker_processes:
+            worker_processes.stop()
+        raise
+
 
 def is_port_available(port: int) -> bool:
     """Check if a port is available for binding."""
@@ -79,33 +472,1149 @@ def is_port_available(port: int) -> bool:
         except OSError:
             return False
 
-def find_available_port(start: int = 8000, end: int = 8099, custom_port: Optional[int] = None) -> int:
+def find_available_port(start: int = 8000, end: int = 8099, custom_port: Optional[int] = None) -> int:
+    """
+    Find an available port within range or verify custom port.
+
+    Args:
+        start: Start of port range (inclusive)
+        end: End of port range (inclusive)
+        custom_port: Specific port to check
+
+    Returns:
+        Available port number
+
+    Raises:
+        RuntimeError: If no port is available
+    """
+    if custom_port is not None:
+        if is_port_available(custom_port):
+            return custom_port
+        raise RuntimeError(f"Custom port {custom_port} is not available")
+
+    for port in range(start, end + 1):
+        if is_port_available(port):
+            return port
+
+    raise RuntimeError(f"No available ports found in range {start}-{end}")
+
+def json_error_payload(status: int, message: str) -> dict:
+    """Build the JSON body used for API errors."""
+    return {
+        'error': message,
+        'status': status
+    }
+
+
+def build_tree_response(directory_path: str, query_params: dict,
+                        listing_cache: Optional[ListingCache] = None) -> Tuple[int, dict]:
+    """
+    Build the /api/tree response.
+
+    With a limit or cursor parameter only one page of the sorted listing is
+    returned, along with the total item count and the cursor of the next
+    page; without either the whole listing is returned as before.
+
+    Args:
+        directory_path: Shared root directory
+        query_params: Parsed query string (path, limit, cursor)
+        listing_cache: Cache of directory listings (default: scan every time)
+
+    Returns:
+        Tuple of (status, payload)
+    """
+    # Get path from query params, default to root
+    request_path = query_params.get('path', ['/'])[0]
+
+    # Validate path
+    is_valid, real_path = validate_directory_path(request_path, directory_path)
+
+    if not is_valid:
+        return 403, json_error_payload(403, "Access denied")
+
+    if not os.path.exists(real_path):
+        return 404, json_error_payload(404, "Path not found")
+
+    if not os.path.isdir(real_path):
+        return 400, json_error_payload(400, "Path is not a directory")
+
+    paginated = 'limit' in query_params or 'cursor' in query_params
+    limit = MAX_TREE_PAGE_SIZE
+    if 'limit' in query_params:
+        try:
+            limit = int(query_params['limit'][0])
+        except ValueError:
+            limit = 0
+        if not 1 <= limit <= MAX_TREE_PAGE_SIZE:
+            return 400, json_error_payload(400, f"limit must be between 1 and {MAX_TREE_PAGE_SIZE}")
+
+    try:
+        if listing_cache is not None:
+            structure = listing_cache.get(directory_path, real_path)
+        else:
+            structure = get_directory_structure(directory_path, real_path)
+    except Exception as e:
+        return 500, json_error_payload(500, str(e))
+
+    if not paginated:
+        return 200, structure
+    try:
+        return 200, paginate_directory_structure(structure, limit, query_params.get('cursor', [''])[0])
+    except ValueError as e:
+        return 400, json_error_payload(400, str(e))
+
+
+def build_content_response(directory_path: str, query_params: dict,
+                           line_index_cache: Optional[LineIndexCache] = None,
+                           encoding_cache: Optional[EncodingCache] = None) -> Tuple[int, dict]:
+    """
+    Build the /api/content (text preview) response.
+
+    Without window parameters the whole file is returned (up to
+    MAX_PREVIEW_SIZE). Larger files are previewed a window at a time:
+    offset/length for a byte range, tail for the end of the file, or
+    line/count for a page of lines found through a cached line index.
+    Whether the file is text, and in which encoding, is sniffed from its
+    first bytes.
+
+    Args:
+        directory_path: Shared root directory
+        query_params: Parsed query string (parse_qs format)
+        line_index_cache: Cache of line indexes for line pages (default: index every time)
+        encoding_cache: Cache of sniffed encodings (default: sniff every time)
+
+    Returns:
+        Tuple of (status, payload)
+    """
+    # Get path from query params
+    request_path = query_params.get('path', [''])[0]
+    if not request_path:
+        return 400, json_error_payload(400, "Missing path parameter")
+
+    # Validate path
+    is_valid, real_path = validate_directory_path(request_path, directory_path)
+
+    if not is_valid:
+        return 403, json_error_payload(403, "Access denied")
+
+    if not os.path.exists(real_path):
+        return 404, json_error_payload(404, "File not found")
+
+    if not os.path.isfile(real_path):
+        return 400, json_error_payload(400, "Path is not a file")
+
+    import mimetypes
+
+    if any(name in query_params for name in CONTENT_WINDOW_PARAMS):
+        try:
+            numbers = {name: int(query_params[name][0]) for name in CONTENT_WINDOW_PARAMS if name in query_params}
+        except ValueError:
+            return 400, json_error_payload(400, "Window parameters must be integers")
+
+        try:
+            if 'line' in numbers or 'count' in numbers:
+                window = read_lines(
+                    real_path, numbers.get('line', 0), numbers.get('count', DEFAULT_LINE_COUNT), line_index_cache,
+                    encoding_cache
+                )
+            elif 'tail' in numbers:
+                window = read_tail(real_path, numbers['tail'], encoding_cache)
+            else:
+                window = read_byte_window(real_path, numbers.get('offset', 0),
+                                          numbers.get('length', DEFAULT_WINDOW_SIZE), encoding_cache)
+        except ValueError as e:
+            return 400, json_error_payload(400, str(e))
+        except NotTextError as e:
+            return 415, json_error_payload(415, str(e))
+        except OSError:
+            return 500, json_error_payload(500, "Error reading file")
+
+        mime_type, _ = mimetypes.guess_type(real_path)
+        return 200, dict(window, path=request_path, type=mime_type or 'text/plain')
+
+    # Check size limit
+    try:
+        file_size = os.path.getsize(real_path)
+        if file_size > MAX_PREVIEW_SIZE:
+            return 413, json_error_payload(
+                413, "File too large for preview (max 1MB); request a window with offset/length, tail or line/count"
+            )
+    except OSError:
+        return 500, json_error_payload(500, "Error reading file info")
+
+    # Read content (binary files are rejected from their first bytes)
+    try:
+        preview = read_file(real_path, encoding_cache)
+    except NotTextError as e:
+        return 415, json_error_payload(415, str(e))
+    except Exception as e:
+        import traceback
+        traceback.print_exc()
+        return 500, json_error_payload(500, str(e))
+
+    mime_type, _ = mimetypes.guess_type(real_path)
+    return 200, dict(preview, path=request_path, type=mime_type or 'text/plain')
+
+
+def build_manifest_response(directory_path: str, query_params: dict,
+                            hash_cache: Optional[HashCache] = None) -> Tuple[int, dict]:
+    """
+    Build the /api/manifest response: every file under a directory, for sync clients.
+
+    Args:
+        directory_path: Shared root directory
+        query_params: Parsed query string (path, hash=0 to skip content hashes)
+        hash_cache: Cache of content hashes
+
+    Returns:
+        Tuple of (status, payload)
+    """
+    request_path = query_params.get('path', ['/'])[0]
+
+    is_valid, real_path = validate_directory_path(request_path, directory_path)
+    if not is_valid:
+        return 403, json_error_payload(403, "Access denied")
+
+    if not os.path.isdir(real_path):
+        return 400, json_error_payload(400, "Path is not a directory")
+
+    with_hashes = query_params.get('hash', ['1'])[0] != '0'
+    try:
+        files = build_manifest(iter_selected_files(real_path, [real_path]), hash_cache, with_hashes)
+    except Exception as e:
+        return 500, json_error_payload(500, str(e))
+
+    return 200, {
+        'path': request_path,
+        'algorithm': HASH_ALGORITHM,
+        'files': files
+    }
+
+
+def build_api_response(directory_path: str, request_path: str,
+                       hash_cache: Optional[HashCache] = None,
+                       listing_cache: Optional[ListingCache] = None,
+                       line_index_cache: Optional[LineIndexCache] = None,
+                       encoding_cache: Optional[EncodingCache] = None) -> Tuple[int, dict]:
+    """
+    Route a JSON API request and build its response.
+
+    Shared by the threaded handler and the asyncio engine.
+
+    Args:
+        directory_path: Shared root directory
+        request_path: Raw request path including query string
+        hash_cache: Cache of content hashes for /api/manifest
+        listing_cache: Cache of directory listings for /api/tree
+        line_index_cache: Cache of line indexes for /api/content line pages
+        encoding_cache: Cache of sniffed encodings for /api/content
+
+    Returns:
+        Tuple of (status, payload)
+    """
+    parsed_path = urlparse(request_path)
+    query_params = parse_qs(parsed_path.query)
+
+    if parsed_path.path == '/api/tree':
+        return build_tree_response(directory_path, query_params, listing_cache)
+    if parsed_path.path == '/api/content':
+        return build_content_response(directory_path, query_params, line_index_cache, encoding_cache)
+    if parsed_path.path == MANIFEST_PATH:
+        return build_manifest_response(directory_path, query_params, hash_cache)
+    if parsed_path.path == ZIP_SELECTION_PATH:
+        return 405, json_error_payload(405, "Use POST with a list of paths")
+    if parsed_path.path == DELTA_PATH:
+        return 405, json_error_payload(405, "Use POST with a client manifest")
+    return 404, json_error_payload(404, "API Endpoint Not Found")
+
+
+def api_file_stat(directory_path: str, request_path: str) -> Optional[os.stat_result]:
+    """
+    Stat the file behind a single-file API request (/api/content).
+
+    Its validators let a conditional request be answered before the file
+    is read.
+
+    Args:
+        directory_path: Shared root directory
+        request_path: Raw request path including query string
+
+    Returns:
+        Stat result of the file, or None for other endpoints and paths that
+        don't name a readable file (their response is built as usual)
+    """
+    parsed_path = urlparse(request_path)
+    if parsed_path.path != '/api/content':
+        return None
+
+    request_file = parse_qs(parsed_path.query).get('path', [''])[0]
+    if not request_file:
+        return None
+    is_valid, real_path = validate_directory_path(request_file, directory_path)
+    if not is_valid:
+        return None
+    try:
+        stat_result = os.stat(real_path)
+    except OSError:
+        return None
+    return stat_result if stat.S_ISREG(stat_result.st_mode) else None
+
+
+def api_validators(stat_result: os.stat_result) -> List[Tuple[str, str]]:
+    """ETag and Last-Modified headers of a file's API response (weak ETag: the JSON may be compressed)."""
+    return [
+        ('ETag', 'W/' + make_etag(stat_result)),
+        ('Last-Modified', format_http_date(stat_result.st_mtime)),
+    ]
+
+
+def _content_head_status(real_path: str, query_params: dict,
+                         encoding_cache: Optional[EncodingCache] = None) -> int:
+    """
+    Status GET /api/content would answer for an existing path, from a stat and the sniffed encoding.
+
+    The encoding comes from the cache, or from the first SNIFF_SIZE bytes
+    of the file (then cached for the GET that follows).
+    """
+    try:
+        stat_result = os.stat(real_path)
+    except OSError:
+        return 404
+    if not stat.S_ISREG(stat_result.st_mode):
+        return 400
+
+    windowed = any(name in query_params for name in CONTENT_WINDOW_PARAMS)
+    if windowed:
+        try:
+            for name in CONTENT_WINDOW_PARAMS:
+                if name in query_params:
+                    int(query_params[name][0])
+        except ValueError:
+            return 400
+    elif stat_result.st_size > MAX_PREVIEW_SIZE:
+        return 413
+
+    try:
+        with open(real_path, 'rb') as f:
+            encoding = file_encoding(f, real_path, encoding_cache)
+    except NotTextError:
+        return 415
+    except OSError:
+        return 500
+    if windowed and encoding == 'utf-16':
+        # Windows need byte-oriented line breaks
+        return 415
+    return 200
+
+
+def api_head_status(directory_path: str, request_path: str,
+                    encoding_cache: Optional[EncodingCache] = None) -> int:
+    """
+    Decide the status of a HEAD request on the JSON API without building the body.
+
+    /api/manifest hashes every file under its path and /api/content reads
+    one, so HEAD runs GET's checks on the path (for /api/content also its
+    type, size and sniffed encoding) but not the ones on paging and window
+    bounds.
+
+    Args:
+        directory_path: Shared root directory
+        request_path: Raw request path including query string
+        encoding_cache: Cache of sniffed encodings for /api/content
+
+    Returns:
+        HTTP status the request is answered with
+    """
+    parsed_path = urlparse(request_path)
+    query_params = parse_qs(parsed_path.query)
+
+    if parsed_path.path in (ZIP_SELECTION_PATH, DELTA_PATH):
+        return 405
+    if parsed_path.path == '/api/content':
+        target = query_params.get('path', [''])[0]
+        if not target:
+            return 400
+    elif parsed_path.path in ('/api/tree', MANIFEST_PATH):
+        target = query_params.get('path', ['/'])[0]
+    else:
+        return 404
+
+    is_valid, real_path = validate_directory_path(target, directory_path)
+    if not is_valid:
+        return 403
+    if not os.path.exists(real_path) and parsed_path.path != MANIFEST_PATH:
+        return 404
+    if parsed_path.path == '/api/content':
+        return _content_head_status(real_path, query_params, encoding_cache)
+    if not os.path.isdir(real_path):
+        return 400
+    return 200
+
+
+def is_restful_archive_path(request_path: str) -> bool:
+    """Check for the RESTful archive URL format (/download/{name}.zip|.tar|...), ignoring the query."""
+    path = urlparse(request_path).path
+    return path.startswith('/download/') and any(path.endswith('.' + fmt) for fmt in ARCHIVE_FORMATS)
+
+
+def archive_download_format(request_path: str) -> Optional[str]:
+    """
+    Detect an archive download request.
+
+    Args:
+        request_path: Request path including query string
+
+    Returns:
+        'zip', 'tar', 'tar.gz' or 'tar.zst', or None for other requests
+    """
+    parsed = urlparse(request_path)
+    if is_restful_archive_path(request_path):
+        # Longest suffix first so name.tar.gz isn't taken for something else
+        for fmt in sorted(ARCHIVE_FORMATS, key=len, reverse=True):
+            if parsed.path.endswith('.' + fmt):
+                return fmt
+
+    # Query parameter format: ?download=zip, ?action=zip, ?download=tar.gz, ...
+    query = parse_qs(parsed.query)
+    for key in ('download', 'action'):
+        values = query.get(key)
+        if values and values[0] in ARCHIVE_FORMATS:
+            return values[0]
+    return None
+
+
+def zip_compression_for_request(request_path: str, default: str = ZIP_COMPRESSION_AUTO) -> str:
+    """
+    Read the compression policy of a zip request (?compression=auto|deflate|store).
+
+    Args:
+        request_path: Request path including query string
+        default: Server-wide policy used when the query doesn't override it
+
+    Returns:
+        One of ZIP_COMPRESSION_MODES
+    """
+    values = parse_qs(urlparse(request_path).query).get('compression')
+    if values and values[0] in ZIP_COMPRESSION_MODES:
+        return values[0]
+    return default
+
+
+class RequestBodyError(ValueError):
+    """A POST /api/zip, /api/delta or /api/blocks request that can't be served."""
+
+    def __init__(self, status: int, message: str):
+        """
+        Initialize error.
+
+        Args:
+            status: HTTP status to answer with
+            message: Error message for the JSON body
+        """
+        super().__init__(message)
+        self.status = status
+
+
+def posted_body_length(headers, limit: int = MAX_ZIP_SELECTION_BODY) -> int:
+    """
+    Check the Content-Length of a POST /api/zip, /api/delta or /api/blocks request.
+
+    Args:
+        headers: Request headers
+        limit: Largest accepted body
+
+    Returns:
+        Number of body bytes to read
+
+    Raises:
+        RequestBodyError: If the length is missing, invalid or too large
+    """
+    value = headers.get('Content-Length')
+    if value is None:
+        raise RequestBodyError(411, "Content-Length required")
+    try:
+        length = int(value)
+    except ValueError:
+        raise RequestBodyError(400, "Invalid Content-Length")
+    if length < 0:
+        raise RequestBodyError(400, "Invalid Content-Length")
+    if length > limit:
+        raise RequestBodyError(413, "Request body too large")
+    return length
+
+
+def parse_zip_selection(directory_path: str, content_type: str, body: bytes) -> Tuple[List[str], Optional[str]]:
+    """
+    Parse and validate the body of a POST /api/zip request.
+
+    Accepts JSON ({"paths": ["/docs", "/src/main.py"], "compression": "store"})
+    or a form post with repeated path fields and an optional compression field.
+
+    Args:
+        directory_path: Shared root directory
+        content_type: Content-Type request header
+        body: Request body
+
+    Returns:
+        Tuple of (real paths to archive, compression policy or None).
+        Duplicates and paths inside another selected directory are dropped.
+
+    Raises:
+        RequestBodyError: If the body is malformed or a path is not accessible
+    """
+    try:
+        text = body.decode('utf-8')
+    except UnicodeDecodeError:
+        raise RequestBodyError(400, "Request body must be UTF-8")
+
+    if content_type.split(';')[0].strip().lower() == 'application/x-www-form-urlencoded':
+        fields = parse_qs(text)
+        paths = fields.get('path', [])
+        compression = fields.get('compression', [None])[0]
+    else:
+        try:
+            data = json.loads(text)
+        except ValueError:
+            raise RequestBodyError(400, "Invalid JSON body")
+        if not isinstance(data, dict):
+            raise RequestBodyError(400, "Expected a JSON object")
+        paths = data.get('paths')
+        compression = data.get('compression')
+
+    if not isinstance(paths, list) or not paths or not all(isinstance(path, str) for path in paths):
+        raise RequestBodyError(400, "Expected a non-empty list of paths")
+    if compression is not None and compression not in ZIP_COMPRESSION_MODES:
+        raise RequestBodyError(400, f"Unknown compression: {compression}")
+
+    targets = []
+    for path in paths:
+        is_valid, real_path = validate_directory_path(path, directory_path)
+        if not is_valid:
+            raise RequestBodyError(403, f"Access denied: {path}")
+        targets.append(real_path)
+
+    selection = []
+    for target in targets:
+        if target in selection:
+            continue
+        # Already included through a selected parent directory
+        if any(other != target and os.path.commonpath([target, other]) == other for other in targets):
+            continue
+        selection.append(target)
+    return selection, compression
+
+
+def parse_delta_request(directory_path: str, body: bytes) -> Tuple[str, Dict[str, dict], Optional[str]]:
+    """
+    Parse and validate the body of a POST /api/delta request.
+
+    The body is JSON: {"path": "/docs", "files": [<manifest entries the
+    client holds>], "compression": "auto"}, with manifest paths relative
+    to path (see /api/manifest).
+
+    Args:
+        directory_path: Shared root directory
+        body: Request body
+
+    Returns:
+        Tuple of (real path of the synced directory, client entries keyed by path, compression or None)
+
+    Raises:
+        RequestBodyError: If the body is malformed or the directory is not accessible
+    """
+    try:
+        data = json.loads(body.decode('utf-8'))
+    except (UnicodeDecodeError, ValueError):
+        raise RequestBodyError(400, "Invalid JSON body")
+    if not isinstance(data, dict):
+        raise RequestBodyError(400, "Expected a JSON object")
+
+    request_path = data.get('path', '/')
+    files = data.get('files', [])
+    compression = data.get('compression')
+    if not isinstance(request_path, str):
+        raise RequestBodyError(400, "path must be a string")
+    if not isinstance(files, list) or not all(
+        isinstance(item, dict) and isinstance(item.get('path'), str) for item in files
+    ):
+        raise RequestBodyError(400, "Expected a list of manifest entries")
+    if compression is not None and compression not in ZIP_COMPRESSION_MODES:
+        raise RequestBodyError(400, f"Unknown compression: {compression}")
+
+    is_valid, real_path = validate_directory_path(request_path, directory_path)
+    if not is_valid:
+        raise RequestBodyError(403, "Access denied")
+    if not os.path.isdir(real_path):
+        raise RequestBodyError(400, "Path is not a directory")
+
+    return real_path, {item['path']: item for item in files}, compression
+
+
+def prepare_posted_zip(directory_path: str, endpoint: str, content_type: str, body: bytes,
+                       hash_cache: Optional[HashCache] = None) -> Tuple[Iterable, str, Optional[str]]:
+    """
+    Turn a POST /api/zip or /api/delta body into the files to archive.
+
+    Args:
+        directory_path: Shared root directory
+        endpoint: ZIP_SELECTION_PATH or DELTA_PATH
+        content_type: Content-Type request header
+        body: Request body
+        hash_cache: Cache of content hashes for change detection
+
+    Returns:
+        Tuple of (lazy iterable of (file_path, arcname, stat_result), zip filename, compression or None)
+
+    Raises:
+        RequestBodyError: If the request can't be served
+    """
+    if endpoint == DELTA_PATH:
+        target_dir, client_files, compression = parse_delta_request(directory_path, body)
+        # Arcnames are relative to the synced directory, like the manifest paths
+        files = iter_changed_files(iter_selected_files(target_dir, [target_dir]), client_files, hash_cache)
+        zip_filename = f"{os.path.basename(target_dir) or 'share'}-delta.zip"
+        return files, zip_filename, compression
+
+    targets, compression = parse_zip_selection(directory_path, content_type, body)
+    return iter_selected_files(directory_path, targets), selection_zip_filename(directory_path, targets), compression
+
+
+def selection_zip_filename(directory_path: str, targets: List[str]) -> str:
+    """Download name of a selective zip: the item's name for one item, else '<share>-selection.zip'."""
+    if len(targets) == 1:
+        return f"{os.path.basename(targets[0]) or os.path.basename(directory_path)}.zip"
+    return f"{os.path.basename(directory_path)}-selection.zip"
+
+
+def build_signature_response(file_path: str, filename: str,
+                             signatures: Optional[SignatureCache] = None) -> Tuple[int, dict]:
+    """
+    Build the /api/signature response of a file share: block checksums for delta pulls.
+
+    Args:
+        file_path: Shared file
+        filename: Its public name
+        signatures: Cache of computed signatures
+
+    Returns:
+        Tuple of (status, payload)
+    """
+    try:
+        signature = (signatures or SignatureCache()).get(file_path)
+    except FileNotFoundError:
+        return 404, json_error_payload(404, "File not found")
+    except OSError as e:
+        return 500, json_error_payload(500, str(e))
+    return 200, dict(signature, filename=filename)
+
+
+def parse_blocks_request(file_path: str, filename: str, body: bytes) -> BlockResponsePlan:
+    """
+    Parse and validate the body of a POST /api/blocks request.
+
+    The body is JSON: {"etag": <signature etag>, "block_size": <signature
+    block size>, "runs": [[first_block, block_count], ...]}.
+
+    Args:
+        file_path: Shared file
+        filename: Its public name
+        body: Request body
+
+    Returns:
+        BlockResponsePlan for the requested blocks
+
+    Raises:
+        RequestBodyError: If the body is malformed (400) or the file changed since the signature (412)
+    """
+    try:
+        data = json.loads(body.decode('utf-8'))
+    except (UnicodeDecodeError, ValueError):
+        raise RequestBodyError(400, "Invalid JSON body")
+    if not isinstance(data, dict):
+        raise RequestBodyError(400, "Expected a JSON object")
+
+    block_size = data.get('block_size')
+    if (not isinstance(block_size, int) or isinstance(block_size, bool)
+            or not MIN_BLOCK_SIZE <= block_size <= MAX_BLOCK_SIZE):
+        raise RequestBodyError(400, "Invalid block_size")
+
+    try:
+        stat_result = os.stat(file_path)
+    except OSError:
+        raise RequestBodyError(404, "File not found")
+    etag = make_etag(stat_result)
+    if data.get('etag') != etag:
+        raise RequestBodyError(412, "File changed since the signature was taken")
+
+    try:
+        ranges = parse_block_runs(data.get('runs'), block_size, stat_result.st_size)
+    except ValueError as e:
+        raise RequestBodyError(400, str(e))
+    return BlockResponsePlan(ranges, stat_result.st_size, etag, filename)
+
+
+class FileTransferMixin:
+    """Shared file body transfer logic for the request handlers."""
+
+    def _get_sendfile_socket(self):
+        """Return the raw connection socket, or None if it can't be used for sendfile."""
+        return getattr(self, 'connection', None)
+
+    def _send_file_body(self, f, offset: int, count: int, tracker: DownloadProgressTracker, lock=None) -> int:
+        """
+        Send a byte range of an open file and log progress through the tracker.
+
+        Args:
+            f: Open binary file
+            offset: First byte to send
+            count: Number of bytes to send
+            tracker: Progress tracker for this download
+            lock: Optional lock when f is shared with other connections
+
+        Returns:
+            Number of bytes sent
+        """
+        on_progress = self._progress_logger(tracker)
+        return send_file(self.wfile, self._get_sendfile_socket(), f, offset, count, on_progress, lock)
+
+    def _progress_logger(self, tracker: DownloadProgressTracker):
+        """Return a callback feeding sent byte counts to tracker and logging progress."""
+        try:
+            from .logger import format_download_progress, get_timestamp
+        except ImportError:
+            from logger import format_download_progress, get_timestamp
+
+        def on_progress(sent: int):
+            if tracker.update(sent):
+                print(format_download_progress(
+                    get_timestamp(),
+                    tracker.client_ip,
+                    tracker.bytes_transferred,
+                    tracker.file_size,
+                    tracker.get_progress_percentage()
+                ))
+
+        return on_progress
+
+    def _segment_client_key(self) -> tuple:
+        """Identify the client for grouping segmented downloads."""
+        session_id = getattr(self, 'session_id', None)
+        return (self.client_address[0], session_id or self.headers.get('User-Agent', ''))
+
+    def _set_session_cookie_if_needed(self):
+        """Hook for handlers that attach a session cookie to responses."""
+        pass
+
+    def _accept_encoding(self) -> Optional[str]:
+        """Accept-Encoding header of the request (None if absent)."""
+        headers = getattr(self, 'headers', None)
+        return headers.get('Accept-Encoding') if headers is not None else None
+
+    def _is_head_request(self) -> bool:
+        """Whether the response is to a HEAD request: same headers as GET, no body."""
+        return getattr(self, 'command', None) == 'HEAD'
+
+    def _is_not_modified(self, etags: Iterable[str], mtime: Optional[float] = None) -> bool:
+        """Whether the request's If-None-Match/If-Modified-Since say the client's copy is current."""
+        headers = getattr(self, 'headers', None)
+        return headers is not None and is_not_modified(headers, etags, mtime)
+
+    def _send_not_modified(self, validators: List[Tuple[str, str]]):
+        """Send 304 Not Modified with the resource's current validators."""
+        self.send_response(304)
+        self._set_session_cookie_if_needed()
+        for name, value in validators:
+            self.send_header(name, value)
+        self.end_headers()
+
+    def _send_text_response(self, body: bytes, content_type: str, status: int = 200,
+                            validators: Optional[List[Tuple[str, str]]] = None):
+        """
+        Send an in-memory HTML/JSON body, gzip/brotli-compressed when the client accepts it.
+
+        Args:
+            body: Uncompressed response body
+            content_type: Content-Type header value
+            status: HTTP status
+            validators: ETag/Last-Modified headers to send
+        """
+        body, encoding, vary = negotiate_body(body, content_type, self._accept_encoding())
+
+        self.send_response(status)
+        self._set_session_cookie_if_needed()
+        self.send_header('Content-Type', content_type)
+        for name, value in validators or ():
+            self.send_header(name, value)
+        if vary:
+            self.send_header('Vary', 'Accept-Encoding')
+        if encoding:
+            self.send_header('Content-Encoding', encoding)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if not self._is_head_request():
+            self.wfile.write(body)
+
+    def _send_static_payload(self, payload: StaticPayload):
+        """Send a prepared payload, or 304 if the client's cached copy (If-None-Match) is current."""
+        body, headers = payload.select(self._accept_encoding())
+        request_headers = getattr(self, 'headers', None)
+        not_modified = request_headers is not None and if_none_match_matches(
+            request_headers.get('If-None-Match'), payload.etags
+        )
+
+        self.send_response(304 if not_modified else 200)
+        self._set_session_cookie_if_needed()
+        for name, value in headers:
+            self.send_header(name, value)
+        if not not_modified:
+            self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if not not_modified and not self._is_head_request():
+            self.wfile.write(body)
+
+    def _send_json_response(self, data: dict, status: int = 200,
+                            validators: Optional[List[Tuple[str, str]]] = None):
+        """
+        Send a JSON response, or 304 if the client's cached copy is current.
+
+        Args:
+            data: Payload
+            status: HTTP status
+            validators: ETag/Last-Modified headers of the resource (default:
+                a successful response is tagged with a hash of its body)
+        """
+        body = json.dumps(data).encode('utf-8')
+        if status == 200:
+            if validators is None:
+                validators = [('ETag', body_etag(body))]
+            if self._is_not_modified([value for name, value in validators if name == 'ETag']):
+                self._send_not_modified(validators)
+                return
+        self._send_text_response(body, 'application/json', status, validators)
+
+    def _send_json_head(self, status: int = 200, validators: Optional[List[Tuple[str, str]]] = None):
+        """
+        Answer a HEAD request on a JSON endpoint without building its body.
+
+        HEAD on the API reports status only: the matching GET's status,
+        Content-Type and stat-based validators (/api/content), but never
+        Content-Length or a body-hash ETag, as computing them would mean
+        hashing or reading files just to throw the body away.
+
+        Args:
+            status: HTTP status
+            validators: Stat-based ETag/Last-Modified headers of the resource, if any
+        """
+        self.send_response(status)
+        self._set_session_cookie_if_needed()
+        self.send_header('Content-Type', 'application/json')
+        for name, value in validators or ():
+            self.send_header(name, value)
+        self.send_header('Vary', 'Accept-Encoding')
+        self.end_headers()
+
+    def _send_json_stream(self, data: dict, status: int = 200,
+                          validators: Optional[List[Tuple[str, str]]] = None):
+        """
+        Send a large JSON response as it is encoded.
+
+        The body is written in JSON_CHUNK_SIZE pieces instead of being
+        built in memory first. HTTP/1.1 exchanges use chunked transfer
+        encoding; otherwise the body ends when the connection closes.
+
+        Args:
+            data: Payload (lists or iterators of entries are streamed)
+            status: HTTP status
+            validators: ETag/Last-Modified headers of the resource (default: a
+                successful response is tagged with a hash of its body, encoded
+                once more before it is sent)
+        """
+        if status == 200 and validators is None and is_reencodable(data):
+            # Hashed chunk by chunk: the same ETag as the body encoded in one piece
+            validators = [('ETag', chunks_etag(iter_json_chunks(data)))]
+            if self._is_not_modified([validators[0][1]]):
+                self._send_not_modified(validators)
+                return
+        encoding = choose_encoding(self._accept_encoding())
+
+        self.send_response(status)
+        self._set_session_cookie_if_needed()
+        self.send_header('Content-Type', 'application/json')
+        for name, value in validators or ():
+            self.send_header(name, value)
+        self.send_header('Vary', 'Accept-Encoding')
+        if encoding:
+            self.send_header('Content-Encoding', encoding)
+        stream = self._begin_streamed_body()
+        self.end_headers()
+        if self._is_head_request():
+            return
+
+        chunks = iter_json_chunks(data)
+        if encoding:
+            chunks = iter_compressed(chunks, encoding)
+        try:
+            for chunk in chunks:
+                stream.write(chunk)
+            self._end_streamed_body(stream)
+        except (BrokenPipeError, ConnectionResetError):
+            self.close_connection = True
+
+    def _begin_streamed_body(self):
+        """
+        Choose the framing of a body whose length isn't known up front.
+
+        Call after the other headers and before end_headers(). HTTP/1.1
+        exchanges use chunked transfer encoding, keeping the connection
+        reusable; otherwise the body ends when the connection closes.
+
+        Returns:
+            Stream to write the body to (finish with _end_streamed_body)
+        """
+        if self.protocol_version == 'HTTP/1.1' and getattr(self, 'request_version', None) == 'HTTP/1.1':
+            self.send_header('Transfer-Encoding', 'chunked')
+            return ChunkedWriter(self.wfile)
+        self.close_connection = True
+        return self.wfile
+
+    def _end_streamed_body(self, stream):
+        """Terminate a body started with _begin_streamed_body (not called when it is cut short)."""
+        if isinstance(stream, ChunkedWriter):
+            stream.close()
+
+    def _send_json_error(self, status: int, message: str):
+        """Send a JSON error response."""
+        self._send_json_response(json_error_payload(status, message), status)
+
+    def _send_range_not_satisfiable(self, file_size: int):
+        """Send 416 with the Content-Range the client should have asked for."""
+        self.send_response(416)
+        self._set_session_cookie_if_needed()
+        self.send_header('Content-Range', f'bytes */{file_size}')
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def _send_file_response(self, file_path: str, filename: str, plan=None):
+        """
+        Send a file to the client, honouring Range/If-Range, with progress tracking.
+
+        The status, headers and body layout come from FileResponsePlan.
+
+        Args:
+            file_path: Absolute path of the file to send
+            filename: Name used in Content-Disposition and logs
+            plan: Precomputed response plan (e.g. BlockResponsePlan) instead of one built from the request
+        """
+        try:
+            from .logger import (
+                format_download_start,
+                format_download_complete,
+                format_download_interrupted,
+                format_download_error,
+                get_timestamp
+            )
+            from .directory_handler import format_file_size
+        except ImportError:
+            from logger import (
+                format_download_start,
+                format_download_complete,
+                format_download_interrupted,
+                format_download_error,
+                get_timestamp
+            )
+            from directory_handler import format_file_size
+
+        client_ip = self.client_address[0]
+
+        if plan is None:
+            # Revalidations are answered from the file's metadata, before it is opened
+            stat_result = os.stat(file_path)
+            etag, last_modified = make_etag(stat_result), format_http_date(stat_result.st_mtime)
+            if self._is_not_modified([etag], stat_result.st_mtime):
+                self._send_not_modified([('ETag', etag), ('Last-Modified', last_modified)])
+                return
+
+        # Range requests from the same client join one segmented download
+        registry = getattr(self.server, 'segments', None)
+        segment = None
+        if registry is not None and plan is None and self.headers.get('Range') and not self._is_head_request():
+            segment = registry.acquire(self._segment_client_key(), file_path, filename, client_ip)
+
+        try:
+            if plan is None:
+                stat_result = segment.stat_result if segment else stat_result
+                try:
+                    plan = FileResponsePlan(self.headers, stat_result, filename)
+                except RangeNotSatisfiable:
+                    self._send_range_not_satisfiable(stat_result.st_size)
+                    return
+
+            if plan.ranges is None and segment:
+                # Falling back to a full response: this is a plain download
+                registry.release(segment)
+                segment = None
+
+            self.send_response(plan.status)
+            self._set_session_cookie_if_needed()
+            for name, value in plan.headers:
+                self.send_header(name, value)
+            self.end_headers()
+            if self._is_head_request():
+                # Size and validators come from the stat: the file is never opened
+                return
+
+            display_name = plan.display_name
+            transfer_size = plan.transfer_size
+
+            if segment:
+                # Progress is aggregated over all segments; start/finish are logged once
+                tracker = segment.tracker
+                if segment.mark_started():
+                    timestamp = get_timestamp()
+                    print(format_download_start(timestamp, client_ip, filename, format_file_size(plan.file_size)))
+            else:
+                # Progress is measured against the requested slice, not the whole file
+                tracker = DownloadProgressTracker(client_ip, display_name, transfer_size)
+                timestamp = get_timestamp()
+                print(format_download_start(timestamp, client_ip, display_name, format_file_size(transfer_size)))
+
+            # Stream file (zero-copy when the connection allows it)
+            try:
+                if segment:
+                    self._send_plan_body(segment.file, plan, tracker, segment.lock)
+                else:
+                    with open(file_path, 'rb') as f:
+                        self._send_plan_body(f, plan, tracker)
+
+                if not segment:
+                    # Log completion
+                    tracker.complete()
+                    duration = time.time() - tracker.start_time
+                    timestamp = get_timestamp()
+                    print(format_download_complete(timestamp, client_ip, display_name, transfer_size, duration))
+
+            except (BrokenPipeError, ConnectionResetError):
+                # Client disconnected (segmented downloads report on release)
+                self.close_connection = True
+                if not segment:
+                    timestamp = get_timestamp()
+                    print(format_download_interrupted(
+                        timestamp,
+                        client_ip,
+                        display_name,
+                        tracker.bytes_transferred,
+                        transfer_size
+                    ))
+            except Exception as e:
+                # Other errors: the promised length can't be met, drop the connection
+                self.close_connection = True
+                timestamp = get_timestamp()
+                print(format_download_error(timestamp, client_ip, display_name, str(e)))
+        finally:
+            if segment:
+                registry.release(segment)
+
+    def _send_plan_body(self, f, plan: FileResponsePlan, tracker: DownloadProgressTracker, lock=None):
+        """Write the body described by a FileResponsePlan."""
+        for prefix, offset, length in plan.segments():
+            if prefix:
+                self.wfile.write(prefix)
+            self._send_file_body(f, offset, length, tracker, lock)
+
+
+class PersistentConnectionMixin:
+    """
+    HTTP/1.1 keep-alive for the request handlers.
+
+    A connection serves requests until the client asks to close, a body
+    can't be framed, it has been idle for KEEPALIVE_TIMEOUT, or it has
+    served KEEPALIVE_MAX_REQUESTS requests (announced with
+    "Connection: close" on the last response). Idle connections also let
+    go when the server closes or, on the pooled engine, as soon as another
+    connection is waiting for a worker. HTTP/1.0 clients get one request
+    per connection.
     """
-    Find an available port within range or verify custom port.
 
-    Args:
-        start: Start of port range (inclusive)
-        end: End of port range (inclusive)
-        custom_port: Specific port to check
+    protocol_version = 'HTTP/1.1'
+    keepalive_timeout = KEEPALIVE_TIMEOUT
+    keepalive_max_requests = KEEPALIVE_MAX_REQUESTS
+    _requests_served = 0
+    _connection_header_sent = False
 
-    Returns:
-        Available port number
+    def handle_one_request(self):
+        """Wait for the next request on a reused connection, then serve it."""
+        if self._requests_served and not self._wait_for_request():
+            self.close_connection = True
+            return
+        self._requests_served += 1
+        self._connection_header_sent = False
+        super().handle_one_request()
 
-    Raises:
-        RuntimeError: If no port is available
-    """
-    if custom_port is not None:
-        if is_port_available(custom_port):
-            return custom_port
-        raise RuntimeError(f"Custom port {custom_port} is not available")
+    def parse_request(self) -> bool:
+        """Parse the request head; only HTTP/1.1 clients keep the connection."""
+        if not super().parse_request():
+            return False
+        if self.request_version != 'HTTP/1.1':
+            self.close_connection = True
+        return True
+
+    def send_header(self, keyword, value):
+        """Send a header, noting an explicit Connection header."""
+        if keyword.lower() == 'connection':
+            self._connection_header_sent = True
+        super().send_header(keyword, value)
+
+    def end_headers(self):
+        """Announce the end of the connection on its last response."""
+        if self._requests_served >= self.keepalive_max_requests or self._should_release():
+            self.close_connection = True
+        if self.close_connection and not self._connection_header_sent and self.request_version == 'HTTP/1.1':
+            self.send_header('Connection', 'close')
+        super().end_headers()
+
+    def _should_release(self) -> bool:
+        """Whether the connection should be given up instead of kept idle."""
+        if getattr(self.server, 'closing', False):
+            return True
+        # Pooled engine: a worker held by an idle connection is one less for queued ones
+        pending = getattr(self.server, 'pending', None)
+        return pending is not None and not pending.empty()
 
-    for port in range(start, end + 1):
-        if is_port_available(port):
-            return port
+    def _wait_for_request(self) -> bool:
+        """
+        Wait for the client to send its next request.
+
+        Returns:
+            True if request data is available, False if the connection
+            should be closed (idle timeout, EOF handled by the caller,
+            server closing or connections queued for a worker)
+        """
+        # A pipelined request may already be buffered
+        try:
+            timeout = self.connection.gettimeout()
+            self.connection.setblocking(False)
+            try:
+                if self.rfile.peek(1):
+                    return True
+            finally:
+                self.connection.settimeout(timeout)
+        except OSError:
+            return False
+
+        deadline = time.monotonic() + self.keepalive_timeout
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or self._should_release():
+                return False
+            try:
+                readable, _, _ = select.select([self.connection], [], [], min(remaining, KEEPALIVE_POLL_INTERVAL))
+            except (OSError, ValueError):
+                return False
+            if readable:
+                return True
 
-    raise RuntimeError(f"No available ports found in range {start}-{end}")
 
-class FileShareHandler(BaseHTTPRequestHandler):
+class FileShareHandler(PersistentConnectionMixin, FileTransferMixin, BaseHTTPRequestHandler):
     """Handler for serving a single file securely."""
 
     def do_GET(self):
@@ -114,6 +1623,17 @@ class FileShareHandler(BaseHTTPRequestHandler):
         file_path = self.server.file_path
         allowed_filename = self.server.allowed_filename
 
+        if urlparse(self.path).path == SIGNATURE_PATH:
+            if self._is_head_request():
+                # Don't read and block-hash the file for headers only
+                self._send_json_head(200 if os.path.isfile(file_path) else 404)
+                return
+            status, data = build_signature_response(
+                file_path, allowed_filename, getattr(self.server, 'signatures', None)
+            )
+            self._send_json_response(data, status)
+            return
+
         # Validate path using security module
         is_valid, normalized_path = validate_request_path(self.path, allowed_filename)
 
@@ -126,94 +1646,33 @@ class FileShareHandler(BaseHTTPRequestHandler):
             return
 
         try:
-            self._stream_file(file_path, allowed_filename)
+            self._send_file_response(file_path, allowed_filename)
         except Exception as e:
             # Log error if needed, but for now just let the handler finish
             pass
 
-    def _stream_file(self, file_path: str, filename: str):
-        """Stream a file to the client in chunks with progress tracking."""
-        try:
-            from .logger import (
-                format_download_start,
-                format_download_progress,
-                format_download_complete,
-                format_download_interrupted,
-                format_download_error,
-                get_timestamp
-            )
-            from .directory_handler import format_file_size
-        except ImportError:
-            from logger import (
-                format_download_start,
-                format_download_progress,
-                format_download_complete,
-                format_download_interrupted,
-                format_download_error,
-                get_timestamp
-            )
-            from directory_handler import format_file_size
-
-        import datetime
-
-        file_size = os.path.getsize(file_path)
-        client_ip = self.client_address[0]
-
-        self.send_response(200)
-        self.send_header('Content-Type', 'application/octet-stream')
-        self.send_header('Content-Disposition', f'attachment; filename="{filename}"')
-        self.send_header('Content-Length', str(file_size))
-        self.end_headers()
-
-        # Initialize progress tracker
-        tracker = DownloadProgressTracker(client_ip, filename, file_size)
+    def do_HEAD(self):
+        """Handle HEAD requests: the headers of the matching GET, without a body (or a signature)."""
+        self.do_GET()
 
-        # Log download start
-        timestamp = get_timestamp()
-        print(format_download_start(timestamp, client_ip, filename, format_file_size(file_size)))
+    def do_POST(self):
+        """Handle POST requests: changed blocks of the file for delta pulls (/api/blocks)."""
+        if urlparse(self.path).path != BLOCKS_PATH:
+            self.close_connection = True
+            self._send_json_error(404, "API Endpoint Not Found")
+            return
 
-        # Stream file in chunks
+        file_path = self.server.file_path
         try:
-            with open(file_path, 'rb') as f:
-                while True:
-                    chunk = f.read(CHUNK_SIZE)
-                    if not chunk:
-                        break
-
-                    self.wfile.write(chunk)
-
-                    # Update progress
-                    if tracker.update(len(chunk)):
-                        percentage = tracker.get_progress_percentage()
-                        timestamp = get_timestamp()
-                        print(format_download_progress(
-                            timestamp,
-                            client_ip,
-                            tracker.bytes_transferred,
-                            file_size,
-                            percentage
-                        ))
-
-            # Log completion
-            tracker.complete()
-            duration = time.time() - tracker.start_time
-            timestamp = get_timestamp()
-            print(format_download_complete(timestamp, client_ip, filename, file_size, duration))
+            body = self.rfile.read(posted_body_length(self.headers, MAX_BLOCKS_BODY))
+            plan = parse_blocks_request(file_path, self.server.allowed_filename, body)
+        except RequestBodyError as e:
+            # The body may not have been read: don't reuse the connection
+            self.close_connection = True
+            self._send_json_error(e.status, str(e))
+            return
 
-        except (BrokenPipeError, ConnectionResetError):
-            # Client disconnected
-            timestamp = get_timestamp()
-            print(format_download_interrupted(
-                timestamp,
-                client_ip,
-                filename,
-                tracker.bytes_transferred,
-                file_size
-            ))
-        except Exception as e:
-            # Other errors
-            timestamp = get_timestamp()
-            print(format_download_error(timestamp, client_ip, filename, str(e)))
+        self._send_file_response(file_path, self.server.allowed_filename, plan)
 
     def log_message(self, format, *args):
         """Suppress default logging to stdout/stderr unless needed."""
@@ -223,21 +1682,54 @@ class FileShareHandler(BaseHTTPRequestHandler):
 class FileShareServer:
     """Managed HTTP server for file sharing."""
 
-    def __init__(self, file_path: str, port: Optional[int] = None, timeout_minutes: int = 30):
+    def __init__(
+        self,
+        file_path: str,
+        port: Optional[int] = None,
+        timeout_minutes: int = 30,
+        pool_workers: Optional[int] = None,
+        pool_queue: int = DEFAULT_POOL_QUEUE,
+        workers: int = 1
+    ):
+        """
+        Initialize FileShareServer.
+
+        Args:
+            file_path: Path to file to share
+            port: Port to bind to (None for auto-select)
+            timeout_minutes: Minutes before auto-shutdown
+            pool_workers: Serve on a bounded pool of this many threads (None: thread per connection)
+            pool_queue: Connections allowed to wait for a pool worker before 503
+            workers: Processes listening on the port via SO_REUSEPORT (1: this process only)
+        """
         self.file_path = os.path.abspath(file_path)
         self.allowed_filename = os.path.basename(file_path)
         self.port = find_available_port(custom_port=port) if port else find_available_port()
         self.timeout_minutes = timeout_minutes
+        self.pool_workers = pool_workers
+        self.pool_queue = pool_queue
+        self.workers = workers
+        self.segments = SegmentedDownloadRegistry()
+        self.signatures = SignatureCache()
         self.httpd: Optional[HTTPServer] = None
         self.server_thread: Optional[threading.Thread] = None
         self.shutdown_timer: Optional[threading.Timer] = None
+        self.worker_processes: Optional[WorkerProcesses] = None
+
+    def _create_httpd(self) -> HTTPServer:
+        """Bind a server for this share (one per process in multi-process mode)."""
+        httpd = create_http_server(self.port, FileShareHandler, self.pool_workers, self.pool_queue,
+                                   reuse_port=self.workers > 1)
+        # Inject file info into server instance so handler can access it
+        httpd.file_path = self.file_path
+        httpd.allowed_filename = self.allowed_filename
+        httpd.segments = self.segments
+        httpd.signatures = self.signatures
+        return httpd
 
     def start(self):
         """Start the server in a background thread."""
-        self.httpd = ThreadingHTTPServer(('', self.port), FileShareHandler)
-        # Inject file info into server instance so handler can access it
-        self.httpd.file_path = self.file_path
-        self.httpd.allowed_filename = self.allowed_filename
+        self.httpd, self.worker_processes = start_listeners(self.workers, self._create_httpd)
 
         self.server_thread = threading.Thread(target=self.httpd.serve_forever)
         self.server_thread.daemon = True
@@ -260,36 +1752,34 @@ class FileShareServer:
             self.httpd.shutdown()
             self.httpd.server_close()
 
+        if self.worker_processes:
+            self.worker_processes.stop()
+            self.worker_processes = None
+
+        self.segments.close_all()
 
-class DirectoryShareHandler(BaseHTTPRequestHandler):
+
+class DirectoryShareHandler(PersistentConnectionMixin, FileTransferMixin, BaseHTTPRequestHandler):
     """Handler for serving a directory securely."""
 
     def do_GET(self):
-        """Handle GET requests: directory listing, file download, or zip download."""
+        """Handle GET requests: directory listing, file download, or zip/tar download."""
         directory_path = self.server.directory_path
 
-        # Track session and enforce limit
-        if hasattr(self.server, 'sessions'):
-            # Session tracking is enabled
-            allowed, session_id = self.server.track_session(self)
-            if not allowed:
-                self.send_error(403, "Session limit reached")
-                return
-            # Store session_id for cookie setting
-            self.session_id = session_id
-        else:
-            self.session_id = None
+        if not self._check_session():
+            return
 
         # Handle API requests
         if self.path.startswith('/api/'):
             self._handle_api_request()
             return
 
-        # Check if requesting zip download (before path validation)
+        # Check if requesting an archive download (before path validation)
         # For RESTful format (/download/{name}.zip), we need to validate root path
-        if self._is_zip_download_request():
-            # For RESTful zip URLs, validate the root directory instead
-            if self.path.startswith('/download/') and self.path.endswith('.zip'):
+        archive_format = self._archive_download_format()
+        if archive_format:
+            # For RESTful archive URLs, validate the root directory instead
+            if is_restful_archive_path(self.path):
                 # Validate root directory
                 is_valid, real_path = validate_directory_path('/', directory_path)
             else:
@@ -303,10 +1793,13 @@ class DirectoryShareHandler(BaseHTTPRequestHandler):
                 self.send_error(403, "Access denied")
                 return
 
-            self._serve_directory_zip(directory_path, real_path)
+            if archive_format == 'zip':
+                self._serve_directory_zip(directory_path, real_path)
+            else:
+                self._serve_directory_tar(directory_path, real_path, archive_format)
             return
 
-        # Validate path for non-zip requests
+        # Validate path for non-archive requests
         is_valid, real_path = validate_directory_path(
             self.path,
             directory_path
@@ -322,132 +1815,98 @@ class DirectoryShareHandler(BaseHTTPRequestHandler):
         else:
             self._serve_directory_listing(directory_path, real_path)
 
-    def _handle_api_request(self):
-        """Handle JSON API requests."""
-        from urllib.parse import urlparse, parse_qs
+    def do_HEAD(self):
+        """Handle HEAD requests: the headers of the matching GET without a body (status only for /api/*)."""
+        self.do_GET()
 
-        parsed_path = urlparse(self.path)
-        query_params = parse_qs(parsed_path.query)
+    def do_POST(self):
+        """Handle POST requests: selective (/api/zip) and incremental (/api/delta) zip downloads."""
+        if not self._check_session():
+            return
 
-        # Simple routing for now
-        if parsed_path.path == '/api/tree':
-            # Get path from query params, default to root
-            request_path = query_params.get('path', ['/'])[0]
+        endpoint = urlparse(self.path).path
+        if endpoint not in POSTED_BODY_LIMITS:
+            self.close_connection = True
+            self._send_json_error(404, "API Endpoint Not Found")
+            return
 
-            # Validate path
-            is_valid, real_path = validate_directory_path(
-                request_path,
-                self.server.directory_path
+        try:
+            body = self.rfile.read(posted_body_length(self.headers, POSTED_BODY_LIMITS[endpoint]))
+            files, zip_filename, compression = prepare_posted_zip(
+                self.server.directory_path, endpoint, self.headers.get('Content-Type', ''), body,
+                getattr(self.server, 'hash_cache', None)
             )
+        except RequestBodyError as e:
+            # The body may not have been read: don't reuse the connection
+            self.close_connection = True
+            self._send_json_error(e.status, str(e))
+            return
 
-            if not is_valid:
-                self._send_json_error(403, "Access denied")
-                return
-
-            if not os.path.exists(real_path):
-                self._send_json_error(404, "Path not found")
-                return
-
-            if not os.path.isdir(real_path):
-                self._send_json_error(400, "Path is not a directory")
-                return
-
-            try:
-                data = get_directory_structure(self.server.directory_path, real_path)
-                self._send_json_response(data)
-            except Exception as e:
-                self._send_json_error(500, str(e))
+        compression = compression or zip_compression_for_request(
+            self.path, getattr(self.server, 'zip_compression', ZIP_COMPRESSION_AUTO)
+        )
 
-        elif parsed_path.path == '/api/content':
-            # Get path from query params
-            request_path = query_params.get('path', [''])[0]
-            if not request_path:
-                self._send_json_error(400, "Missing path parameter")
-                return
+        self.send_response(200)
+        self._set_session_cookie_if_needed()
+        self.send_header('Content-Type', 'application/zip')
+        self.send_header('Content-Disposition', f'attachment; filename="{zip_filename}"')
+        # Length is unknown: chunked, or close the connection after streaming
+        stream = self._begin_streamed_body()
+        self.end_headers()
 
-            # Validate path
-            is_valid, real_path = validate_directory_path(
-                request_path,
-                self.server.directory_path
+        try:
+            stream_files_as_zip(
+                stream, files, zip_filename, progress_callback=True,
+                compression=compression, entry_cache=getattr(self.server, 'entry_cache', None)
             )
+            self._end_streamed_body(stream)
+        except (BrokenPipeError, ConnectionResetError):
+            # Client disconnected - this is normal, ignore it
+            self.close_connection = True
+        except OSError as e:
+            self._abort_archive(zip_filename, e)
 
-            if not is_valid:
-                self._send_json_error(403, "Access denied")
-                return
-
-            if not os.path.exists(real_path):
-                self._send_json_error(404, "File not found")
-                return
-
-            if not os.path.isfile(real_path):
-                self._send_json_error(400, "Path is not a file")
-                return
+    def _check_session(self) -> bool:
+        """Track the session and enforce the session limit; answers 403 and returns False when full."""
+        if hasattr(self.server, 'sessions'):
+            # Session tracking is enabled
+            allowed, session_id = self.server.track_session(self)
+            if not allowed:
+                self.send_error(403, "Session limit reached")
+                return False
+            # Store session_id for cookie setting
+            self.session_id = session_id
+        else:
+            self.session_id = None
+        return True
 
-            # Check size limit (1MB)
-            try:
-                file_size = os.path.getsize(real_path)
-                if file_size > 1024 * 1024:  # 1MB
-                    self._send_json_error(413, "File too large for preview (max 1MB)")
-                    return
-            except OSError:
-                self._send_json_error(500, "Error reading file info")
+    def _handle_api_request(self):
+        """Handle JSON API requests."""
+        validators = None
+        stat_result = api_file_stat(self.server.directory_path, self.path)
+        if stat_result is not None:
+            validators = api_validators(stat_result)
+            if self._is_not_modified([validators[0][1]], stat_result.st_mtime):
+                self._send_not_modified(validators)
                 return
 
-            # Read content
-            try:
-                with open(real_path, 'rb') as f:
-                    content_bytes = f.read()
-
-                # Try decode as utf-8
-                try:
-                    content_str = content_bytes.decode('utf-8')
-                    import mimetypes
-                    mime_type, _ = mimetypes.guess_type(real_path)
-
-                    data = {
-                        'path': request_path,
-                        'content': content_str,
-                        'size': file_size,
-                        'encoding': 'utf-8',
-                        'type': mime_type or 'text/plain'
-                    }
-                    self._send_json_response(data)
-                except UnicodeDecodeError:
-                    self._send_json_error(415, "Binary file not supported for preview")
-                    return
-
-            except Exception as e:
-                import traceback
-                traceback.print_exc()
-                self._send_json_error(500, str(e))
+        encoding_cache = getattr(self.server, 'encoding_cache', None)
+        if self._is_head_request():
+            self._send_json_head(api_head_status(self.server.directory_path, self.path, encoding_cache), validators)
+            return
+        status, data = build_api_response(
+            self.server.directory_path, self.path, getattr(self.server, 'hash_cache', None),
+            getattr(self.server, 'listing_cache', None), getattr(self.server, 'line_index_cache', None),
+            encoding_cache
+        )
+        if should_stream_json(data):
+            self._send_json_stream(data, status, validators)
         else:
-            self._send_json_error(404, "API Endpoint Not Found")
-
-    def _send_json_response(self, data: dict, status: int = 200):
-        """Send a JSON response."""
-        response_body = json.dumps(data).encode('utf-8')
-
-        self.send_response(status)
-        self._set_session_cookie_if_needed()
-        self.send_header('Content-Type', 'application/json')
-        self.send_header('Content-Length', str(len(response_body)))
-        self.end_headers()
-        self.wfile.write(response_body)
+            self._send_json_response(data, status, validators)
 
-    def _send_json_error(self, status: int, message: str):
-        """Send a JSON error response."""
-        data = {
-            'error': message,
-            'status': status
-        }
-        self._send_json_response(data, status)
-
-    def _is_zip_download_request(self) -> bool:
-        """Check if the request is for zip download."""
-        # Support both query parameter format and RESTful path format
-        return ('?download=zip' in self.path or
-                '?action=zip' in self.path or
-                self.path.startswith('/download/') and self.path.endswith('.zip'))
+    def _archive_download_format(self) -> Optional[str]:
+        """Return the archive format requested ('zip', 'tar', ...), or None."""
+        return archive_download_format(self.path)
 
     def _serve_directory_listing(self, base_dir: str, current_dir: str):
         """Generate and return directory listing HTML."""
@@ -457,35 +1916,113 @@ class DirectoryShareHandler(BaseHTTPRequestHandler):
         if use_legacy:
             html = generate_directory_listing_html(base_dir, current_dir)
         else:
-            # Serve SPA
+            spa_page = getattr(self.server, 'spa_page', None)
+            if spa_page is not None:
+                # Prepared at server start: the page only depends on the shared directory's name
+                self._send_static_payload(spa_page)
+                return
             html = generate_spa_html(os.path.basename(base_dir))
 
-        html_bytes = html.encode('utf-8')
-
-        self.send_response(200)
-        self._set_session_cookie_if_needed()
-        self.send_header('Content-Type', 'text/html; charset=utf-8')
-        self.send_header('Content-Length', str(len(html_bytes)))
-        self.end_headers()
-        self.wfile.write(html_bytes)
+        self._send_text_response(html.encode('utf-8'), 'text/html; charset=utf-8')
 
     def _serve_file(self, file_path: str):
         """Stream a single file to the client."""
         filename = os.path.basename(file_path)
 
         try:
-            self._stream_file_with_headers(file_path, filename)
+            self._send_file_response(file_path, filename)
         except OSError as e:
             self.send_error(500, "Internal server error")
         except Exception as e:
             self.send_error(500, "Internal server error")
 
-    def _stream_file_with_headers(self, file_path: str, filename: str):
-        """Send headers and stream file content with progress tracking."""
+    def _serve_directory_zip(self, base_dir: str, target_dir: str):
+        """Stream directory as zip file with progress tracking."""
+        dir_name = os.path.basename(base_dir)
+        zip_filename = f"{dir_name}.zip"
+
+        compression = zip_compression_for_request(
+            self.path, getattr(self.server, 'zip_compression', ZIP_COMPRESSION_AUTO)
+        )
+        if compression == ZIP_COMPRESSION_STORE:
+            # Store-only archives have a deterministic layout: sized and resumable
+            self._serve_stored_zip(base_dir, target_dir, zip_filename)
+            return
+
+        self.send_response(200)
+        self._set_session_cookie_if_needed()
+        self.send_header('Content-Type', 'application/zip')
+        self.send_header('Content-Disposition', f'attachment; filename="{zip_filename}"')
+        # Length is unknown: chunked, or close the connection after streaming
+        stream = self._begin_streamed_body()
+        self.end_headers()
+        if self._is_head_request():
+            return
+
+        # Stream zip to client with progress tracking
+        try:
+            stream_directory_as_zip(stream, base_dir, target_dir, progress_callback=True,
+                                    compression=compression,
+                                    entry_cache=getattr(self.server, 'entry_cache', None))
+            self._end_streamed_body(stream)
+        except (BrokenPipeError, ConnectionResetError):
+            # Client disconnected - this is normal, ignore it
+            self.close_connection = True
+        except OSError as e:
+            self._abort_archive(zip_filename, e)
+
+    def _serve_directory_tar(self, base_dir: str, target_dir: str, archive_format: str):
+        """Stream directory as a tar, tar.gz or tar.zst archive."""
+        if archive_format == 'tar.zst' and not zstd_available():
+            self.send_error(501, "tar.zst downloads need the zstandard module on the server")
+            return
+
+        archive_filename = f"{os.path.basename(base_dir)}.{archive_format}"
+
+        self.send_response(200)
+        self._set_session_cookie_if_needed()
+        self.send_header('Content-Type', TAR_CONTENT_TYPES[archive_format])
+        self.send_header('Content-Disposition', f'attachment; filename="{archive_filename}"')
+        # Length is unknown: chunked, or close the connection after streaming
+        stream = self._begin_streamed_body()
+        self.end_headers()
+        if self._is_head_request():
+            return
+
+        try:
+            stream_directory_as_tar(stream, base_dir, target_dir, archive_format, progress_callback=True)
+            self._end_streamed_body(stream)
+        except (BrokenPipeError, ConnectionResetError):
+            # Client disconnected - this is normal, ignore it
+            self.close_connection = True
+        except OSError as e:
+            self._abort_archive(archive_filename, e)
+
+    def _abort_archive(self, archive_filename: str, error: OSError):
+        """
+        Give up on an archive that failed mid-stream.
+
+        A file that vanished, shrank or can't be read after the response
+        started (e.g. "unexpected end of data") truncates the archive: the
+        body is left unterminated and the connection dropped, so the client
+        sees an incomplete transfer rather than a complete one.
+
+        Args:
+            archive_filename: Name of the archive being sent
+            error: The error that stopped it
+        """
+        try:
+            from .logger import format_download_error, get_timestamp
+        except ImportError:
+            from logger import format_download_error, get_timestamp
+        print(format_download_error(get_timestamp(), self.client_address[0], archive_filename, str(error)))
+        self.close_connection = True
+
+    def _serve_stored_zip(self, base_dir: str, target_dir: str, zip_filename: str):
+        """Send a store-only zip with Content-Length, honouring Range/If-Range."""
         try:
             from .logger import (
                 format_download_start,
-                format_download_progress,
                 format_download_complete,
                 format_download_interrupted,
                 format_download_error,
@@ -495,7 +2032,6 @@ class DirectoryShareHandler(BaseHTTPRequestHandler):
         except ImportError:
             from logger import (
                 format_download_start,
-                format_download_progress,
                 format_download_complete,
                 format_download_interrupted,
                 format_download_error,
@@ -503,85 +2039,53 @@ class DirectoryShareHandler(BaseHTTPRequestHandler):
             )
             from directory_handler import format_file_size
 
-        file_size = os.path.getsize(file_path)
         client_ip = self.client_address[0]
+        layout = build_stored_zip_layout(base_dir, target_dir, getattr(self.server, 'entry_cache', None))
+        try:
+            plan = RangeResponsePlan(
+                self.headers, layout.size, layout.etag, format_http_date(layout.mtime),
+                zip_filename, 'application/zip',
+                # The newest mtime survives deletes and renames: only the ETag pins the layout
+                date_validates_range=False
+            )
+        except RangeNotSatisfiable:
+            self._send_range_not_satisfiable(layout.size)
+            return
 
-        self.send_response(200)
+        self.send_response(plan.status)
         self._set_session_cookie_if_needed()
-        self.send_header('Content-Type', 'application/octet-stream')
-        self.send_header('Content-Disposition', f'attachment; filename="{filename}"')
-        self.send_header('Content-Length', str(file_size))
+        for name, value in plan.headers:
+            self.send_header(name, value)
         self.end_headers()
+        if self._is_head_request():
+            return
 
-        # Initialize progress tracker
-        tracker = DownloadProgressTracker(client_ip, filename, file_size)
-
-        # Log download start
-        timestamp = get_timestamp()
-        print(format_download_start(timestamp, client_ip, filename, format_file_size(file_size)))
+        tracker = DownloadProgressTracker(client_ip, plan.display_name, plan.transfer_size)
+        print(format_download_start(get_timestamp(), client_ip, plan.display_name, format_file_size(plan.transfer_size)))
 
-        # Stream file in chunks
         try:
-            with open(file_path, 'rb') as f:
-                while True:
-                    chunk = f.read(CHUNK_SIZE)
-                    if not chunk:
-                        break
-
-                    self.wfile.write(chunk)
-
-                    # Update progress
-                    if tracker.update(len(chunk)):
-                        percentage = tracker.get_progress_percentage()
-                        timestamp = get_timestamp()
-                        print(format_download_progress(
-                            timestamp,
-                            client_ip,
-                            tracker.bytes_transferred,
-                            file_size,
-                            percentage
-                        ))
-
-            # Log completion
+            on_progress = self._progress_logger(tracker)
+            for prefix, offset, length in plan.segments():
+                if prefix:
+                    self.wfile.write(prefix)
+                layout.write_range(self.wfile, offset, length, on_progress)
+
             tracker.complete()
             duration = time.time() - tracker.start_time
-            timestamp = get_timestamp()
-            print(format_download_complete(timestamp, client_ip, filename, file_size, duration))
-
+            print(format_download_complete(get_timestamp(), client_ip, plan.display_name, plan.transfer_size, duration))
         except (BrokenPipeError, ConnectionResetError):
-            # Client disconnected
-            timestamp = get_timestamp()
+            self.close_connection = True
             print(format_download_interrupted(
-                timestamp,
+                get_timestamp(),
                 client_ip,
-                filename,
+                plan.display_name,
                 tracker.bytes_transferred,
-                file_size
+                plan.transfer_size
             ))
-        except Exception as e:
-            # Other errors
-            timestamp = get_timestamp()
-            print(format_download_error(timestamp, client_ip, filename, str(e)))
-
-    def _serve_directory_zip(self, base_dir: str, target_dir: str):
-        """Stream directory as zip file with progress tracking."""
-        dir_name = os.path.basename(base_dir)
-        zip_filename = f"{dir_name}.zip"
-
-        self.send_response(200)
-        self._set_session_cookie_if_needed()
-        self.send_header('Content-Type', 'application/zip')
-        self.send_header('Content-Disposition', f'attachment; filename="{zip_filename}"')
-        # Don't set Transfer-Encoding or Content-Length
-        # Let the connection close naturally after streaming
-        self.end_headers()
-
-        # Stream zip to client with progress tracking
-        try:
-            stream_directory_as_zip(self.wfile, base_dir, target_dir, progress_callback=True)
-        except (BrokenPipeError, ConnectionResetError):
-            # Client disconnected - this is normal, ignore it
-            pass
+        except OSError as e:
+            # A file changed under us: the promised length can't be met, drop the connection
+            print(format_download_error(get_timestamp(), client_ip, plan.display_name, str(e)))
+            self.close_connection = True
 
     def _set_session_cookie_if_needed(self):
         """Set session cookie header if we have a session_id."""
@@ -602,7 +2106,12 @@ class DirectoryShareServer:
         port: Optional[int] = None,
         timeout_minutes: int = 30,
         max_sessions: int = 10,
-        legacy_mode: bool = False
+        legacy_mode: bool = False,
+        pool_workers: Optional[int] = None,
+        pool_queue: int = DEFAULT_POOL_QUEUE,
+        workers: int = 1,
+        zip_compression: str = ZIP_COMPRESSION_AUTO,
+        zip_cache_size: int = DEFAULT_CACHE_SIZE
     ):
         """
         Initialize DirectoryShareServer.
@@ -613,20 +2122,43 @@ class DirectoryShareServer:
             timeout_minutes: Minutes before auto-shutdown
             max_sessions: Maximum number of concurrent sessions
             legacy_mode: If True, use legacy server-side rendering by default
+            pool_workers: Serve on a bounded pool of this many threads (None: thread per connection)
+            pool_queue: Connections allowed to wait for a pool worker before 503
+            workers: Processes listening on the port via SO_REUSEPORT (1: this process only);
+                sessions are then shared through a WorkerCoordinator
+            zip_compression: Default zip policy: 'auto', 'deflate' or 'store'
+            zip_cache_size: Bytes of deflated entries kept on disk for repeated zip downloads (0: no cache)
         """
         self.directory_path = os.path.abspath(directory_path)
         self.port = find_available_port(custom_port=port) if port else find_available_port()
         self.timeout_minutes = timeout_minutes
         self.max_sessions = max_sessions
         self.legacy_mode = legacy_mode
+        self.pool_workers = pool_workers
+        self.pool_queue = pool_queue
+        self.workers = workers
+        self.zip_compression = zip_compression
+        self.zip_cache_size = zip_cache_size
+        self.entry_cache: Optional[EntryCache] = None
+        self.hash_cache = HashCache()
+        self.listing_cache: Optional[ListingCache] = None
+        self.line_index_cache = LineIndexCache()
+        self.encoding_cache = EncodingCache()
+        # The SPA page only depends on the directory name: build (and compress) it once
+        self.spa_page = StaticPayload(
+            generate_spa_html(os.path.basename(directory_path)).encode('utf-8'), 'text/html; charset=utf-8'
+        )
 
         # Session management (to be implemented in later tasks)
         self.sessions = {}
         self.session_lock = threading.Lock()
+        self.segments = SegmentedDownloadRegistry()
 
         self.httpd: Optional[HTTPServer] = None
         self.server_thread: Optional[threading.Thread] = None
         self.shutdown_timer: Optional[threading.Timer] = None
+        self.coordinator: Optional[WorkerCoordinator] = None
+        self.worker_processes: Optional[WorkerProcesses] = None
 
     def track_session(self, request_handler) -> Tuple[bool, Optional[str]]:
         """
@@ -679,19 +2211,59 @@ class DirectoryShareServer:
 
         return None
 
-    def start(self):
-        """Start the server in a background thread."""
-        self.httpd = ThreadingHTTPServer(('', self.port), DirectoryShareHandler)
+    def _create_httpd(self) -> HTTPServer:
+        """Bind a server for this share (one per process in multi-process mode)."""
+        httpd = create_http_server(self.port, DirectoryShareHandler, self.pool_workers, self.pool_queue,
+                                   reuse_port=self.workers > 1)
 
         # Inject directory info and session management into server instance
-        self.httpd.directory_path = self.directory_path
-        self.httpd.sessions = self.sessions
-        self.httpd.session_lock = self.session_lock
-        self.httpd.max_sessions = self.max_sessions
-        self.httpd.legacy_mode = self.legacy_mode
+        httpd.directory_path = self.directory_path
+        httpd.sessions = self.sessions
+        httpd.session_lock = self.session_lock
+        httpd.max_sessions = self.max_sessions
+        httpd.legacy_mode = self.legacy_mode
+        httpd.zip_compression = self.zip_compression
+        httpd.entry_cache = self.entry_cache
+        httpd.hash_cache = self.hash_cache
+        # Per process: inotify watches and their reader thread don't survive a fork
+        self.listing_cache = ListingCache()
+        httpd.listing_cache = self.listing_cache
+        httpd.line_index_cache = self.line_index_cache
+        httpd.encoding_cache = self.encoding_cache
+        httpd.spa_page = self.spa_page
+        httpd.segments = self.segments
         # Inject track_session method so handler can call it
-        self.httpd.track_session = self.track_session
-        self.httpd._extract_session_id_from_cookie = self._extract_session_id_from_cookie
+        httpd.track_session = self.track_session
+        httpd._extract_session_id_from_cookie = self._extract_session_id_from_cookie
+        return httpd
+
+    def _open_entry_cache(self):
+        """Create the zip entry cache (before any worker is forked, so all share it)."""
+        if self.zip_cache_size > 0 and self.entry_cache is None:
+            self.entry_cache = EntryCache(self.zip_cache_size)
+
+    def _close_entry_cache(self):
+        """Remove the zip entry cache."""
+        if self.entry_cache:
+            self.entry_cache.close()
+            self.entry_cache = None
+
+    def _close_listing_cache(self):
+        """Drop cached listings and stop watching directories."""
+        if self.listing_cache:
+            self.listing_cache.close()
+            self.listing_cache = None
+
+    def start(self):
+        """Start the server in a background thread."""
+        self._open_entry_cache()
+        if self.workers > 1:
+            # Every worker must see the same sessions for max_sessions to hold
+            self.coordinator = WorkerCoordinator()
+            self.sessions = self.coordinator.dict(self.sessions)
+            self.session_lock = self.coordinator.lock()
+
+        self.httpd, self.worker_processes = start_listeners(self.workers, self._create_httpd)
 
         self.server_thread = threading.Thread(target=self.httpd.serve_forever)
         self.server_thread.daemon = True
@@ -713,3 +2285,15 @@ class DirectoryShareServer:
         if self.httpd:
             self.httpd.shutdown()
             self.httpd.server_close()
+
+        if self.worker_processes:
+            self.worker_processes.stop()
+            self.worker_processes = None
+
+        if self.coordinator:
+            self.coordinator.shutdown()
+            self.coordinator = None
+
+        self._close_entry_cache()
+        self._close_listing_cache()
+        self.segments.close_all()
@@ -0,0 +1,136 @@
+"""Directory manifests and change detection for incremental sync (quick-share pull)."""
+
+import hashlib
+import os
+import threading
+from typing import Dict, Iterable, Iterator, Optional, Tuple
+
+# Constants
+HASH_ALGORITHM = 'sha256'
+HASH_BLOCK_SIZE = 1024 * 1024
+
+FileItem = Tuple[str, str, os.stat_result]
+
+
+def file_digest(file_path: str) -> str:
+    """
+    Hash a file's content.
+
+    Args:
+        file_path: File to hash
+
+    Returns:
+        Hex digest (HASH_ALGORITHM)
+    """
+    digest = hashlib.new(HASH_ALGORITHM)
+    with open(file_path, 'rb') as f:
+        while True:
+            block = f.read(HASH_BLOCK_SIZE)
+            if not block:
+                break
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class HashCache:
+    """
+    Content hashes of files, reused while size, mtime and inode are unchanged.
+
+    Hashing a large tree is expensive, so the server keeps the digests it
+    has computed for the lifetime of the share.
+    """
+
+    def __init__(self):
+        self._digests: Dict[str, Tuple[int, int, int, str]] = {}
+        self._lock = threading.Lock()
+
+    def digest(self, file_path: str, stat_result: os.stat_result) -> str:
+        """
+        Hash of a file, computed only if it changed since it was last hashed.
+
+        Args:
+            file_path: File to hash
+            stat_result: Its current stat result
+
+        Returns:
+            Hex digest
+
+        Raises:
+            OSError: If the file can't be read
+        """
+        key = (stat_result.st_size, stat_result.st_mtime_ns, stat_result.st_ino)
+        with self._lock:
+            cached = self._digests.get(file_path)
+        if cached and cached[:3] == key:
+            return cached[3]
+
+        digest = file_digest(file_path)
+        with self._lock:
+            self._digests[file_path] = key + (digest,)
+        return digest
+
+
+def _manifest_path(arcname: str) -> str:
+    """Manifest paths are '/' separated and relative to the synced directory."""
+    return arcname.replace(os.sep, '/')
+
+
+def build_manifest(files: Iterable[FileItem], hash_cache: Optional[HashCache] = None,
+                   with_hashes: bool = True) -> list:
+    """
+    Describe a set of files for sync clients.
+
+    Args:
+        files: Iterable of (file_path, arcname, stat_result)
+        hash_cache: Cache of content hashes (default: hash every file)
+        with_hashes: Include content hashes (costly on first use)
+
+    Returns:
+        List of {'path', 'size', 'mtime'[, HASH_ALGORITHM]} dicts
+    """
+    manifest = []
+    for file_path, arcname, stat_result in files:
+        item = {
+            'path': _manifest_path(arcname),
+            'size': stat_result.st_size,
+            'mtime': stat_result.st_mtime,
+        }
+        if with_hashes:
+            try:
+                item[HASH_ALGORITHM] = (
+                    hash_cache.digest(file_path, stat_result) if hash_cache else file_digest(file_path)
+                )
+            except OSError:
+                # Vanished or unreadable: leave it out like the archive writers do
+                continue
+        manifest.append(item)
+    return manifest
+
+
+def iter_changed_files(files: Iterable[FileItem], client_files: Dict[str, dict],
+                       hash_cache: Optional[HashCache] = None) -> Iterator[FileItem]:
+    """
+    Yield the files a client is missing or holds a different version of.
+
+    Sizes are compared first; content is only hashed when the sizes match.
+
+    Args:
+        files: Iterable of (file_path, arcname, stat_result) on the server
+        client_files: Client manifest entries keyed by manifest path
+        hash_cache: Cache of content hashes
+
+    Returns:
+        Iterator over the subset of files to send
+    """
+    for item in files:
+        file_path, arcname, stat_result = item
+        theirs = client_files.get(_manifest_path(arcname))
+        if theirs is None or theirs.get('size') != stat_result.st_size or not theirs.get(HASH_ALGORITHM):
+            yield item
+            continue
+        try:
+            ours = hash_cache.digest(file_path, stat_result) if hash_cache else file_digest(file_path)
+        except OSError:
+            continue
+        if ours != theirs[HASH_ALGORITHM]:
+            yield item
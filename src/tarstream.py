@@ -0,0 +1,101 @@
+"""Streaming tar writer with optional gzip or zstd compression."""
+
+import gzip
+import os
+import tarfile
+from typing import Callable, Iterable, Optional, Tuple
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Constants
+TAR_FORMATS = ('tar', 'tar.gz', 'tar.zst')
+GZIP_LEVEL = 6  # tarfile's stream mode would use level 9, which is several times slower
+ZSTD_LEVEL = 3
+COPY_BUFFER_SIZE = 1024 * 1024
+
+
+def zstd_available() -> bool:
+    """Check whether tar.zst downloads can be produced (needs the zstandard module)."""
+    return zstandard is not None
+
+
+def _make_tarinfo(arcname: str, stat_result: os.stat_result) -> tarfile.TarInfo:
+    """
+    Build a TarInfo from an existing stat result.
+
+    Owner names are left out: looking them up costs a passwd/group query
+    per file and means nothing on the receiving machine.
+    """
+    info = tarfile.TarInfo(arcname.replace(os.sep, '/'))
+    info.size = stat_result.st_size
+    info.mtime = int(stat_result.st_mtime)
+    info.mode = stat_result.st_mode & 0o7777
+    info.type = tarfile.REGTYPE
+    return info
+
+
+class _BoundedReader:
+    """Reader returning at most size bytes, so a growing file can't corrupt the tar stream."""
+
+    def __init__(self, f, size: int):
+        self._f = f
+        self._remaining = size
+
+    def read(self, n: int = -1) -> bytes:
+        if n < 0 or n > self._remaining:
+            n = self._remaining
+        data = self._f.read(n)
+        self._remaining -= len(data)
+        return data
+
+
+def write_tar(
+    output,
+    files: Iterable[Tuple[str, str, os.stat_result]],
+    compression: Optional[str] = None,
+    on_entry: Optional[Callable[[tarfile.TarInfo], None]] = None
+):
+    """
+    Stream a tar archive of files to output.
+
+    Args:
+        output: Writable binary stream
+        files: Iterable of (file_path, arcname, stat_result)
+        compression: None, 'gz' or 'zst'
+        on_entry: Called after each member is completely written
+
+    Raises:
+        RuntimeError: If zstd is requested but the zstandard module is missing
+    """
+    if compression == 'zst':
+        if not zstd_available():
+            raise RuntimeError("tar.zst requires the zstandard module")
+        # threads=-1: one compression thread per CPU
+        compressor = zstandard.ZstdCompressor(level=ZSTD_LEVEL, threads=-1)
+        stream = compressor.stream_writer(output, closefd=False)
+    elif compression == 'gz':
+        stream = gzip.GzipFile(fileobj=output, mode='wb', compresslevel=GZIP_LEVEL, mtime=0)
+    else:
+        stream = output
+
+    with tarfile.open(fileobj=stream, mode='w|', copybufsize=COPY_BUFFER_SIZE) as tar:
+        for file_path, arcname, stat_result in files:
+            try:
+                f = open(file_path, 'rb')
+            except OSError:
+                # Skip files that vanished or can't be read
+                continue
+            with f:
+                info = _make_tarinfo(arcname, stat_result)
+                tar.addfile(info, _BoundedReader(f, info.size))
+            # The member list is only needed for reading; don't grow it over huge trees
+            tar.members = []
+            if on_entry:
+                on_entry(info)
+
+    if stream is not output:
+        # Finishes the gzip member / zstd frame; output itself stays open
+        stream.close()
@@ -1,6 +1,16 @@
 import html
 import os
 
+try:
+    from .textpreview import MAX_PREVIEW_SIZE
+except ImportError:
+    from textpreview import MAX_PREVIEW_SIZE
+
+# Constants
+TREE_PAGE_SIZE = 500  # Entries the SPA requests per /api/tree page
+LINE_PAGE_SIZE = 500  # Lines the SPA requests per /api/content page of a large file
+
+
 def generate_spa_html(base_dir_name: str) -> str:
     """
     Generate the Single Page Application HTML.
@@ -147,6 +157,11 @@ def generate_spa_html(base_dir_name: str) -> str:
             margin-left: 20px;
         }}
 
+        .tree-select {{
+            margin: 0;
+            flex-shrink: 0;
+        }}
+
         /* Content Area */
         .content-area {{
             flex: 1;
@@ -192,6 +207,47 @@ def generate_spa_html(base_dir_name: str) -> str:
             z-index: 10;
         }}
 
+        .log-toolbar {{
+            display: flex;
+            align-items: center;
+            justify-content: space-between;
+            color: #666;
+            font-size: 0.9rem;
+            margin-bottom: 10px;
+        }}
+
+        .log-view {{
+            position: relative;
+            height: 70vh;
+            overflow: auto;
+            background: #2d2d2d;
+            border-radius: 6px;
+        }}
+
+        .log-lines {{
+            position: absolute;
+            left: 0;
+            right: 0;
+            overflow: hidden;
+            padding: 0 10px;
+            background: transparent;
+            color: #ccc;
+            font-size: 13px;
+            line-height: 18px;
+            white-space: pre;
+        }}
+
+        .tree-more {{
+            color: #0366d6;
+            font-size: 0.8em;
+            padding: 4px 0 4px 28px;
+            cursor: pointer;
+        }}
+
+        .tree-more:hover {{
+            text-decoration: underline;
+        }}
+
         .error-message {{
             color: #dc3545;
             padding: 15px;
@@ -209,6 +265,12 @@ def generate_spa_html(base_dir_name: str) -> str:
                 <span style="color: #888; font-weight: normal;">/ {html.escape(base_dir_name)}</span>
             </div>
             <div class="actions">
+                <template v-if="selectedPaths.length">
+                    <button class="btn" @click="clearSelection">Clear</button>
+                    <button class="btn btn-primary" @click="downloadSelected">
+                        Download {{{{ selectedPaths.length }}}} selected
+                    </button>
+                </template>
                 <a href="/?legacy=1" class="btn">Legacy View</a>
                 <a href="/?download=zip" class="btn">Download ZIP</a>
             </div>
@@ -223,8 +285,13 @@ def generate_spa_html(base_dir_name: str) -> str:
                         :key="item.name"
                         :item="item"
                         :current-path="currentPath"
+                        :selected-paths="selectedPaths"
                         @select="selectItem"
+                        @toggle-select="toggleSelect"
                     ></tree-item>
+                    <div v-if="treeCursor" class="tree-more" @click="loadMoreRoot">
+                        {{{{ treeLoadingMore ? 'Loading...' : 'Load more (' + tree.length + ' of ' + treeTotal + ')' }}}}
+                    </div>
                 </div>
             </aside>
 
@@ -243,6 +310,18 @@ def generate_spa_html(base_dir_name: str) -> str:
                         </div>
                     </div>
 
+                    <!-- Large files: pages of lines fetched as they scroll into view -->
+                    <div v-if="logTotal !== null">
+                        <div class="log-toolbar">
+                            <span>{{{{ logTotal.toLocaleString() }}}} lines</span>
+                            <button class="btn" @click="jumpToLogEnd">Jump to end</button>
+                        </div>
+                        <div class="log-view" ref="logView" @scroll="onLogScroll">
+                            <div :style="{{ height: logSpacerHeight + 'px' }}"></div>
+                            <pre class="log-lines" :style="{{ top: logScrollTop + 'px', height: logViewHeight + 'px' }}">{{{{ logVisibleText }}}}</pre>
+                        </div>
+                    </div>
+
                     <div v-if="fileContent" class="file-content">
                         <!-- Markdown -->
                         <div v-if="isMarkdown" v-html="renderedMarkdown" class="markdown-body"></div>
@@ -263,16 +342,39 @@ def generate_spa_html(base_dir_name: str) -> str:
 
     <script>
         const {{ createApp, ref, computed, onMounted, watch }} = Vue;
+        const TREE_PAGE_SIZE = {TREE_PAGE_SIZE};
+        const PREVIEW_MAX_SIZE = {MAX_PREVIEW_SIZE};
+        const LINE_PAGE_SIZE = {LINE_PAGE_SIZE};
+        const LINE_HEIGHT = 18;
+        const MAX_SCROLL_HEIGHT = 10000000;  // Browsers cap element heights: long files scroll proportionally
+
+        // Fetch one page of a directory listing, with item paths filled in
+        async function fetchTreePage(path, cursor) {{
+            let url = `/api/tree?path=${{encodeURIComponent(path)}}&limit=${{TREE_PAGE_SIZE}}`;
+            if (cursor) url += `&cursor=${{encodeURIComponent(cursor)}}`;
+            const res = await fetch(url);
+            if (!res.ok) throw new Error('Failed to load');
+            const data = await res.json();
+            const parentPath = path === '/' ? '' : path;
+            return {{
+                items: data.items.map(child => ({{ ...child, path: parentPath + '/' + child.name }})),
+                nextCursor: data.next_cursor,
+                total: data.total
+            }};
+        }}
 
         // Tree Item Component
         const TreeItem = {{
             name: 'TreeItem',
-            props: ['item', 'currentPath'],
-            emits: ['select'],
+            props: ['item', 'currentPath', 'selectedPaths'],
+            emits: ['select', 'toggle-select'],
             setup(props, {{ emit }}) {{
                 const isOpen = ref(false);
                 const children = ref([]);
                 const isLoading = ref(false);
+                const nextCursor = ref(null);
+                const total = ref(0);
+                const isLoadingMore = ref(false);
 
                 const isFolder = computed(() => props.item.type === 'directory');
 
@@ -293,16 +395,10 @@ def generate_spa_html(base_dir_name: str) -> str:
                 async function loadChildren() {{
                     isLoading.value = true;
                     try {{
-                        const res = await fetch(`/api/tree?path=${{encodeURIComponent(fullPath.value)}}`);
-                        if (!res.ok) throw new Error('Failed to load');
-                        const data = await res.json();
-
-                        // Enrich children with paths
-                        const parentPath = fullPath.value === '/' ? '' : fullPath.value;
-                        children.value = data.items.map(child => ({{
-                            ...child,
-                            path: parentPath + '/' + child.name
-                        }}));
+                        const page = await fetchTreePage(fullPath.value, null);
+                        children.value = page.items;
+                        nextCursor.value = page.nextCursor;
+                        total.value = page.total;
                     }} catch (e) {{
                         console.error(e);
                     }} finally {{
@@ -310,17 +406,43 @@ def generate_spa_html(base_dir_name: str) -> str:
                     }}
                 }}
 
+                async function loadMore() {{
+                    if (isLoadingMore.value || !nextCursor.value) return;
+                    isLoadingMore.value = true;
+                    try {{
+                        const page = await fetchTreePage(fullPath.value, nextCursor.value);
+                        children.value.push(...page.items);
+                        nextCursor.value = page.nextCursor;
+                        total.value = page.total;
+                    }} catch (e) {{
+                        console.error(e);
+                    }} finally {{
+                        isLoadingMore.value = false;
+                    }}
+                }}
+
                 return {{
                     isOpen,
                     isFolder,
                     children,
                     isLoading,
-                    toggle
+                    nextCursor,
+                    total,
+                    isLoadingMore,
+                    toggle,
+                    loadMore
                 }};
             }},
             template: `
                 <div class="tree-node">
                     <div class="tree-item" @click="toggle" :class="{{ active: false }}">
+                        <input
+                            type="checkbox"
+                            class="tree-select"
+                            :checked="selectedPaths.includes(item.path)"
+                            @click.stop
+                            @change="$emit('toggle-select', item.path)"
+                        >
                         <span style="width: 20px; text-align: center;">
                             {{{{ isFolder ? (isOpen ? '📂' : '📁') : '📄' }}}}
                         </span>
@@ -334,8 +456,13 @@ def generate_spa_html(base_dir_name: str) -> str:
                             :key="child.name"
                             :item="child"
                             :current-path="currentPath"
+                            :selected-paths="selectedPaths"
                             @select="$emit('select', $event)"
+                            @toggle-select="$emit('toggle-select', $event)"
                          ></tree-item>
+                         <div v-if="!isLoading && nextCursor" class="tree-more" @click.stop="loadMore">
+                            {{{{ isLoadingMore ? 'Loading...' : 'Load more (' + children.length + ' of ' + total + ')' }}}}
+                         </div>
                          <div v-if="!isLoading && children.length === 0" style="color: #999; font-size: 0.8em; padding-left: 28px;">
                             (Empty)
                          </div>
@@ -348,11 +475,21 @@ def generate_spa_html(base_dir_name: str) -> str:
             components: {{ TreeItem }},
             setup() {{
                 const tree = ref([]);
+                const treeCursor = ref(null);
+                const treeTotal = ref(0);
+                const treeLoadingMore = ref(false);
                 const selectedFile = ref(null);
                 const fileContent = ref('');
                 const loading = ref(false);
                 const error = ref(null);
                 const currentPath = ref('/');
+                const selectedPaths = ref([]);
+                const logTotal = ref(null);  // Line count of a large file shown page by page
+                const logPages = ref({{}});
+                const logScrollTop = ref(0);
+                const logViewHeight = ref(600);
+                const logView = ref(null);
+                const logPagesLoading = new Set();
 
                 // Computed
                 const isMarkdown = computed(() => {{
@@ -370,6 +507,28 @@ def generate_spa_html(base_dir_name: str) -> str:
                     return marked.parse(fileContent.value);
                 }});
 
+                const logSpacerHeight = computed(() => {{
+                    return Math.min((logTotal.value || 0) * LINE_HEIGHT, MAX_SCROLL_HEIGHT);
+                }});
+
+                const logVisibleCount = computed(() => Math.ceil(logViewHeight.value / LINE_HEIGHT) + 1);
+
+                const logFirstLine = computed(() => {{
+                    const maxFirst = Math.max(0, (logTotal.value || 0) - logVisibleCount.value);
+                    const maxScroll = Math.max(1, logSpacerHeight.value - logViewHeight.value);
+                    return Math.min(maxFirst, Math.round(logScrollTop.value / maxScroll * maxFirst));
+                }});
+
+                const logVisibleText = computed(() => {{
+                    const lines = [];
+                    const last = Math.min(logTotal.value || 0, logFirstLine.value + logVisibleCount.value);
+                    for (let line = logFirstLine.value; line < last; line++) {{
+                        const page = logPages.value[Math.floor(line / LINE_PAGE_SIZE)];
+                        lines.push(page ? (page[line % LINE_PAGE_SIZE] ?? '') : '…');
+                    }}
+                    return lines.join('\\n');
+                }});
+
                 // Methods
                 function formatSize(bytes) {{
                     if (bytes === 0) return '0 B';
@@ -379,12 +538,64 @@ def generate_spa_html(base_dir_name: str) -> str:
                     return parseFloat((bytes / Math.pow(k, i)).toFixed(2)) + ' ' + sizes[i];
                 }}
 
+                async function fetchLinePage(item, page) {{
+                    const line = page * LINE_PAGE_SIZE;
+                    const res = await fetch(
+                        `/api/content?path=${{encodeURIComponent(item.path)}}&line=${{line}}&count=${{LINE_PAGE_SIZE}}`
+                    );
+                    const data = await res.json();
+                    if (!res.ok) throw new Error(data.error || 'Failed to load content');
+                    if (selectedFile.value === item) {{
+                        logPages.value[page] = data.lines;
+                        logTotal.value = data.total_lines;
+                    }}
+                }}
+
+                async function loadVisibleLinePages() {{
+                    const item = selectedFile.value;
+                    if (!item || logTotal.value === null) return;
+                    const first = Math.floor(logFirstLine.value / LINE_PAGE_SIZE);
+                    const last = Math.floor((logFirstLine.value + logVisibleCount.value) / LINE_PAGE_SIZE);
+                    for (let page = first; page <= last; page++) {{
+                        const key = item.path + ':' + page;
+                        if (logPages.value[page] || logPagesLoading.has(key)) continue;
+                        logPagesLoading.add(key);
+                        fetchLinePage(item, page)
+                            .catch(e => {{ error.value = e.message; }})
+                            .finally(() => logPagesLoading.delete(key));
+                    }}
+                }}
+
+                function onLogScroll(event) {{
+                    logScrollTop.value = event.target.scrollTop;
+                    logViewHeight.value = event.target.clientHeight;
+                }}
+
+                function jumpToLogEnd() {{
+                    if (logView.value) logView.value.scrollTop = logView.value.scrollHeight;
+                }}
+
                 async function selectItem(item) {{
                     selectedFile.value = item;
                     fileContent.value = ''; // Clear previous content
+                    logTotal.value = null;
+                    logPages.value = {{}};
+                    logScrollTop.value = 0;
                     loading.value = true;
                     error.value = null;
 
+                    if (item.size > PREVIEW_MAX_SIZE) {{
+                        // Too large to load whole: scroll through it a page of lines at a time
+                        try {{
+                            await fetchLinePage(item, 0);
+                        }} catch (e) {{
+                            error.value = e.message;
+                        }} finally {{
+                            loading.value = false;
+                        }}
+                        return;
+                    }}
+
                     try {{
                         const res = await fetch(`/api/content?path=${{encodeURIComponent(item.path)}}`);
                         if (!res.ok) {{
@@ -400,14 +611,43 @@ def generate_spa_html(base_dir_name: str) -> str:
                     }}
                 }}
 
+                function toggleSelect(path) {{
+                    const index = selectedPaths.value.indexOf(path);
+                    if (index === -1) {{
+                        selectedPaths.value.push(path);
+                    }} else {{
+                        selectedPaths.value.splice(index, 1);
+                    }}
+                }}
+
+                function clearSelection() {{
+                    selectedPaths.value = [];
+                }}
+
+                function downloadSelected() {{
+                    // A plain form post lets the browser stream the zip straight to disk
+                    const form = document.createElement('form');
+                    form.method = 'POST';
+                    form.action = '/api/zip';
+                    for (const path of selectedPaths.value) {{
+                        const input = document.createElement('input');
+                        input.type = 'hidden';
+                        input.name = 'path';
+                        input.value = path;
+                        form.appendChild(input);
+                    }}
+                    document.body.appendChild(form);
+                    form.submit();
+                    form.remove();
+                }}
+
                 async function loadRoot() {{
                     loading.value = true;
                     try {{
-                        const res = await fetch('/api/tree?path=/');
-                        if (!res.ok) throw new Error('Failed to load root');
-                        const data = await res.json();
-                        // Enrich items with path
-                        tree.value = data.items.map(i => ({{ ...i, path: '/' + i.name }}));
+                        const page = await fetchTreePage('/', null);
+                        tree.value = page.items;
+                        treeCursor.value = page.nextCursor;
+                        treeTotal.value = page.total;
                     }} catch (e) {{
                         error.value = "Failed to load directory structure";
                         console.error(e);
@@ -416,10 +656,31 @@ def generate_spa_html(base_dir_name: str) -> str:
                     }}
                 }}
 
+                async function loadMoreRoot() {{
+                    if (treeLoadingMore.value || !treeCursor.value) return;
+                    treeLoadingMore.value = true;
+                    try {{
+                        const page = await fetchTreePage('/', treeCursor.value);
+                        tree.value.push(...page.items);
+                        treeCursor.value = page.nextCursor;
+                        treeTotal.value = page.total;
+                    }} catch (e) {{
+                        console.error(e);
+                    }} finally {{
+                        treeLoadingMore.value = false;
+                    }}
+                }}
+
                 onMounted(() => {{
                     loadRoot();
                 }});
 
+                watch([logFirstLine, logVisibleCount], loadVisibleLinePages);
+
+                watch(logView, el => {{
+                    if (el) logViewHeight.value = el.clientHeight;
+                }});
+
                 watch(fileContent, () => {{
                     if (!isMarkdown.value) {{
                         // Trigger Prism highlight next tick
@@ -429,16 +690,32 @@ def generate_spa_html(base_dir_name: str) -> str:
 
                 return {{
                     tree,
+                    treeCursor,
+                    treeTotal,
+                    treeLoadingMore,
+                    loadMoreRoot,
                     selectedFile,
                     fileContent,
                     loading,
                     error,
                     currentPath,
+                    selectedPaths,
                     isMarkdown,
                     languageClass,
                     renderedMarkdown,
+                    logTotal,
+                    logView,
+                    logScrollTop,
+                    logViewHeight,
+                    logSpacerHeight,
+                    logVisibleText,
+                    onLogScroll,
+                    jumpToLogEnd,
                     formatSize,
-                    selectItem
+                    selectItem,
+                    toggleSelect,
+                    clearSelection,
+                    downloadSelected
                 }};
             }}
         }}).mount('#app');
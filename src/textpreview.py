@@ -0,0 +1,551 @@
+"""Text previews for /api/content: encoding sniffing, whole files, byte ranges, tails and line pages."""
+
+import codecs
+import hashlib
+import os
+import threading
+from array import array
+from bisect import bisect_left
+from collections import OrderedDict
+from typing import BinaryIO, Optional, Tuple
+
+# Constants
+MAX_PREVIEW_SIZE = 1024 * 1024  # Largest file previewed whole
+MAX_WINDOW_SIZE = 1024 * 1024  # Most bytes read for one windowed request
+DEFAULT_WINDOW_SIZE = 64 * 1024
+DEFAULT_LINE_COUNT = 200
+MAX_LINE_COUNT = 5000
+INDEX_BLOCK_SIZE = 64 * 1024  # The line index records a newline count every this many bytes
+INDEX_READ_SIZE = 1024 * 1024  # Bytes read per call while indexing
+LINE_INDEX_CACHE_FILES = 32  # Line indexes kept in memory (least recently used are dropped)
+APPEND_CHECK_SIZE = 4096  # Bytes at each end of the indexed part that must be unchanged to extend an index
+MAX_UTF8_CONTINUATION = 3  # A UTF-8 character has at most 3 bytes after its lead byte
+SNIFF_SIZE = 8 * 1024  # Bytes at the start of a file that decide whether (and how) it is text
+MAX_CONTROL_RATIO = 0.1  # Samples with more control characters than this are binary
+ENCODING_CACHE_FILES = 4096  # Sniffed files remembered (least recently used are dropped)
+
+# Control characters that are common in text (tab, line breaks, form feed, backspace, ANSI escapes)
+_TEXT_CONTROLS = b'\t\n\r\f\b\x1b'
+_NON_CONTROL_BYTES = bytes(byte for byte in range(256) if byte >= 0x20 or byte in _TEXT_CONTROLS)
+_BOMS = (
+    (codecs.BOM_UTF8, 'utf-8-sig'),
+    (codecs.BOM_UTF16_LE, 'utf-16'),
+    (codecs.BOM_UTF16_BE, 'utf-16'),
+)
+
+
+class NotTextError(Exception):
+    """The requested bytes are not text that can be previewed."""
+    pass
+
+
+def sniff_encoding(sample: bytes, complete: bool = False) -> Optional[str]:
+    """
+    Classify the start of a file as text (and pick its encoding) or binary.
+
+    Byte order marks decide first. Otherwise NUL bytes or too many control
+    characters mean binary; text that decodes as UTF-8 is UTF-8, anything
+    else is read as Windows-1252, or Latin-1 where that has undefined bytes.
+
+    Args:
+        sample: First bytes of the file (up to SNIFF_SIZE)
+        complete: The sample is the whole file (a multi-byte character can't be cut at its end)
+
+    Returns:
+        Python codec name, or None for binary
+    """
+    for bom, encoding in _BOMS:
+        if sample.startswith(bom):
+            return encoding
+
+    if b'\x00' in sample:
+        return None
+    controls = len(sample.translate(None, _NON_CONTROL_BYTES))
+    if controls > len(sample) * MAX_CONTROL_RATIO:
+        return None
+
+    try:
+        codecs.getincrementaldecoder('utf-8')().decode(sample, final=complete)
+        return 'utf-8'
+    except UnicodeDecodeError:
+        pass
+    try:
+        sample.decode('cp1252')
+        return 'cp1252'
+    except UnicodeDecodeError:
+        return 'latin-1'
+
+
+class EncodingCache:
+    """
+    Sniffed encodings (or 'binary') of recently previewed files, reused while
+    the file's size and mtime are unchanged.
+    """
+
+    def __init__(self, max_files: int = ENCODING_CACHE_FILES):
+        """
+        Initialize cache.
+
+        Args:
+            max_files: Files remembered before the least recently used is dropped
+        """
+        self.max_files = max_files
+        self._encodings: 'OrderedDict[str, Tuple[Tuple[int, int, int], Optional[str]]]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, file_path: str, stat_result: os.stat_result) -> Tuple[bool, Optional[str]]:
+        """
+        Look up a file.
+
+        Args:
+            file_path: Path of the file
+            stat_result: Its current stat result
+
+        Returns:
+            Tuple of (known, encoding): encoding is None for binary files
+        """
+        key = (stat_result.st_ino, stat_result.st_size, stat_result.st_mtime_ns)
+        with self._lock:
+            cached = self._encodings.get(file_path)
+            if not cached or cached[0] != key:
+                return False, None
+            self._encodings.move_to_end(file_path)
+            return True, cached[1]
+
+    def put(self, file_path: str, stat_result: os.stat_result, encoding: Optional[str]):
+        """Remember a file's encoding (None for binary)."""
+        key = (stat_result.st_ino, stat_result.st_size, stat_result.st_mtime_ns)
+        with self._lock:
+            self._encodings[file_path] = (key, encoding)
+            self._encodings.move_to_end(file_path)
+            while len(self._encodings) > self.max_files:
+                self._encodings.popitem(last=False)
+
+
+def file_encoding(f: BinaryIO, file_path: str, encoding_cache: Optional[EncodingCache] = None,
+                  sample: Optional[bytes] = None) -> str:
+    """
+    Encoding of an open file, sniffed from its first SNIFF_SIZE bytes.
+
+    Args:
+        f: The file, open for binary reading
+        file_path: Path of the file (cache key)
+        encoding_cache: Cache of sniffed encodings (default: sniff every time)
+        sample: First bytes of the file, if already read (otherwise read from f)
+
+    Returns:
+        Python codec name
+
+    Raises:
+        NotTextError: If the file is binary
+    """
+    stat_result = None
+    if encoding_cache is not None:
+        stat_result = os.fstat(f.fileno())
+        known, encoding = encoding_cache.get(file_path, stat_result)
+        if known:
+            if encoding is None:
+                raise NotTextError("Binary file not supported for preview")
+            return encoding
+
+    if sample is None:
+        f.seek(0)
+        sample = f.read(SNIFF_SIZE)
+    encoding = sniff_encoding(sample, len(sample) < SNIFF_SIZE)
+    if stat_result is not None:
+        encoding_cache.put(file_path, stat_result, encoding)
+    if encoding is None:
+        raise NotTextError("Binary file not supported for preview")
+    return encoding
+
+
+def _windowed_encoding(f: BinaryIO, file_path: str, encoding_cache: Optional[EncodingCache]) -> str:
+    """Encoding of a file previewed in windows (which need byte-oriented line breaks)."""
+    encoding = file_encoding(f, file_path, encoding_cache)
+    if encoding == 'utf-16':
+        raise NotTextError("UTF-16 files can only be previewed whole")
+    return encoding
+
+
+def read_file(file_path: str, encoding_cache: Optional[EncodingCache] = None) -> dict:
+    """
+    Preview a whole file.
+
+    Binary files are rejected after reading SNIFF_SIZE bytes (or none, once
+    cached); text is decoded in its sniffed encoding, undecodable bytes
+    replaced.
+
+    Args:
+        file_path: File to read (the caller enforces MAX_PREVIEW_SIZE)
+        encoding_cache: Cache of sniffed encodings
+
+    Returns:
+        Payload with content, size and encoding
+
+    Raises:
+        NotTextError: If the file is binary
+        OSError: If the file can't be read
+    """
+    with open(file_path, 'rb') as f:
+        sample = f.read(SNIFF_SIZE)
+        encoding = file_encoding(f, file_path, encoding_cache, sample)
+        data = sample + f.read()
+    return {
+        'content': data.decode(encoding, errors='replace'),
+        'size': len(data),
+        'encoding': encoding
+    }
+
+
+def decode_window(data: bytes, at_start: bool, at_end: bool, encoding: str = 'utf-8') -> Tuple[str, int, int]:
+    """
+    Decode a window of a text file.
+
+    A UTF-8 window starting or ending inside a multi-byte character is
+    trimmed to whole characters; undecodable bytes are replaced.
+
+    Args:
+        data: Bytes read from the file
+        at_start: The window starts at the beginning of the file
+        at_end: The window ends at the end of the file
+        encoding: Encoding of the file (an ASCII-compatible codec)
+
+    Returns:
+        Tuple of (text, skipped, consumed): bytes dropped at the start, and
+        bytes decoded (from the start of data, including the skipped ones)
+    """
+    skipped = 0
+    if encoding in ('utf-8', 'utf-8-sig') and not at_start:
+        # The byte order mark is only at the start of the file
+        encoding = 'utf-8'
+        while skipped < min(len(data), MAX_UTF8_CONTINUATION) and data[skipped] & 0xC0 == 0x80:
+            skipped += 1
+
+    decoder = codecs.getincrementaldecoder(encoding)(errors='replace')
+    text = decoder.decode(data[skipped:], final=at_end)
+    pending, _ = decoder.getstate()
+    return text, skipped, len(data) - len(pending)
+
+
+def _window_payload(f: BinaryIO, offset: int, length: int, size: int, encoding: str,
+                    align_to_line: bool = False) -> dict:
+    """Read, trim and decode [offset, offset + length) of an open file."""
+    f.seek(offset)
+    data = f.read(length)
+    if align_to_line and offset > 0:
+        # Start at the first complete line (unless the window holds no line break)
+        newline = data.find(b'\n')
+        if newline != -1:
+            offset += newline + 1
+            data = data[newline + 1:]
+
+    end = offset + len(data)
+    text, skipped, consumed = decode_window(data, offset == 0, end >= size, encoding)
+    return {
+        'content': text,
+        'offset': offset + skipped,
+        'end': offset + consumed,
+        'size': size,
+        'encoding': encoding
+    }
+
+
+def read_byte_window(file_path: str, offset: int, length: int = DEFAULT_WINDOW_SIZE,
+                     encoding_cache: Optional[EncodingCache] = None) -> dict:
+    """
+    Preview a byte range of a file.
+
+    Args:
+        file_path: File to read
+        offset: First byte of the window
+        length: Bytes to read (at most MAX_WINDOW_SIZE)
+        encoding_cache: Cache of sniffed encodings
+
+    Returns:
+        Payload with content, offset/end of the decoded text, the file size
+        and encoding
+
+    Raises:
+        ValueError: If the window is out of bounds
+        NotTextError: If the file is binary
+        OSError: If the file can't be read
+    """
+    if offset < 0:
+        raise ValueError("offset must not be negative")
+    if not 1 <= length <= MAX_WINDOW_SIZE:
+        raise ValueError(f"length must be between 1 and {MAX_WINDOW_SIZE}")
+
+    with open(file_path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        if offset > size:
+            raise ValueError("offset is past the end of the file")
+        encoding = _windowed_encoding(f, file_path, encoding_cache)
+        return _window_payload(f, offset, length, size, encoding)
+
+
+def read_tail(file_path: str, length: int = DEFAULT_WINDOW_SIZE,
+              encoding_cache: Optional[EncodingCache] = None) -> dict:
+    """
+    Preview the end of a file, starting at a line boundary.
+
+    Args:
+        file_path: File to read
+        length: Bytes to read from the end (at most MAX_WINDOW_SIZE)
+        encoding_cache: Cache of sniffed encodings
+
+    Returns:
+        Payload as for read_byte_window
+
+    Raises:
+        ValueError: If length is out of bounds
+        NotTextError: If the file is binary
+        OSError: If the file can't be read
+    """
+    if not 1 <= length <= MAX_WINDOW_SIZE:
+        raise ValueError(f"tail must be between 1 and {MAX_WINDOW_SIZE}")
+
+    with open(file_path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        offset = max(0, size - length)
+        encoding = _windowed_encoding(f, file_path, encoding_cache)
+        return _window_payload(f, offset, size - offset, size, encoding, align_to_line=True)
+
+
+class LineIndex:
+    """
+    Sparse line index of a file: the number of newlines before every
+    INDEX_BLOCK_SIZE-th byte.
+
+    Finding a line means reading one block, so the index stays small
+    (about 8 bytes per 64KB of file) however short the lines are.
+    Instances are not modified once built; extended() returns a new one.
+    """
+
+    def __init__(self, block_size: int = INDEX_BLOCK_SIZE):
+        """
+        Initialize an index of an empty file.
+
+        Args:
+            block_size: Bytes between recorded newline counts
+        """
+        self.block_size = block_size
+        self.newlines_before = array('q', [0])  # Entry k: newlines in bytes [0, k * block_size)
+        self.size = 0  # Bytes indexed
+        self.newlines = 0  # Newlines in the indexed bytes
+        self.last_byte = b''
+        self.fingerprint = b''  # Hash of the first and last indexed bytes (see _fingerprint)
+
+    @property
+    def line_count(self) -> int:
+        """Number of lines (a final line without a newline counts too)."""
+        if self.size and self.last_byte != b'\n':
+            return self.newlines + 1
+        return self.newlines
+
+    def extended(self, f: BinaryIO, size: int) -> 'LineIndex':
+        """
+        Index a file that grew (or the whole file, for a new index).
+
+        Args:
+            f: File open for binary reading
+            size: Current size of the file (at least self.size)
+
+        Returns:
+            New index covering the first size bytes
+        """
+        index = LineIndex(self.block_size)
+        # Resume at the last block boundary: a partial last block is counted again
+        blocks = self.size // self.block_size
+        index.newlines_before = self.newlines_before[:blocks + 1]
+        index.newlines = index.newlines_before[-1]
+        position = blocks * self.block_size
+        index.last_byte = self.last_byte if position == self.size else b''
+
+        f.seek(position)
+        while position < size:
+            data = f.read(min(INDEX_READ_SIZE, size - position))
+            if not data:
+                break
+            for start in range(0, len(data), self.block_size):
+                block_end = min(start + self.block_size, len(data))
+                index.newlines += data.count(b'\n', start, block_end)
+                if (position + block_end) % self.block_size == 0:
+                    index.newlines_before.append(index.newlines)
+            position += len(data)
+            index.last_byte = data[-1:]
+        index.size = position
+        index.fingerprint = _fingerprint(f, position)
+        return index
+
+    def line_offset(self, f: BinaryIO, line: int) -> int:
+        """
+        Byte offset where a line starts.
+
+        Args:
+            f: The indexed file, open for binary reading
+            line: Line number (0-based, less than line_count)
+
+        Returns:
+            Offset of the first byte of the line
+        """
+        if line <= 0:
+            return 0
+        # The block holding the newline that ends the previous line
+        block = bisect_left(self.newlines_before, line) - 1
+        f.seek(block * self.block_size)
+        data = f.read(self.block_size)
+        wanted = line - self.newlines_before[block]
+        rest = data.split(b'\n', wanted)[-1]
+        return block * self.block_size + len(data) - len(rest)
+
+
+class LineIndexCache:
+    """
+    Line indexes of recently previewed files, reused while the file is unchanged.
+
+    Files that only grew since they were indexed (logs being appended to)
+    have just the new bytes indexed.
+    """
+
+    def __init__(self, max_files: int = LINE_INDEX_CACHE_FILES):
+        """
+        Initialize cache.
+
+        Args:
+            max_files: Indexes kept before the least recently used is dropped
+        """
+        self.max_files = max_files
+        self._indexes: 'OrderedDict[str, Tuple[Tuple[int, int, int], LineIndex]]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, file_path: str, f: BinaryIO, stat_result: os.stat_result) -> LineIndex:
+        """
+        Line index of an open file.
+
+        Args:
+            file_path: Path of the file (cache key)
+            f: The file, open for binary reading
+            stat_result: Its current stat result
+
+        Returns:
+            Index covering the whole file
+        """
+        key = (stat_result.st_ino, stat_result.st_size, stat_result.st_mtime_ns)
+        with self._lock:
+            cached = self._indexes.get(file_path)
+            if cached:
+                self._indexes.move_to_end(file_path)
+        if cached and cached[0] == key:
+            return cached[1]
+
+        base = LineIndex()
+        if cached and cached[0][0] == key[0] and cached[1].size <= key[1] and _is_appended(f, cached[1]):
+            base = cached[1]
+        index = base.extended(f, stat_result.st_size)
+
+        with self._lock:
+            self._indexes[file_path] = (key, index)
+            self._indexes.move_to_end(file_path)
+            while len(self._indexes) > self.max_files:
+                self._indexes.popitem(last=False)
+        return index
+
+
+def _fingerprint(f: BinaryIO, size: int) -> bytes:
+    """Short hash of the first and last APPEND_CHECK_SIZE bytes of a file's first size bytes."""
+    digest = hashlib.blake2b(digest_size=8)
+    f.seek(0)
+    digest.update(f.read(min(size, APPEND_CHECK_SIZE)))
+    if size > APPEND_CHECK_SIZE:
+        f.seek(max(APPEND_CHECK_SIZE, size - APPEND_CHECK_SIZE))
+        digest.update(f.read(size - f.tell()))
+    return digest.digest()
+
+
+def _is_appended(f: BinaryIO, index: LineIndex) -> bool:
+    """
+    Cheap check that the indexed part of a file was left alone.
+
+    Both ends of it are compared: a log truncated in place (copytruncate
+    rotation) and grown past its old size has new bytes at the start and
+    usually at the old end too.
+    """
+    if not index.size:
+        return True
+    return _fingerprint(f, index.size) == index.fingerprint
+
+
+def read_lines(file_path: str, line: int, count: int = DEFAULT_LINE_COUNT,
+               line_index_cache: Optional[LineIndexCache] = None,
+               encoding_cache: Optional[EncodingCache] = None) -> dict:
+    """
+    Preview a page of lines, for scrolling through files of any size.
+
+    Args:
+        file_path: File to read
+        line: First line (0-based; negative counts back from the end)
+        count: Lines to return (at most MAX_LINE_COUNT)
+        line_index_cache: Cache of line indexes (default: index the file every time)
+        encoding_cache: Cache of sniffed encodings
+
+    Returns:
+        Payload with the lines (without line breaks), the first line's
+        number, the total line count, offset/end of the lines in bytes,
+        the file size and encoding, and whether the page was cut short by
+        MAX_WINDOW_SIZE
+
+    Raises:
+        ValueError: If count is out of bounds
+        NotTextError: If the file is binary
+        OSError: If the file can't be read
+    """
+    if not 1 <= count <= MAX_LINE_COUNT:
+        raise ValueError(f"count must be between 1 and {MAX_LINE_COUNT}")
+
+    with open(file_path, 'rb') as f:
+        # Binary files are rejected before they are indexed
+        encoding = _windowed_encoding(f, file_path, encoding_cache)
+        stat_result = os.fstat(f.fileno())
+        if line_index_cache is not None:
+            index = line_index_cache.get(file_path, f, stat_result)
+        else:
+            index = LineIndex().extended(f, stat_result.st_size)
+
+        total = index.line_count
+        if line < 0:
+            line = max(0, total + line)
+        line = min(line, total)
+
+        offset = index.line_offset(f, line) if line < total else index.size
+        f.seek(offset)
+        data = f.read(min(MAX_WINDOW_SIZE, index.size - offset))
+
+    pieces = data.split(b'\n', count)
+    if len(pieces) > count:
+        # Stop after the count-th line break
+        data = data[:len(data) - len(pieces[-1])]
+        partial = b''
+    else:
+        partial = pieces[-1]  # Bytes after the last line break: a final line or one cut by the window
+
+    at_end = offset + len(data) >= index.size
+    truncated = len(pieces) <= count and not at_end
+    if partial and truncated and len(pieces) > 1:
+        # The next page starts with the cut line
+        data = data[:len(data) - len(partial)]
+        partial = b''
+
+    text, skipped, consumed = decode_window(data, offset == 0, at_end or not partial, encoding)
+    lines = text.split('\n')
+    if lines[-1] == '' and not partial:
+        lines.pop()
+    return {
+        'lines': lines,
+        'line': line,
+        'total_lines': total,
+        'offset': offset + skipped,
+        'end': offset + consumed,
+        'size': index.size,
+        'encoding': encoding,
+        'truncated': truncated
+    }
@@ -0,0 +1,186 @@
+"""Zero-copy file transfer helpers for the HTTP handlers."""
+
+import errno
+import os
+import selectors
+import socket
+import threading
+from contextlib import nullcontext
+from typing import BinaryIO, Callable, Optional
+
+# Constants
+COPY_CHUNK_SIZE = 8192  # Read/write loop chunk size (fallback path)
+SENDFILE_SLICE = 8 * 1024 * 1024  # Bytes handed to os.sendfile per call
+
+# errno values meaning "sendfile can't be used for this fd pair", not a transfer failure
+_SENDFILE_UNSUPPORTED = {
+    getattr(errno, name) for name in ('EINVAL', 'ENOSYS', 'ENOTSOCK', 'EOPNOTSUPP', 'ENOTSUP')
+    if hasattr(errno, name)
+}
+
+
+def sendfile_supported(sock) -> bool:
+    """
+    Check whether a connection can be fed with os.sendfile.
+
+    Only plain TCP sockets qualify: TLS-wrapped sockets (ssl.SSLSocket is a
+    socket.socket subclass) must go through the userspace write loop.
+
+    Args:
+        sock: Connection object from the request handler (may be None)
+
+    Returns:
+        True if os.sendfile can write directly to the socket
+    """
+    if not hasattr(os, 'sendfile'):
+        return False
+    if type(sock) is not socket.socket:
+        return False
+    try:
+        return sock.fileno() >= 0
+    except OSError:
+        return False
+
+
+class _SendfileUnavailable(Exception):
+    """Raised when os.sendfile cannot be used for this file/socket pair."""
+
+
+def _wait_writable(sock, timeout: Optional[float]) -> None:
+    """Block until a non-blocking socket becomes writable or the timeout expires."""
+    with selectors.DefaultSelector() as selector:
+        selector.register(sock, selectors.EVENT_WRITE)
+        if not selector.select(timeout):
+            raise socket.timeout('timed out')
+
+
+def _sendfile_loop(
+    sock,
+    fd: int,
+    offset: int,
+    count: int,
+    on_progress: Optional[Callable[[int], None]]
+) -> int:
+    """
+    Push count bytes of fd starting at offset with os.sendfile.
+
+    The explicit offset leaves the file position untouched, so the same
+    descriptor can be shared between connections.
+
+    Returns:
+        Number of bytes sent (less than count only if the file shrank)
+
+    Raises:
+        _SendfileUnavailable: If the kernel refused sendfile before any byte was sent
+    """
+    out_fd = sock.fileno()
+    timeout = sock.gettimeout()
+    sent_total = 0
+
+    while sent_total < count:
+        blocksize = min(SENDFILE_SLICE, count - sent_total)
+        try:
+            sent = os.sendfile(out_fd, fd, offset + sent_total, blocksize)
+        except BlockingIOError:
+            # Socket has a timeout set, so it is non-blocking at the OS level
+            _wait_writable(sock, timeout)
+            continue
+        except (BrokenPipeError, ConnectionResetError):
+            raise
+        except OSError as e:
+            if sent_total == 0 and e.errno in _SENDFILE_UNSUPPORTED:
+                raise _SendfileUnavailable() from e
+            raise
+
+        if sent == 0:
+            # EOF: file was truncated while we were sending it
+            break
+
+        sent_total += sent
+        if on_progress:
+            on_progress(sent)
+
+    return sent_total
+
+
+def _copy_loop(
+    wfile,
+    f: BinaryIO,
+    offset: int,
+    count: int,
+    on_progress: Optional[Callable[[int], None]],
+    lock=None
+) -> int:
+    """
+    Copy count bytes of f starting at offset through wfile in small chunks.
+
+    Args:
+        lock: Optional lock guarding seek+read when f is shared between threads
+
+    Returns:
+        Number of bytes written
+    """
+    guard = lock if lock is not None else nullcontext()
+    written = 0
+
+    while written < count:
+        with guard:
+            f.seek(offset + written)
+            chunk = f.read(min(COPY_CHUNK_SIZE, count - written))
+        if not chunk:
+            break
+
+        wfile.write(chunk)
+        written += len(chunk)
+        if on_progress:
+            on_progress(len(chunk))
+
+    return written
+
+
+def send_file(
+    wfile,
+    sock,
+    f: BinaryIO,
+    offset: int,
+    count: int,
+    on_progress: Optional[Callable[[int], None]] = None,
+    lock: Optional[threading.Lock] = None
+) -> int:
+    """
+    Send a byte range of an open file to the client.
+
+    Uses os.sendfile (zero-copy) when the connection is a plain socket and
+    falls back to a read/write loop through wfile otherwise (TLS, platforms
+    without sendfile, filesystems that reject it, mocked streams).
+
+    Args:
+        wfile: Handler output stream (used for the fallback path)
+        sock: Underlying connection socket, or None to force the fallback
+        f: Open binary file
+        offset: First byte to send
+        count: Number of bytes to send
+        on_progress: Optional callback receiving the size of each sent slice
+        lock: Optional lock for the fallback path when f is shared
+
+    Returns:
+        Number of bytes sent
+    """
+    if count <= 0:
+        return 0
+
+    if sendfile_supported(sock):
+        try:
+            fd = f.fileno()
+        except (AttributeError, OSError, ValueError):
+            fd = None
+
+        if isinstance(fd, int):
+            # Anything buffered in wfile must hit the socket before sendfile bypasses it
+            wfile.flush()
+            try:
+                return _sendfile_loop(sock, fd, offset, count, on_progress)
+            except _SendfileUnavailable:
+                pass  # Nothing was sent yet; use the copy loop instead
+
+    return _copy_loop(wfile, f, offset, count, on_progress, lock)
@@ -10,6 +10,12 @@ TIME_MULTIPLIERS: Dict[str, int] = {
     "h": 3600,
     "d": 86400,
 }
+SIZE_MULTIPLIERS: Dict[str, int] = {
+    "K": 1024,
+    "M": 1024 ** 2,
+    "G": 1024 ** 3,
+    "T": 1024 ** 4,
+}
 
 
 def format_file_size(size_bytes: int) -> str:
@@ -92,3 +98,48 @@ def parse_duration(duration_str: str) -> int:
     value = int(value_str)
 
     return value * TIME_MULTIPLIERS[unit]
+
+
+def parse_size(size_str: str) -> int:
+    """
+    Parse a size string to bytes.
+    Supported formats: "512K", "200M", "2G", "1T" (powers of 1024), plain bytes, "0".
+
+    Args:
+        size_str (str): The size string to parse.
+
+    Returns:
+        int: Size in bytes.
+
+    Raises:
+        TypeError: If size_str is not a string.
+        ValueError: If format is invalid or value is negative.
+    """
+    if not isinstance(size_str, str):
+        raise TypeError("Size must be a string")
+
+    clean_str = size_str.strip().upper()
+
+    if not clean_str:
+        raise ValueError("Size string cannot be empty")
+
+    if clean_str.startswith("-"):
+        raise ValueError("Size cannot be negative")
+
+    # Accept both "2G" and "2GB"
+    if clean_str.endswith("B") and len(clean_str) > 1 and not clean_str[-2].isdigit():
+        clean_str = clean_str[:-1]
+
+    if clean_str.isdigit():
+        return int(clean_str)
+
+    unit = clean_str[-1]
+    value_str = clean_str[:-1]
+
+    if not value_str.isdigit():
+        raise ValueError("Invalid size format: value must be an integer")
+
+    if unit not in SIZE_MULTIPLIERS:
+        raise ValueError(f"Unknown size unit: {unit}")
+
+    return int(value_str) * SIZE_MULTIPLIERS[unit]
@@ -0,0 +1,123 @@
+"""Multi-process serving: SO_REUSEPORT listeners and shared state across workers."""
+
+import multiprocessing
+import os
+import signal
+import socket
+import threading
+from multiprocessing.managers import SyncManager
+from typing import Callable, List
+
+# Constants
+PARENT_CHECK_INTERVAL = 1.0  # Seconds between checks that the parent process is still alive
+WORKER_STOP_TIMEOUT = 5.0  # Seconds to wait for a worker to exit before killing it
+
+
+def reuse_port_supported() -> bool:
+    """Check whether this platform can fork workers that share a port via SO_REUSEPORT."""
+    return hasattr(socket, 'SO_REUSEPORT') and hasattr(os, 'fork')
+
+
+def _ignore_sigint():
+    """Manager process initializer: leave Ctrl+C handling to the parent."""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+
+class WorkerCoordinator:
+    """
+    Shared state for worker processes.
+
+    Backed by a multiprocessing manager, so every worker talks to the same
+    dict and lock over a local socket. Must be created before the workers
+    are forked.
+    """
+
+    def __init__(self):
+        """Start the manager process."""
+        self._manager = SyncManager(ctx=multiprocessing.get_context('fork'))
+        self._manager.start(initializer=_ignore_sigint)
+
+    def dict(self, initial=None):
+        """
+        Create a dict shared by all workers.
+
+        Args:
+            initial: Optional mapping to copy into the shared dict
+
+        Returns:
+            Dict proxy
+        """
+        return self._manager.dict(initial or {})
+
+    def lock(self):
+        """Create a lock shared by all workers."""
+        return self._manager.Lock()
+
+    def shutdown(self):
+        """Stop the manager process; shared proxies become unusable."""
+        self._manager.shutdown()
+
+
+def _worker_main(serve: Callable[[], object], parent_pid: int):
+    """
+    Worker process body.
+
+    Args:
+        serve: Returns a bound server exposing serve_forever()/shutdown()
+        parent_pid: PID of the process that forked this worker
+    """
+    httpd = serve()
+    thread = threading.Thread(target=httpd.serve_forever)
+    thread.daemon = True
+    thread.start()
+
+    try:
+        # Exit with the parent even if it dies without stopping us
+        while thread.is_alive() and os.getppid() == parent_pid:
+            thread.join(timeout=PARENT_CHECK_INTERVAL)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        httpd.shutdown()
+        httpd.server_close()
+
+
+class WorkerProcesses:
+    """A group of forked processes each serving its own SO_REUSEPORT listener."""
+
+    def __init__(self, count: int, serve: Callable[[], object]):
+        """
+        Initialize worker group.
+
+        Args:
+            count: Number of processes to fork
+            serve: Called in each worker to create its bound server
+        """
+        self.count = count
+        self.serve = serve
+        self.processes: List[multiprocessing.Process] = []
+
+    def start(self):
+        """Fork the workers."""
+        context = multiprocessing.get_context('fork')
+        for index in range(self.count):
+            process = context.Process(
+                target=_worker_main,
+                args=(self.serve, os.getpid()),
+                name=f"quick-share-process-{index}"
+            )
+            process.daemon = True
+            process.start()
+            self.processes.append(process)
+
+    def stop(self):
+        """Terminate the workers and wait for them to exit."""
+        for process in self.processes:
+            if process.is_alive():
+                process.terminate()
+        for process in self.processes:
+            process.join(timeout=WORKER_STOP_TIMEOUT)
+            if process.is_alive():
+                process.kill()
+                process.join()
+        self.processes = []
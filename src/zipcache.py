@@ -0,0 +1,246 @@
+"""On-disk LRU cache of deflated zip entries, so repeated zip downloads skip recompression."""
+
+import hashlib
+import os
+import shutil
+import struct
+import tempfile
+import threading
+from typing import Optional
+
+# Constants
+DEFAULT_CACHE_SIZE = 1024 * 1024 * 1024  # 1GB of cached entries per share
+CACHE_MIN_ENTRY_SIZE = 64 * 1024  # Smaller files deflate faster than a cache round trip
+EVICTION_SCAN_INTERVAL = 64  # Inserts between directory rescans (other workers insert too)
+ENTRY_SUFFIX = '.entry'
+
+# Record header: magic, CRC-32, uncompressed size, compressed size, compress type.
+# A deflated record is followed by its raw deflate payload; a stored record
+# only remembers the CRC.
+_RECORD_HEADER = struct.Struct('<4sLQQH')
+_RECORD_MAGIC = b'QSZ1'
+
+
+class CachedEntry:
+    """A cache hit: an open record positioned at its payload."""
+
+    def __init__(self, f, crc: int, file_size: int, compressed_size: int, compress_type: int):
+        self.f = f
+        self.crc = crc
+        self.file_size = file_size
+        self.compressed_size = compressed_size
+        self.compress_type = compress_type
+
+    def read_blocks(self, block_size: int):
+        """Yield the payload in blocks of at most block_size bytes."""
+        remaining = self.compressed_size
+        while remaining > 0:
+            block = self.f.read(min(block_size, remaining))
+            if not block:
+                raise OSError("cached zip entry is truncated")
+            remaining -= len(block)
+            yield block
+
+    def close(self):
+        self.f.close()
+
+
+class EntryWriter:
+    """Collects one entry's payload into a temporary file and publishes it on commit."""
+
+    def __init__(self, cache: 'EntryCache', record_path: str, compress_type: int):
+        self.cache = cache
+        self.record_path = record_path
+        self.compress_type = compress_type
+        self.compressed_size = 0
+        fd, self.temp_path = tempfile.mkstemp(dir=cache.directory, suffix='.tmp')
+        self.f = os.fdopen(fd, 'wb')
+        self.f.write(b'\0' * _RECORD_HEADER.size)
+
+    def write(self, data: bytes):
+        """Append payload bytes; a failing disk only drops this record."""
+        if self.f is None:
+            return
+        try:
+            self.f.write(data)
+            self.compressed_size += len(data)
+        except OSError:
+            self.abort()
+
+    def commit(self, crc: int, file_size: int):
+        """
+        Finish the record and make it visible to other downloads.
+
+        Args:
+            crc: CRC-32 of the uncompressed data
+            file_size: Uncompressed size
+        """
+        if self.f is None:
+            return
+        try:
+            self.f.seek(0)
+            self.f.write(_RECORD_HEADER.pack(
+                _RECORD_MAGIC, crc, file_size, self.compressed_size, self.compress_type
+            ))
+            self.f.close()
+            self.f = None
+            os.replace(self.temp_path, self.record_path)
+        except OSError:
+            self.abort()
+            return
+        self.cache._added(_RECORD_HEADER.size + self.compressed_size)
+
+    def abort(self):
+        """Discard the record (incomplete entry, changed file or disk error)."""
+        if self.f is not None:
+            self.f.close()
+            self.f = None
+        try:
+            os.unlink(self.temp_path)
+        except OSError:
+            pass
+
+
+class EntryCache:
+    """
+    Size-bounded cache of compressed entry payloads and CRCs.
+
+    Records are keyed by path, size, mtime and inode, so any change to a
+    file makes its old record unreachable (it then ages out). Records are
+    plain files in one directory: worker processes forked after the cache
+    is created share it. Eviction is least recently used, tracked by the
+    records' mtimes, which are refreshed on every hit.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_CACHE_SIZE, directory: Optional[str] = None,
+                 min_entry_size: int = CACHE_MIN_ENTRY_SIZE):
+        """
+        Initialize cache.
+
+        Args:
+            max_bytes: Approximate upper bound of the records' total size
+            directory: Where to keep records (default: a private temporary
+                directory, removed by close())
+            min_entry_size: Files smaller than this are not cached
+        """
+        self.max_bytes = max_bytes
+        self.min_entry_size = min_entry_size
+        self._owns_directory = directory is None
+        self.directory = directory or tempfile.mkdtemp(prefix='quick-share-zip-cache-')
+        self._lock = threading.Lock()
+        self._total = 0
+        self._inserts = 0
+        self._rescan()
+
+    def _record_path(self, file_path: str, stat_result: os.stat_result) -> str:
+        key = f'{file_path}\0{stat_result.st_size}\0{stat_result.st_mtime_ns}\0{stat_result.st_ino}'
+        digest = hashlib.sha1(key.encode('utf-8', 'surrogateescape')).hexdigest()
+        return os.path.join(self.directory, digest + ENTRY_SUFFIX)
+
+    def cacheable(self, stat_result: os.stat_result) -> bool:
+        """Whether a file is worth caching."""
+        return stat_result.st_size >= self.min_entry_size
+
+    def lookup(self, file_path: str, stat_result: os.stat_result) -> Optional[CachedEntry]:
+        """
+        Find the record of a file.
+
+        Args:
+            file_path: Path of the source file
+            stat_result: Its current stat result
+
+        Returns:
+            Open CachedEntry (the caller closes it), or None on a miss
+        """
+        if not self.cacheable(stat_result):
+            return None
+        record_path = self._record_path(file_path, stat_result)
+        try:
+            f = open(record_path, 'rb')
+        except OSError:
+            return None
+        try:
+            header = f.read(_RECORD_HEADER.size)
+            if len(header) != _RECORD_HEADER.size:
+                raise ValueError("short record")
+            magic, crc, file_size, compressed_size, compress_type = _RECORD_HEADER.unpack(header)
+            if magic != _RECORD_MAGIC or file_size != stat_result.st_size:
+                raise ValueError("foreign record")
+            if os.fstat(f.fileno()).st_size != _RECORD_HEADER.size + compressed_size:
+                raise ValueError("truncated record")
+            # Mark as recently used for eviction
+            os.utime(record_path)
+        except (OSError, ValueError):
+            f.close()
+            return None
+        return CachedEntry(f, crc, file_size, compressed_size, compress_type)
+
+    def crc(self, file_path: str, stat_result: os.stat_result) -> Optional[int]:
+        """CRC-32 of a file if any record of it exists."""
+        entry = self.lookup(file_path, stat_result)
+        if entry is None:
+            return None
+        entry.close()
+        return entry.crc
+
+    def writer(self, file_path: str, stat_result: os.stat_result, compress_type: int) -> Optional[EntryWriter]:
+        """
+        Start recording an entry.
+
+        Args:
+            file_path: Path of the source file
+            stat_result: Stat result the entry was built from
+            compress_type: ZIP_DEFLATED (payload is recorded) or ZIP_STORED (CRC only)
+
+        Returns:
+            EntryWriter, or None if the file isn't cached
+        """
+        if not self.cacheable(stat_result):
+            return None
+        try:
+            return EntryWriter(self, self._record_path(file_path, stat_result), compress_type)
+        except OSError:
+            return None
+
+    def _added(self, size: int):
+        """Account for a new record and evict if the cache may be over budget."""
+        with self._lock:
+            self._total += size
+            self._inserts += 1
+            if self._total > self.max_bytes or self._inserts % EVICTION_SCAN_INTERVAL == 0:
+                self._rescan()
+
+    def _rescan(self):
+        """Recount records on disk and evict least recently used ones over the budget."""
+        records = []
+        try:
+            with os.scandir(self.directory) as it:
+                for dir_entry in it:
+                    if not dir_entry.name.endswith(ENTRY_SUFFIX):
+                        continue
+                    try:
+                        stat_result = dir_entry.stat()
+                    except OSError:
+                        continue
+                    records.append((stat_result.st_mtime_ns, stat_result.st_size, dir_entry.path))
+        except OSError:
+            return
+
+        total = sum(size for _, size, _ in records)
+        if total > self.max_bytes:
+            records.sort()
+            for _, size, path in records:
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.unlink(path)
+                except OSError:
+                    # Another worker evicted it first
+                    pass
+                total -= size
+        self._total = total
+
+    def close(self):
+        """Remove the cache directory if this cache created it."""
+        if self._owns_directory:
+            shutil.rmtree(self.directory, ignore_errors=True)
@@ -0,0 +1,622 @@
+"""Streaming zip writer with a parallel deflate pipeline and store-only layouts."""
+
+import bisect
+import hashlib
+import os
+import struct
+import threading
+import time
+import zlib
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Iterable, List, Optional, Tuple
+
+# Constants
+ZIP_STORED = 0
+ZIP_DEFLATED = 8
+ZIP64_LIMIT = (1 << 32) - 1
+ZIP_MAX_ENTRIES = (1 << 16) - 1
+COMPRESS_BLOCK_SIZE = 1024 * 1024  # Files are deflated in independent 1MB blocks
+COMPRESS_LEVEL = 6  # zlib's default level, same as zipfile.ZIP_DEFLATED
+COMPRESS_WORKERS = os.cpu_count() or 1
+DEFLATE_WINDOW = 32 * 1024  # Each block is primed with the previous block's last 32KB
+COMPRESSION_SAMPLE_SIZE = 64 * 1024  # Bytes test-compressed to decide whether deflate pays off
+INCOMPRESSIBLE_RATIO = 0.9  # Store entries whose sample doesn't shrink below this ratio
+
+# Compression policies for zip downloads
+ZIP_COMPRESSION_AUTO = 'auto'
+ZIP_COMPRESSION_DEFLATE = 'deflate'
+ZIP_COMPRESSION_STORE = 'store'
+ZIP_COMPRESSION_MODES = (ZIP_COMPRESSION_AUTO, ZIP_COMPRESSION_DEFLATE, ZIP_COMPRESSION_STORE)
+
+# Formats that are already compressed; deflating them wastes CPU for ~0% gain
+INCOMPRESSIBLE_EXTENSIONS = frozenset({
+    # Images
+    '.jpg', '.jpeg', '.png', '.gif', '.webp', '.heic', '.avif', '.jxl',
+    # Audio / video
+    '.mp3', '.aac', '.m4a', '.ogg', '.opus', '.flac', '.mp4', '.m4v', '.mkv', '.mov', '.webm', '.avi',
+    # Archives and packages
+    '.zip', '.gz', '.tgz', '.bz2', '.xz', '.txz', '.zst', '.7z', '.rar', '.lz4', '.br',
+    '.whl', '.jar', '.apk', '.deb', '.rpm', '.dmg', '.nupkg', '.docx', '.xlsx', '.pptx', '.odt',
+})
+
+# General purpose flags: sizes/CRC follow the data, names are UTF-8
+FLAG_DATA_DESCRIPTOR = 0x08
+FLAG_UTF8 = 0x800
+
+_LOCAL_HEADER = struct.Struct('<4sHHHHHLLLHH')
+_CENTRAL_HEADER = struct.Struct('<4sBBBBHHHHLLLHHHHHLL')
+_END_RECORD = struct.Struct('<4sHHHHLLH')
+_ZIP64_END_RECORD = struct.Struct('<4sQHHLLQQQQ')
+_ZIP64_LOCATOR = struct.Struct('<4sLQL')
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def get_compress_executor() -> ThreadPoolExecutor:
+    """
+    Return the process-wide compression pool.
+
+    It is shared by all zip downloads so concurrent downloads can't
+    oversubscribe the CPU. Created lazily, i.e. after any worker fork.
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=COMPRESS_WORKERS, thread_name_prefix='quick-share-deflate')
+        return _executor
+
+
+def deflate_block(data: bytes, final: bool, zdict: Optional[bytes] = None, level: int = COMPRESS_LEVEL) -> bytes:
+    """
+    Deflate one block so that blocks can simply be concatenated.
+
+    Non-final blocks end on a sync flush (byte aligned, no BFINAL bit); the
+    final block terminates the stream. zlib releases the GIL, so blocks
+    compress in parallel on a thread pool.
+
+    Args:
+        data: Uncompressed block
+        final: Whether this is the last block of the entry
+        zdict: Preceding uncompressed data to prime the window with
+        level: zlib compression level
+
+    Returns:
+        Raw deflate bytes for this block
+    """
+    if zdict:
+        compressor = zlib.compressobj(level, zlib.DEFLATED, -zlib.MAX_WBITS, zdict=zdict)
+    else:
+        compressor = zlib.compressobj(level, zlib.DEFLATED, -zlib.MAX_WBITS)
+    return compressor.compress(data) + compressor.flush(zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH)
+
+
+def choose_compress_type(arcname: str, sample: bytes, mode: str = ZIP_COMPRESSION_AUTO) -> int:
+    """
+    Pick ZIP_STORED or ZIP_DEFLATED for an entry.
+
+    In auto mode, known compressed formats and empty files are stored;
+    otherwise the start of the file is test-compressed at level 1 and the
+    entry is stored if that barely shrinks it.
+
+    Args:
+        arcname: Entry name (its extension is checked)
+        sample: Leading bytes of the file
+        mode: One of ZIP_COMPRESSION_MODES
+
+    Returns:
+        ZIP_STORED or ZIP_DEFLATED
+    """
+    if mode == ZIP_COMPRESSION_STORE:
+        return ZIP_STORED
+    if mode == ZIP_COMPRESSION_DEFLATE:
+        return ZIP_DEFLATED
+
+    if not sample or os.path.splitext(arcname)[1].lower() in INCOMPRESSIBLE_EXTENSIONS:
+        return ZIP_STORED
+
+    sample = sample[:COMPRESSION_SAMPLE_SIZE]
+    compressed = zlib.compress(sample, 1)
+    if len(compressed) > len(sample) * INCOMPRESSIBLE_RATIO:
+        return ZIP_STORED
+    return ZIP_DEFLATED
+
+
+def _dos_datetime(timestamp: float) -> Tuple[int, int]:
+    """Convert a POSIX timestamp to zip (DOS) time and date fields."""
+    year, month, day, hour, minute, second = time.localtime(timestamp)[:6]
+    if year < 1980:
+        year, month, day, hour, minute, second = 1980, 1, 1, 0, 0, 0
+    dos_time = (hour << 11) | (minute << 5) | (second // 2)
+    dos_date = ((year - 1980) << 9) | (month << 5) | day
+    return dos_time, dos_date
+
+
+class ZipEntry:
+    """Metadata of one archive member."""
+
+    def __init__(self, arcname: str, file_size: int, mtime: float, mode: int = 0o100644,
+                 compress_type: int = ZIP_DEFLATED):
+        """
+        Initialize entry.
+
+        Args:
+            arcname: Path inside the archive ('/' separated)
+            file_size: Uncompressed size (from stat; used to decide zip64)
+            mtime: Modification time
+            mode: st_mode stored in the external attributes
+            compress_type: ZIP_STORED or ZIP_DEFLATED
+        """
+        self.arcname = arcname.replace(os.sep, '/')
+        self.name_bytes = self.arcname.encode('utf-8')
+        self.file_size = file_size
+        self.mtime = mtime
+        self.mode = mode
+        self.compress_type = compress_type
+        # Deflate may expand incompressible data slightly, so leave headroom (like zipfile)
+        self.zip64 = file_size * 1.05 > ZIP64_LIMIT
+        self.crc = 0
+        self.compressed_size = 0
+        self.header_offset = 0
+
+    @property
+    def version_needed(self) -> int:
+        return 45 if self.zip64 else 20
+
+    def local_header(self) -> bytes:
+        """Local file header; CRC and sizes follow in the data descriptor."""
+        dos_time, dos_date = _dos_datetime(self.mtime)
+        extra = b''
+        if self.zip64:
+            extra = struct.pack('<HHQQ', 1, 16, 0, 0)
+        size_field = ZIP64_LIMIT if self.zip64 else 0
+        return _LOCAL_HEADER.pack(
+            b'PK\x03\x04', self.version_needed, FLAG_DATA_DESCRIPTOR | FLAG_UTF8, self.compress_type,
+            dos_time, dos_date, 0, size_field, size_field, len(self.name_bytes), len(extra)
+        ) + self.name_bytes + extra
+
+    def data_descriptor(self) -> bytes:
+        """Data descriptor carrying the CRC and final sizes."""
+        if self.zip64:
+            return struct.pack('<4sLQQ', b'PK\x07\x08', self.crc, self.compressed_size, self.file_size)
+        return struct.pack('<4sLLL', b'PK\x07\x08', self.crc, self.compressed_size, self.file_size)
+
+    def central_header(self) -> bytes:
+        """Central directory record for this entry."""
+        dos_time, dos_date = _dos_datetime(self.mtime)
+        extra_fields = []
+        file_size, compressed_size, header_offset = self.file_size, self.compressed_size, self.header_offset
+        if self.zip64 or file_size > ZIP64_LIMIT or compressed_size > ZIP64_LIMIT:
+            extra_fields.extend([file_size, compressed_size])
+            file_size = compressed_size = ZIP64_LIMIT
+        if header_offset > ZIP64_LIMIT:
+            extra_fields.append(header_offset)
+            header_offset = ZIP64_LIMIT
+        extra = b''
+        if extra_fields:
+            extra = struct.pack(f'<HH{len(extra_fields)}Q', 1, 8 * len(extra_fields), *extra_fields)
+        version = 45 if extra_fields else self.version_needed
+        return _CENTRAL_HEADER.pack(
+            b'PK\x01\x02', version, 3, version, 0, FLAG_DATA_DESCRIPTOR | FLAG_UTF8, self.compress_type,
+            dos_time, dos_date, self.crc, compressed_size, file_size,
+            len(self.name_bytes), len(extra), 0, 0, 0, (self.mode & 0xFFFF) << 16, header_offset
+        ) + self.name_bytes + extra
+
+
+def end_records(entry_count: int, directory_offset: int, directory_size: int) -> bytes:
+    """
+    Build the end of central directory record(s).
+
+    Args:
+        entry_count: Number of entries
+        directory_offset: Offset of the central directory
+        directory_size: Size of the central directory
+
+    Returns:
+        Zip64 end record and locator (when needed) followed by the end record
+    """
+    records = b''
+    if entry_count >= ZIP_MAX_ENTRIES or directory_offset > ZIP64_LIMIT or directory_size > ZIP64_LIMIT:
+        zip64_offset = directory_offset + directory_size
+        records += _ZIP64_END_RECORD.pack(
+            b'PK\x06\x06', _ZIP64_END_RECORD.size - 12, 45, 45, 0, 0,
+            entry_count, entry_count, directory_size, directory_offset
+        )
+        records += _ZIP64_LOCATOR.pack(b'PK\x06\x07', 0, zip64_offset, 1)
+        entry_count = min(entry_count, ZIP_MAX_ENTRIES)
+        directory_offset = min(directory_offset, ZIP64_LIMIT)
+        directory_size = min(directory_size, ZIP64_LIMIT)
+    return records + _END_RECORD.pack(
+        b'PK\x05\x06', 0, 0, entry_count, entry_count, directory_size, directory_offset, 0
+    )
+
+
+class ZipStreamWriter:
+    """Write a zip archive sequentially to a non-seekable stream."""
+
+    def __init__(self, output):
+        """
+        Initialize writer.
+
+        Args:
+            output: Writable binary stream
+        """
+        self.output = output
+        self.offset = 0
+        self.entries: List[ZipEntry] = []
+
+    def _write(self, data: bytes):
+        if data:
+            self.output.write(data)
+            self.offset += len(data)
+
+    def start_entry(self, entry: ZipEntry):
+        """Write the local header of an entry."""
+        entry.header_offset = self.offset
+        self._write(entry.local_header())
+
+    def write_data(self, entry: ZipEntry, data: bytes):
+        """Write (already compressed) entry data."""
+        entry.compressed_size += len(data)
+        self._write(data)
+
+    def finish_entry(self, entry: ZipEntry, crc: int, file_size: int):
+        """
+        Write the data descriptor of an entry.
+
+        Args:
+            entry: Entry being written
+            crc: CRC-32 of the uncompressed data
+            file_size: Uncompressed bytes actually written
+        """
+        entry.crc = crc
+        entry.file_size = file_size
+        self._write(entry.data_descriptor())
+        self.entries.append(entry)
+
+    def close(self):
+        """Write the central directory and end records."""
+        directory_offset = self.offset
+        for entry in self.entries:
+            self._write(entry.central_header())
+        self._write(end_records(len(self.entries), directory_offset, self.offset - directory_offset))
+
+
+def _read_blocks(f, size: int, block_size: int):
+    """
+    Yield (block, is_final) for up to size bytes of f, reading one block ahead.
+
+    Reading stops at the size seen by stat, so a growing file can't
+    invalidate the entry's zip64 decision. A read error ends the entry
+    early; CRC and sizes still describe the data actually written.
+    """
+    remaining = size
+    try:
+        block = f.read(min(block_size, remaining))
+        remaining -= len(block)
+        while True:
+            next_block = f.read(min(block_size, remaining)) if remaining > 0 and block else b''
+            remaining -= len(next_block)
+            yield block, not next_block
+            if not next_block:
+                return
+            block = next_block
+    except OSError:
+        yield b'', True
+
+
+def write_zip(
+    output,
+    files: Iterable[Tuple[str, str, os.stat_result]],
+    on_entry: Optional[Callable[[ZipEntry], None]] = None,
+    executor: Optional[ThreadPoolExecutor] = None,
+    block_size: int = COMPRESS_BLOCK_SIZE,
+    compression: str = ZIP_COMPRESSION_AUTO,
+    entry_cache=None
+) -> ZipStreamWriter:
+    """
+    Stream a zip archive of files to output.
+
+    Blocks of the current and upcoming files are deflated on a thread pool
+    while earlier blocks are written, with a bounded number in flight;
+    output order always matches input order. Entries that don't benefit
+    from deflate are stored (see choose_compress_type). With an entry
+    cache, files deflated by an earlier download are copied from the cache
+    instead of being compressed again, and new entries are recorded.
+
+    Args:
+        output: Writable binary stream
+        files: Iterable of (file_path, arcname, stat_result)
+        on_entry: Called after each entry is completely written
+        executor: Compression pool (defaults to the shared pool)
+        block_size: Size of independently compressed blocks
+        compression: One of ZIP_COMPRESSION_MODES
+        entry_cache: Optional zipcache.EntryCache shared between downloads
+
+    Returns:
+        The writer, with entries describing what was written
+    """
+    executor = executor or get_compress_executor()
+    writer = ZipStreamWriter(output)
+    # Items: ('start', entry) | ('data', entry, future, sink) | ('end', entry, state, sink)
+    pending = deque()
+    max_in_flight = COMPRESS_WORKERS * 2
+    in_flight = 0
+    # Cache records being written, aborted if the download breaks off
+    sinks = []
+
+    def drain(limit: int):
+        nonlocal in_flight
+        while pending and in_flight > limit:
+            item = pending.popleft()
+            if item[0] == 'start':
+                writer.start_entry(item[1])
+            elif item[0] == 'data':
+                _, entry, data, sink = item
+                data = data.result() if isinstance(data, Future) else data
+                writer.write_data(entry, data)
+                if sink:
+                    sink.write(data)
+                in_flight -= 1
+            else:
+                _, entry, state, sink = item
+                writer.finish_entry(entry, state['crc'], state['size'])
+                if sink:
+                    sinks.remove(sink)
+                    if state['complete']:
+                        sink.commit(state['crc'], state['size'])
+                    else:
+                        sink.abort()
+                if on_entry:
+                    on_entry(entry)
+
+    try:
+        for file_path, arcname, stat_result in files:
+            cached = None
+            if entry_cache and compression != ZIP_COMPRESSION_STORE:
+                cached = entry_cache.lookup(file_path, stat_result)
+                if cached and cached.compress_type != ZIP_DEFLATED:
+                    # Only the CRC was recorded; the file still has to be read
+                    cached.close()
+                    cached = None
+
+            if cached:
+                # Splice the deflated payload of an unchanged file
+                entry = ZipEntry(arcname, stat_result.st_size, stat_result.st_mtime, stat_result.st_mode)
+                pending.append(('start', entry))
+                try:
+                    for block in cached.read_blocks(block_size):
+                        pending.append(('data', entry, block, None))
+                        in_flight += 1
+                        drain(max_in_flight)
+                finally:
+                    cached.close()
+                pending.append(('end', entry, {'crc': cached.crc, 'size': cached.file_size}, None))
+                continue
+
+            try:
+                f = open(file_path, 'rb')
+            except OSError:
+                # Skip files that vanished or can't be read
+                continue
+            entry = ZipEntry(arcname, stat_result.st_size, stat_result.st_mtime, stat_result.st_mode)
+            state = {'crc': 0, 'size': 0, 'complete': False}
+            sink = None
+
+            with f:
+                previous = None
+                for block, is_final in _read_blocks(f, stat_result.st_size, block_size):
+                    if previous is None:
+                        # The first block doubles as the compressibility sample
+                        entry.compress_type = choose_compress_type(arcname, block, compression)
+                        pending.append(('start', entry))
+                        if entry_cache:
+                            sink = entry_cache.writer(file_path, stat_result, entry.compress_type)
+                            if sink:
+                                sinks.append(sink)
+                    state['crc'] = zlib.crc32(block, state['crc'])
+                    state['size'] += len(block)
+                    if entry.compress_type == ZIP_STORED:
+                        data = block
+                    else:
+                        zdict = previous[-DEFLATE_WINDOW:] if previous else None
+                        data = executor.submit(deflate_block, block, is_final, zdict)
+                    # Stored records keep only the CRC
+                    pending.append(('data', entry, data, sink if entry.compress_type == ZIP_DEFLATED else None))
+                    in_flight += 1
+                    previous = block
+                    drain(max_in_flight)
+
+                if sink:
+                    # Only record what matches the stat result the cache key was built from
+                    try:
+                        state['complete'] = (state['size'] == stat_result.st_size and
+                                             os.fstat(f.fileno()).st_mtime_ns == stat_result.st_mtime_ns)
+                    except OSError:
+                        pass
+
+            pending.append(('end', entry, state, sink))
+
+        drain(-1)
+        writer.close()
+    finally:
+        # On a broken connection don't leave queued work or partial cache records behind
+        for item in pending:
+            if item[0] == 'data' and isinstance(item[2], Future):
+                item[2].cancel()
+        for sink in sinks:
+            sink.abort()
+
+    return writer
+
+
+class ZipLayoutChanged(OSError):
+    """Raised when a file no longer matches the layout promised to the client."""
+
+
+def _file_crc(file_path: str, size: int) -> int:
+    """CRC-32 of the first size bytes of a file."""
+    crc = 0
+    with open(file_path, 'rb') as f:
+        remaining = size
+        while remaining > 0:
+            block = f.read(min(COMPRESS_BLOCK_SIZE, remaining))
+            if not block:
+                raise ZipLayoutChanged(f"{file_path} shrank while being archived")
+            crc = zlib.crc32(block, crc)
+            remaining -= len(block)
+    return crc
+
+
+class StoredZipLayout:
+    """
+    Byte-exact layout of a store-only zip archive, computed from stat results.
+
+    Without compression every offset follows from names and sizes, so the
+    archive size is known up front and any byte range can be produced by
+    mapping it back to headers and file offsets. CRCs (needed by data
+    descriptors and the central directory) are computed while file data is
+    streamed, or by reading the file when a range skips it (unless an
+    entry cache already knows them).
+    """
+
+    def __init__(self, files: Iterable[Tuple[str, str, os.stat_result]], entry_cache=None):
+        """
+        Lay out the archive.
+
+        Args:
+            files: Iterable of (file_path, arcname, stat_result)
+            entry_cache: Optional zipcache.EntryCache to look up and record CRCs
+        """
+        self.entries: List[ZipEntry] = []
+        self.paths: List[str] = []
+        self.stats: List[os.stat_result] = []
+        self.entry_cache = entry_cache
+        # Parts in archive order: (start, length, kind, index)
+        self.parts: List[Tuple[int, int, str, int]] = []
+        self._crcs = {}
+
+        digest = hashlib.sha1()
+        offset = 0
+        self.mtime = 0.0
+        for file_path, arcname, stat_result in files:
+            index = len(self.entries)
+            entry = ZipEntry(arcname, stat_result.st_size, stat_result.st_mtime, stat_result.st_mode, ZIP_STORED)
+            entry.compressed_size = stat_result.st_size
+            entry.header_offset = offset
+            self.entries.append(entry)
+            self.paths.append(file_path)
+            self.stats.append(stat_result)
+            self.mtime = max(self.mtime, stat_result.st_mtime)
+            digest.update(entry.name_bytes + b'\0' + (
+                f'{stat_result.st_size}:{stat_result.st_mtime_ns}:{stat_result.st_ino}'.encode('ascii')
+            ) + b'\0')
+
+            for kind, length in (
+                ('header', len(entry.local_header())),
+                ('data', entry.file_size),
+                ('descriptor', len(entry.data_descriptor()))
+            ):
+                if length:
+                    self.parts.append((offset, length, kind, index))
+                    offset += length
+
+        self.directory_offset = offset
+        self.directory_size = sum(len(entry.central_header()) for entry in self.entries)
+        end_length = len(end_records(len(self.entries), self.directory_offset, self.directory_size))
+        self.parts.append((offset, self.directory_size + end_length, 'directory', -1))
+        self.size = offset + self.directory_size + end_length
+        self._part_starts = [part[0] for part in self.parts]
+        self.etag = f'"zip-{digest.hexdigest()[:32]}"'
+
+    def _crc(self, index: int) -> int:
+        """CRC of an entry, reading the file if it hasn't been streamed yet."""
+        if index not in self._crcs and self.entry_cache:
+            crc = self.entry_cache.crc(self.paths[index], self.stats[index])
+            if crc is not None:
+                self._crcs[index] = crc
+        if index not in self._crcs:
+            self._record_crc(index, _file_crc(self.paths[index], self.entries[index].file_size))
+        return self._crcs[index]
+
+    def _record_crc(self, index: int, crc: int):
+        """Remember a computed CRC, also for later downloads if there is an entry cache."""
+        self._crcs[index] = crc
+        if self.entry_cache and self.entry_cache.crc(self.paths[index], self.stats[index]) is None:
+            sink = self.entry_cache.writer(self.paths[index], self.stats[index], ZIP_STORED)
+            if sink:
+                sink.commit(crc, self.entries[index].file_size)
+
+    def _part_bytes(self, kind: str, index: int) -> bytes:
+        """Bytes of a header, descriptor or directory part."""
+        if kind == 'header':
+            return self.entries[index].local_header()
+        if kind == 'descriptor':
+            self.entries[index].crc = self._crc(index)
+            return self.entries[index].data_descriptor()
+
+        for entry_index, entry in enumerate(self.entries):
+            entry.crc = self._crc(entry_index)
+        directory = b''.join(entry.central_header() for entry in self.entries)
+        return directory + end_records(len(self.entries), self.directory_offset, self.directory_size)
+
+    def _write_data(self, output, index: int, offset: int, length: int,
+                    on_progress: Optional[Callable[[int], None]]):
+        """Copy part of an entry's file, recording its CRC when the whole file passes through."""
+        entry = self.entries[index]
+        whole_file = offset == 0 and length == entry.file_size
+        crc = 0
+        with open(self.paths[index], 'rb') as f:
+            if os.fstat(f.fileno()).st_size < entry.file_size:
+                raise ZipLayoutChanged(f"{self.paths[index]} shrank while being archived")
+            f.seek(offset)
+            remaining = length
+            while remaining > 0:
+                block = f.read(min(COMPRESS_BLOCK_SIZE, remaining))
+                if not block:
+                    raise ZipLayoutChanged(f"{self.paths[index]} shrank while being archived")
+                if whole_file:
+                    crc = zlib.crc32(block, crc)
+                output.write(block)
+                remaining -= len(block)
+                if on_progress:
+                    on_progress(len(block))
+        if whole_file and index not in self._crcs:
+            self._record_crc(index, crc)
+
+    def write_range(self, output, start: int, length: int,
+                    on_progress: Optional[Callable[[int], None]] = None) -> int:
+        """
+        Write bytes [start, start + length) of the archive.
+
+        Args:
+            output: Writable binary stream
+            start: First archive offset to write
+            length: Number of bytes to write
+            on_progress: Called with the size of each file-data block written
+
+        Returns:
+            Number of bytes written
+
+        Raises:
+            ZipLayoutChanged: If a file shrank since the layout was computed
+        """
+        end = min(start + length, self.size)
+        written = 0
+        first = max(bisect.bisect_right(self._part_starts, start) - 1, 0)
+        for position in range(first, len(self.parts)):
+            part_start, part_length, kind, index = self.parts[position]
+            if part_start >= end:
+                break
+            part_end = part_start + part_length
+            if part_end <= start:
+                continue
+            lo = max(start, part_start) - part_start
+            hi = min(end, part_end) - part_start
+            if kind == 'data':
+                self._write_data(output, index, lo, hi - lo, on_progress)
+            else:
+                output.write(self._part_bytes(kind, index)[lo:hi])
+            written += hi - lo
+        return written
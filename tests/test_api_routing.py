@@ -14,6 +14,12 @@ class TestApiRouting(unittest.TestCase):
     def setUp(self):
         self.mock_server = MagicMock()
         self.mock_server.directory_path = "/tmp/test"
+        # Servers built without caches (or a prepared page) scan and render every time
+        self.mock_server.hash_cache = None
+        self.mock_server.listing_cache = None
+        self.mock_server.line_index_cache = None
+        self.mock_server.encoding_cache = None
+        self.mock_server.spa_page = None
 
         # Patch BaseHTTPRequestHandler so we can instantiate the handler
         with patch.object(BaseHTTPRequestHandler, '__init__', return_value=None):
@@ -132,8 +138,8 @@ class TestApiRouting(unittest.TestCase):
         # Or simpler: verify implementation catches decoding error.
         # Implementation strategy: read bytes, try decode('utf-8').
 
-        # We'll mock open to return bytes that are invalid utf-8
-        invalid_utf8 = b'\x80\x81'
+        # We'll mock open to return bytes that are binary (NUL bytes: not text in any supported encoding)
+        invalid_utf8 = b'\x89PNG\r\n\x1a\n\x00\x00\x00\rIHDR'
 
         with patch('server.validate_directory_path', return_value=(True, "/tmp/test/binary.bin")), \
              patch('os.path.exists', return_value=True), \
@@ -146,6 +152,63 @@ class TestApiRouting(unittest.TestCase):
             # Verify 415 response (Unsupported Media Type) or generic error
             self.handler.send_response.assert_called_with(415)
 
+    def test_content_api_legacy_encoding(self):
+        """Test that /api/content previews text that isn't UTF-8."""
+        self.handler.path = "/api/content?path=/notes.txt"
+
+        with patch('server.validate_directory_path', return_value=(True, "/tmp/test/notes.txt")), \
+             patch('os.path.exists', return_value=True), \
+             patch('os.path.isfile', return_value=True), \
+             patch('os.path.getsize', return_value=100), \
+             patch('mimetypes.guess_type', return_value=('text/plain', None)), \
+             patch('builtins.open', unittest.mock.mock_open(read_data='café – €5'.encode('cp1252'))):
+
+            self.handler.do_GET()
+
+            self.handler.send_response.assert_called_with(200)
+            written_data = b''.join(call.args[0] for call in self.handler.wfile.write.call_args_list)
+            response = json.loads(written_data.decode('utf-8'))
+            self.assertEqual(response['content'], 'café – €5')
+            self.assertEqual(response['encoding'], 'cp1252')
+
+    def test_content_api_windows(self):
+        """Test that /api/content serves byte windows, tails and line pages of large files."""
+        import shutil
+        import tempfile
+        tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp_dir)
+        with open(os.path.join(tmp_dir, 'big.log'), 'w') as f:
+            f.write(''.join(f"line {index}\n" for index in range(200000)))
+        self.mock_server.directory_path = tmp_dir
+
+        def get(path):
+            self.handler.wfile = MagicMock()
+            self.handler.path = path
+            self.handler.do_GET()
+            status = self.handler.send_response.call_args.args[0]
+            written_data = b''.join(call.args[0] for call in self.handler.wfile.write.call_args_list)
+            return status, json.loads(written_data.decode('utf-8'))
+
+        status, response = get("/api/content?path=/big.log")
+        self.assertEqual(status, 413)
+
+        status, response = get("/api/content?path=/big.log&offset=5&length=20")
+        self.assertEqual(status, 200)
+        self.assertEqual(response['content'], "0\nline 1\nline 2\nline")
+        self.assertEqual(response['offset'], 5)
+
+        status, response = get("/api/content?path=/big.log&tail=30")
+        self.assertEqual(response['content'], "line 199998\nline 199999\n")
+
+        status, response = get("/api/content?path=/big.log&line=150000&count=2")
+        self.assertEqual(response['lines'], ["line 150000", "line 150001"])
+        self.assertEqual(response['total_lines'], 200000)
+
+        status, response = get("/api/content?path=/big.log&line=x")
+        self.assertEqual(status, 400)
+        status, response = get("/api/content?path=/big.log&count=0")
+        self.assertEqual(status, 400)
+
     def test_content_api_placeholder(self):
         """Deprecated: Covered by test_content_api_success"""
         pass
@@ -0,0 +1,414 @@
+import unittest
+from unittest.mock import patch
+import io
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+import zipfile
+
+# Adjust path to include src
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from async_server import AsyncFileShareServer, AsyncDirectoryShareServer, format_response_head
+
+
+def fetch(url, headers=None, data=None):
+    """GET (or POST data to) a URL and return (status, headers, body) without raising on HTTP errors."""
+    request = urllib.request.Request(url, headers=headers or {}, data=data)
+    try:
+        with urllib.request.urlopen(request, timeout=10) as response:
+            return response.status, response.headers, response.read()
+    except urllib.error.HTTPError as e:
+        return e.code, e.headers, e.read()
+
+
+class TestFormatResponseHead(unittest.TestCase):
+    def test_status_line_and_headers(self):
+        head = format_response_head(206, [('Content-Length', '10')])
+
+        self.assertTrue(head.startswith(b'HTTP/1.1 206 Partial Content\r\n'))
+        self.assertIn(b'Content-Length: 10\r\n', head)
+        self.assertIn(b'Connection: close\r\n', head)
+        self.assertTrue(head.endswith(b'\r\n\r\n'))
+
+
+class TestAsyncFileShareServer(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.file_path = os.path.join(self.tmp_dir, "payload.bin")
+        self.payload = os.urandom(256 * 1024)
+        with open(self.file_path, 'wb') as f:
+            f.write(self.payload)
+
+        self.server = AsyncFileShareServer(self.file_path, timeout_minutes=1)
+        self.server.start()
+        self.base_url = f"http://127.0.0.1:{self.server.port}"
+
+    def tearDown(self):
+        self.server.stop()
+        shutil.rmtree(self.tmp_dir)
+
+    def test_full_download(self):
+        with patch('builtins.print'):
+            status, headers, body = fetch(f"{self.base_url}/payload.bin")
+
+        self.assertEqual(status, 200)
+        self.assertEqual(headers['Accept-Ranges'], 'bytes')
+        self.assertEqual(body, self.payload)
+
+    def test_range_download(self):
+        with patch('builtins.print'):
+            status, headers, body = fetch(f"{self.base_url}/payload.bin", {'Range': 'bytes=1000-1999'})
+
+        self.assertEqual(status, 206)
+        self.assertEqual(headers['Content-Range'], f'bytes 1000-1999/{len(self.payload)}')
+        self.assertEqual(body, self.payload[1000:2000])
+
+    def test_invalid_path(self):
+        status, _, _ = fetch(f"{self.base_url}/other.bin")
+        self.assertEqual(status, 403)
+
+    def test_signature_head_skips_hashing(self):
+        request = urllib.request.Request(f"{self.base_url}/api/signature", method='HEAD')
+        with patch('blockdelta.compute_signature') as compute:
+            with urllib.request.urlopen(request, timeout=10) as response:
+                status, body = response.status, response.read()
+
+        compute.assert_not_called()
+        self.assertEqual(status, 200)
+        self.assertEqual(body, b'')
+
+    def test_signature_and_blocks(self):
+        status, _, body = fetch(f"{self.base_url}/api/signature")
+        self.assertEqual(status, 200)
+        signature = json.loads(body)
+        self.assertEqual(signature['size'], len(self.payload))
+
+        block_size = signature['block_size']
+        request = json.dumps({'etag': signature['etag'], 'block_size': block_size, 'runs': [[1, 2]]}).encode()
+        with patch('builtins.print'):
+            status, _, body = fetch(f"{self.base_url}/api/blocks", {'Content-Type': 'application/json'}, request)
+        self.assertEqual(status, 200)
+        self.assertEqual(body, self.payload[block_size:3 * block_size])
+
+        stale = json.dumps({'etag': '"old"', 'block_size': block_size, 'runs': [[0, 1]]}).encode()
+        status, _, _ = fetch(f"{self.base_url}/api/blocks", {'Content-Type': 'application/json'}, stale)
+        self.assertEqual(status, 412)
+
+    def test_stop_releases_thread(self):
+        self.server.stop()
+        self.assertFalse(self.server.server_thread.is_alive())
+
+
+class TestAsyncDirectoryShareServer(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.shared = os.path.join(self.tmp_dir, "shared")
+        os.makedirs(os.path.join(self.shared, "sub"))
+        with open(os.path.join(self.shared, "a.txt"), 'w') as f:
+            f.write("hello")
+        with open(os.path.join(self.shared, "sub", "b.txt"), 'w') as f:
+            f.write("nested")
+
+        self.server = AsyncDirectoryShareServer(self.shared, timeout_minutes=1)
+        self.server.start()
+        self.base_url = f"http://127.0.0.1:{self.server.port}"
+
+    def tearDown(self):
+        self.server.stop()
+        shutil.rmtree(self.tmp_dir)
+
+    def test_spa_page_sets_session_cookie(self):
+        status, headers, body = fetch(f"{self.base_url}/")
+
+        self.assertEqual(status, 200)
+        self.assertIn('quick_share_session=', headers['Set-Cookie'])
+        self.assertIn(b'Quick Share - shared', body)
+
+    def test_spa_page_revalidation(self):
+        status, headers, body = fetch(f"{self.base_url}/", {'Accept-Encoding': 'gzip'})
+        self.assertEqual(status, 200)
+        self.assertEqual(headers['Cache-Control'], 'no-cache')
+        etag = headers['ETag']
+
+        status, headers, body = fetch(f"{self.base_url}/sub/", {'Accept-Encoding': 'gzip', 'If-None-Match': etag})
+        self.assertEqual(status, 304)
+        self.assertEqual(body, b'')
+        self.assertEqual(headers['ETag'], etag)
+
+    def test_conditional_requests(self):
+        for path in ('/a.txt', '/api/content?path=/a.txt', '/api/tree?path=/'):
+            status, headers, body = fetch(f"{self.base_url}{path}")
+            self.assertEqual(status, 200, path)
+            etag = headers['ETag']
+
+            status, headers, body = fetch(f"{self.base_url}{path}", {'If-None-Match': etag})
+            self.assertEqual(status, 304, path)
+            self.assertEqual(body, b'')
+            self.assertEqual(headers['ETag'], etag)
+
+        status, headers, _ = fetch(f"{self.base_url}/a.txt")
+        status, _, body = fetch(f"{self.base_url}/a.txt", {'If-Modified-Since': headers['Last-Modified']})
+        self.assertEqual(status, 304)
+
+    def test_head_requests(self):
+        for path in ('/', '/a.txt', '/?download=zip&compression=store', '/missing.txt'):
+            _, get_headers, _ = fetch(f"{self.base_url}{path}")
+            request = urllib.request.Request(f"{self.base_url}{path}", method='HEAD')
+            try:
+                with urllib.request.urlopen(request, timeout=10) as response:
+                    status, headers, body = response.status, response.headers, response.read()
+            except urllib.error.HTTPError as e:
+                status, headers, body = e.code, e.headers, e.read()
+
+            self.assertEqual(body, b'', path)
+            for name in ('Content-Type', 'Content-Length', 'ETag', 'Last-Modified'):
+                self.assertEqual(headers[name], get_headers[name], f"{path} {name}")
+
+    def test_head_api_skips_building_bodies(self):
+        def head(path):
+            request = urllib.request.Request(f"{self.base_url}{path}", method='HEAD')
+            try:
+                with urllib.request.urlopen(request, timeout=10) as response:
+                    return response.status, response.headers
+            except urllib.error.HTTPError as e:
+                return e.code, e.headers
+
+        with patch('server.build_manifest') as build_manifest, \
+                patch('async_server.build_api_response') as build_api_response:
+            for path, expected in (('/api/manifest?path=/', 200), ('/api/content?path=/a.txt', 200),
+                                   ('/api/content?path=/missing.txt', 403), ('/api/tree?path=/a.txt', 400)):
+                status, headers = head(path)
+                self.assertEqual(status, expected, path)
+                self.assertEqual(headers['Content-Type'], 'application/json')
+                self.assertIsNone(headers['Content-Length'])
+        build_manifest.assert_not_called()
+        build_api_response.assert_not_called()
+
+        _, headers = head('/api/content?path=/a.txt')
+        _, get_headers, _ = fetch(f"{self.base_url}/api/content?path=/a.txt")
+        self.assertEqual(headers['ETag'], get_headers['ETag'])
+
+    def test_head_api_content_status_matches_get(self):
+        from textpreview import MAX_PREVIEW_SIZE
+
+        with open(os.path.join(self.shared, 'big.txt'), 'w') as f:
+            f.write('x' * (MAX_PREVIEW_SIZE + 1))
+        with open(os.path.join(self.shared, 'nul.txt'), 'wb') as f:
+            f.write(b'text\x00' * 100)
+        for path, expected in (('/api/content?path=/big.txt', 413), ('/api/content?path=/nul.txt', 415)):
+            request = urllib.request.Request(f"{self.base_url}{path}", method='HEAD')
+            with self.assertRaises(urllib.error.HTTPError) as ctx:
+                urllib.request.urlopen(request, timeout=10)
+            self.assertEqual(ctx.exception.code, expected, path)
+            self.assertEqual(fetch(f"{self.base_url}{path}")[0], expected, path)
+
+    def test_api_tree(self):
+        status, _, body = fetch(f"{self.base_url}/api/tree?path=/")
+
+        self.assertEqual(status, 200)
+        names = [item['name'] for item in json.loads(body)['items']]
+        self.assertEqual(names, ['sub', 'a.txt'])
+
+    def test_api_tree_streams_large_listing(self):
+        from jsonstream import STREAM_MIN_ITEMS
+        big = os.path.join(self.shared, 'big')
+        os.mkdir(big)
+        for index in range(STREAM_MIN_ITEMS):
+            open(os.path.join(big, f"{index:05d}.txt"), 'w').close()
+
+        status, headers, body = fetch(f"{self.base_url}/api/tree?path=/big")
+
+        self.assertEqual(status, 200)
+        self.assertEqual(headers['Transfer-Encoding'], 'chunked')
+        self.assertIsNone(headers['Content-Length'])
+        items = json.loads(body)['items']
+        self.assertEqual(len(items), STREAM_MIN_ITEMS)
+        self.assertEqual(items[0]['name'], '00000.txt')
+
+        from http_utils import body_etag
+        self.assertEqual(headers['ETag'], body_etag(body))
+        status, _, body = fetch(f"{self.base_url}/api/tree?path=/big", {'If-None-Match': headers['ETag']})
+        self.assertEqual(status, 304)
+        self.assertEqual(body, b'')
+
+    def test_compressed_responses(self):
+        import gzip
+        from jsonstream import STREAM_MIN_ITEMS
+        big = os.path.join(self.shared, 'big')
+        os.mkdir(big)
+        for index in range(STREAM_MIN_ITEMS):
+            open(os.path.join(big, f"{index:05d}.txt"), 'w').close()
+
+        with patch('content_encoding.brotli', None):
+
+            status, headers, body = fetch(f"{self.base_url}/api/tree?path=/big", {'Accept-Encoding': 'gzip'})
+            self.assertEqual(status, 200)
+            self.assertEqual(headers['Content-Encoding'], 'gzip')
+            self.assertEqual(len(json.loads(gzip.decompress(body))['items']), STREAM_MIN_ITEMS)
+
+            # Downloads are never compressed
+            status, headers, body = fetch(f"{self.base_url}/a.txt", {'Accept-Encoding': 'gzip'})
+            self.assertIsNone(headers['Content-Encoding'])
+
+    def test_api_content(self):
+        status, _, body = fetch(f"{self.base_url}/api/content?path=/a.txt")
+
+        self.assertEqual(status, 200)
+        self.assertEqual(json.loads(body)['content'], 'hello')
+
+    def test_file_download(self):
+        with patch('builtins.print'):
+            status, _, body = fetch(f"{self.base_url}/sub/b.txt")
+
+        self.assertEqual(status, 200)
+        self.assertEqual(body, b'nested')
+
+    def test_zip_download(self):
+        with patch('builtins.print'):
+            status, headers, body = fetch(f"{self.base_url}/download/shared.zip")
+
+        self.assertEqual(status, 200)
+        self.assertEqual(headers['Content-Type'], 'application/zip')
+        with zipfile.ZipFile(io.BytesIO(body)) as zf:
+            self.assertEqual(sorted(zf.namelist()), ['a.txt', 'sub/b.txt'])
+
+    def test_stored_zip_is_sized_and_resumable(self):
+        with patch('builtins.print'):
+            status, headers, body = fetch(f"{self.base_url}/download/shared.zip?compression=store")
+            self.assertEqual(status, 200)
+            self.assertEqual(int(headers['Content-Length']), len(body))
+
+            status, headers, tail = fetch(
+                f"{self.base_url}/download/shared.zip?compression=store",
+                {'Range': 'bytes=100-', 'If-Range': headers['ETag']}
+            )
+
+        self.assertEqual(status, 206)
+        self.assertEqual(tail, body[100:])
+        with zipfile.ZipFile(io.BytesIO(body)) as zf:
+            self.assertEqual(sorted(zf.namelist()), ['a.txt', 'sub/b.txt'])
+
+    def test_stored_zip_ignores_date_if_range(self):
+        url = f"{self.base_url}/download/shared.zip?compression=store"
+        with patch('builtins.print'):
+            _, headers, _ = fetch(url)
+            os.remove(os.path.join(self.shared, 'a.txt'))
+            status, _, body = fetch(url, {'Range': 'bytes=10-', 'If-Range': headers['Last-Modified']})
+
+        self.assertEqual(status, 200)
+        with zipfile.ZipFile(io.BytesIO(body)) as zf:
+            self.assertEqual(zf.namelist(), ['sub/b.txt'])
+
+    def test_tar_gz_download(self):
+        import tarfile
+        with patch('builtins.print'):
+            status, headers, body = fetch(f"{self.base_url}/download/shared.tar.gz")
+
+        self.assertEqual(status, 200)
+        self.assertEqual(headers['Content-Type'], 'application/gzip')
+        with tarfile.open(fileobj=io.BytesIO(body), mode='r:gz') as tar:
+            self.assertEqual(sorted(tar.getnames()), ['a.txt', 'sub/b.txt'])
+
+    def test_zip_read_error_closes_connection(self):
+        def fail_mid_stream(output, *args):
+            output.write(b'PK\x03\x04')
+            raise OSError("unexpected end of data")
+
+        with patch('async_server.stream_directory_as_zip', side_effect=fail_mid_stream), \
+                patch('builtins.print') as mock_print:
+            status, _, body = fetch(f"{self.base_url}/download/shared.zip")
+
+        self.assertEqual(status, 200)
+        self.assertEqual(body, b'PK\x03\x04')
+        self.assertIn('unexpected end of data', str(mock_print.call_args_list))
+        self.assertEqual(self.server._archive_streams, 0)
+
+    def test_archive_streams_busy(self):
+        # Every archive thread taken: downloads get 503, the API and page still answer
+        self.server._archive_streams = self.server.max_archive_streams
+
+        for path in ('/download/shared.zip', '/download/shared.zip?compression=store', '/download/shared.tar.gz'):
+            status, headers, _ = fetch(f"{self.base_url}{path}")
+            self.assertEqual(status, 503, path)
+            self.assertEqual(headers['Retry-After'], '5')
+        status, _, _ = fetch(f"{self.base_url}/api/zip", {'Content-Type': 'application/json'},
+                             json.dumps({'paths': ['/sub']}).encode())
+        self.assertEqual(status, 503)
+
+        self.assertEqual(fetch(f"{self.base_url}/api/tree?path=/")[0], 200)
+        self.assertEqual(fetch(f"{self.base_url}/")[0], 200)
+
+    def test_archive_stream_slot_released(self):
+        with patch('builtins.print'):
+            fetch(f"{self.base_url}/download/shared.zip")
+            fetch(f"{self.base_url}/download/shared.zip?compression=store")
+
+        # A sized body can reach the client before the handler has returned
+        deadline = time.time() + 5
+        while self.server._archive_streams and time.time() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(self.server._archive_streams, 0)
+
+    def test_selection_zip(self):
+        with patch('builtins.print'):
+            status, headers, body = fetch(
+                f"{self.base_url}/api/zip", {'Content-Type': 'application/json'},
+                json.dumps({'paths': ['/sub']}).encode()
+            )
+
+        self.assertEqual(status, 200)
+        self.assertIn('filename="sub.zip"', headers['Content-Disposition'])
+        with zipfile.ZipFile(io.BytesIO(body)) as zf:
+            self.assertEqual(zf.namelist(), ['sub/b.txt'])
+
+    def test_selection_zip_form_post(self):
+        with patch('builtins.print'):
+            status, _, body = fetch(f"{self.base_url}/api/zip", data=b'path=%2Fa.txt&path=%2Fsub')
+
+        self.assertEqual(status, 200)
+        with zipfile.ZipFile(io.BytesIO(body)) as zf:
+            self.assertEqual(sorted(zf.namelist()), ['a.txt', 'sub/b.txt'])
+
+    def test_selection_zip_denied(self):
+        status, _, body = fetch(
+            f"{self.base_url}/api/zip", {'Content-Type': 'application/json'}, b'{"paths": ["/../x"]}'
+        )
+        self.assertEqual(status, 403)
+        self.assertEqual(json.loads(body)['status'], 403)
+
+    def test_manifest_and_delta(self):
+        status, _, body = fetch(f"{self.base_url}/api/manifest")
+        self.assertEqual(status, 200)
+        files = json.loads(body)['files']
+        self.assertEqual(sorted(item['path'] for item in files), ['a.txt', 'sub/b.txt'])
+
+        up_to_date = json.dumps({'files': files}).encode()
+        with patch('builtins.print'):
+            status, _, body = fetch(f"{self.base_url}/api/delta", {'Content-Type': 'application/json'}, up_to_date)
+        self.assertEqual(status, 200)
+        with zipfile.ZipFile(io.BytesIO(body)) as zf:
+            self.assertEqual(zf.namelist(), [])
+
+        with patch('builtins.print'):
+            status, _, body = fetch(f"{self.base_url}/api/delta", {'Content-Type': 'application/json'}, b'{}')
+        with zipfile.ZipFile(io.BytesIO(body)) as zf:
+            self.assertEqual(sorted(zf.namelist()), ['a.txt', 'sub/b.txt'])
+
+    def test_path_traversal_denied(self):
+        status, _, _ = fetch(f"{self.base_url}/%2e%2e/etc/passwd")
+        self.assertEqual(status, 403)
+
+    def test_session_limit(self):
+        self.server.max_sessions = 0
+        status, _, _ = fetch(f"{self.base_url}/")
+        self.assertEqual(status, 403)
+
+
+if __name__ == '__main__':
+    unittest.main()
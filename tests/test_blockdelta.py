@@ -0,0 +1,112 @@
+import unittest
+from unittest.mock import patch
+import os
+import shutil
+import sys
+import tempfile
+
+# Adjust path to include src
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+import blockdelta
+from blockdelta import (
+    MIN_BLOCK_SIZE, MAX_BLOCK_SIZE, SignatureCache, choose_block_size, compute_signature,
+    match_blocks, missing_runs, parse_block_runs
+)
+
+
+class TestBlockDelta(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.base = os.urandom(64 * MIN_BLOCK_SIZE + 100)
+        self.old_path = self._make_file('old.bin', self.base)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def _make_file(self, name, data):
+        path = os.path.join(self.tmp_dir, name)
+        with open(path, 'wb') as f:
+            f.write(data)
+        return path
+
+    def _match(self, new_data):
+        signature = compute_signature(self._make_file('new.bin', new_data))
+        sources = match_blocks(self.old_path, signature)
+
+        # Every matched block really holds the wanted content
+        block_size = signature['block_size']
+        for index, source in enumerate(sources):
+            if source is not None:
+                wanted = new_data[index * block_size:(index + 1) * block_size]
+                self.assertEqual(self.base[source:source + len(wanted)], wanted)
+        return sources
+
+    def test_choose_block_size(self):
+        self.assertEqual(choose_block_size(0), MIN_BLOCK_SIZE)
+        self.assertEqual(choose_block_size(20 * 1024 ** 3), 143 * 1024)
+        self.assertEqual(choose_block_size(10 ** 15), MAX_BLOCK_SIZE)
+
+    def test_signature(self):
+        signature = compute_signature(self.old_path)
+
+        self.assertEqual(signature['size'], len(self.base))
+        self.assertEqual(signature['block_size'], MIN_BLOCK_SIZE)
+        self.assertEqual(len(signature['weak']), 65)
+        self.assertEqual(len(signature['strong']), 65)
+
+    def test_identical_file_needs_nothing(self):
+        sources = self._match(self.base)
+        self.assertEqual(sources, [index * MIN_BLOCK_SIZE for index in range(65)])
+        self.assertEqual(missing_runs(sources), [])
+
+    def test_in_place_change(self):
+        changed = bytearray(self.base)
+        changed[10 * MIN_BLOCK_SIZE + 5] ^= 0xff
+        self.assertEqual(missing_runs(self._match(bytes(changed))), [[10, 1]])
+
+    def test_insertion_resyncs_by_rolling(self):
+        inserted = self.base[:5000] + b'x' * 777 + self.base[5000:]
+        runs = missing_runs(self._match(inserted))
+        self.assertLessEqual(sum(count for _, count in runs), 2)
+
+    def test_deletion_resyncs_by_rolling(self):
+        deleted = self.base[:5000] + self.base[5000 + 3 * MIN_BLOCK_SIZE + 11:]
+        runs = missing_runs(self._match(deleted))
+        self.assertLessEqual(sum(count for _, count in runs), 2)
+
+    def test_large_deletion_resyncs_periodically(self):
+        deleted = self.base[:5000] + self.base[5000 + 20 * MIN_BLOCK_SIZE + 11:]
+        with patch.object(blockdelta, 'ROLLING_SEARCH_SIZE', MIN_BLOCK_SIZE), \
+                patch.object(blockdelta, 'RESYNC_INTERVAL_BLOCKS', 4):
+            runs = missing_runs(self._match(deleted))
+        self.assertLess(sum(count for _, count in runs), 10)
+
+    def test_unrelated_local_file(self):
+        sources = self._match(os.urandom(len(self.base)))
+        self.assertEqual(missing_runs(sources), [[0, 65]])
+
+    def test_parse_block_runs(self):
+        size = 3 * MIN_BLOCK_SIZE + 10
+        self.assertEqual(
+            parse_block_runs([[0, 1], [2, 2]], MIN_BLOCK_SIZE, size),
+            [(0, MIN_BLOCK_SIZE), (2 * MIN_BLOCK_SIZE, MIN_BLOCK_SIZE + 10)]
+        )
+        for runs in ('x', [[0]], [[1, 1], [0, 1]], [[0, 2], [1, 1]], [[3, 2]], [[0, 0]], [[True, 1]]):
+            with self.assertRaises(ValueError, msg=runs):
+                parse_block_runs(runs, MIN_BLOCK_SIZE, size)
+
+    def test_signature_cache(self):
+        cache = SignatureCache()
+        first = cache.get(self.old_path)
+        with patch('blockdelta.compute_signature') as mock_compute:
+            self.assertIs(cache.get(self.old_path), first)
+        mock_compute.assert_not_called()
+
+        with open(self.old_path, 'ab') as f:
+            f.write(b'more')
+        self.assertEqual(cache.get(self.old_path)['size'], len(self.base) + 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -101,3 +101,62 @@ def test_validate_arguments_invalid_timeout_unit():
     )
     with pytest.raises(ValueError, match="Timeout unit must be"):
         validate_arguments(args)
+
+def test_parse_arguments_engine_default():
+    """Test that the threaded engine is the default."""
+    args = parse_arguments(['test.txt'])
+    assert args.engine == 'threaded'
+
+def test_parse_arguments_engine_async():
+    """Test selecting the asyncio engine."""
+    args = parse_arguments(['test.txt', '--engine', 'async'])
+    assert args.engine == 'async'
+
+def test_parse_arguments_engine_invalid():
+    """Test that unknown engines are rejected."""
+    with pytest.raises(SystemExit):
+        parse_arguments(['test.txt', '--engine', 'gevent'])
+
+def test_parse_arguments_pool_engine():
+    """Test bounded worker pool options."""
+    args = parse_arguments(['test.txt', '--engine', 'pool', '--threads', '8', '--queue', '32'])
+    assert args.engine == 'pool'
+    assert args.threads == 8
+    assert args.queue == 32
+
+def test_validate_arguments_invalid_threads():
+    """Test that a non-positive worker count is rejected."""
+    args = parse_arguments(['test.txt', '--engine', 'pool', '--threads', '0'])
+    with pytest.raises(ValueError, match="threads"):
+        validate_arguments(args)
+
+def test_parse_arguments_workers():
+    """Test multi-process worker count."""
+    assert parse_arguments(['test.txt']).workers == 1
+    assert parse_arguments(['test.txt', '--workers', '4']).workers == 4
+
+def test_validate_arguments_invalid_workers():
+    """Test that a non-positive process count is rejected."""
+    args = parse_arguments(['test.txt', '--workers', '0'])
+    with pytest.raises(ValueError, match="workers"):
+        validate_arguments(args)
+
+def test_validate_arguments_workers_with_async_engine():
+    """Test that --workers can't be combined with the asyncio engine."""
+    args = parse_arguments(['test.txt', '--engine', 'async', '--workers', '2'])
+    with pytest.raises(ValueError, match="async"):
+        validate_arguments(args)
+
+def test_parse_arguments_zip_compression():
+    """Test zip compression policy option."""
+    assert parse_arguments(['test.txt']).zip_compression == 'auto'
+    assert parse_arguments(['test.txt', '--zip-compression', 'store']).zip_compression == 'store'
+    with pytest.raises(SystemExit):
+        parse_arguments(['test.txt', '--zip-compression', 'lzma'])
+
+def test_parse_arguments_zip_cache():
+    """Test zip entry cache size option."""
+    assert parse_arguments(['test.txt']).zip_cache == '1G'
+    validate_arguments(parse_arguments(['test.txt', '--zip-cache', '0']))
+    with pytest.raises(ValueError, match="zip-cache"):
+        validate_arguments(parse_arguments(['test.txt', '--zip-cache', 'lots']))
@@ -0,0 +1,87 @@
+import unittest
+from unittest.mock import patch
+import gzip
+import os
+import sys
+
+# Adjust path to include src
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+import content_encoding
+from content_encoding import (
+    parse_accept_encoding, choose_encoding, iter_compressed, negotiate_body, StaticPayload, COMPRESS_MIN_SIZE
+)
+
+
+class TestNegotiation(unittest.TestCase):
+    def test_parse_accept_encoding(self):
+        self.assertEqual(
+            parse_accept_encoding('gzip, deflate;q=0.5 , BR;q=0, identity;q=x'),
+            {'gzip': 1.0, 'deflate': 0.5, 'br': 0.0, 'identity': 0.0}
+        )
+        self.assertEqual(parse_accept_encoding(None), {})
+
+    def test_choose_gzip_without_brotli(self):
+        with patch.object(content_encoding, 'brotli', None):
+            self.assertEqual(choose_encoding('gzip, deflate, br'), 'gzip')
+            self.assertEqual(choose_encoding('*'), 'gzip')
+            self.assertIsNone(choose_encoding('br'))
+            self.assertIsNone(choose_encoding('gzip;q=0'))
+            self.assertIsNone(choose_encoding('*, gzip;q=0'))
+            self.assertIsNone(choose_encoding(''))
+
+    @unittest.skipUnless(content_encoding.brotli_available(), "brotli module not installed")
+    def test_choose_brotli(self):
+        self.assertEqual(choose_encoding('gzip, br'), 'br')
+        self.assertEqual(choose_encoding('gzip, br;q=0.5'), 'gzip')
+
+
+class TestCompression(unittest.TestCase):
+    def setUp(self):
+        patcher = patch.object(content_encoding, 'brotli', None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_negotiate_body(self):
+        body = b'{"items": []}' * 200
+
+        compressed, encoding, vary = negotiate_body(body, 'application/json', 'gzip')
+        self.assertEqual((encoding, vary), ('gzip', True))
+        self.assertEqual(gzip.decompress(compressed), body)
+
+        self.assertEqual(negotiate_body(body, 'application/json', None), (body, None, True))
+        self.assertEqual(negotiate_body(body, 'application/zip', 'gzip'), (body, None, False))
+        small = b'x' * (COMPRESS_MIN_SIZE - 1)
+        self.assertEqual(negotiate_body(small, 'text/html', 'gzip'), (small, None, False))
+
+    def test_static_payload(self):
+        body = b'<html>' + b'page ' * 1000
+        with patch('content_encoding.compress', wraps=content_encoding.compress) as mock_compress:
+            payload = StaticPayload(body, 'text/html; charset=utf-8')
+            compressed, headers = payload.select('gzip')
+            again, _ = payload.select('gzip')
+
+        self.assertEqual(mock_compress.call_count, 1)
+        self.assertIs(compressed, again)
+        self.assertEqual(gzip.decompress(compressed), body)
+        headers = dict(headers)
+        self.assertEqual(headers['Content-Encoding'], 'gzip')
+        self.assertEqual(headers['Cache-Control'], 'no-cache')
+        self.assertIn(headers['ETag'], payload.etags)
+        self.assertNotEqual(headers['ETag'], payload.etag)
+
+        raw, headers = payload.select(None)
+        self.assertIs(raw, body)
+        self.assertEqual(dict(headers)['ETag'], payload.etag)
+        self.assertNotIn('Content-Encoding', dict(headers))
+
+    def test_iter_compressed(self):
+        chunks = [b'{"name": "%d"}' % i * 100 for i in range(10)]
+        compressed = list(iter_compressed(iter(chunks), 'gzip'))
+
+        self.assertTrue(all(compressed))
+        self.assertEqual(gzip.decompress(b''.join(compressed)), b''.join(chunks))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -6,6 +6,7 @@ import tempfile
 from pathlib import Path
 import zipfile
 import io
+from unittest.mock import patch
 
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
 
@@ -13,8 +14,15 @@ from directory_handler import (
     get_directory_info,
     format_file_size,
     generate_directory_listing_html,
-    stream_directory_as_zip
+    stream_directory_as_zip,
+    iter_selected_files,
+    _ArchiveWalk,
+    _iter_archive_files,
+    get_directory_structure,
+    paginate_directory_structure,
+    decode_tree_cursor
 )
+import pytest
 
 
 class TestDirectoryInfo:
@@ -62,6 +70,57 @@ class TestDirectoryInfo:
         assert format_file_size(1024 * 1024 * 1024) == "1.0 GB"
 
 
+class TestTreePagination:
+    """Test cursor-based pages of directory listings."""
+
+    def _make_tree(self, tmp_dir):
+        for name in ("b", "A"):
+            os.mkdir(os.path.join(tmp_dir, name))
+        for name in ("readme", "README", "z.txt", "a.txt"):
+            Path(tmp_dir, name).write_text(name)
+        return get_directory_structure(tmp_dir, tmp_dir)
+
+    def test_stable_order(self):
+        """Directories first, case-insensitive, exact spelling breaks ties."""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            structure = self._make_tree(tmp_dir)
+            names = [item['name'] for item in structure['items']]
+            assert names == ['A', 'b', 'a.txt', 'README', 'readme', 'z.txt']
+
+    def test_pages_cover_listing(self):
+        """Following next_cursor returns every item exactly once."""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            structure = self._make_tree(tmp_dir)
+            names = []
+            cursor = None
+            while True:
+                page = paginate_directory_structure(structure, 4, cursor)
+                assert page['total'] == 6
+                names.extend(item['name'] for item in page['items'])
+                cursor = page['next_cursor']
+                if cursor is None:
+                    break
+            assert names == [item['name'] for item in structure['items']]
+
+    def test_cursor_survives_changes(self):
+        """Entries created or deleted before the cursor don't shift the next page."""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            self._make_tree(tmp_dir)
+            first = paginate_directory_structure(get_directory_structure(tmp_dir, tmp_dir), 3)
+            os.rmdir(os.path.join(tmp_dir, 'A'))
+            Path(tmp_dir, '0.txt').write_text('new')
+
+            rest = paginate_directory_structure(get_directory_structure(tmp_dir, tmp_dir), 10, first['next_cursor'])
+            assert [item['name'] for item in rest['items']] == ['README', 'readme', 'z.txt']
+            assert rest['next_cursor'] is None
+
+    def test_invalid_cursor(self):
+        """Malformed cursors raise ValueError."""
+        for cursor in ('%%', 'bm90IGpzb24', 'WzIsICJhIl0'):
+            with pytest.raises(ValueError):
+                decode_tree_cursor(cursor)
+
+
 class TestHTMLListingGeneration:
     """Test HTML directory listing generation."""
 
@@ -190,3 +249,84 @@ class TestZipGeneration:
             with zipfile.ZipFile(output, 'r') as zf:
                 # Empty zip is still valid
                 assert len(zf.namelist()) == 0
+
+
+class TestArchiveWalk:
+    """Test the single-pass walk feeding zip and tar streams."""
+
+    def _make_tree(self, base_dir):
+        (base_dir / "a" / "b").mkdir(parents=True)
+        (base_dir / "c").mkdir()
+        (base_dir / "top.txt").write_text("top")
+        (base_dir / "a" / "one.txt").write_text("one")
+        (base_dir / "a" / "b" / "two.txt").write_text("two")
+        (base_dir / "c" / "three.txt").write_text("three")
+
+    def test_matches_os_walk_order(self):
+        """Test files come out in os.walk order with base-relative arcnames."""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            base_dir = Path(tmp_dir)
+            self._make_tree(base_dir)
+            os.symlink(base_dir / "a", base_dir / "link-to-a")
+
+            expected = []
+            for root, dirs, files in os.walk(base_dir):
+                for name in files:
+                    path = os.path.join(root, name)
+                    expected.append((path, os.path.relpath(path, base_dir)))
+
+            found = [(path, arcname) for path, arcname, _ in _iter_archive_files(str(base_dir), str(base_dir))]
+            assert found == expected
+            # Symlinked directories are not followed
+            assert not any(arcname.startswith("link-to-a") for _, arcname in found)
+
+    def test_subdirectory_arcnames(self):
+        """Test arcnames stay relative to the shared root."""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            base_dir = Path(tmp_dir)
+            self._make_tree(base_dir)
+
+            walk = _ArchiveWalk(_iter_archive_files(str(base_dir), str(base_dir / "a")))
+            arcnames = [arcname for _, arcname, _ in walk]
+            assert arcnames == [os.path.join("a", "one.txt"), os.path.join("a", "b", "two.txt")]
+            assert walk.done
+            assert walk.files_found == 2
+            assert walk.bytes_found == 6
+
+    def test_close_stops_walker(self):
+        """Test an abandoned walk doesn't keep its thread blocked on the queue."""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            base_dir = Path(tmp_dir)
+            for index in range(3000):
+                (base_dir / f"{index}.txt").write_text("x")
+
+            with patch('directory_handler.WALK_QUEUE_SIZE', 1):
+                walk = _ArchiveWalk(_iter_archive_files(str(base_dir), str(base_dir)))
+            next(iter(walk))
+            walk.close()
+            walk._thread.join(timeout=5)
+            assert not walk._thread.is_alive()
+
+    def test_selected_files(self):
+        """Test a selection mixes single files and whole directories."""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            base_dir = Path(tmp_dir)
+            self._make_tree(base_dir)
+
+            targets = [str(base_dir / "a" / "b"), str(base_dir / "top.txt"), str(base_dir / "missing")]
+            arcnames = [arcname for _, arcname, _ in iter_selected_files(str(base_dir), targets)]
+            assert arcnames == [os.path.join("a", "b", "two.txt"), "top.txt"]
+
+    def test_progress_without_pre_walk(self):
+        """Test progress logging doesn't walk the tree before streaming."""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            base_dir = Path(tmp_dir)
+            self._make_tree(base_dir)
+
+            output = io.BytesIO()
+            with patch('os.walk', side_effect=AssertionError("pre-walk")), patch('builtins.print'):
+                stream_directory_as_zip(output, str(base_dir), str(base_dir), progress_callback=True)
+
+            output.seek(0)
+            with zipfile.ZipFile(output, 'r') as zf:
+                assert sorted(zf.namelist()) == ['a/b/two.txt', 'a/one.txt', 'c/three.txt', 'top.txt']
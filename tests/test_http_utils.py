@@ -0,0 +1,171 @@
+import unittest
+import os
+import sys
+
+# Adjust path to include src
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from http_utils import (
+    RangeNotSatisfiable,
+    MultipartByteranges,
+    parse_range_header,
+    format_content_range,
+    if_range_matches,
+    if_none_match_matches,
+    if_modified_since_matches,
+    is_not_modified,
+    body_etag,
+    chunks_etag,
+    chunk_frame,
+    ChunkedWriter
+)
+
+
+class TestParseRangeHeader(unittest.TestCase):
+    def test_absent_header(self):
+        self.assertIsNone(parse_range_header(None, 1000))
+        self.assertIsNone(parse_range_header('', 1000))
+
+    def test_single_range(self):
+        self.assertEqual(parse_range_header('bytes=0-499', 1000), [(0, 499)])
+
+    def test_open_ended_range(self):
+        self.assertEqual(parse_range_header('bytes=900-', 1000), [(900, 999)])
+
+    def test_suffix_range(self):
+        self.assertEqual(parse_range_header('bytes=-100', 1000), [(900, 999)])
+
+    def test_suffix_larger_than_file(self):
+        self.assertEqual(parse_range_header('bytes=-5000', 1000), [(0, 999)])
+
+    def test_end_clamped_to_file_size(self):
+        self.assertEqual(parse_range_header('bytes=500-5000', 1000), [(500, 999)])
+
+    def test_multiple_ranges_sorted_and_coalesced(self):
+        ranges = parse_range_header('bytes=500-599, 0-99, 50-149, 600-650', 1000)
+        self.assertEqual(ranges, [(0, 149), (500, 650)])
+
+    def test_unsatisfiable(self):
+        with self.assertRaises(RangeNotSatisfiable):
+            parse_range_header('bytes=1000-', 1000)
+
+    def test_empty_file_is_unsatisfiable(self):
+        with self.assertRaises(RangeNotSatisfiable):
+            parse_range_header('bytes=0-', 0)
+
+    def test_malformed_headers_ignored(self):
+        for header in ('items=0-1', 'bytes=abc', 'bytes=5-1', 'bytes=', 'bytes=1-2-3', 'bytes=-'):
+            self.assertIsNone(parse_range_header(header, 1000), header)
+
+    def test_too_many_ranges_ignored(self):
+        header = 'bytes=' + ','.join(f'{i * 2}-{i * 2}' for i in range(100))
+        self.assertIsNone(parse_range_header(header, 1000))
+
+
+class TestIfRange(unittest.TestCase):
+    def setUp(self):
+        self.etag = '"abc-1"'
+        self.last_modified = 'Thu, 01 Jan 2026 00:00:00 GMT'
+
+    def test_absent(self):
+        self.assertTrue(if_range_matches(None, self.etag, self.last_modified))
+
+    def test_etag_match(self):
+        self.assertTrue(if_range_matches('"abc-1"', self.etag, self.last_modified))
+
+    def test_etag_mismatch(self):
+        self.assertFalse(if_range_matches('"other"', self.etag, self.last_modified))
+
+    def test_weak_etag_never_matches(self):
+        self.assertFalse(if_range_matches('W/"abc-1"', self.etag, self.last_modified))
+
+    def test_date_match(self):
+        self.assertTrue(if_range_matches(self.last_modified, self.etag, self.last_modified))
+
+    def test_date_mismatch(self):
+        self.assertFalse(if_range_matches('Fri, 02 Jan 2026 00:00:00 GMT', self.etag, self.last_modified))
+
+    def test_date_not_accepted(self):
+        self.assertFalse(if_range_matches(self.last_modified, self.etag, None))
+        self.assertTrue(if_range_matches('"abc-1"', self.etag, None))
+
+
+class TestIfNoneMatch(unittest.TestCase):
+    def test_matches(self):
+        etags = ['"abc"', '"abc-gzip"']
+        self.assertTrue(if_none_match_matches('"abc"', etags))
+        self.assertTrue(if_none_match_matches('"x", W/"abc-gzip"', etags))
+        self.assertTrue(if_none_match_matches('*', etags))
+
+    def test_no_match(self):
+        etags = ['"abc"']
+        self.assertFalse(if_none_match_matches(None, etags))
+        self.assertFalse(if_none_match_matches('"abd"', etags))
+        self.assertFalse(if_none_match_matches('abc', etags))
+
+
+class TestConditionalRequests(unittest.TestCase):
+    def setUp(self):
+        self.mtime = 1767225600.5  # Thu, 01 Jan 2026 00:00:00.5 GMT
+
+    def test_if_modified_since(self):
+        self.assertTrue(if_modified_since_matches('Thu, 01 Jan 2026 00:00:00 GMT', self.mtime))
+        self.assertTrue(if_modified_since_matches('Fri, 02 Jan 2026 00:00:00 GMT', self.mtime))
+        self.assertFalse(if_modified_since_matches('Wed, 31 Dec 2025 23:59:59 GMT', self.mtime))
+        self.assertFalse(if_modified_since_matches(None, self.mtime))
+        self.assertFalse(if_modified_since_matches('yesterday', self.mtime))
+
+    def test_if_none_match_takes_precedence(self):
+        fresh_date = 'Fri, 02 Jan 2026 00:00:00 GMT'
+        self.assertTrue(is_not_modified({'If-None-Match': '"abc"'}, ['"abc"'], self.mtime))
+        self.assertFalse(is_not_modified(
+            {'If-None-Match': '"old"', 'If-Modified-Since': fresh_date}, ['"abc"'], self.mtime
+        ))
+        self.assertTrue(is_not_modified({'If-Modified-Since': fresh_date}, ['"abc"'], self.mtime))
+        self.assertFalse(is_not_modified({'If-Modified-Since': fresh_date}, ['"abc"']))
+        self.assertFalse(is_not_modified({}, ['"abc"'], self.mtime))
+
+    def test_body_etag(self):
+        etag = body_etag(b'{}')
+        self.assertTrue(etag.startswith('W/"'))
+        self.assertEqual(etag, body_etag(b'{}'))
+        self.assertNotEqual(etag, body_etag(b'[]'))
+
+    def test_chunks_etag(self):
+        self.assertEqual(chunks_etag([b'{"a"', b': 1}']), body_etag(b'{"a": 1}'))
+
+
+class TestChunkedWriter(unittest.TestCase):
+    def test_chunk_frame(self):
+        self.assertEqual(chunk_frame(b'hello world!'), b'c\r\nhello world!\r\n')
+
+    def test_gathers_small_writes(self):
+        import io
+        output = io.BytesIO()
+        writer = ChunkedWriter(output, buffer_size=10)
+        for piece in (b'abc', b'defg', b'hijk', b'', b'lm'):
+            writer.write(piece)
+        self.assertEqual(output.getvalue(), b'b\r\nabcdefghijk\r\n')
+
+        writer.close()
+        self.assertEqual(output.getvalue(), b'b\r\nabcdefghijk\r\n2\r\nlm\r\n0\r\n\r\n')
+
+
+class TestMultipartByteranges(unittest.TestCase):
+    def test_content_length_matches_body(self):
+        data = bytes(range(256)) * 4
+        ranges = [(0, 9), (100, 199)]
+        multipart = MultipartByteranges(ranges, len(data), 'application/octet-stream')
+
+        body = b''
+        for header, start, length in multipart.parts():
+            body += header + data[start:start + length]
+        body += multipart.trailer
+
+        self.assertEqual(len(body), multipart.content_length)
+        self.assertIn(format_content_range(100, 199, len(data)).encode(), body)
+        self.assertTrue(multipart.content_type.endswith(multipart.boundary))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,48 @@
+import unittest
+import json
+import os
+import sys
+
+# Adjust path to include src
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from jsonstream import iter_json, iter_json_chunks, should_stream_json, is_reencodable, STREAM_MIN_ITEMS
+
+
+class TestIterJson(unittest.TestCase):
+    def test_matches_json_dumps(self):
+        data = {
+            'path': '/ünï',
+            'items': [{'name': 'a "b"', 'size': 1, 'modified': None}, {'name': 'c', 'ok': True}],
+            'nested': {'empty': [], 'pair': (1, 2.5)},
+            'total': 2
+        }
+        self.assertEqual(''.join(iter_json(data)), json.dumps(data))
+
+    def test_generator_is_encoded_as_array(self):
+        data = {'items': ({'n': i} for i in range(3))}
+        self.assertEqual(json.loads(''.join(iter_json(data))), {'items': [{'n': 0}, {'n': 1}, {'n': 2}]})
+
+    def test_chunks(self):
+        data = {'items': [{'name': 'x' * 100} for _ in range(2000)]}
+        chunks = list(iter_json_chunks(data, chunk_size=1000))
+
+        self.assertGreater(len(chunks), 5)
+        self.assertTrue(all(chunks))
+        self.assertEqual(json.loads(b''.join(chunks)), data)
+
+
+class TestShouldStream(unittest.TestCase):
+    def test_threshold(self):
+        self.assertFalse(should_stream_json({'items': [0] * (STREAM_MIN_ITEMS - 1)}))
+        self.assertTrue(should_stream_json({'items': [0] * STREAM_MIN_ITEMS}))
+        self.assertTrue(should_stream_json({'items': iter([])}))
+        self.assertFalse(should_stream_json({'error': 'x', 'status': 404}))
+
+    def test_reencodable(self):
+        self.assertTrue(is_reencodable({'items': [0] * STREAM_MIN_ITEMS}))
+        self.assertFalse(is_reencodable({'items': iter([])}))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,131 @@
+import unittest
+from unittest.mock import patch
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+# Adjust path to include src
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+import listing_cache
+from listing_cache import ListingCache, inotify_available
+
+
+def wait_for(predicate, timeout=2.0):
+    """Poll until predicate() is true (inotify events arrive asynchronously)."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return predicate()
+
+
+class ListingCacheTestMixin:
+    use_inotify = False
+
+    def setUp(self):
+        self.tmp_dir = os.path.realpath(tempfile.mkdtemp())
+        for name in ('a.txt', 'b.txt'):
+            with open(os.path.join(self.tmp_dir, name), 'w') as f:
+                f.write(name)
+        os.makedirs(os.path.join(self.tmp_dir, 'sub'))
+        self.cache = ListingCache(use_inotify=self.use_inotify)
+
+    def tearDown(self):
+        self.cache.close()
+        shutil.rmtree(self.tmp_dir)
+
+    def names(self, path=None):
+        listing = self.cache.get(self.tmp_dir, path or self.tmp_dir)
+        return [item['name'] for item in listing['items']]
+
+    def test_repeat_listing_is_served_from_memory(self):
+        first = self.cache.get(self.tmp_dir, self.tmp_dir)
+        with patch('listing_cache.get_directory_structure') as mock_scan:
+            self.assertIs(self.cache.get(self.tmp_dir, self.tmp_dir), first)
+        mock_scan.assert_not_called()
+        self.assertEqual([item['name'] for item in first['items']], ['sub', 'a.txt', 'b.txt'])
+
+    def test_lru_is_bounded_by_entries(self):
+        cache = ListingCache(max_entries=3, use_inotify=self.use_inotify)
+        try:
+            cache.get(self.tmp_dir, self.tmp_dir)
+            cache.get(self.tmp_dir, os.path.join(self.tmp_dir, 'sub'))
+            # Root (3 items) + empty sub (counted as 1) is over budget: root was evicted
+            self.assertEqual(list(cache._listings), [os.path.join(self.tmp_dir, 'sub')])
+        finally:
+            cache.close()
+
+    def test_oversized_listing_is_not_cached(self):
+        cache = ListingCache(max_entries=2, use_inotify=self.use_inotify)
+        try:
+            self.assertEqual(len(cache.get(self.tmp_dir, self.tmp_dir)['items']), 3)
+            self.assertEqual(len(cache._listings), 0)
+        finally:
+            cache.close()
+
+
+class TestListingCacheFallback(ListingCacheTestMixin, unittest.TestCase):
+    def test_directory_mtime_change_invalidates(self):
+        self.names()
+        with open(os.path.join(self.tmp_dir, 'c.txt'), 'w'):
+            pass
+        stat_result = os.stat(self.tmp_dir)
+        # Make sure the mtime moves even on coarse-grained filesystems
+        os.utime(self.tmp_dir, ns=(stat_result.st_atime_ns, stat_result.st_mtime_ns + 10 ** 9))
+        self.assertIn('c.txt', self.names())
+
+    def test_max_age_rescans(self):
+        self.names()
+        with open(os.path.join(self.tmp_dir, 'a.txt'), 'w') as f:
+            f.write('much longer now')
+        with patch.object(listing_cache, 'FALLBACK_MAX_AGE', 0):
+            listing = self.cache.get(self.tmp_dir, self.tmp_dir)
+        sizes = {item['name']: item['size'] for item in listing['items']}
+        self.assertEqual(sizes['a.txt'], len('much longer now'))
+
+
+@unittest.skipUnless(inotify_available(), "inotify is Linux only")
+class TestListingCacheInotify(ListingCacheTestMixin, unittest.TestCase):
+    use_inotify = True
+
+    def test_watching(self):
+        self.assertTrue(self.cache.watching)
+
+    def test_created_entry_invalidates(self):
+        self.names()
+        with open(os.path.join(self.tmp_dir, 'c.txt'), 'w'):
+            pass
+        self.assertTrue(wait_for(lambda: 'c.txt' in self.names()))
+
+    def test_modified_file_invalidates(self):
+        self.names()
+        with open(os.path.join(self.tmp_dir, 'a.txt'), 'a') as f:
+            f.write('more')
+
+        def a_size():
+            listing = self.cache.get(self.tmp_dir, self.tmp_dir)
+            return {item['name']: item['size'] for item in listing['items']}['a.txt']
+        self.assertTrue(wait_for(lambda: a_size() == len('a.txtmore')))
+
+    def test_deleted_directory_is_forgotten(self):
+        sub = os.path.join(self.tmp_dir, 'sub')
+        self.names(sub)
+        os.rmdir(sub)
+        self.assertTrue(wait_for(lambda: sub not in self.cache._listings))
+
+    def test_eviction_removes_watch(self):
+        cache = ListingCache(max_entries=3, use_inotify=True)
+        try:
+            cache.get(self.tmp_dir, self.tmp_dir)
+            cache.get(self.tmp_dir, os.path.join(self.tmp_dir, 'sub'))
+            self.assertEqual(list(cache._watcher._paths.values()), [os.path.join(self.tmp_dir, 'sub')])
+        finally:
+            cache.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -206,6 +206,64 @@ def test_main_directory_with_max_sessions(mock_dir_server, mock_port, mock_ip, t
     assert 'max_sessions' in call_kwargs
     assert call_kwargs['max_sessions'] == 5
 
+@patch('src.main.get_local_ip', return_value='192.168.1.100')
+@patch('src.main.find_available_port', return_value=8000)
+@patch('src.main.DirectoryShareServer')
+def test_main_directory_with_workers(mock_dir_server, mock_port, mock_ip, tmp_path):
+    """Test main() passes the process count for --workers."""
+    test_dir = tmp_path / "test_dir"
+    test_dir.mkdir()
+
+    server_instance = MagicMock()
+    server_instance.server_thread = MagicMock()
+    server_instance.server_thread.is_alive.return_value = False
+    mock_dir_server.return_value = server_instance
+
+    with patch('sys.argv', ['quick-share', str(test_dir), '--workers', '4']):
+        main()
+
+    call_kwargs = mock_dir_server.call_args.kwargs
+    assert call_kwargs['workers'] == 4
+    assert 'pool_workers' not in call_kwargs
+
+@patch('src.main.get_local_ip', return_value='192.168.1.100')
+@patch('src.main.find_available_port', return_value=8000)
+@patch('src.main.DirectoryShareServer')
+def test_main_directory_with_zip_cache(mock_dir_server, mock_port, mock_ip, tmp_path):
+    """Test main() passes the zip entry cache size in bytes."""
+    test_dir = tmp_path / "test_dir"
+    test_dir.mkdir()
+
+    server_instance = MagicMock()
+    server_instance.server_thread = MagicMock()
+    server_instance.server_thread.is_alive.return_value = False
+    mock_dir_server.return_value = server_instance
+
+    with patch('sys.argv', ['quick-share', str(test_dir), '--zip-cache', '256M']):
+        main()
+
+    assert mock_dir_server.call_args.kwargs['zip_cache_size'] == 256 * 1024 * 1024
+
+@patch('src.main.get_local_ip', return_value='192.168.1.100')
+@patch('src.main.find_available_port', return_value=8000)
+@patch('src.main.DirectoryShareServer')
+def test_main_directory_with_pool_engine(mock_dir_server, mock_port, mock_ip, tmp_path):
+    """Test main() passes worker pool sizing for --engine pool."""
+    test_dir = tmp_path / "test_dir"
+    test_dir.mkdir()
+
+    server_instance = MagicMock()
+    server_instance.server_thread = MagicMock()
+    server_instance.server_thread.is_alive.return_value = False
+    mock_dir_server.return_value = server_instance
+
+    with patch('sys.argv', ['quick-share', str(test_dir), '--engine', 'pool', '--threads', '4', '--queue', '16']):
+        main()
+
+    call_kwargs = mock_dir_server.call_args.kwargs
+    assert call_kwargs['pool_workers'] == 4
+    assert call_kwargs['pool_queue'] == 16
+
 @patch('src.main.get_local_ip', return_value='192.168.1.100')
 @patch('src.main.find_available_port', return_value=8000)
 @patch('src.main.FileShareServer')
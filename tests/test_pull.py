@@ -0,0 +1,151 @@
+"""Tests for the pull client."""
+
+import io
+import os
+import zipfile
+from unittest.mock import patch
+
+import pytest
+
+from src.async_server import AsyncDirectoryShareServer
+from src.server import FileShareServer
+from src.cli import is_pull_command, parse_pull_arguments
+from src.pull import (
+    STATE_FILENAME, PullError, _read_exactly, extract_delta, load_state, pull, run_pull, scan_local,
+    split_share_url
+)
+
+
+def write(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w') as f:
+        f.write(data)
+
+
+def read(path):
+    with open(path) as f:
+        return f.read()
+
+
+@pytest.fixture
+def share(tmp_path):
+    """A running directory share with a couple of files."""
+    shared = tmp_path / 'shared'
+    write(str(shared / 'a.txt'), 'alpha')
+    write(str(shared / 'docs' / 'b.txt'), 'beta')
+    server = AsyncDirectoryShareServer(str(shared), max_sessions=10, timeout_minutes=1)
+    server.start()
+    yield str(shared), f"http://127.0.0.1:{server.port}"
+    server.stop()
+
+
+class TestPullCommand:
+    """Test command line parsing."""
+
+    def test_is_pull_command(self):
+        assert is_pull_command(['pull', 'http://host/', 'dest'])
+        assert not is_pull_command(['file.txt'])
+        assert not is_pull_command([])
+
+    def test_parse_pull_arguments(self):
+        args = parse_pull_arguments(['pull', 'http://host:8000/docs/', 'out', '--delete'])
+        assert args.url == 'http://host:8000/docs/'
+        assert args.dest == 'out'
+        assert args.delete
+
+    def test_split_share_url(self):
+        assert split_share_url('http://host:8000') == ('http://host:8000', '/')
+        assert split_share_url('http://host:8000/my%20docs/?x=1') == ('http://host:8000', '/my docs/')
+        with pytest.raises(PullError):
+            split_share_url('ftp://host/')
+
+
+class TestLocalState:
+    """Test the local manifest and extraction."""
+
+    def test_scan_local_reuses_recorded_hashes(self, tmp_path):
+        write(str(tmp_path / 'a.txt'), 'alpha')
+        manifest, state = scan_local(str(tmp_path), {})
+        assert [item['path'] for item in manifest] == ['a.txt']
+
+        with patch('src.pull.file_digest') as mock_digest:
+            again, _ = scan_local(str(tmp_path), state)
+        mock_digest.assert_not_called()
+        assert again == manifest
+
+    def test_extract_rejects_unsafe_paths(self, tmp_path):
+        for name in ('../evil.txt', '/etc/evil', 'a/./b', STATE_FILENAME):
+            archive = io.BytesIO()
+            with zipfile.ZipFile(archive, 'w') as zf:
+                zf.writestr(name, 'x')
+            archive.seek(0)
+            with pytest.raises(PullError):
+                extract_delta(archive, str(tmp_path / 'dest'), {})
+        assert not (tmp_path / 'evil.txt').exists()
+
+
+class TestPull:
+    """Test pulling from a running share."""
+
+    def test_pull_transfers_only_changes(self, share, tmp_path):
+        shared, url = share
+        dest = str(tmp_path / 'copy')
+
+        with patch('builtins.print'):
+            written, removed = pull(url, dest)
+        assert sorted(written) == ['a.txt', 'docs/b.txt']
+        assert removed == []
+        assert read(os.path.join(dest, 'docs', 'b.txt')) == 'beta'
+        assert set(load_state(dest)) == {'a.txt', 'docs/b.txt'}
+
+        write(os.path.join(shared, 'a.txt'), 'ALPHA')
+        with patch('builtins.print'):
+            written, _ = pull(url, dest)
+        assert written == ['a.txt']
+        assert read(os.path.join(dest, 'a.txt')) == 'ALPHA'
+
+        with patch('builtins.print'):
+            assert pull(url, dest) == ([], [])
+
+    def test_pull_subdirectory_with_delete(self, share, tmp_path):
+        _, url = share
+        dest = str(tmp_path / 'copy')
+        write(os.path.join(dest, 'stale', 'old.txt'), 'old')
+
+        with patch('builtins.print'):
+            written, removed = pull(f"{url}/docs/", dest, delete=True)
+        assert written == ['b.txt']
+        assert removed == ['stale/old.txt']
+        assert not os.path.exists(os.path.join(dest, 'stale'))
+        assert os.path.exists(os.path.join(dest, STATE_FILENAME))
+
+    def test_pull_file_downloads_only_changed_blocks(self, tmp_path):
+        shared = tmp_path / 'disk.img'
+        payload = os.urandom(256 * 1024)
+        shared.write_bytes(payload)
+        server = FileShareServer(str(shared), timeout_minutes=1)
+        server.start()
+        try:
+            url = f"http://127.0.0.1:{server.port}/disk.img"
+            dest = str(tmp_path / 'copy')
+            with patch('builtins.print'):
+                assert pull(url, dest) == (['disk.img'], [])
+            assert (tmp_path / 'copy' / 'disk.img').read_bytes() == payload
+
+            changed = payload[:1000] + b'inserted' + payload[1000:]
+            shared.write_bytes(changed)
+            with patch('builtins.print'), patch('src.pull._read_exactly', wraps=_read_exactly) as mock_read:
+                assert pull(url, dest) == (['disk.img'], [])
+            assert (tmp_path / 'copy' / 'disk.img').read_bytes() == changed
+            # Only the block around the insertion came over the network
+            assert mock_read.call_count == 1
+
+            with patch('builtins.print'):
+                assert pull(url, dest) == ([], [])
+        finally:
+            server.stop()
+
+    def test_run_pull_reports_errors(self, share, tmp_path, capsys):
+        _, url = share
+        assert run_pull(['pull', f"{url}/missing/", str(tmp_path / 'copy')]) == 1
+        assert '403' in capsys.readouterr().out
@@ -12,6 +12,7 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../s
 
 import server
 from server import find_available_port, is_port_available, FileShareHandler, FileShareServer, DirectoryShareHandler, DirectoryShareServer
+from workers import reuse_port_supported
 
 class TestPortUtils(unittest.TestCase):
     def test_is_port_available_true(self):
@@ -62,6 +63,7 @@ class TestFileShareHandler(unittest.TestCase):
             handler.server = self.mock_server
             handler.wfile = MagicMock()
             handler.rfile = MagicMock()
+            handler.headers = {}
             handler.path = ""
 
             # Mock the helper methods from BaseHTTPRequestHandler
@@ -74,12 +76,12 @@ class TestFileShareHandler(unittest.TestCase):
 
     @patch('server.validate_request_path')
     @patch('os.path.exists')
-    @patch('os.path.getsize')
-    def test_do_GET_success(self, mock_getsize, mock_exists, mock_validate):
+    @patch('os.stat')
+    def test_do_GET_success(self, mock_stat, mock_exists, mock_validate):
         # Setup mocks
         mock_validate.return_value = (True, "/testfile.txt")
         mock_exists.return_value = True
-        mock_getsize.return_value = 100
+        mock_stat.return_value = MagicMock(st_size=100, st_ino=1, st_mtime=0, st_mtime_ns=0)
 
         handler = self.create_handler()
         handler.path = "/testfile.txt"
@@ -122,12 +124,12 @@ class TestFileShareHandler(unittest.TestCase):
 
     @patch('server.validate_request_path')
     @patch('os.path.exists')
-    @patch('os.path.getsize')
-    def test_do_GET_exception(self, mock_getsize, mock_exists, mock_validate):
+    @patch('os.stat')
+    def test_do_GET_exception(self, mock_stat, mock_exists, mock_validate):
         # Setup mocks to proceed to file reading
         mock_validate.return_value = (True, "/testfile.txt")
         mock_exists.return_value = True
-        mock_getsize.return_value = 100
+        mock_stat.return_value = MagicMock(st_size=100, st_ino=1, st_mtime=0, st_mtime_ns=0)
 
         handler = self.create_handler()
         handler.path = "/testfile.txt"
@@ -144,6 +146,653 @@ class TestFileShareHandler(unittest.TestCase):
         # Should not raise error
         handler.log_message("format %s", "args")
 
+class TestFileShareHandlerRanges(unittest.TestCase):
+    """Tests for Range / If-Range handling on file downloads."""
+
+    def setUp(self):
+        import tempfile
+        self.tmp_dir = tempfile.mkdtemp()
+        self.file_path = os.path.join(self.tmp_dir, "data.bin")
+        self.payload = bytes(range(256)) * 40  # 10240 bytes
+        with open(self.file_path, 'wb') as f:
+            f.write(self.payload)
+        self.segments = None
+
+    def tearDown(self):
+        import shutil
+        if self.segments:
+            self.segments.close_all()
+        shutil.rmtree(self.tmp_dir)
+
+    def request(self, headers, client_address=('127.0.0.1', 12345)):
+        import io
+        mock_server = MagicMock()
+        mock_server.file_path = self.file_path
+        mock_server.allowed_filename = "data.bin"
+        mock_server.segments = self.segments
+
+        with patch.object(BaseHTTPRequestHandler, '__init__', return_value=None):
+            handler = FileShareHandler(MagicMock(), ('127.0.0.1', 12345), mock_server)
+        handler.server = mock_server
+        handler.client_address = client_address
+        handler.path = "/data.bin"
+        handler.headers = headers
+        handler.wfile = io.BytesIO()
+        handler.send_response = MagicMock()
+        handler.send_header = MagicMock()
+        handler.end_headers = MagicMock()
+        handler.send_error = MagicMock()
+
+        handler.do_GET()
+        sent_headers = {c.args[0]: c.args[1] for c in handler.send_header.call_args_list}
+        return handler, sent_headers, handler.wfile.getvalue()
+
+    def test_full_response_advertises_ranges(self):
+        handler, headers, body = self.request({})
+
+        handler.send_response.assert_called_with(200)
+        self.assertEqual(headers['Accept-Ranges'], 'bytes')
+        self.assertIn('ETag', headers)
+        self.assertIn('Last-Modified', headers)
+        self.assertEqual(body, self.payload)
+
+    def test_single_range(self):
+        handler, headers, body = self.request({'Range': 'bytes=100-199'})
+
+        handler.send_response.assert_called_with(206)
+        self.assertEqual(headers['Content-Range'], 'bytes 100-199/10240')
+        self.assertEqual(headers['Content-Length'], '100')
+        self.assertEqual(body, self.payload[100:200])
+
+    def test_resume_from_offset(self):
+        handler, headers, body = self.request({'Range': 'bytes=9000-'})
+
+        handler.send_response.assert_called_with(206)
+        self.assertEqual(body, self.payload[9000:])
+
+    def test_multi_range(self):
+        handler, headers, body = self.request({'Range': 'bytes=0-9,500-509'})
+
+        handler.send_response.assert_called_with(206)
+        self.assertTrue(headers['Content-Type'].startswith('multipart/byteranges; boundary='))
+        self.assertEqual(headers['Content-Length'], str(len(body)))
+        self.assertIn(b'Content-Range: bytes 0-9/10240', body)
+        self.assertIn(b'Content-Range: bytes 500-509/10240', body)
+        self.assertIn(self.payload[500:510], body)
+
+    def test_unsatisfiable_range(self):
+        handler, headers, body = self.request({'Range': 'bytes=20000-'})
+
+        handler.send_response.assert_called_with(416)
+        self.assertEqual(headers['Content-Range'], 'bytes */10240')
+        self.assertEqual(body, b'')
+
+    def test_stale_if_range_sends_full_file(self):
+        handler, headers, body = self.request({'Range': 'bytes=100-199', 'If-Range': '"stale"'})
+
+        handler.send_response.assert_called_with(200)
+        self.assertEqual(body, self.payload)
+
+    def test_matching_if_range_honours_range(self):
+        _, first_headers, _ = self.request({})
+        handler, headers, body = self.request({'Range': 'bytes=100-199', 'If-Range': first_headers['ETag']})
+
+        handler.send_response.assert_called_with(206)
+        self.assertEqual(body, self.payload[100:200])
+
+class TestSegmentedDownloads(TestFileShareHandlerRanges):
+    """Tests for grouping concurrent range requests into one download."""
+
+    def setUp(self):
+        super().setUp()
+        self.segments = server.SegmentedDownloadRegistry(linger_seconds=60)
+
+    def test_segments_share_one_download(self):
+        agent = {'User-Agent': 'aria2/1.36'}
+        with patch('builtins.print') as mock_print:
+            self.request(dict(agent, Range='bytes=0-5119'))
+            self.request(dict(agent, Range='bytes=5120-10239'))
+
+        logs = [c.args[0] for c in mock_print.call_args_list]
+        self.assertEqual(sum('Completed' in line for line in logs), 1)
+        self.assertEqual(sum('(10.0 KB)' in line for line in logs), 1)  # One start line for the whole file
+        self.assertEqual(self.segments._downloads, {})
+
+    def test_segments_share_file_descriptor(self):
+        agent = {'User-Agent': 'aria2/1.36'}
+        download = self.segments.acquire(('127.0.0.1', 'aria2/1.36'), self.file_path, 'data.bin', '127.0.0.1')
+        try:
+            with patch('builtins.open') as mock_open_call, patch('builtins.print'):
+                handler, headers, body = self.request(dict(agent, Range='bytes=100-199'))
+
+            mock_open_call.assert_not_called()
+            self.assertEqual(body, self.payload[100:200])
+            self.assertEqual(download.tracker.bytes_transferred, 100)
+        finally:
+            self.segments.release(download)
+
+    def test_different_clients_are_separate(self):
+        with patch('builtins.print'):
+            first = self.segments.acquire(('10.0.0.1', 'curl'), self.file_path, 'data.bin', '10.0.0.1')
+            second = self.segments.acquire(('10.0.0.2', 'curl'), self.file_path, 'data.bin', '10.0.0.2')
+            self.assertIsNot(first, second)
+            self.segments.release(first)
+            self.segments.release(second)
+
+    def test_incomplete_download_lingers(self):
+        with patch('builtins.print'):
+            self.request({'User-Agent': 'aria2', 'Range': 'bytes=0-99'})
+
+        self.assertEqual(len(self.segments._downloads), 1)
+        download = next(iter(self.segments._downloads.values()))
+        self.assertIsNotNone(download.linger_timer)
+
+        with patch('builtins.print') as mock_print:
+            self.segments._expire(download)
+        self.assertTrue(download.file.closed)
+        self.assertIn('Interrupted', mock_print.call_args.args[0])
+
+    def test_full_request_bypasses_registry(self):
+        with patch('builtins.print'):
+            handler, headers, body = self.request({'User-Agent': 'aria2'})
+
+        handler.send_response.assert_called_with(200)
+        self.assertEqual(self.segments._downloads, {})
+
+
+class TestBlockDeltaEndpoints(unittest.TestCase):
+    """Tests for /api/signature and POST /api/blocks on file shares."""
+
+    def setUp(self):
+        import tempfile
+        self.tmp_dir = tempfile.mkdtemp()
+        self.file_path = os.path.join(self.tmp_dir, "disk.img")
+        self.payload = os.urandom(3 * 4096 + 100)
+        with open(self.file_path, 'wb') as f:
+            f.write(self.payload)
+
+    def tearDown(self):
+        import shutil
+        shutil.rmtree(self.tmp_dir)
+
+    def _handler(self, path, body=None, method='GET'):
+        import io
+        from email.message import Message
+
+        mock_server = MagicMock(spec=['file_path', 'allowed_filename', 'segments', 'signatures'])
+        mock_server.file_path = self.file_path
+        mock_server.allowed_filename = "disk.img"
+        mock_server.segments = None
+        mock_server.signatures = None
+
+        with patch.object(BaseHTTPRequestHandler, '__init__', return_value=None):
+            handler = FileShareHandler(MagicMock(), ('127.0.0.1', 12345), mock_server)
+        handler.server = mock_server
+        handler.client_address = ('127.0.0.1', 12345)
+        handler.path = path
+        headers = Message()
+        if body is not None:
+            headers['Content-Length'] = str(len(body))
+        handler.headers = headers
+        handler.rfile = io.BytesIO(body or b'')
+        handler.wfile = io.BytesIO()
+        handler.send_response = MagicMock()
+        handler.send_header = MagicMock()
+        handler.end_headers = MagicMock()
+        handler.send_error = MagicMock()
+        handler.command = 'POST' if body is not None else method
+        with patch('builtins.print'):
+            getattr(handler, 'do_' + handler.command)()
+        return handler
+
+    def test_signature(self):
+        import json
+
+        handler = self._handler('/api/signature')
+
+        handler.send_response.assert_called_with(200)
+        signature = json.loads(handler.wfile.getvalue())
+        self.assertEqual(signature['filename'], 'disk.img')
+        self.assertEqual(signature['size'], len(self.payload))
+        self.assertEqual(len(signature['weak']), 4)
+
+    def test_signature_head_skips_hashing(self):
+        with patch('blockdelta.compute_signature') as compute:
+            handler = self._handler('/api/signature', method='HEAD')
+
+        compute.assert_not_called()
+        handler.send_response.assert_called_with(200)
+        handler.send_header.assert_any_call('Content-Type', 'application/json')
+        self.assertEqual(handler.wfile.getvalue(), b'')
+
+        os.remove(self.file_path)
+        handler = self._handler('/api/signature', method='HEAD')
+        handler.send_response.assert_called_with(404)
+
+    def test_blocks_are_sent_back_to_back(self):
+        import json
+
+        _, signature = server.build_signature_response(self.file_path, 'disk.img')
+        body = json.dumps({'etag': signature['etag'], 'block_size': 4096, 'runs': [[0, 1], [3, 1]]}).encode()
+        handler = self._handler('/api/blocks', body)
+
+        handler.send_response.assert_called_with(200)
+        self.assertEqual(handler.wfile.getvalue(), self.payload[:4096] + self.payload[3 * 4096:])
+
+    def test_blocks_request_errors(self):
+        import json
+
+        _, signature = server.build_signature_response(self.file_path, 'disk.img')
+        cases = [
+            (b'nope', 400),
+            (json.dumps({'etag': signature['etag'], 'block_size': 1, 'runs': []}).encode(), 400),
+            (json.dumps({'etag': signature['etag'], 'block_size': 4096, 'runs': [[9, 1]]}).encode(), 400),
+            (json.dumps({'etag': '"stale"', 'block_size': 4096, 'runs': [[0, 1]]}).encode(), 412),
+        ]
+        for body, status in cases:
+            with self.assertRaises(server.RequestBodyError) as ctx:
+                server.parse_blocks_request(self.file_path, 'disk.img', body)
+            self.assertEqual(ctx.exception.status, status, body)
+
+        handler = self._handler('/api/blocks', cases[-1][0])
+        handler.send_response.assert_called_with(412)
+        self.assertTrue(handler.close_connection)
+
+    def test_post_unknown_endpoint(self):
+        handler = self._handler('/disk.img', b'{}')
+        handler.send_response.assert_called_with(404)
+
+
+class TestPooledHTTPServer(unittest.TestCase):
+    """Tests for the bounded worker pool server."""
+
+    def setUp(self):
+        self.started = threading.Event()
+        self.release = threading.Event()
+        started, release = self.started, self.release
+
+        class BlockingHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                started.set()
+                release.wait(5)
+                self.send_response(200)
+                self.send_header('Content-Length', '2')
+                self.end_headers()
+                self.wfile.write(b'ok')
+
+            def log_message(self, format, *args):
+                pass
+
+        self.httpd = server.PooledHTTPServer(('127.0.0.1', 0), BlockingHandler, workers=1, queue_size=1)
+        self.port = self.httpd.server_address[1]
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+
+    def tearDown(self):
+        self.release.set()
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def open_request(self):
+        sock = socket.create_connection(('127.0.0.1', self.port), timeout=5)
+        sock.sendall(b'GET / HTTP/1.0\r\n\r\n')
+        return sock
+
+    def read_all(self, sock):
+        data = b''
+        while True:
+            chunk = sock.recv(4096)
+            if not chunk:
+                return data
+            data += chunk
+
+    def test_saturated_pool_returns_503(self):
+        busy = self.open_request()
+        self.assertTrue(self.started.wait(5))
+
+        queued = self.open_request()
+        deadline = time.time() + 5
+        while self.httpd.pending.qsize() < 1 and time.time() < deadline:
+            time.sleep(0.01)
+
+        rejected = self.open_request()
+        response = self.read_all(rejected)
+        self.assertTrue(response.startswith(b'HTTP/1.1 503'))
+        self.assertIn(b'Retry-After: 5', response)
+
+        self.release.set()
+        self.assertIn(b' 200 ', self.read_all(busy))
+        self.assertIn(b' 200 ', self.read_all(queued))
+        for sock in (busy, queued, rejected):
+            sock.close()
+
+    def test_workers_are_bounded(self):
+        self.assertEqual(len(self.httpd.workers), 1)
+        self.assertEqual(self.httpd.pending.maxsize, 1)
+
+    def test_create_http_server_selects_pool(self):
+        with patch('server.PooledHTTPServer') as mock_pool, patch('server.ThreadingHTTPServer') as mock_threading:
+            server.create_http_server(8000, FileShareHandler, pool_workers=4, pool_queue=8)
+            mock_pool.assert_called_once_with(('', 8000), FileShareHandler, workers=4, queue_size=8,
+                                              bind_and_activate=False)
+            mock_threading.assert_not_called()
+            mock_pool.return_value.server_bind.assert_called_once()
+            mock_pool.return_value.server_activate.assert_called_once()
+
+    @unittest.skipUnless(hasattr(socket, 'SO_REUSEPORT'), "SO_REUSEPORT not available")
+    def test_create_http_server_reuse_port(self):
+        first = server.create_http_server(0, FileShareHandler, reuse_port=True)
+        port = first.server_address[1]
+        try:
+            # A second listener on the same port only works with SO_REUSEPORT on both
+            second = server.create_http_server(port, FileShareHandler, reuse_port=True)
+            second.server_close()
+        finally:
+            first.server_close()
+
+
+class TestPersistentConnections(unittest.TestCase):
+    """Tests for HTTP/1.1 keep-alive on the threaded handlers."""
+
+    def setUp(self):
+        import tempfile
+        self.tmp_dir = tempfile.mkdtemp()
+        self.shared = os.path.join(self.tmp_dir, "shared")
+        os.makedirs(os.path.join(self.shared, "sub"))
+        with open(os.path.join(self.shared, "a.txt"), 'w') as f:
+            f.write("hello")
+        with open(os.path.join(self.shared, "sub", "b.bin"), 'wb') as f:
+            f.write(os.urandom(100000))
+
+        self.print_patcher = patch('builtins.print')
+        self.print_patcher.start()
+        self.server = DirectoryShareServer(self.shared, timeout_minutes=1)
+        self.server.start()
+
+    def tearDown(self):
+        import shutil
+        self.server.stop()
+        self.print_patcher.stop()
+        shutil.rmtree(self.tmp_dir)
+
+    def connect(self):
+        import http.client
+        return http.client.HTTPConnection('127.0.0.1', self.server.port, timeout=5)
+
+    def test_requests_share_a_connection(self):
+        import io
+        import zipfile
+
+        connection = self.connect()
+        first_socket = None
+        for path in ('/', '/api/tree?path=/', '/a.txt', '/?download=zip', '/download/shared.tar', '/sub/b.bin'):
+            connection.request('GET', path)
+            response = connection.getresponse()
+            body = response.read()
+            self.assertEqual(response.status, 200, path)
+            first_socket = first_socket or connection.sock
+            self.assertIs(connection.sock, first_socket, path)
+            if path == '/?download=zip':
+                self.assertEqual(response.getheader('Transfer-Encoding'), 'chunked')
+                self.assertEqual(sorted(zipfile.ZipFile(io.BytesIO(body)).namelist()), ['a.txt', 'sub/b.bin'])
+        connection.close()
+
+    def test_max_requests_closes_connection(self):
+        with patch.object(DirectoryShareHandler, 'keepalive_max_requests', 2):
+            connection = self.connect()
+            connection.request('GET', '/a.txt')
+            response = connection.getresponse()
+            response.read()
+            self.assertIsNone(response.getheader('Connection'))
+
+            connection.request('GET', '/a.txt')
+            response = connection.getresponse()
+            response.read()
+            self.assertEqual(response.getheader('Connection'), 'close')
+            self.assertIsNone(connection.sock)
+            connection.close()
+
+    def test_idle_connection_is_closed(self):
+        with patch.object(DirectoryShareHandler, 'keepalive_timeout', 0.2):
+            sock = socket.create_connection(('127.0.0.1', self.server.port), timeout=5)
+            sock.sendall(b'GET /a.txt HTTP/1.1\r\nHost: x\r\n\r\n')
+            data = b''
+            while True:
+                chunk = sock.recv(4096)
+                if not chunk:
+                    break
+                data += chunk
+            sock.close()
+        self.assertTrue(data.startswith(b'HTTP/1.1 200'))
+        self.assertTrue(data.endswith(b'hello'))
+
+    def test_conditional_requests(self):
+        connection = self.connect()
+        for path in ('/sub/b.bin', '/api/content?path=/a.txt', '/api/tree?path=/'):
+            connection.request('GET', path)
+            response = connection.getresponse()
+            response.read()
+            etag = response.getheader('ETag')
+            self.assertIsNotNone(etag, path)
+
+            connection.request('GET', path, headers={'If-None-Match': etag})
+            response = connection.getresponse()
+            self.assertEqual(response.status, 304, path)
+            self.assertEqual(response.read(), b'')
+            self.assertEqual(response.getheader('ETag'), etag)
+
+        connection.request('GET', '/sub/b.bin')
+        response = connection.getresponse()
+        response.read()
+        last_modified = response.getheader('Last-Modified')
+        connection.request('GET', '/sub/b.bin', headers={'If-Modified-Since': last_modified, 'Range': 'bytes=0-9'})
+        response = connection.getresponse()
+        self.assertEqual(response.status, 304)
+        response.read()
+
+        connection.request('GET', '/sub/b.bin', headers={'If-None-Match': '"stale"'})
+        response = connection.getresponse()
+        self.assertEqual(response.status, 200)
+        self.assertEqual(len(response.read()), 100000)
+        connection.close()
+
+    def test_conditional_request_does_not_open_file(self):
+        connection = self.connect()
+        connection.request('GET', '/a.txt')
+        response = connection.getresponse()
+        response.read()
+        etag = response.getheader('ETag')
+
+        with patch('builtins.open', side_effect=AssertionError("file opened")):
+            connection.request('GET', '/a.txt', headers={'If-None-Match': etag})
+            response = connection.getresponse()
+            response.read()
+        self.assertEqual(response.status, 304)
+        connection.close()
+
+    def test_head_requests(self):
+        def comparable(response):
+            return {name: value for name, value in response.getheaders() if name not in ('Date', 'Set-Cookie')}
+
+        connection = self.connect()
+        for path in ('/', '/a.txt', '/?download=zip&compression=store', '/?download=zip',
+                     '/download/shared.tar', '/missing.txt'):
+            connection.request('GET', path)
+            response = connection.getresponse()
+            response.read()
+            expected = comparable(response)
+
+            with patch('server.stream_directory_as_zip') as stream_zip, \
+                    patch('server.stream_directory_as_tar') as stream_tar:
+                connection.request('HEAD', path)
+                response = connection.getresponse()
+                self.assertEqual(response.read(), b'')
+            stream_zip.assert_not_called()
+            stream_tar.assert_not_called()
+            self.assertEqual(comparable(response), expected, path)
+        connection.close()
+
+    def test_head_api_skips_building_bodies(self):
+        from server import api_validators
+
+        connection = self.connect()
+        cases = [
+            ('/api/manifest?path=/', 200), ('/api/tree?path=/', 200), ('/api/content?path=/a.txt', 200),
+            ('/api/content?path=/missing.txt', 403), ('/api/content?path=/sub', 400),
+            ('/api/tree?path=/../', 403), ('/api/zip', 405), ('/api/unknown', 404),
+        ]
+        with patch('server.build_manifest') as build_manifest, \
+                patch('server.build_api_response') as build_api_response:
+            for path, status in cases:
+                connection.request('HEAD', path)
+                response = connection.getresponse()
+                self.assertEqual(response.read(), b'')
+                self.assertEqual(response.status, status, path)
+                self.assertEqual(response.getheader('Content-Type'), 'application/json')
+                self.assertIsNone(response.getheader('Content-Length'), path)
+        build_manifest.assert_not_called()
+        build_api_response.assert_not_called()
+
+        # /api/content keeps its stat-based validators, and still answers 304
+        validators = dict(api_validators(os.stat(os.path.join(self.shared, 'a.txt'))))
+        connection.request('HEAD', '/api/content?path=/a.txt')
+        response = connection.getresponse()
+        response.read()
+        self.assertEqual(response.getheader('ETag'), validators['ETag'])
+        self.assertEqual(response.getheader('Last-Modified'), validators['Last-Modified'])
+        connection.request('HEAD', '/api/content?path=/a.txt', headers={'If-None-Match': validators['ETag']})
+        response = connection.getresponse()
+        response.read()
+        self.assertEqual(response.status, 304)
+        connection.close()
+
+    def test_head_api_reports_status_only(self):
+        connection = self.connect()
+        for path in ('/api/tree?path=/', '/api/manifest?path=/', '/api/content?path=/a.txt',
+                     '/api/content?path=/sub', '/api/unknown'):
+            connection.request('GET', path)
+            get_response = connection.getresponse()
+            get_response.read()
+            connection.request('HEAD', path)
+            response = connection.getresponse()
+            self.assertEqual(response.read(), b'')
+
+            self.assertEqual(response.status, get_response.status, path)
+            self.assertEqual(response.getheader('Content-Type'), get_response.getheader('Content-Type'), path)
+            self.assertIsNone(response.getheader('Content-Length'), path)
+            if path.startswith('/api/content') and response.status == 200:
+                # Stat-based validators are kept
+                self.assertEqual(response.getheader('ETag'), get_response.getheader('ETag'))
+                self.assertEqual(response.getheader('Last-Modified'), get_response.getheader('Last-Modified'))
+            else:
+                # Body-hash ETags are not computed
+                self.assertIsNone(response.getheader('ETag'), path)
+        connection.close()
+
+    def test_head_api_content_status_matches_get(self):
+        from textpreview import MAX_PREVIEW_SIZE
+
+        with open(os.path.join(self.shared, 'big.txt'), 'w') as f:
+            f.write('x' * (MAX_PREVIEW_SIZE + 1))
+        with open(os.path.join(self.shared, 'nul.txt'), 'wb') as f:
+            f.write(b'text\x00' * 100)
+        paths = ['/api/content?path=/big.txt', '/api/content?path=/big.txt&tail=100',
+                 '/api/content?path=/nul.txt', '/api/content?path=/nul.txt&line=0',
+                 '/api/content?path=/a.txt&offset=x']
+        if hasattr(os, 'mkfifo'):
+            os.mkfifo(os.path.join(self.shared, 'pipe'))
+            paths.append('/api/content?path=/pipe')
+
+        connection = self.connect()
+        for path in paths:
+            # HEAD first: nothing is cached yet
+            connection.request('HEAD', path)
+            response = connection.getresponse()
+            response.read()
+            connection.request('GET', path)
+            get_response = connection.getresponse()
+            get_response.read()
+            self.assertEqual(response.status, get_response.status, path)
+        connection.close()
+
+    def test_head_does_not_open_file(self):
+        connection = self.connect()
+        with patch('builtins.open', side_effect=AssertionError("file opened")):
+            connection.request('HEAD', '/sub/b.bin', headers={'Range': 'bytes=0-9'})
+            response = connection.getresponse()
+            response.read()
+        self.assertEqual(response.status, 206)
+        self.assertEqual(response.getheader('Content-Length'), '10')
+        connection.close()
+
+    def test_http10_closes_after_response(self):
+        sock = socket.create_connection(('127.0.0.1', self.server.port), timeout=5)
+        sock.sendall(b'GET /?download=zip HTTP/1.0\r\n\r\n')
+        data = b''
+        while True:
+            chunk = sock.recv(65536)
+            if not chunk:
+                break
+            data += chunk
+        sock.close()
+        head, _, body = data.partition(b'\r\n\r\n')
+        self.assertNotIn(b'Transfer-Encoding', head)
+        self.assertTrue(body.startswith(b'PK'))
+
+
+@unittest.skipUnless(reuse_port_supported(), "SO_REUSEPORT/fork not available")
+class TestMultiProcessServing(unittest.TestCase):
+    """Tests for --workers: forked processes sharing one port."""
+
+    def setUp(self):
+        import tempfile
+        self.tmp_dir = tempfile.mkdtemp()
+        with open(os.path.join(self.tmp_dir, "a.txt"), 'w') as f:
+            f.write("hello")
+
+    def tearDown(self):
+        import shutil
+        shutil.rmtree(self.tmp_dir)
+
+    def fetch_status(self, port):
+        import urllib.error
+        import urllib.request
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/a.txt", timeout=10) as response:
+                response.read()
+                return response.status
+        except urllib.error.HTTPError as e:
+            return e.code
+
+    def test_session_limit_shared_across_workers(self):
+        server_obj = DirectoryShareServer(self.tmp_dir, max_sessions=2, workers=3)
+        with patch('builtins.print'):
+            server_obj.start()
+            try:
+                self.assertEqual(len(server_obj.worker_processes.processes), 2)
+                # Cookie-less requests each start a session, whichever process accepts them
+                statuses = [self.fetch_status(server_obj.port) for _ in range(12)]
+            finally:
+                server_obj.stop()
+
+        self.assertEqual(statuses.count(200), 2)
+        self.assertEqual(statuses.count(403), 10)
+        self.assertIsNone(server_obj.worker_processes)
+        self.assertIsNone(server_obj.coordinator)
+
+    def test_stop_terminates_workers(self):
+        server_obj = FileShareServer(os.path.join(self.tmp_dir, "a.txt"), workers=2)
+        with patch('builtins.print'):
+            server_obj.start()
+            processes = list(server_obj.worker_processes.processes)
+            try:
+                self.assertEqual(self.fetch_status(server_obj.port), 200)
+            finally:
+                server_obj.stop()
+
+        self.assertFalse(any(process.is_alive() for process in processes))
+
+
 class TestFileShareServer(unittest.TestCase):
     @patch('server.find_available_port')
     @patch('server.ThreadingHTTPServer')
@@ -264,9 +913,11 @@ class TestDirectoryShareHandler(unittest.TestCase):
             test_dir = os.path.join(tmp_path, "shared")
             os.makedirs(test_dir)
 
-            mock_server = MagicMock(spec=['directory_path', 'legacy_mode'])
+            # No prepared page: the SPA is rendered per request
+            mock_server = MagicMock(spec=['directory_path', 'legacy_mode', 'spa_page'])
             mock_server.directory_path = test_dir
             mock_server.legacy_mode = False
+            mock_server.spa_page = None
 
             handler = self.create_directory_handler(mock_server)
             handler.path = "/"
@@ -289,6 +940,43 @@ class TestDirectoryShareHandler(unittest.TestCase):
         finally:
             shutil.rmtree(tmp_path)
 
+    def test_directory_handler_prepared_spa(self):
+        """SPA page is served from the server's prepared payload, gzipped, with 304 revalidation"""
+        import gzip
+        from content_encoding import StaticPayload
+
+        with patch('content_encoding.brotli', None):
+            spa_page = StaticPayload(b'<html>' + b'SPA-VIEW ' * 500 + b'</html>', 'text/html; charset=utf-8')
+        mock_server = MagicMock(spec=['directory_path', 'legacy_mode', 'spa_page'])
+        mock_server.directory_path = "/tmp/shared"
+        mock_server.legacy_mode = False
+        mock_server.spa_page = spa_page
+
+        handler = self.create_directory_handler(mock_server)
+        handler.headers = {'Accept-Encoding': 'gzip, deflate'}
+        with patch('server.validate_directory_path', return_value=(True, "/tmp/shared")), \
+             patch('os.path.isfile', return_value=False), \
+             patch('server.generate_spa_html') as mock_spa:
+            handler.path = "/"
+            handler.do_GET()
+        mock_spa.assert_not_called()
+
+        handler.send_response.assert_called_with(200)
+        sent_headers = dict(call.args for call in handler.send_header.call_args_list)
+        self.assertEqual(sent_headers['Content-Encoding'], 'gzip')
+        self.assertEqual(sent_headers['Cache-Control'], 'no-cache')
+        written_data = b''.join(call.args[0] for call in handler.wfile.write.call_args_list)
+        self.assertIn(b'SPA-VIEW', gzip.decompress(written_data))
+
+        handler = self.create_directory_handler(mock_server)
+        handler.headers = {'Accept-Encoding': 'gzip', 'If-None-Match': sent_headers['ETag']}
+        with patch('server.validate_directory_path', return_value=(True, "/tmp/shared")), \
+             patch('os.path.isfile', return_value=False):
+            handler.path = "/sub/"
+            handler.do_GET()
+        handler.send_response.assert_called_with(304)
+        handler.wfile.write.assert_not_called()
+
     def test_directory_handler_file_response(self, tmp_path=None):
         """T-009: Test DirectoryShareHandler downloads single file"""
         import tempfile
@@ -387,6 +1075,225 @@ class TestDirectoryShareHandler(unittest.TestCase):
         finally:
             shutil.rmtree(tmp_path)
 
+    def test_directory_handler_zip_compression_query(self):
+        """Test the ?compression= override on RESTful zip URLs"""
+        import io
+
+        mock_server = MagicMock(spec=['directory_path', 'zip_compression'])
+        mock_server.directory_path = "/tmp/shared"
+        mock_server.zip_compression = 'auto'
+
+        handler = self.create_directory_handler(mock_server)
+        handler.path = "/download/shared.zip?compression=deflate"
+        handler.wfile = io.BytesIO()
+
+        with patch('server.validate_directory_path', return_value=(True, "/tmp/shared")) as mock_validate:
+            with patch('server.stream_directory_as_zip') as mock_zip:
+                handler.do_GET()
+
+        mock_validate.assert_called_once_with('/', "/tmp/shared")
+        self.assertEqual(mock_zip.call_args.kwargs['compression'], 'deflate')
+
+    def _stored_zip_request(self, test_dir, headers):
+        import io
+
+        mock_server = MagicMock(spec=['directory_path', 'zip_compression'])
+        mock_server.directory_path = test_dir
+        mock_server.zip_compression = 'store'
+
+        handler = self.create_directory_handler(mock_server)
+        handler.client_address = ('127.0.0.1', 12345)
+        handler.headers = headers
+        handler.path = "/download/shared.zip"
+        handler.wfile = io.BytesIO()
+        with patch('builtins.print'):
+            handler.do_GET()
+        return handler
+
+    def test_directory_handler_stored_zip_ranges(self):
+        """Test store-only zips are sized and resumable"""
+        import io
+        import tempfile
+        import shutil
+        import zipfile
+
+        tmp_path = tempfile.mkdtemp()
+        try:
+            test_dir = os.path.join(tmp_path, "shared")
+            os.makedirs(os.path.join(test_dir, "sub"))
+            with open(os.path.join(test_dir, "a.txt"), 'w') as f:
+                f.write("content1" * 100)
+            with open(os.path.join(test_dir, "sub", "b.bin"), 'wb') as f:
+                f.write(os.urandom(5000))
+
+            full = self._stored_zip_request(test_dir, {})
+            body = full.wfile.getvalue()
+            full.send_response.assert_called_with(200)
+            full.send_header.assert_any_call('Content-Length', str(len(body)))
+            full.send_header.assert_any_call('Accept-Ranges', 'bytes')
+            with zipfile.ZipFile(io.BytesIO(body)) as zf:
+                self.assertIsNone(zf.testzip())
+                self.assertEqual(sorted(zf.namelist()), ['a.txt', 'sub/b.bin'])
+
+            etag = next(call.args[1] for call in full.send_header.call_args_list if call.args[0] == 'ETag')
+            resumed = self._stored_zip_request(test_dir, {'Range': 'bytes=1000-', 'If-Range': etag})
+            resumed.send_response.assert_called_with(206)
+            self.assertEqual(resumed.wfile.getvalue(), body[1000:])
+
+            with open(os.path.join(test_dir, "a.txt"), 'a') as f:
+                f.write("changed")
+            stale = self._stored_zip_request(test_dir, {'Range': 'bytes=1000-', 'If-Range': etag})
+            stale.send_response.assert_called_with(200)
+        finally:
+            shutil.rmtree(tmp_path)
+
+    def test_directory_handler_stored_zip_date_if_range(self):
+        """Test a date If-Range never resumes a store-only zip whose entries changed"""
+        import tempfile
+        import shutil
+
+        tmp_path = tempfile.mkdtemp()
+        try:
+            test_dir = os.path.join(tmp_path, "shared")
+            os.makedirs(test_dir)
+            for name in ("a.txt", "b.txt"):
+                with open(os.path.join(test_dir, name), 'w') as f:
+                    f.write(name * 500)
+            os.utime(os.path.join(test_dir, "a.txt"), (1000000000, 1000000000))
+
+            full = self._stored_zip_request(test_dir, {})
+            last_modified = next(
+                call.args[1] for call in full.send_header.call_args_list if call.args[0] == 'Last-Modified'
+            )
+
+            # Deleting the older file leaves the newest mtime (and Last-Modified) unchanged
+            os.remove(os.path.join(test_dir, "a.txt"))
+            resumed = self._stored_zip_request(test_dir, {'Range': 'bytes=10-', 'If-Range': last_modified})
+
+            resumed.send_response.assert_called_with(200)
+            resumed.send_header.assert_any_call('Last-Modified', last_modified)
+            body = resumed.wfile.getvalue()
+            resumed.send_header.assert_any_call('Content-Length', str(len(body)))
+            self.assertNotIn(b'a.txt', body)
+        finally:
+            shutil.rmtree(tmp_path)
+
+    def test_directory_handler_tar_download(self):
+        """Test RESTful tar.gz downloads are routed to the tar streamer"""
+        import io
+
+        mock_server = MagicMock(spec=['directory_path'])
+        mock_server.directory_path = "/tmp/shared"
+
+        handler = self.create_directory_handler(mock_server)
+        handler.path = "/download/shared.tar.gz"
+        handler.wfile = io.BytesIO()
+
+        with patch('server.validate_directory_path', return_value=(True, "/tmp/shared")) as mock_validate:
+            with patch('server.stream_directory_as_tar') as mock_tar:
+                handler.do_GET()
+
+        mock_validate.assert_called_once_with('/', "/tmp/shared")
+        handler.send_header.assert_any_call('Content-Type', 'application/gzip')
+        self.assertEqual(mock_tar.call_args.args[3], 'tar.gz')
+
+    def test_directory_handler_zip_read_error(self):
+        """Test a read error mid-zip drops the connection without ending the chunked body"""
+        import io
+
+        mock_server = MagicMock(spec=['directory_path'])
+        mock_server.directory_path = "/tmp/shared"
+        handler = self.create_directory_handler(mock_server)
+        handler.client_address = ('127.0.0.1', 12345)
+        handler.protocol_version = 'HTTP/1.1'
+        handler.request_version = 'HTTP/1.1'
+        handler.close_connection = False
+        handler.path = "/download/shared.zip"
+        handler.wfile = io.BytesIO()
+
+        def fail_mid_stream(output, *args, **kwargs):
+            output.write(b'PK\x03\x04')
+            raise PermissionError(13, "Permission denied", "/tmp/shared/locked")
+
+        with patch('server.validate_directory_path', return_value=(True, "/tmp/shared")), \
+                patch('server.stream_directory_as_zip', side_effect=fail_mid_stream), \
+                patch('builtins.print') as mock_print:
+            handler.do_GET()
+
+        self.assertTrue(handler.close_connection)
+        self.assertFalse(handler.wfile.getvalue().endswith(b'0\r\n\r\n'))
+        self.assertIn('Permission denied', str(mock_print.call_args_list[-1]))
+
+    def test_directory_handler_tar_file_shrinks(self):
+        """Test a file shrinking mid-stream drops the connection without ending the chunked body"""
+        import io
+        import tempfile
+        import shutil
+        import tarstream
+
+        tmp_path = tempfile.mkdtemp()
+        try:
+            test_dir = os.path.join(tmp_path, "shared")
+            os.makedirs(test_dir)
+            big_file = os.path.join(test_dir, "big.bin")
+            with open(big_file, 'wb') as f:
+                f.write(os.urandom(10000))
+
+            mock_server = MagicMock(spec=['directory_path'])
+            mock_server.directory_path = test_dir
+            handler = self.create_directory_handler(mock_server)
+            handler.client_address = ('127.0.0.1', 12345)
+            handler.protocol_version = 'HTTP/1.1'
+            handler.request_version = 'HTTP/1.1'
+            handler.close_connection = False
+            handler.path = "/download/shared.tar"
+            handler.wfile = io.BytesIO()
+
+            make_tarinfo = tarstream._make_tarinfo
+
+            def shrink_after_stat(arcname, stat_result):
+                os.truncate(big_file, 100)
+                return make_tarinfo(arcname, stat_result)
+
+            with patch('tarstream._make_tarinfo', side_effect=shrink_after_stat):
+                with patch('builtins.print') as mock_print:
+                    handler.do_GET()
+
+            self.assertTrue(handler.close_connection)
+            self.assertFalse(handler.wfile.getvalue().endswith(b'0\r\n\r\n'))
+            self.assertIn('unexpected end of data', str(mock_print.call_args_list[-1]))
+        finally:
+            shutil.rmtree(tmp_path)
+
+    def test_directory_handler_tar_zst_without_zstandard(self):
+        """Test tar.zst is refused when zstandard isn't installed"""
+        mock_server = MagicMock(spec=['directory_path'])
+        mock_server.directory_path = "/tmp/shared"
+
+        handler = self.create_directory_handler(mock_server)
+        handler.path = "/download/shared.tar.zst"
+
+        with patch('server.validate_directory_path', return_value=(True, "/tmp/shared")):
+            with patch('server.zstd_available', return_value=False):
+                handler.do_GET()
+
+        handler.send_error.assert_called_once_with(501, unittest.mock.ANY)
+
+    def test_archive_download_format(self):
+        self.assertEqual(server.archive_download_format('/download/shared.zip'), 'zip')
+        self.assertEqual(server.archive_download_format('/download/shared.tar'), 'tar')
+        self.assertEqual(server.archive_download_format('/download/shared.tar.gz?x=1'), 'tar.gz')
+        self.assertEqual(server.archive_download_format('/download/shared.tar.zst'), 'tar.zst')
+        self.assertEqual(server.archive_download_format('/sub/?download=tar'), 'tar')
+        self.assertEqual(server.archive_download_format('/?action=zip'), 'zip')
+        self.assertIsNone(server.archive_download_format('/download/shared.rar'))
+        self.assertIsNone(server.archive_download_format('/docs/readme.tar.gz'))
+
+    def test_zip_compression_for_request(self):
+        self.assertEqual(server.zip_compression_for_request('/download/a.zip', 'deflate'), 'deflate')
+        self.assertEqual(server.zip_compression_for_request('/?download=zip&compression=store'), 'store')
+        self.assertEqual(server.zip_compression_for_request('/download/a.zip?compression=bogus'), 'auto')
+
     def test_directory_handler_invalid_path(self):
         """Test DirectoryShareHandler denies access to invalid paths"""
         mock_server = MagicMock(spec=['directory_path'])
@@ -456,6 +1363,302 @@ class TestDirectoryShareHandler(unittest.TestCase):
             shutil.rmtree(tmp_path)
 
 
+class TestZipSelection(unittest.TestCase):
+    """Tests for selective (POST /api/zip) and incremental (/api/manifest, POST /api/delta) zip downloads"""
+
+    def setUp(self):
+        import tempfile
+        self.tmp_dir = tempfile.mkdtemp()
+        self.shared = os.path.realpath(os.path.join(self.tmp_dir, "shared"))
+        os.makedirs(os.path.join(self.shared, "docs", "drafts"))
+        os.makedirs(os.path.join(self.shared, "media"))
+        for name in ("docs/a.txt", "docs/drafts/b.txt", "media/c.bin", "top.txt"):
+            with open(os.path.join(self.shared, name), 'w') as f:
+                f.write(name)
+
+    def tearDown(self):
+        import shutil
+        shutil.rmtree(self.tmp_dir)
+
+    def test_parse_json_selection(self):
+        import json
+        body = json.dumps({'paths': ['/docs', '/top.txt'], 'compression': 'store'}).encode()
+        targets, compression = server.parse_zip_selection(self.shared, 'application/json', body)
+
+        self.assertEqual(targets, [os.path.join(self.shared, 'docs'), os.path.join(self.shared, 'top.txt')])
+        self.assertEqual(compression, 'store')
+
+    def test_parse_form_selection_drops_nested_and_duplicates(self):
+        body = b'path=%2Fdocs%2Fdrafts&path=%2Fdocs&path=%2Fdocs'
+        targets, compression = server.parse_zip_selection(
+            self.shared, 'application/x-www-form-urlencoded; charset=UTF-8', body
+        )
+
+        self.assertEqual(targets, [os.path.join(self.shared, 'docs')])
+        self.assertIsNone(compression)
+
+    def test_parse_rejects_bad_selections(self):
+        cases = [
+            (b'{"paths": []}', 400),
+            (b'{"paths": "/docs"}', 400),
+            (b'not json', 400),
+            (b'{"paths": ["/docs"], "compression": "lzma"}', 400),
+            (b'{"paths": ["/../etc"]}', 403),
+            (b'{"paths": ["/missing"]}', 403),
+        ]
+        for body, status in cases:
+            with self.assertRaises(server.RequestBodyError) as ctx:
+                server.parse_zip_selection(self.shared, 'application/json', body)
+            self.assertEqual(ctx.exception.status, status, body)
+
+    def test_body_length(self):
+        self.assertEqual(server.posted_body_length({'Content-Length': '12'}), 12)
+        for headers, status in (({}, 411), ({'Content-Length': 'x'}, 400),
+                                ({'Content-Length': str(server.MAX_ZIP_SELECTION_BODY + 1)}, 413)):
+            with self.assertRaises(server.RequestBodyError) as ctx:
+                server.posted_body_length(headers)
+            self.assertEqual(ctx.exception.status, status)
+
+    def test_selection_zip_filename(self):
+        self.assertEqual(server.selection_zip_filename(self.shared, [os.path.join(self.shared, 'docs')]), 'docs.zip')
+        self.assertEqual(server.selection_zip_filename(self.shared, ['/a', '/b']), 'shared-selection.zip')
+
+    def test_get_is_rejected(self):
+        status, payload = server.build_api_response(self.shared, '/api/zip')
+        self.assertEqual(status, 405)
+
+    def _post(self, body, content_type='application/json', path='/api/zip'):
+        import io
+        from email.message import Message
+
+        mock_server = MagicMock(spec=['directory_path', 'zip_compression'])
+        mock_server.directory_path = self.shared
+        mock_server.zip_compression = 'auto'
+
+        with patch.object(BaseHTTPRequestHandler, '__init__', return_value=None):
+            handler = DirectoryShareHandler(MagicMock(), ('127.0.0.1', 12345), mock_server)
+        handler.server = mock_server
+        handler.client_address = ('127.0.0.1', 12345)
+        handler.send_response = MagicMock()
+        handler.send_header = MagicMock()
+        handler.end_headers = MagicMock()
+        headers = Message()
+        headers['Content-Type'] = content_type
+        headers['Content-Length'] = str(len(body))
+        handler.headers = headers
+        handler.path = path
+        handler.rfile = io.BytesIO(body)
+        handler.wfile = io.BytesIO()
+        with patch('builtins.print'):
+            handler.do_POST()
+        return handler
+
+    def test_post_streams_selection(self):
+        import io
+        import json
+        import zipfile
+
+        handler = self._post(json.dumps({'paths': ['/docs/drafts', '/top.txt']}).encode())
+
+        handler.send_response.assert_called_with(200)
+        handler.send_header.assert_any_call('Content-Disposition', 'attachment; filename="shared-selection.zip"')
+        with zipfile.ZipFile(io.BytesIO(handler.wfile.getvalue())) as zf:
+            self.assertEqual(sorted(zf.namelist()), ['docs/drafts/b.txt', 'top.txt'])
+            self.assertEqual(zf.read('top.txt'), b'top.txt')
+
+    def test_post_read_error_drops_connection(self):
+        import json
+
+        with patch('server.stream_files_as_zip', side_effect=OSError("unexpected end of data")):
+            handler = self._post(json.dumps({'paths': ['/top.txt']}).encode())
+
+        handler.send_response.assert_called_with(200)
+        self.assertTrue(handler.close_connection)
+
+    def test_post_error_is_json(self):
+        import json
+
+        handler = self._post(b'{"paths": ["/../etc/passwd"]}')
+
+        handler.send_response.assert_called_with(403)
+        self.assertEqual(json.loads(handler.wfile.getvalue())['status'], 403)
+        self.assertTrue(handler.close_connection)
+
+    def test_post_unknown_endpoint(self):
+        handler = self._post(b'{}', path='/api/tree')
+        handler.send_response.assert_called_with(404)
+
+    def test_tree_uses_listing_cache(self):
+        from listing_cache import ListingCache
+
+        cache = ListingCache(use_inotify=False)
+        try:
+            status, first = server.build_api_response(self.shared, '/api/tree?path=/docs', listing_cache=cache)
+            with patch('listing_cache.get_directory_structure') as mock_scan:
+                status, second = server.build_api_response(self.shared, '/api/tree?path=/docs', listing_cache=cache)
+            mock_scan.assert_not_called()
+            self.assertEqual(status, 200)
+            self.assertIs(second, first)
+            self.assertEqual(server.build_api_response(self.shared, '/api/tree?path=/../', listing_cache=cache)[0], 403)
+        finally:
+            cache.close()
+
+    def test_tree_pages(self):
+        status, payload = server.build_api_response(self.shared, '/api/tree?path=/&limit=2')
+        self.assertEqual(status, 200)
+        self.assertEqual([item['name'] for item in payload['items']], ['docs', 'media'])
+        self.assertEqual(payload['total'], 3)
+
+        status, payload = server.build_api_response(
+            self.shared, '/api/tree?path=/&limit=2&cursor=' + payload['next_cursor']
+        )
+        self.assertEqual(status, 200)
+        self.assertEqual([item['name'] for item in payload['items']], ['top.txt'])
+        self.assertIsNone(payload['next_cursor'])
+
+        # Unpaginated requests keep the original shape
+        status, payload = server.build_api_response(self.shared, '/api/tree?path=/')
+        self.assertNotIn('next_cursor', payload)
+
+    def test_tree_rejects_bad_pages(self):
+        for query in ('limit=0', 'limit=abc', f'limit={server.MAX_TREE_PAGE_SIZE + 1}', 'cursor=%25%25'):
+            status, payload = server.build_api_response(self.shared, '/api/tree?path=/&' + query)
+            self.assertEqual(status, 400, query)
+
+    def test_large_tree_is_streamed(self):
+        import io
+        import json
+        from jsonstream import STREAM_MIN_ITEMS
+
+        big = os.path.join(self.shared, 'big')
+        os.mkdir(big)
+        for index in range(STREAM_MIN_ITEMS):
+            open(os.path.join(big, f"{index:05d}.txt"), 'w').close()
+
+        for protocol_version, chunked in (('HTTP/1.0', False), ('HTTP/1.1', True)):
+            mock_server = MagicMock(spec=['directory_path'])
+            mock_server.directory_path = self.shared
+            with patch.object(BaseHTTPRequestHandler, '__init__', return_value=None):
+                handler = DirectoryShareHandler(MagicMock(), ('127.0.0.1', 12345), mock_server)
+            handler.server = mock_server
+            handler.path = '/api/tree?path=/big'
+            handler.protocol_version = protocol_version
+            handler.request_version = 'HTTP/1.1'
+            handler.wfile = io.BytesIO()
+            handler.send_response = MagicMock()
+            handler.send_header = MagicMock()
+            handler.end_headers = MagicMock()
+            handler.session_id = None
+
+            handler._handle_api_request()
+
+            handler.send_response.assert_called_with(200)
+            sent_headers = dict(call.args for call in handler.send_header.call_args_list)
+            self.assertNotIn('Content-Length', sent_headers)
+            body = handler.wfile.getvalue()
+            if chunked:
+                self.assertEqual(sent_headers['Transfer-Encoding'], 'chunked')
+                self.assertTrue(body.endswith(b'0\r\n\r\n'))
+                decoded = b''
+                while True:
+                    size_line, _, body = body.partition(b'\r\n')
+                    size = int(size_line, 16)
+                    if size == 0:
+                        break
+                    decoded += body[:size]
+                    body = body[size + 2:]
+                body = decoded
+            else:
+                self.assertNotIn('Transfer-Encoding', sent_headers)
+                self.assertTrue(handler.close_connection)
+            self.assertEqual(len(json.loads(body)['items']), STREAM_MIN_ITEMS)
+
+    def test_large_tree_revalidates(self):
+        import io
+        import json
+        from http_utils import body_etag
+        from jsonstream import STREAM_MIN_ITEMS
+
+        big = os.path.join(self.shared, 'big')
+        os.mkdir(big)
+        for index in range(STREAM_MIN_ITEMS):
+            open(os.path.join(big, f"{index:05d}.txt"), 'w').close()
+
+        def request(headers):
+            mock_server = MagicMock(spec=['directory_path'])
+            mock_server.directory_path = self.shared
+            with patch.object(BaseHTTPRequestHandler, '__init__', return_value=None):
+                handler = DirectoryShareHandler(MagicMock(), ('127.0.0.1', 12345), mock_server)
+            handler.server = mock_server
+            handler.path = '/api/tree?path=/big'
+            handler.headers = headers
+            handler.protocol_version = 'HTTP/1.0'
+            handler.wfile = io.BytesIO()
+            handler.send_response = MagicMock()
+            handler.send_header = MagicMock()
+            handler.end_headers = MagicMock()
+            handler.session_id = None
+            handler._handle_api_request()
+            return handler
+
+        handler = request({})
+        etag = dict(call.args for call in handler.send_header.call_args_list)['ETag']
+        body = handler.wfile.getvalue()
+        self.assertEqual(len(json.loads(body)['items']), STREAM_MIN_ITEMS)
+        self.assertEqual(etag, body_etag(body))
+
+        handler = request({'If-None-Match': etag})
+        handler.send_response.assert_called_with(304)
+        self.assertEqual(handler.wfile.getvalue(), b'')
+
+    def test_manifest(self):
+        status, payload = server.build_api_response(self.shared, '/api/manifest?path=/docs')
+
+        self.assertEqual(status, 200)
+        self.assertEqual(payload['algorithm'], 'sha256')
+        self.assertEqual([item['path'] for item in payload['files']], ['a.txt', 'drafts/b.txt'])
+        self.assertIn('sha256', payload['files'][0])
+
+        status, payload = server.build_api_response(self.shared, '/api/manifest?hash=0')
+        self.assertEqual(status, 200)
+        self.assertEqual(len(payload['files']), 4)
+        self.assertNotIn('sha256', payload['files'][0])
+
+        self.assertEqual(server.build_api_response(self.shared, '/api/manifest?path=/../')[0], 403)
+        self.assertEqual(server.build_api_response(self.shared, '/api/manifest?path=/top.txt')[0], 400)
+
+    def test_parse_delta_request(self):
+        import json
+        body = json.dumps({'path': '/docs', 'files': [{'path': 'a.txt', 'size': 1}]}).encode()
+        target, client_files, compression = server.parse_delta_request(self.shared, body)
+
+        self.assertEqual(target, os.path.join(self.shared, 'docs'))
+        self.assertEqual(list(client_files), ['a.txt'])
+        self.assertIsNone(compression)
+
+        for body, status in ((b'[]', 400), (b'{"files": [1]}', 400), (b'{"path": "/../"}', 403),
+                             (b'{"path": "/top.txt"}', 400)):
+            with self.assertRaises(server.RequestBodyError) as ctx:
+                server.parse_delta_request(self.shared, body)
+            self.assertEqual(ctx.exception.status, status, body)
+
+    def test_post_delta_sends_only_changed_files(self):
+        import io
+        import json
+        import zipfile
+
+        _, manifest = server.build_api_response(self.shared, '/api/manifest?path=/docs')
+        with open(os.path.join(self.shared, 'docs', 'a.txt'), 'w') as f:
+            f.write('edited')
+        handler = self._post(json.dumps({'path': '/docs', 'files': manifest['files']}).encode(), path='/api/delta')
+
+        handler.send_response.assert_called_with(200)
+        handler.send_header.assert_any_call('Content-Disposition', 'attachment; filename="docs-delta.zip"')
+        with zipfile.ZipFile(io.BytesIO(handler.wfile.getvalue())) as zf:
+            self.assertEqual(zf.namelist(), ['a.txt'])
+            self.assertEqual(zf.read('a.txt'), b'edited')
+
+
 class TestDirectoryShareServer(unittest.TestCase):
     """Tests for DirectoryShareServer (Tasks T-011, T-012, T-016, T-017)"""
 
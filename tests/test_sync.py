@@ -0,0 +1,84 @@
+import unittest
+from unittest.mock import patch
+import hashlib
+import os
+import shutil
+import sys
+import tempfile
+
+# Adjust path to include src
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from sync import HashCache, build_manifest, file_digest, iter_changed_files
+
+
+class TestSync(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def _make_file(self, name, data):
+        path = os.path.join(self.tmp_dir, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(data)
+        return (path, name, os.stat(path))
+
+    def test_file_digest(self):
+        path, _, _ = self._make_file('a.txt', b'hello')
+        self.assertEqual(file_digest(path), hashlib.sha256(b'hello').hexdigest())
+
+    def test_hash_cache_reuses_digest_until_file_changes(self):
+        path, _, stat_result = self._make_file('a.txt', b'hello')
+        cache = HashCache()
+
+        first = cache.digest(path, stat_result)
+        with patch('sync.file_digest') as mock_digest:
+            self.assertEqual(cache.digest(path, stat_result), first)
+        mock_digest.assert_not_called()
+
+        _, _, changed = self._make_file('a.txt', b'hello world')
+        self.assertEqual(cache.digest(path, changed), hashlib.sha256(b'hello world').hexdigest())
+
+    def test_build_manifest(self):
+        files = [self._make_file('a.txt', b'one'), self._make_file(os.path.join('sub', 'b.txt'), b'two')]
+
+        manifest = build_manifest(files)
+        self.assertEqual([item['path'] for item in manifest], ['a.txt', 'sub/b.txt'])
+        self.assertEqual(manifest[0]['size'], 3)
+        self.assertEqual(manifest[1]['sha256'], hashlib.sha256(b'two').hexdigest())
+
+        self.assertNotIn('sha256', build_manifest(files, with_hashes=False)[0])
+
+    def test_build_manifest_skips_vanished_files(self):
+        files = [self._make_file('a.txt', b'one')]
+        os.unlink(files[0][0])
+        self.assertEqual(build_manifest(files), [])
+
+    def test_iter_changed_files(self):
+        same = self._make_file('same.txt', b'same')
+        edited = self._make_file('edited.txt', b'new!')
+        new = self._make_file('new.txt', b'new')
+        resized = self._make_file('resized.txt', b'longer now')
+        client_files = {
+            'same.txt': {'path': 'same.txt', 'size': 4, 'sha256': hashlib.sha256(b'same').hexdigest()},
+            'edited.txt': {'path': 'edited.txt', 'size': 4, 'sha256': hashlib.sha256(b'old!').hexdigest()},
+            'resized.txt': {'path': 'resized.txt', 'size': 5, 'sha256': hashlib.sha256(b'short').hexdigest()},
+        }
+
+        changed = list(iter_changed_files([same, edited, new, resized], client_files, HashCache()))
+        self.assertEqual([arcname for _, arcname, _ in changed], ['edited.txt', 'new.txt', 'resized.txt'])
+
+    def test_iter_changed_files_compares_sizes_before_hashing(self):
+        resized = self._make_file('a.txt', b'abc')
+        client_files = {'a.txt': {'path': 'a.txt', 'size': 2, 'sha256': 'x'}}
+
+        with patch('sync.file_digest') as mock_digest:
+            self.assertEqual(len(list(iter_changed_files([resized], client_files))), 1)
+        mock_digest.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main()
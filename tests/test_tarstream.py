@@ -0,0 +1,82 @@
+import unittest
+from unittest.mock import patch
+import io
+import os
+import shutil
+import sys
+import tarfile
+import tempfile
+
+# Adjust path to include src
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+import tarstream
+from tarstream import write_tar, zstd_available
+
+
+class TestWriteTar(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.contents = {
+            'a.txt': b'hello world\n' * 100,
+            'empty.txt': b'',
+            'sub/deep/c.bin': os.urandom(3000),
+        }
+        self.files = []
+        for name, data in self.contents.items():
+            path = os.path.join(self.tmp_dir, name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'wb') as f:
+                f.write(data)
+            self.files.append((path, name, os.stat(path)))
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def assert_round_trip(self, data: bytes, mode: str):
+        with tarfile.open(fileobj=io.BytesIO(data), mode=mode) as tar:
+            self.assertEqual(tar.getnames(), list(self.contents))
+            for name, content in self.contents.items():
+                self.assertEqual(tar.extractfile(name).read(), content)
+
+    def test_plain_tar(self):
+        output = io.BytesIO()
+        write_tar(output, self.files)
+        self.assert_round_trip(output.getvalue(), 'r:')
+
+    def test_gzip_tar(self):
+        output = io.BytesIO()
+        write_tar(output, self.files, compression='gz')
+        self.assertTrue(output.getvalue().startswith(b'\x1f\x8b'))
+        self.assert_round_trip(output.getvalue(), 'r:gz')
+
+    @unittest.skipUnless(zstd_available(), "zstandard not installed")
+    def test_zstd_tar(self):
+        output = io.BytesIO()
+        write_tar(output, self.files, compression='zst')
+        decompressed = tarstream.zstandard.ZstdDecompressor().stream_reader(io.BytesIO(output.getvalue())).read()
+        self.assert_round_trip(decompressed, 'r:')
+
+    def test_zstd_missing(self):
+        with patch('tarstream.zstandard', None):
+            with self.assertRaises(RuntimeError):
+                write_tar(io.BytesIO(), self.files, compression='zst')
+
+    def test_file_grown_after_stat_is_truncated(self):
+        path, name, stat_result = self.files[0]
+        with open(path, 'ab') as f:
+            f.write(b'appended')
+        output = io.BytesIO()
+        write_tar(output, [(path, name, stat_result)])
+
+        with tarfile.open(fileobj=io.BytesIO(output.getvalue()), mode='r:') as tar:
+            self.assertEqual(tar.extractfile(name).read(), self.contents[name])
+
+    def test_entries_reported(self):
+        seen = []
+        write_tar(io.BytesIO(), self.files, on_entry=lambda info: seen.append((info.name, info.size)))
+        self.assertEqual(seen, [(name, len(data)) for name, data in self.contents.items()])
+
+
+if __name__ == '__main__':
+    unittest.main()
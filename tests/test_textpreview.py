@@ -0,0 +1,226 @@
+import unittest
+import os
+import sys
+import shutil
+import tempfile
+from unittest.mock import patch
+
+# Adjust path to include src
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from textpreview import (
+    LineIndex,
+    LineIndexCache,
+    EncodingCache,
+    NotTextError,
+    sniff_encoding,
+    decode_window,
+    read_file,
+    read_byte_window,
+    read_tail,
+    read_lines,
+    MAX_WINDOW_SIZE
+)
+
+
+class TestDecodeWindow(unittest.TestCase):
+    def test_trims_partial_characters(self):
+        data = 'aé€b'.encode('utf-8')
+        text, skipped, consumed = decode_window(data[2:-1], False, False)
+        self.assertEqual(text, '€')
+        self.assertEqual(skipped, 1)
+        self.assertEqual(consumed, len(data) - 3)
+
+    def test_replaces_undecodable_bytes(self):
+        text, skipped, consumed = decode_window(b'ok \xff\xfe', True, True)
+        self.assertEqual(text, 'ok \ufffd\ufffd')
+        self.assertEqual(consumed, 5)
+
+    def test_single_byte_encoding(self):
+        text, skipped, consumed = decode_window('café'.encode('cp1252'), False, False, 'cp1252')
+        self.assertEqual((text, skipped, consumed), ('café', 0, 4))
+
+
+class TestSniffEncoding(unittest.TestCase):
+    def test_text(self):
+        self.assertEqual(sniff_encoding('hé\tllo\r\n\x1b[31mred\x1b[0m'.encode('utf-8')), 'utf-8')
+        self.assertEqual(sniff_encoding(b'\xef\xbb\xbfbom'), 'utf-8-sig')
+        self.assertEqual(sniff_encoding('hi'.encode('utf-16')), 'utf-16')
+        self.assertEqual(sniff_encoding('café €'.encode('cp1252')), 'cp1252')
+        self.assertEqual(sniff_encoding(b'caf\xe9 \x81'), 'latin-1')
+
+    def test_cut_character_at_sample_end(self):
+        sample = 'aé'.encode('utf-8')[:-1]
+        self.assertEqual(sniff_encoding(sample), 'utf-8')
+        self.assertNotEqual(sniff_encoding(sample, complete=True), 'utf-8')
+
+    def test_binary(self):
+        self.assertIsNone(sniff_encoding(b'\x89PNG\r\n\x1a\n\x00\x00\x00\rIHDR'))
+        self.assertIsNone(sniff_encoding(bytes(range(1, 32)) * 10))
+
+
+class TestReadFile(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp_dir, 'file')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_encodings(self):
+        for text, encoding in (('naïve\n', 'utf-8'), ('naïve\n', 'utf-16'), ('naïve €\n', 'cp1252')):
+            with open(self.path, 'w', encoding=encoding) as f:
+                f.write(text)
+            preview = read_file(self.path)
+            self.assertEqual(preview['content'], text)
+            self.assertEqual(preview['encoding'], encoding)
+
+    def test_binary_is_cached(self):
+        cache = EncodingCache()
+        with open(self.path, 'wb') as f:
+            f.write(b'\x00' * 100000)
+        with self.assertRaises(NotTextError):
+            read_file(self.path, cache)
+
+        with patch('textpreview.sniff_encoding') as sniff:
+            with self.assertRaises(NotTextError):
+                read_file(self.path, cache)
+            sniff.assert_not_called()
+
+        with open(self.path, 'w') as f:
+            f.write('now text')
+        self.assertEqual(read_file(self.path, cache)['content'], 'now text')
+
+    def test_utf16_windows_are_rejected(self):
+        with open(self.path, 'w', encoding='utf-16') as f:
+            f.write('line\n' * 10)
+        with self.assertRaises(NotTextError):
+            read_lines(self.path, 0, 5)
+
+
+class TestWindows(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp_dir, 'app.log')
+        self.lines = [f"{index} {'é' * (index % 5)}" for index in range(50000)]
+        with open(self.path, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(self.lines) + '\n')
+        with open(self.path, 'rb') as f:
+            self.data = f.read()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_byte_window(self):
+        for offset in (0, 1, 2, 3, 4097):
+            window = read_byte_window(self.path, offset, 1000)
+            self.assertEqual(self.data[window['offset']:window['end']].decode('utf-8'), window['content'])
+            self.assertLessEqual(window['offset'] - offset, 3)
+            self.assertEqual(window['size'], len(self.data))
+
+    def test_byte_window_bounds(self):
+        with self.assertRaises(ValueError):
+            read_byte_window(self.path, -1, 10)
+        with self.assertRaises(ValueError):
+            read_byte_window(self.path, 0, MAX_WINDOW_SIZE + 1)
+        with self.assertRaises(ValueError):
+            read_byte_window(self.path, len(self.data) + 1, 10)
+
+    def test_tail_starts_at_a_line(self):
+        window = read_tail(self.path, 100)
+        self.assertEqual(window['end'], len(self.data))
+        self.assertTrue(window['content'].endswith('49999 éééé\n'))
+        self.assertEqual(self.data[window['offset'] - 1:window['offset']], b'\n')
+
+    def test_line_pages(self):
+        cache = LineIndexCache()
+        for line in (0, 1, 12345, 49990):
+            page = read_lines(self.path, line, 100, cache)
+            self.assertEqual(page['lines'], self.lines[line:line + 100])
+            self.assertEqual(page['total_lines'], 50000)
+            self.assertFalse(page['truncated'])
+
+        page = read_lines(self.path, -3, 100, cache)
+        self.assertEqual(page['line'], 49997)
+        self.assertEqual(page['lines'], self.lines[-3:])
+
+    def test_long_line_is_truncated(self):
+        with open(self.path, 'w') as f:
+            f.write('x' * (MAX_WINDOW_SIZE + 10) + '\nnext\n')
+
+        page = read_lines(self.path, 0, 10)
+        self.assertTrue(page['truncated'])
+        self.assertEqual(page['lines'], ['x' * MAX_WINDOW_SIZE])
+        self.assertEqual(read_lines(self.path, 1, 10)['lines'], ['next'])
+
+    def test_page_stops_before_cut_line(self):
+        with open(self.path, 'w') as f:
+            f.write('short\n' + 'y' * MAX_WINDOW_SIZE + '\n')
+
+        page = read_lines(self.path, 0, 10)
+        self.assertTrue(page['truncated'])
+        self.assertEqual(page['lines'], ['short'])
+        self.assertEqual(page['end'], 6)
+
+
+class TestLineIndex(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp_dir, 'app.log')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_line_offsets(self):
+        lines = [b'x' * (index % 13) for index in range(5000)]
+        data = b'\n'.join(lines)
+        with open(self.path, 'wb') as f:
+            f.write(data)
+
+        with open(self.path, 'rb') as f:
+            index = LineIndex(block_size=256).extended(f, len(data))
+            self.assertEqual(index.line_count, 5000)
+            offset = 0
+            for line, content in enumerate(lines):
+                self.assertEqual(index.line_offset(f, line), offset)
+                offset += len(content) + 1
+
+    def test_appended_file_is_extended(self):
+        cache = LineIndexCache()
+        with open(self.path, 'w') as f:
+            f.write('one\ntwo')
+        self.assertEqual(read_lines(self.path, 0, 10, cache)['lines'], ['one', 'two'])
+
+        with open(self.path, 'a') as f:
+            f.write('\nthree\n')
+        page = read_lines(self.path, 0, 10, cache)
+        self.assertEqual(page['lines'], ['one', 'two', 'three'])
+        self.assertEqual(page['total_lines'], 3)
+
+    def test_rotated_file_is_reindexed(self):
+        cache = LineIndexCache()
+        with open(self.path, 'w') as f:
+            f.write(('x' * 99 + '\n') * 700)
+        self.assertEqual(read_lines(self.path, 0, 10, cache)['total_lines'], 700)
+
+        # copytruncate: same inode, truncated, then grown past the old size (same byte at the old end)
+        with open(self.path, 'r+') as f:
+            f.truncate(0)
+            f.write(('y' * 9 + '\n') * 7100)
+        page = read_lines(self.path, 7000, 10, cache)
+        self.assertEqual(page['total_lines'], 7100)
+        self.assertEqual(page['offset'], 70000)
+        self.assertEqual(page['lines'], ['y' * 9] * 10)
+
+    def test_cache_is_bounded(self):
+        cache = LineIndexCache(max_files=2)
+        for name in ('a', 'b', 'c'):
+            path = os.path.join(self.tmp_dir, name)
+            with open(path, 'w') as f:
+                f.write('line\n')
+            read_lines(path, 0, 10, cache)
+        self.assertEqual(list(cache._indexes), [os.path.join(self.tmp_dir, 'b'), os.path.join(self.tmp_dir, 'c')])
+
+
+if __name__ == '__main__':
+    unittest.main()
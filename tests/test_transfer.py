@@ -0,0 +1,130 @@
+import unittest
+from unittest.mock import MagicMock, patch
+import io
+import os
+import socket
+import sys
+import tempfile
+import threading
+
+# Adjust path to include src
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+import transfer
+from transfer import send_file, sendfile_supported
+
+
+def _drain(sock, expected: int) -> bytes:
+    """Read exactly expected bytes from a socket."""
+    received = bytearray()
+    while len(received) < expected:
+        data = sock.recv(65536)
+        if not data:
+            break
+        received.extend(data)
+    return bytes(received)
+
+
+class TestSendfileSupported(unittest.TestCase):
+    def test_none_socket(self):
+        self.assertFalse(sendfile_supported(None))
+
+    def test_wrapped_socket_rejected(self):
+        class WrappedSocket(socket.socket):
+            pass
+
+        sock = WrappedSocket()
+        try:
+            self.assertFalse(sendfile_supported(sock))
+        finally:
+            sock.close()
+
+    def test_platform_without_sendfile(self):
+        a, b = socket.socketpair()
+        try:
+            with patch.object(transfer, 'os', MagicMock(spec=['fstat'])):
+                self.assertFalse(sendfile_supported(a))
+        finally:
+            a.close()
+            b.close()
+
+
+class TestSendFile(unittest.TestCase):
+    def setUp(self):
+        self.payload = os.urandom(300 * 1024)
+        fd, self.path = tempfile.mkstemp()
+        with os.fdopen(fd, 'wb') as f:
+            f.write(self.payload)
+
+    def tearDown(self):
+        os.unlink(self.path)
+
+    def _send_over_socketpair(self, offset: int, count: int, **kwargs):
+        a, b = socket.socketpair()
+        progress = []
+        result = {}
+        try:
+            reader = threading.Thread(target=lambda: result.setdefault('data', _drain(b, count)))
+            reader.start()
+            with open(self.path, 'rb') as f:
+                wfile = a.makefile('wb', buffering=0)
+                sent = send_file(wfile, a, f, offset, count, progress.append, **kwargs)
+            reader.join(timeout=5)
+            return sent, result.get('data', b''), progress
+        finally:
+            a.close()
+            b.close()
+
+    @unittest.skipUnless(hasattr(os, 'sendfile'), "os.sendfile not available")
+    def test_sendfile_path_sends_range(self):
+        with patch('transfer._copy_loop') as mock_copy:
+            sent, data, progress = self._send_over_socketpair(1000, 200 * 1024)
+
+        mock_copy.assert_not_called()
+        self.assertEqual(sent, 200 * 1024)
+        self.assertEqual(data, self.payload[1000:1000 + 200 * 1024])
+        self.assertEqual(sum(progress), sent)
+
+    @unittest.skipUnless(hasattr(os, 'sendfile'), "os.sendfile not available")
+    def test_sendfile_slices_report_progress(self):
+        with patch('transfer.SENDFILE_SLICE', 64 * 1024):
+            sent, data, progress = self._send_over_socketpair(0, len(self.payload))
+
+        self.assertEqual(data, self.payload)
+        self.assertGreater(len(progress), 1)
+        self.assertTrue(all(size <= 64 * 1024 for size in progress))
+
+    @unittest.skipUnless(hasattr(os, 'sendfile'), "os.sendfile not available")
+    def test_sendfile_unsupported_falls_back(self):
+        import errno
+        with patch('transfer.os.sendfile', side_effect=OSError(errno.EINVAL, 'Invalid argument')):
+            sent, data, progress = self._send_over_socketpair(0, len(self.payload))
+
+        self.assertEqual(sent, len(self.payload))
+        self.assertEqual(data, self.payload)
+
+    def test_fallback_without_socket(self):
+        wfile = io.BytesIO()
+        progress = []
+        with open(self.path, 'rb') as f:
+            sent = send_file(wfile, None, f, 10, 50000, progress.append)
+
+        self.assertEqual(sent, 50000)
+        self.assertEqual(wfile.getvalue(), self.payload[10:50010])
+        self.assertTrue(all(size <= transfer.COPY_CHUNK_SIZE for size in progress))
+
+    def test_fallback_stops_at_eof(self):
+        wfile = io.BytesIO()
+        with open(self.path, 'rb') as f:
+            sent = send_file(wfile, None, f, len(self.payload) - 100, 1000)
+
+        self.assertEqual(sent, 100)
+
+    def test_zero_count(self):
+        wfile = MagicMock()
+        self.assertEqual(send_file(wfile, None, MagicMock(), 0, 0), 0)
+        wfile.write.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main()
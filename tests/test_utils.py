@@ -1,7 +1,7 @@
 """Tests for utility functions."""
 
 import pytest
-from src.utils import format_file_size, parse_duration
+from src.utils import format_file_size, parse_duration, parse_size
 
 
 class TestFormatFileSize:
@@ -126,3 +126,25 @@ class TestParseDuration:
         assert parse_duration("100h") == 360000
         assert parse_duration("1440m") == 86400  # 24 hours
         assert parse_duration("86400s") == 86400  # 24 hours
+
+
+class TestParseSize:
+    """Tests for parse_size function."""
+
+    def test_parse_units(self):
+        """Test parsing binary units, with or without a trailing B."""
+        assert parse_size("0") == 0
+        assert parse_size("4096") == 4096
+        assert parse_size("512K") == 512 * 1024
+        assert parse_size("200m") == 200 * 1024 ** 2
+        assert parse_size("2G") == 2 * 1024 ** 3
+        assert parse_size(" 2GB ") == 2 * 1024 ** 3
+
+    def test_invalid_sizes(self):
+        """Test invalid size strings."""
+        for value in ("", "G", "1.5G", "2X", "-1G"):
+            with pytest.raises(ValueError):
+                parse_size(value)
+
+        with pytest.raises(TypeError):
+            parse_size(1024)
@@ -0,0 +1,137 @@
+import unittest
+from unittest.mock import patch
+import io
+import os
+import shutil
+import sys
+import tempfile
+import zipfile
+
+# Adjust path to include src
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+import zipstream
+from zipcache import EntryCache
+from zipstream import StoredZipLayout, write_zip
+
+
+class TestEntryCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.cache = EntryCache(max_bytes=1024 * 1024, min_entry_size=16)
+
+    def tearDown(self):
+        self.cache.close()
+        shutil.rmtree(self.tmp_dir)
+
+    def _make_file(self, name, data):
+        path = os.path.join(self.tmp_dir, name)
+        with open(path, 'wb') as f:
+            f.write(data)
+        return path, os.stat(path)
+
+    def _zip(self, paths, **kwargs):
+        output = io.BytesIO()
+        files = [(path, os.path.basename(path), os.stat(path)) for path in paths]
+        write_zip(output, files, entry_cache=self.cache, block_size=4096, **kwargs)
+        return output.getvalue()
+
+    def test_repeat_download_splices_cached_payload(self):
+        path, _ = self._make_file('a.txt', b'hello world ' * 5000)
+
+        first = self._zip([path])
+        with patch('zipstream.deflate_block') as mock_deflate:
+            second = self._zip([path])
+
+        mock_deflate.assert_not_called()
+        self.assertEqual(first, second)
+        with zipfile.ZipFile(io.BytesIO(second)) as zf:
+            self.assertIsNone(zf.testzip())
+            self.assertEqual(zf.read('a.txt'), b'hello world ' * 5000)
+
+    def test_changed_file_misses(self):
+        path, stat_result = self._make_file('a.txt', b'a' * 10000)
+        self._zip([path])
+        self.assertIsNotNone(self.cache.crc(path, stat_result))
+
+        with open(path, 'wb') as f:
+            f.write(b'b' * 20000)
+        self.assertIsNone(self.cache.lookup(path, os.stat(path)))
+        with zipfile.ZipFile(io.BytesIO(self._zip([path]))) as zf:
+            self.assertEqual(zf.read('a.txt'), b'b' * 20000)
+
+    def test_small_and_stored_entries(self):
+        small, small_stat = self._make_file('small.txt', b'tiny')
+        media, media_stat = self._make_file('photo.jpg', os.urandom(5000))
+        self._zip([small, media])
+
+        self.assertIsNone(self.cache.lookup(small, small_stat))
+        # Stored entries only keep their CRC
+        cached = self.cache.lookup(media, media_stat)
+        self.assertEqual(cached.compress_type, zipstream.ZIP_STORED)
+        self.assertEqual(cached.compressed_size, 0)
+        cached.close()
+
+    def test_interrupted_download_leaves_no_record(self):
+        path, stat_result = self._make_file('a.txt', b'abc' * 50000)
+
+        class BrokenOutput:
+            def __init__(self):
+                self.written = 0
+
+            def write(self, data):
+                self.written += len(data)
+                if self.written > 100:
+                    raise BrokenPipeError()
+
+        with self.assertRaises(BrokenPipeError):
+            write_zip(BrokenOutput(), [(path, 'a.txt', stat_result)], entry_cache=self.cache, block_size=4096)
+        self.assertIsNone(self.cache.lookup(path, stat_result))
+        self.assertEqual(os.listdir(self.cache.directory), [])
+
+    def test_evicts_least_recently_used(self):
+        cache = EntryCache(max_bytes=30000, min_entry_size=16)
+        try:
+            stats = []
+            for index in range(3):
+                path, stat_result = self._make_file(f'{index}.bin', os.urandom(12000))
+                writer = cache.writer(path, stat_result, zipstream.ZIP_DEFLATED)
+                writer.write(b'x' * stat_result.st_size)
+                writer.commit(0, stat_result.st_size)
+                # Distinct, increasing record ages
+                for name in os.listdir(cache.directory):
+                    record = os.path.join(cache.directory, name)
+                    mtime_ns = os.stat(record).st_mtime_ns
+                    os.utime(record, ns=(mtime_ns - 10 ** 9, mtime_ns - 10 ** 9))
+                stats.append((path, stat_result))
+
+            self.assertIsNone(cache.lookup(*stats[0]))
+            for path, stat_result in stats[1:]:
+                cache.lookup(path, stat_result).close()
+        finally:
+            cache.close()
+
+    def test_close_removes_directory(self):
+        directory = self.cache.directory
+        self.cache.close()
+        self.assertFalse(os.path.exists(directory))
+
+    def test_stored_layout_reuses_crcs(self):
+        path, _ = self._make_file('a.txt', b'data ' * 4000)
+        self._zip([path])
+        files = [(path, 'a.txt', os.stat(path))]
+
+        with patch('zipstream._file_crc') as mock_crc:
+            layout = StoredZipLayout(files, self.cache)
+            output = io.BytesIO()
+            # Skip the file data: its CRC must come from the cache
+            layout.write_range(output, layout.directory_offset, layout.size - layout.directory_offset)
+        mock_crc.assert_not_called()
+
+        full = io.BytesIO()
+        StoredZipLayout(files).write_range(full, 0, layout.size)
+        self.assertEqual(output.getvalue(), full.getvalue()[layout.directory_offset:])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,157 @@
+import unittest
+from unittest.mock import patch
+import io
+import os
+import shutil
+import sys
+import tempfile
+import zipfile
+import zlib
+
+# Adjust path to include src
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+import zipstream
+from zipstream import ZipEntry, ZipStreamWriter, deflate_block, write_zip
+
+
+class TestDeflateBlock(unittest.TestCase):
+    def test_concatenated_blocks_form_one_stream(self):
+        data = os.urandom(1000) + b'abc' * 50000
+        blocks = [data[i:i + 4096] for i in range(0, len(data), 4096)]
+
+        stream = b''
+        previous = None
+        for index, block in enumerate(blocks):
+            zdict = previous[-zipstream.DEFLATE_WINDOW:] if previous else None
+            stream += deflate_block(block, index == len(blocks) - 1, zdict)
+            previous = block
+
+        decompressor = zlib.decompressobj(-zlib.MAX_WBITS)
+        self.assertEqual(decompressor.decompress(stream), data)
+        self.assertTrue(decompressor.eof)
+
+    def test_empty_final_block(self):
+        self.assertEqual(zlib.decompress(deflate_block(b'', True), -zlib.MAX_WBITS), b'')
+
+
+class TestWriteZip(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.contents = {
+            'a.txt': b'hello world\n' * 1000,
+            'empty.txt': b'',
+            'sub/random.bin': os.urandom(300 * 1024),
+            'sub/文件.txt': 'unicode'.encode('utf-8'),
+        }
+        self.files = []
+        for name, data in self.contents.items():
+            path = os.path.join(self.tmp_dir, name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'wb') as f:
+                f.write(data)
+            self.files.append((path, name, os.stat(path)))
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_archive_round_trip(self):
+        output = io.BytesIO()
+        # Small blocks so files span several parallel jobs
+        write_zip(output, self.files, block_size=64 * 1024)
+
+        with zipfile.ZipFile(io.BytesIO(output.getvalue())) as zf:
+            self.assertIsNone(zf.testzip())
+            self.assertEqual(zf.namelist(), list(self.contents))
+            for name, data in self.contents.items():
+                self.assertEqual(zf.read(name), data)
+
+    def test_entries_reported_in_order(self):
+        seen = []
+        write_zip(io.BytesIO(), self.files, on_entry=lambda entry: seen.append(entry.arcname))
+        self.assertEqual(seen, list(self.contents))
+
+    def test_unreadable_file_skipped(self):
+        missing = (os.path.join(self.tmp_dir, 'gone.txt'), 'gone.txt', self.files[0][2])
+        output = io.BytesIO()
+        write_zip(output, [missing] + self.files)
+
+        with zipfile.ZipFile(io.BytesIO(output.getvalue())) as zf:
+            self.assertNotIn('gone.txt', zf.namelist())
+
+    def test_file_grown_after_stat_is_truncated_to_stat_size(self):
+        path, name, stat_result = self.files[0]
+        with open(path, 'ab') as f:
+            f.write(b'appended')
+        output = io.BytesIO()
+        write_zip(output, [(path, name, stat_result)])
+
+        with zipfile.ZipFile(io.BytesIO(output.getvalue())) as zf:
+            self.assertEqual(zf.read(name), self.contents[name])
+
+    def test_compression_runs_on_pool(self):
+        with patch('zipstream.deflate_block', wraps=deflate_block) as mock_deflate:
+            write_zip(io.BytesIO(), self.files, block_size=64 * 1024, compression='deflate')
+        # random.bin alone spans five blocks
+        self.assertGreaterEqual(mock_deflate.call_count, len(self.files) + 4)
+
+
+    def test_auto_mode_stores_incompressible_entries(self):
+        output = io.BytesIO()
+        write_zip(output, self.files)
+
+        with zipfile.ZipFile(io.BytesIO(output.getvalue())) as zf:
+            types = {info.filename: info.compress_type for info in zf.infolist()}
+            self.assertEqual(types['a.txt'], zipfile.ZIP_DEFLATED)
+            self.assertEqual(types['sub/random.bin'], zipfile.ZIP_STORED)
+            self.assertEqual(types['empty.txt'], zipfile.ZIP_STORED)
+            self.assertEqual(zf.read('sub/random.bin'), self.contents['sub/random.bin'])
+
+    def test_store_mode(self):
+        output = io.BytesIO()
+        write_zip(output, self.files, compression='store')
+
+        with zipfile.ZipFile(io.BytesIO(output.getvalue())) as zf:
+            self.assertIsNone(zf.testzip())
+            self.assertTrue(all(info.compress_type == zipfile.ZIP_STORED for info in zf.infolist()))
+
+
+class TestChooseCompressType(unittest.TestCase):
+    def test_known_compressed_extension_stored(self):
+        self.assertEqual(zipstream.choose_compress_type('photos/IMG_1.JPG', b'a' * 1000), zipstream.ZIP_STORED)
+
+    def test_compressible_sample_deflated(self):
+        self.assertEqual(zipstream.choose_compress_type('log.txt', b'a' * 1000), zipstream.ZIP_DEFLATED)
+
+    def test_random_sample_stored(self):
+        self.assertEqual(zipstream.choose_compress_type('blob.dat', os.urandom(10000)), zipstream.ZIP_STORED)
+
+    def test_forced_modes(self):
+        self.assertEqual(zipstream.choose_compress_type('a.mp4', b'x', 'deflate'), zipstream.ZIP_DEFLATED)
+        self.assertEqual(zipstream.choose_compress_type('a.txt', b'a' * 1000, 'store'), zipstream.ZIP_STORED)
+
+
+class TestZip64(unittest.TestCase):
+    def test_zip64_entry_readable(self):
+        data = b'zip64 ' * 100
+        output = io.BytesIO()
+        writer = ZipStreamWriter(output)
+        entry = ZipEntry('big.txt', len(data), 0)
+        entry.zip64 = True
+        writer.start_entry(entry)
+        writer.write_data(entry, deflate_block(data, True))
+        writer.finish_entry(entry, zlib.crc32(data), len(data))
+        writer.close()
+
+        with zipfile.ZipFile(io.BytesIO(output.getvalue())) as zf:
+            self.assertEqual(zf.read('big.txt'), data)
+
+    def test_end_records_switch_to_zip64(self):
+        records = zipstream.end_records(70000, 10, 20)
+        self.assertTrue(records.startswith(b'PK\x06\x06'))
+        self.assertIn(b'PK\x06\x07', records)
+        self.assertEqual(len(zipstream.end_records(3, 10, 20)), 22)
+
+
+if __name__ == '__main__':
+    unittest.main()